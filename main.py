@@ -1,12 +1,5 @@
 import sys
-import pygame
-from src.game_loop import run_game
-
-def main():
-    """Initializes Pygame and runs the game."""
-    run_game()
-    pygame.quit()
-    sys.exit()
+from src.cli import main
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    sys.exit(main())
@@ -0,0 +1,147 @@
+import hashlib
+import json
+import logging
+import os
+import struct
+from typing import Optional, Tuple
+import pygame
+from src import config, sprites, ui
+
+ASSET_MAGIC = b"SNKA"
+ASSET_FORMAT_VERSION = 2
+
+# Binary layout, all little-endian:
+#   header: magic, version, length of the index
+#   the index in UTF-8 JSON: the config hash, and per surface its name, pixel
+#   format, size and the offset and length of its pixels after the index
+#   the raw pixels of every surface, back to back
+_HEADER = struct.Struct("<4sHI")
+
+# The settings that change what the cached surfaces look like
+_ASSET_SETTINGS = ("SCREEN_WIDTH", "SCREEN_HEIGHT", "GRID_SIZE", "BLACK", "GRAY", "WHITE", "GOLD", "THEMES",
+                   "UI_BG_COLOR", "UI_TEXT_COLOR", "UI_HIGHLIGHT_COLOR", "MENU_TITLE_FONT_SIZE",
+                   "MENU_OPTION_FONT_SIZE", "SCORE_FONT_SIZE")
+
+def config_hash() -> str:
+    """
+    Returns a hash of the settings the cached assets are drawn from.
+
+    The pygame version is part of the hash, since fonts may rasterize
+    differently from one release to the next.
+    """
+    settings = {name: getattr(config, name) for name in _ASSET_SETTINGS}
+    text = json.dumps([ASSET_FORMAT_VERSION, pygame.version.ver, settings], sort_keys=True)
+    return hashlib.sha256(text.encode()).hexdigest()[:16]
+
+
+def asset_path(cache_dir: str = config.ASSET_CACHE_DIR) -> str:
+    """Returns the cache file for the current settings in a cache directory."""
+    return os.path.join(cache_dir, f"assets-{config_hash()}.bin")
+
+
+def save_assets(size: Tuple[int, int], theme: str = config.DEFAULT_THEME,
+                cache_dir: str = config.ASSET_CACHE_DIR) -> str:
+    """
+    Writes the static assets of the first screens to the cache file of the current settings.
+
+    These are the grid background of the open board, the sprite atlas of a
+    theme and the composed main menu. Whatever is already drawn is taken
+    from the caches of src.ui and src.sprites, so after the first frame the
+    main menu is saved as it was shown (with the high score, if there is
+    one); the rest is drawn here.
+
+    Args:
+        size: The logical screen size the game draws at.
+        theme: The theme whose atlas is saved.
+        cache_dir: The directory to write to.
+
+    Returns:
+        The path of the cache file.
+    """
+    if not pygame.font.get_init():
+        pygame.font.init()
+    static = ui.export_static_surfaces(size)
+    surfaces = [("background", static["background"], "RGB"),
+                (f"atlas/{theme}", sprites.get_atlas(theme).surface, "RGB"),
+                ("menu", static["menu"], "RGB")]
+    for i, (normal, highlighted, _) in enumerate(static["menu_options"]):
+        surfaces.append((f"menu/{i}/normal", normal, "RGBA"))
+        surfaces.append((f"menu/{i}/highlighted", highlighted, "RGBA"))
+
+    entries, blobs, offset = [], [], 0
+    for name, surface, mode in surfaces:
+        pixels = pygame.image.tobytes(surface, mode)
+        entries.append([name, mode, surface.get_width(), surface.get_height(), offset, len(pixels)])
+        blobs.append(pixels)
+        offset += len(pixels)
+    index = json.dumps({"hash": config_hash(), "size": size, "surfaces": entries, "menu_key": static["menu_key"],
+                        "menu_rects": [list(rect) for _, _, rect in static["menu_options"]]}).encode()
+
+    path = asset_path(cache_dir)
+    os.makedirs(cache_dir, exist_ok=True)
+    temporary = f"{path}.{os.getpid()}.tmp"
+    with open(temporary, "wb") as f:
+        f.write(_HEADER.pack(ASSET_MAGIC, ASSET_FORMAT_VERSION, len(index)))
+        f.write(index)
+        for pixels in blobs:
+            f.write(pixels)
+    # Readers see the old file or the whole new one, never half of it
+    os.replace(temporary, path)
+    return path
+
+
+def load_assets(size: Tuple[int, int], cache_dir: Optional[str] = config.ASSET_CACHE_DIR) -> bool:
+    """
+    Seeds the caches of src.ui and src.sprites from the cache file of the current settings.
+
+    The file is read with a single read, and the surfaces are made straight
+    from its pixels, so the first screens need neither fonts nor drawing.
+    Call this after `ui.clear_caches()` and, to get surfaces in the
+    display's pixel format, after the window is open.
+
+    Args:
+        size: The logical screen size the game draws at; a file saved for
+            another size is ignored.
+        cache_dir: The directory to read from, or None to skip the cache.
+
+    Returns:
+        True if the caches were seeded; False if there is no file for the
+        current settings or it cannot be read.
+    """
+    if cache_dir is None:
+        return False
+    path = asset_path(cache_dir)
+    try:
+        with open(path, "rb") as f:
+            data = memoryview(f.read())
+        magic, version, index_length = _HEADER.unpack_from(data)
+        if magic != ASSET_MAGIC or version != ASSET_FORMAT_VERSION:
+            raise ValueError("not an asset cache of this version")
+        start = _HEADER.size + index_length
+        index = json.loads(bytes(data[_HEADER.size:start]))
+        if index["hash"] != config_hash() or tuple(index["size"]) != tuple(size):
+            return False
+        convert = pygame.display.get_init() and pygame.display.get_surface() is not None
+        surfaces = {}
+        for name, mode, width, height, offset, length in index["surfaces"]:
+            # A view of the file's pixels; converting copies them into the display's format
+            surface = pygame.image.frombuffer(data[start + offset:start + offset + length], (width, height), mode)
+            if convert:
+                surface = surface.convert_alpha() if mode == "RGBA" else surface.convert()
+            surfaces[name] = surface
+        options = [(surfaces[f"menu/{i}/normal"], surfaces[f"menu/{i}/highlighted"], pygame.Rect(rect))
+                   for i, rect in enumerate(index["menu_rects"])]
+        menu_key = index["menu_key"]
+    except FileNotFoundError:
+        return False
+    except (OSError, ValueError, KeyError, TypeError, struct.error, pygame.error) as e:
+        logging.warning("Ignoring the asset cache %s: %s", path, e)
+        return False
+
+    ui.seed_static_surfaces(size, surfaces["background"], surfaces["menu"], options, menu_key)
+    for name, surface in surfaces.items():
+        if name.startswith("atlas/"):
+            theme = name[len("atlas/"):]
+            if theme in config.THEMES:
+                sprites.seed_atlas(theme, surface)
+    return True
@@ -0,0 +1,225 @@
+import random
+from array import array
+from collections import deque
+from typing import Tuple
+from src import config, game_logic
+from src.grid import neighbor_table, position_table
+from src.levels import PORTAL, WALL
+from src.reachability import FreeRegions
+
+DIRECTIONS = (config.UP, config.DOWN, config.LEFT, config.RIGHT)
+
+
+def _is_blocked(game_data, settings, cell: Tuple[int, int]) -> bool:
+    """Returns True if moving the head onto `cell` would end the game."""
+    x, y = cell
+    if not (0 <= x < game_logic.GRID_WIDTH and 0 <= y < game_logic.GRID_HEIGHT):
+        return True
+    level = game_data.level
+    if level is not None:
+        index = y * level.width + x
+        if level.cells[index] == WALL:
+            return True
+        if level.cells[index] == PORTAL:
+            # The head comes out of the paired portal
+            cell = position_table(level.width, level.height)[level.portals[index]]
+    snake = game_data.snake
+    positions = snake.positions
+    # Unless the snake is still growing, its tail moves out of the way on this tick
+    body = positions[:-1] if len(positions) >= snake.length else positions
+    if cell in body:
+        return True
+    if settings.wonq_mode and cell in game_data.poops:
+        return True
+    return False
+
+
+def safe_directions(game_data, settings):
+    """
+    Returns the directions the snake can move in without dying on the next tick.
+
+    Args:
+        game_data: The current game state.
+        settings: The current GameSettings.
+    """
+    snake = game_data.snake
+    head_x, head_y = snake.get_head_position()
+    reverse = (-snake.direction[0], -snake.direction[1])
+    safe = []
+    for direction in DIRECTIONS:
+        if snake.length > 1 and direction == reverse:
+            continue
+        if not _is_blocked(game_data, settings, (head_x + direction[0], head_y + direction[1])):
+            safe.append(direction)
+    return safe
+
+
+def greedy_policy(game_data, settings, rng=None) -> Tuple[int, int]:
+    """
+    Heads straight for the food, avoiding moves that die on the next tick.
+
+    Args:
+        game_data: The current game state.
+        settings: The current GameSettings.
+        rng: Unused; accepted so all policies share one signature.
+
+    Returns:
+        The direction to turn to.
+    """
+    safe = safe_directions(game_data, settings)
+    if not safe:
+        return game_data.snake.direction
+    return _closest_to_food(game_data, safe)
+
+
+def _closest_to_food(game_data, directions) -> Tuple[int, int]:
+    """Returns the direction that brings the head closest to the food."""
+    head_x, head_y = game_data.snake.get_head_position()
+    food_x, food_y = game_data.food.position
+    level = game_data.level
+    if level is not None:
+        # Walls make straight-line distance misleading: follow the level's shortest paths instead
+        distances = _food_distances(game_data, food_y * level.width + food_x)
+        return min(directions, key=lambda d: (distances[_landing(level, head_x + d[0], head_y + d[1])],
+                                              abs(head_x + d[0] - food_x) + abs(head_y + d[1] - food_y)))
+    return min(directions, key=lambda d: abs(head_x + d[0] - food_x) + abs(head_y + d[1] - food_y))
+
+
+def _landing(level, x: int, y: int) -> int:
+    """Returns the index of the cell the head ends up on when it moves onto (x, y) of a level."""
+    index = y * level.width + x
+    return level.portals[index] if level.cells[index] == PORTAL else index
+
+
+def level_distances(level, target: int) -> array:
+    """
+    Returns the number of moves from every cell of a level to a target cell, ignoring the snake.
+
+    Moves go around walls and through portals. Unreachable cells get a
+    distance larger than any path.
+
+    Args:
+        level: The Level.
+        target: The index of the target cell.
+    """
+    width, height = level.width, level.height
+    cells, portals = level.cells, level.portals
+    neighbors = neighbor_table(width, height)
+    unreachable = width * height
+    distances = array("i", [unreachable]) * (width * height)
+    distances[target] = 0
+    queue = deque([target])
+    while queue:
+        index = queue.popleft()
+        # The head lands on a portal cell only by entering its pair
+        entry = portals[index] if cells[index] == PORTAL else index
+        for slot in range(4):
+            source = neighbors[4 * entry + slot]
+            if source >= 0 and cells[source] != WALL and distances[source] == unreachable:
+                distances[source] = distances[index] + 1
+                queue.append(source)
+    return distances
+
+
+def _food_distances(game_data, target: int) -> array:
+    """Returns `level_distances` of a game's level and the food's cell, which stay the same until the food moves."""
+    cached = game_data.trackers.get("food_distances")
+    if cached is None or cached[0] != target:
+        # One store of the pair, so the target and its distances always match
+        cached = game_data.trackers["food_distances"] = (target, level_distances(game_data.level, target))
+    return cached[1]
+
+
+def random_policy(game_data, settings, rng=None) -> Tuple[int, int]:
+    """
+    Picks a random direction that does not die on the next tick.
+
+    Args:
+        game_data: The current game state.
+        settings: The current GameSettings.
+        rng: The random.Random to draw from (defaults to the `random` module).
+
+    Returns:
+        The direction to turn to.
+    """
+    safe = safe_directions(game_data, settings)
+    if not safe:
+        return game_data.snake.direction
+    return (rng or random).choice(safe)
+
+
+def free_regions(game_data) -> FreeRegions:
+    """Returns the FreeRegions tracker following a game, creating it the first time it is asked for."""
+    regions = game_data.trackers.get("free_regions")
+    if regions is None:
+        regions = game_data.trackers["free_regions"] = FreeRegions(game_data)
+    return regions
+
+
+def cautious_policy(game_data, settings, rng=None) -> Tuple[int, int]:
+    """
+    Heads for the food like the greedy policy, but stays out of pockets too small to get out of.
+
+    A move has room if the region of free cells it leads into can hold the
+    snake, or if the tail frees a way out of it before the snake has filled
+    it. Moves with room are steered towards the food, with an occasional
+    random detour (config.CAUTIOUS_DETOUR); without any, the largest region is
+    picked.
+
+    Args:
+        game_data: The current game state.
+        settings: The current GameSettings.
+        rng: The random.Random the detours are drawn from (defaults to the `random` module).
+
+    Returns:
+        The direction to turn to.
+    """
+    snake = game_data.snake
+    safe = safe_directions(game_data, settings)
+    if not safe:
+        return snake.direction
+    regions = free_regions(game_data)
+    head_x, head_y = snake.get_head_position()
+    level = game_data.level
+    room = {}
+    for direction in safe:
+        x, y = head_x + direction[0], head_y + direction[1]
+        if level is not None:
+            x, y = position_table(level.width, level.height)[_landing(level, x, y)]
+        if not regions.is_free((x, y)):
+            # The tail's cell, which it leaves on this tick: following the tail always has a way out
+            room[direction] = None
+            continue
+        size = regions.region_size((x, y))
+        room[direction] = None if size >= snake.length or regions.opens_within((x, y), size) else size
+    roomy = [direction for direction in safe if room[direction] is None]
+    if not roomy:
+        return max(safe, key=room.get)
+    if len(roomy) > 1 and (rng or random).random() < config.CAUTIOUS_DETOUR:
+        # A coiled snake can otherwise chase its tail around the food forever
+        return (rng or random).choice(roomy)
+    return _closest_to_food(game_data, roomy)
+
+
+def lookahead_policy(game_data, settings, rng=None) -> Tuple[int, int]:
+    """
+    Compares directions with Monte Carlo rollouts, using the shared bot from src.lookahead.
+
+    Args:
+        game_data: The current game state.
+        settings: The current GameSettings.
+        rng: The random.Random that seeds the rollouts.
+
+    Returns:
+        The direction to turn to.
+    """
+    from src.lookahead import default_bot
+    return default_bot().choose(game_data, settings, rng)
+
+
+POLICIES = {
+    "greedy": greedy_policy,
+    "random": random_policy,
+    "cautious": cautious_policy,
+    "lookahead": lookahead_policy,
+}
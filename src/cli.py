@@ -0,0 +1,446 @@
+import argparse
+import json
+import logging
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from typing import List, Optional
+
+# Keep pygame from printing its banner into the output of batch jobs
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+
+from src import config
+from src.game_state import GameSettings
+from src.utils.logger import setup_logging
+
+
+def resolve_settings(args: argparse.Namespace) -> GameSettings:
+    """
+    Builds the GameSettings for a command from config defaults and command-line overrides.
+
+    This is the only place settings are resolved; everything downstream
+    receives the resulting GameSettings instead of reading config itself.
+    With --config, the chosen profile is applied to config first.
+    """
+    if args.config:
+        from src.profiles import ProfileError, apply_profile, load_profile
+        try:
+            apply_profile(load_profile(args.config, args.profile))
+        except ProfileError as e:
+            raise SystemExit(str(e))
+    settings = GameSettings()
+    if args.speed is not None:
+        if not 0 <= args.speed < len(config.SPEED_LEVELS):
+            raise SystemExit(f"--speed must be between 0 and {len(config.SPEED_LEVELS) - 1}")
+        settings.speed_index = args.speed
+    if args.wonq is not None:
+        settings.wonq_mode = args.wonq
+    if args.theme is not None:
+        if args.theme not in config.THEMES:
+            raise SystemExit(f"--theme must be one of: {', '.join(config.THEMES)}")
+        settings.theme = args.theme
+    if args.foods is not None:
+        if args.foods < 1:
+            raise SystemExit("--foods must be at least 1")
+        settings.food_count = args.foods
+    if args.power_ups is not None:
+        settings.power_ups = args.power_ups
+    if args.level is not None:
+        settings.level = args.level
+    if settings.level is not None:
+        from src.levels import LevelError, load_level
+        try:
+            level = load_level(settings.level)
+        except LevelError as e:
+            raise SystemExit(str(e))
+        if (level.width, level.height) != (config.GRID_WIDTH, config.GRID_HEIGHT):
+            raise SystemExit(f"--level is {level.width}x{level.height} cells, "
+                             f"but the board is {config.GRID_WIDTH}x{config.GRID_HEIGHT}")
+    return settings
+
+
+def cmd_play(args: argparse.Namespace) -> int:
+    """Opens the game window and plays interactively."""
+    import pygame
+    from src.display import Display
+    from src.game_loop import run_game
+    from src.profiles import ConfigWatcher
+    settings = resolve_settings(args)
+    if args.turbo is not None:
+        settings.turbo = args.turbo
+    bot = None
+    if args.bot:
+        from src.bots import POLICIES
+        if args.bot not in POLICIES:
+            raise SystemExit(f"Unknown policy {args.bot!r}, expected one of: {', '.join(POLICIES)}")
+        bot = POLICIES[args.bot]
+    watcher = ConfigWatcher(args.config, args.profile) if args.config else None
+    telemetry = None
+    if args.telemetry_dir:
+        from src.telemetry import Telemetry
+        telemetry = Telemetry(args.telemetry_dir)
+    profiler = None
+    if args.memory_profile:
+        from src.diagnostics import MemoryProfiler
+        profiler = MemoryProfiler(args.memory_profile, every=args.memory_every)
+    on_first_frame = None
+    if args.exit_after_first_frame:
+        from src.startup import FIRST_FRAME_MARKER
+
+        def on_first_frame():
+            print(FIRST_FRAME_MARKER, flush=True)
+            pygame.event.post(pygame.event.Event(pygame.QUIT))
+    try:
+        pygame.init()
+        display = Display(window_size=args.window, fullscreen=args.fullscreen, integer_scaling=args.integer_scaling)
+        run_game(settings, replay_dir=args.replay_dir, config_watcher=watcher, telemetry=telemetry,
+                 profiler=profiler, display=display, render_thread=args.render_thread, bot=bot,
+                 asset_cache_dir=args.asset_cache, on_first_frame=on_first_frame)
+    finally:
+        if telemetry is not None:
+            telemetry.close()
+        if profiler is not None:
+            profiler.close()
+    pygame.quit()
+    return 0
+
+
+def cmd_simulate(args: argparse.Namespace) -> int:
+    """Plays bot games headlessly and prints one JSON line per game."""
+    from src.simulation import simulate_game
+    settings = resolve_settings(args)
+    seeds = range(args.seed, args.seed + args.games)
+    play = partial(simulate_game, settings, policy=args.policy, max_ticks=args.max_ticks)
+    if args.workers > 1:
+        with ProcessPoolExecutor(max_workers=args.workers) as pool:
+            results = list(pool.map(play, seeds, chunksize=max(1, args.games // (4 * args.workers))))
+    else:
+        results = [play(seed) for seed in seeds]
+    for result in results:
+        print(json.dumps(result.to_dict()))
+    if results:
+        mean = sum(r.score for r in results) / len(results)
+        logging.info("%d games, mean score %.2f, best %d", len(results), mean, max(r.score for r in results))
+    return 0
+
+
+def cmd_bench(args: argparse.Namespace) -> int:
+    """Measures engine throughput headlessly and prints the result as JSON."""
+    from src.simulation import run_benchmark
+    profiler = None
+    if args.memory_profile:
+        from src.diagnostics import MemoryProfiler
+        profiler = MemoryProfiler(args.memory_profile, every=args.memory_every)
+    try:
+        result = run_benchmark(resolve_settings(args), args.ticks, policy=args.policy,
+                               seed=args.seed, render=args.render, profiler=profiler)
+    finally:
+        if profiler is not None:
+            profiler.close()
+    print(json.dumps(result))
+    return 0
+
+
+def cmd_build(args: argparse.Namespace) -> int:
+    """Builds the bytecode zipapp and prints its path and size as JSON."""
+    from src.startup import build_bundle
+    print(json.dumps(build_bundle(args.out, assets_dir=args.assets)))
+    return 0
+
+
+def cmd_startup(args: argparse.Namespace) -> int:
+    """Times launches up to the first frame and prints the result as JSON."""
+    from src.startup import measure_startup
+    if args.bundle is not None and not os.path.exists(args.bundle):
+        raise SystemExit(f"No bundle at {args.bundle}; build one with the build command")
+    print(json.dumps(measure_startup(args.runs, bundle=args.bundle)))
+    return 0
+
+
+def cmd_replay(args: argparse.Namespace) -> int:
+    """Plays back a replay headlessly, or renders it to video with --video."""
+    from src.replay import Replay, play_replay
+    replay = Replay.load(args.file)
+    if args.video:
+        from src.recorder import render_replay
+        frames = render_replay(replay, args.video, encoder=args.encoder,
+                               workers=args.workers, max_ticks=args.max_ticks)
+        logging.info("Rendered %d frames to %s", frames, args.video)
+        return 0
+    game_data = None
+    for game_data in play_replay(replay, max_ticks=args.max_ticks):
+        pass
+    print(json.dumps({"seed": replay.seed, "score": game_data.score, "ticks": game_data.ticks,
+                      "death_cause": game_data.death_cause}))
+    return 0
+
+
+def cmd_hashes(args: argparse.Namespace) -> int:
+    """Hashes every tick of a replay, to save for later or to check against hashes saved by another version."""
+    from src.replay import Replay
+    from src.state_hash import first_difference, game_hashes, load_hashes, save_hashes
+    hashes = game_hashes(Replay.load(args.file), max_ticks=args.max_ticks)
+    if args.out:
+        save_hashes(args.out, hashes)
+    result = {"ticks": len(hashes) - 1, "hash": f"{hashes[-1]:016x}"}
+    if args.against:
+        try:
+            expected = load_hashes(args.against)
+        except (ValueError, OSError) as e:
+            logging.error("%s", e)
+            return 1
+        result["first_difference"] = first_difference(expected, hashes)
+    print(json.dumps(result))
+    return 1 if result.get("first_difference") is not None else 0
+
+
+def cmd_difftest(args: argparse.Namespace) -> int:
+    """Checks an engine against update_game_state on generated games, shrinking any divergence."""
+    from src.differential import run_differential
+    settings = resolve_settings(args)
+    try:
+        result = run_differential(settings, args.engine, args.ticks, seed=args.seed, workers=args.workers,
+                                  max_ticks=args.max_ticks)
+    except ValueError as e:
+        logging.error("%s", e)
+        return 1
+    divergence = result["divergence"]
+    if divergence is not None:
+        logging.error("%s diverged from the reference at tick %d of a game with %d turns",
+                      args.engine, divergence["tick"], divergence["turns"])
+        if args.out:
+            with open(args.out, "w") as f:
+                json.dump(divergence["replay"], f)
+    print(json.dumps(result))
+    return 0 if divergence is None else 1
+
+
+def cmd_serve(args: argparse.Namespace) -> int:
+    """Runs the simulation service until interrupted."""
+    import asyncio
+    from src.service import ResultCache, SimulationService, run_service
+    cache = ResultCache(args.cache_size, None if args.no_spill else args.cache_file)
+    try:
+        asyncio.run(run_service(SimulationService(args.workers, cache), args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+def cmd_train(args: argparse.Namespace) -> int:
+    """Evolves policy networks headlessly, resuming from the output directory's checkpoint."""
+    from src.neuroevolution import train
+    settings = resolve_settings(args)
+    curve = train(args.out, generations=args.generations, population_size=args.population,
+                  seeds=args.seeds, hidden=args.hidden, wonq_mode=settings.wonq_mode,
+                  workers=args.workers, seed=args.seed, resume=not args.fresh)
+    print(json.dumps({"directory": args.out, "generations": len(curve), "best": max(curve, default=None)}))
+    return 0
+
+
+def cmd_compile_level(args: argparse.Namespace) -> int:
+    """Compiles text level files into the binary level format."""
+    from src.levels import LEVEL_SUFFIX, LevelError, compile_level_file
+    if args.out:
+        os.makedirs(args.out, exist_ok=True)
+    for source in args.sources:
+        destination = None
+        if args.out:
+            destination = os.path.join(args.out, os.path.splitext(os.path.basename(source))[0] + LEVEL_SUFFIX)
+        try:
+            logging.info("Compiled %s", compile_level_file(source, destination))
+        except (LevelError, OSError) as e:
+            logging.error("%s", e)
+            return 1
+    return 0
+
+
+def _window_size(text: str):
+    """Parses a WIDTHxHEIGHT window size."""
+    try:
+        width, height = (int(part) for part in text.lower().split("x"))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected WIDTHxHEIGHT, got {text!r}")
+    if width < 1 or height < 1:
+        raise argparse.ArgumentTypeError(f"expected a positive size, got {text!r}")
+    return (width, height)
+
+
+def _positive_int(text: str) -> int:
+    """Parses a whole number above 0."""
+    try:
+        value = int(text)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected a whole number, got {text!r}")
+    if value < 1:
+        raise argparse.ArgumentTypeError(f"expected a number above 0, got {text!r}")
+    return value
+
+
+def build_parser() -> argparse.ArgumentParser:
+    """Creates the argument parser with all subcommands."""
+    parser = argparse.ArgumentParser(prog="snekbyte", description="SnekByte, a snake game with a twist.")
+    parser.add_argument("--debug", action="store_true", help="Enable debug logging.")
+
+    settings_args = argparse.ArgumentParser(add_help=False)
+    settings_args.add_argument("--speed", type=int, default=None,
+                               help=f"Speed index into {config.SPEED_LEVELS} (default {config.DEFAULT_SPEED_INDEX}).")
+    wonq = settings_args.add_mutually_exclusive_group()
+    wonq.add_argument("--wonq", dest="wonq", action="store_true", default=None, help="Play in WoNQ mode.")
+    wonq.add_argument("--no-wonq", dest="wonq", action="store_false", help="Play without WoNQ mode.")
+    settings_args.add_argument("--theme", default=None, help=f"Sprite theme, one of: {', '.join(config.THEMES)}.")
+    settings_args.add_argument("--foods", type=int, default=None,
+                               help=f"Foods on the board at once (default {config.PARTY_FOOD_COUNT}).")
+    power_ups = settings_args.add_mutually_exclusive_group()
+    power_ups.add_argument("--power-ups", dest="power_ups", action="store_true", default=None,
+                           help="Spawn timed power-ups.")
+    power_ups.add_argument("--no-power-ups", dest="power_ups", action="store_false", help="Spawn no power-ups.")
+    settings_args.add_argument("--level", default=None,
+                               help="A level file (.snkl, or the text format) to play on instead of the open board.")
+    settings_args.add_argument("--config", default=config.CONFIG_FILE,
+                               help="A JSON file of config profiles. While playing, it is reloaded when it changes.")
+    settings_args.add_argument("--profile", default=config.CONFIG_PROFILE, help="The profile to use from --config.")
+
+    bot_args = argparse.ArgumentParser(add_help=False)
+    bot_args.add_argument("--policy", default="greedy", help="Bot policy that steers the snake.")
+    bot_args.add_argument("--seed", type=int, default=0, help="Seed of the first game.")
+
+    memory_args = argparse.ArgumentParser(add_help=False)
+    memory_args.add_argument("--memory-profile", metavar="DIR", default=config.MEMORY_PROFILE_DIR,
+                             help="Trace allocations and write memory reports here (slows the game down).")
+    memory_args.add_argument("--memory-every", type=int, default=config.MEMORY_PROFILE_EVERY,
+                             help="Ticks between periodic memory reports; 0 for game boundaries only.")
+
+    subcommands = parser.add_subparsers(dest="command", metavar="COMMAND")
+
+    play = subcommands.add_parser("play", parents=[settings_args, memory_args], help="Play the game (default).")
+    play.add_argument("--replay-dir", default=config.REPLAY_DIR, help="Save a replay of every game here.")
+    play.add_argument("--telemetry-dir", default=config.TELEMETRY_DIR,
+                      help="Write game events and frame time statistics here as JSON lines.")
+    play.add_argument("--window", type=_window_size, default=config.WINDOW_SIZE, metavar="WxH",
+                      help="Initial window size, e.g. 1920x1080. The game is scaled to fit.")
+    play.add_argument("--fullscreen", action="store_true", default=config.FULLSCREEN,
+                      help="Play fullscreen at the desktop resolution.")
+    play.add_argument("--integer-scaling", action="store_true", default=config.INTEGER_SCALING,
+                      help="Scale the game only by whole factors, for crisp pixels.")
+    play.add_argument("--render-thread", action="store_true", default=config.RENDER_THREAD,
+                      help="Run the game on its own thread, so slow frames never delay its ticks.")
+    play.add_argument("--turbo", type=_positive_int, default=None, metavar="TPS",
+                      help="Play this many ticks per second whatever the speed, drawing at the render frame rate.")
+    play.add_argument("--bot", default=None, metavar="POLICY", help="Let a bot policy steer the snake.")
+    asset_cache = play.add_mutually_exclusive_group()
+    asset_cache.add_argument("--asset-cache", default=config.ASSET_CACHE_DIR, metavar="DIR",
+                             help="Load the rendered menu, background and sprites from here, "
+                                  "saving them on the first launch.")
+    asset_cache.add_argument("--no-asset-cache", dest="asset_cache", action="store_const", const=None,
+                             help="Render every asset at launch.")
+    play.add_argument("--exit-after-first-frame", action="store_true",
+                      help="Quit once the first frame is drawn, printing a marker (used by the startup command).")
+    play.set_defaults(func=cmd_play)
+
+    simulate = subcommands.add_parser("simulate", parents=[settings_args, bot_args],
+                                      help="Play bot games without a display.")
+    simulate.add_argument("--games", type=int, default=100, help="Number of games to play.")
+    simulate.add_argument("--max-ticks", type=int, default=None, help="Stop each game after this many ticks.")
+    simulate.add_argument("--workers", type=int, default=1, help="Number of worker processes.")
+    simulate.set_defaults(func=cmd_simulate)
+
+    bench = subcommands.add_parser("bench", parents=[settings_args, bot_args, memory_args],
+                                   help="Measure engine throughput without a display.")
+    bench.add_argument("--ticks", type=int, default=100_000, help="Number of ticks to run.")
+    bench.add_argument("--render", action="store_true", help="Also draw every tick offscreen.")
+    bench.set_defaults(func=cmd_bench)
+
+    replay = subcommands.add_parser("replay", help="Play back a replay file without a display.")
+    replay.add_argument("file", help="A replay file written by the game.")
+    replay.add_argument("--video", default=None, help="Render to this video file (or PNG directory).")
+    replay.add_argument("--encoder", default="auto", choices=["auto", "png", "ffmpeg"],
+                        help="How to encode frames when rendering video.")
+    replay.add_argument("--workers", type=int, default=None, help="Number of PNG encoding processes.")
+    replay.add_argument("--max-ticks", type=int, default=None, help="Stop after this many ticks.")
+    replay.set_defaults(func=cmd_replay)
+
+    hashes = subcommands.add_parser("hashes", help="Hash every tick of a replay to check that engines agree.")
+    hashes.add_argument("file", help="A replay file written by the game.")
+    hashes.add_argument("--out", default=None, help="Save the per-tick hashes to this file.")
+    hashes.add_argument("--against", default=None,
+                        help="Compare with hashes saved by --out, reporting the first tick that differs.")
+    hashes.add_argument("--max-ticks", type=int, default=None, help="Stop after this many ticks.")
+    hashes.set_defaults(func=cmd_hashes)
+
+    difftest = subcommands.add_parser("difftest", parents=[settings_args],
+                                      help="Check an engine against the reference engine on random games.")
+    difftest.add_argument("--engine", default="compact",
+                          help="The engine to check: compact (the lookahead bot's engine) or reference.")
+    difftest.add_argument("--ticks", type=int, default=1_000_000, help="Number of ticks to check, over all games.")
+    difftest.add_argument("--seed", type=int, default=0, help="Seed of the first game.")
+    difftest.add_argument("--workers", type=int, default=1, help="Number of processes.")
+    difftest.add_argument("--max-ticks", type=int, default=config.DIFFTEST_MAX_TICKS, help="Ticks per game at most.")
+    difftest.add_argument("--out", default=None, help="Save the replay of a divergence here.")
+    difftest.set_defaults(func=cmd_difftest)
+
+    serve = subcommands.add_parser("serve", help="Answer batches of simulation jobs over a local socket.")
+    serve.add_argument("--host", default=config.SERVICE_HOST, help="Address to listen on.")
+    serve.add_argument("--port", type=int, default=config.SERVICE_PORT, help="Port to listen on.")
+    serve.add_argument("--workers", type=int, default=config.SERVICE_WORKERS,
+                       help="Simulation processes (default: one per CPU).")
+    serve.add_argument("--cache-size", type=int, default=config.SERVICE_CACHE_SIZE, help="Results kept in memory.")
+    serve.add_argument("--cache-file", default=config.SERVICE_CACHE_PATH,
+                       help="SQLite file that evicted results spill to and that outlives the service.")
+    serve.add_argument("--no-spill", action="store_true", help="Keep results in memory only.")
+    serve.set_defaults(func=cmd_serve)
+
+    train = subcommands.add_parser("train", parents=[settings_args],
+                                   help="Evolve neural network policies without a display.")
+    train.add_argument("--out", default=config.TRAIN_DIR, help="Directory for checkpoints and the fitness curve.")
+    train.add_argument("--generations", type=int, default=50, help="Generation to stop after.")
+    train.add_argument("--population", type=int, default=config.TRAIN_POPULATION, help="Genomes per generation.")
+    train.add_argument("--seeds", type=int, default=config.TRAIN_SEEDS, help="Games per genome and generation.")
+    train.add_argument("--hidden", type=int, default=config.TRAIN_HIDDEN, help="Hidden units per network.")
+    train.add_argument("--workers", type=int, default=None, help="Number of evaluation processes.")
+    train.add_argument("--seed", type=int, default=0, help="Seed of the population and the games.")
+    train.add_argument("--fresh", action="store_true", help="Start over instead of resuming a checkpoint.")
+    train.set_defaults(func=cmd_train)
+
+    build = subcommands.add_parser("build", help="Build a zipapp of precompiled bytecode for faster launches.")
+    build.add_argument("--out", default=config.BUNDLE_PATH, help="The zipapp to write.")
+    build.add_argument("--assets", default=None, metavar="DIR",
+                       help=f"Also render the static assets into this asset cache (e.g. {config.ASSET_CACHE_DIR}).")
+    build.set_defaults(func=cmd_build)
+
+    startup = subcommands.add_parser("startup", help="Measure the time from launch to the first frame.")
+    startup.add_argument("--runs", type=int, default=config.STARTUP_RUNS, help="Launches timed per case.")
+    startup.add_argument("--bundle", default=None, help="Also time this zipapp from the build command.")
+    startup.set_defaults(func=cmd_startup)
+
+    compile_level = subcommands.add_parser("compile-level", help="Compile text level files to the binary format.")
+    compile_level.add_argument("sources", nargs="+", help="Text level files.")
+    compile_level.add_argument("--out", default=None,
+                               help="Directory for the binary files (default: next to each source).")
+    compile_level.set_defaults(func=cmd_compile_level)
+
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """
+    Runs the SnekByte command line. Without a subcommand, the game is played.
+
+    Args:
+        argv: The arguments to parse, defaulting to sys.argv[1:].
+
+    Returns:
+        The process exit code.
+    """
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    if args.command is None:
+        args = parser.parse_args((["--debug"] if args.debug else []) + ["play"])
+    # Headless commands print results on stdout, so their logs go to stderr
+    setup_logging(args.debug, stream=sys.stdout if args.command == "play" else sys.stderr)
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,3 +1,4 @@
+import os
 import pygame
 
 # Screen dimensions
@@ -21,6 +22,15 @@ UI_HIGHLIGHT_COLOR = GOLD
 FOOD_COLOR = RED
 GRID_COLOR = GRAY
 
+# Sprite themes: colors used to pre-render the snake, food and poop cells
+THEMES = {
+    "classic": {"snake": GREEN, "outline": GRAY, "eyes": BLACK, "food": FOOD_COLOR, "poop": BROWN},
+    "neon": {"snake": (57, 255, 20), "outline": (0, 90, 0), "eyes": (255, 0, 255),
+             "food": (0, 255, 255), "poop": (255, 0, 170)},
+    "mono": {"snake": WHITE, "outline": GRAY, "eyes": BLACK, "food": GRAY, "poop": (80, 80, 80)},
+}
+DEFAULT_THEME = "classic"
+
 # Game settings
 SPEED_LEVELS = [5, 8, 12, 16, 20]
 DEFAULT_SPEED_INDEX = 2
@@ -37,4 +47,99 @@ RIGHT = (1, 0)
 UI_FONT_SIZE = 30
 MENU_TITLE_FONT_SIZE = 72
 MENU_OPTION_FONT_SIZE = 48
-SCORE_FONT_SIZE = 36
\ No newline at end of file
+SCORE_FONT_SIZE = 36
+
+# Persistent statistics
+STATS_DB_PATH = os.path.join(os.path.expanduser("~"), ".snekbyte", "stats.db")
+STATS_TOP_N = 5
+STATS_BATCH_SIZE = 64
+STATS_FLUSH_INTERVAL = 0.05 # Seconds to wait for more runs before writing a batch
+
+# Replays and recording
+REPLAY_DIR = None # Set to a directory to save a replay of every finished game
+RECORDING_SLOTS = 32 # Frames that can wait for the video encoders at once
+
+# Lookahead bot
+LOOKAHEAD_WORKERS = None # Rollout processes (None for one per CPU, 0 to roll out in-process)
+LOOKAHEAD_DEPTH = 40 # Ticks played out by each rollout
+LOOKAHEAD_BUDGET = 0.5 # Share of one tick, at the current speed, spent on each decision
+LOOKAHEAD_POOL_ROUND_TRIPS = 4 # Budgets shorter than this many pool round trips roll out in-process instead
+
+# Cautious bot
+CAUTIOUS_DETOUR = 0.05 # Share of moves taken at random among those with room, so a coiled snake cannot circle forever
+
+# Neuroevolution
+TRAIN_DIR = "training" # Where checkpoints and fitness curves are written
+TRAIN_POPULATION = 200
+TRAIN_SEEDS = 10 # Games each genome plays per generation
+TRAIN_HIDDEN = 16 # Hidden units of the policy networks
+TRAIN_MAX_TICKS = 1000 # Ticks after which a training game is stopped
+TRAIN_STARVATION_TICKS = 200 # Ticks without food after which a training game is stopped
+TRAIN_ELITE = 0.05 # Share of the population copied unchanged into the next generation
+TRAIN_PARENTS = 0.2 # Share of the population that mutated children are drawn from
+TRAIN_SIGMA = 0.1 # Standard deviation of the mutation noise
+
+# Config profiles
+CONFIG_FILE = None # A JSON file of profiles that override the settings above; watched for changes
+CONFIG_PROFILE = "default" # The profile to use from CONFIG_FILE
+CONFIG_POLL_INTERVAL = 1.0 # Seconds between checks of CONFIG_FILE for changes
+
+# Telemetry
+TELEMETRY_DIR = None # Set to a directory to write telemetry events there as JSON lines
+TELEMETRY_MAX_BYTES = 5_000_000 # Size at which the telemetry file is rotated
+TELEMETRY_BACKUPS = 5 # Rotated telemetry files to keep
+TELEMETRY_QUEUE_SIZE = 10_000 # Events that can wait for the writer before new ones are dropped
+TELEMETRY_BATCH_SIZE = 256 # Events written to disk at once
+TELEMETRY_RATE_LIMITS = {"food_eaten": 20, "poop_dropped": 20, "frame_stats": 1} # Events per second
+TELEMETRY_DEFAULT_RATE = 50 # Events per second for categories without their own limit
+TELEMETRY_FRAME_STATS_INTERVAL = 5.0 # Seconds of frame times summarized in each frame_stats event
+
+# Memory profiling
+MEMORY_PROFILE_DIR = None # Set to a directory to profile allocations with tracemalloc and dump reports there
+MEMORY_PROFILE_EVERY = 1000 # Ticks between periodic snapshots
+MEMORY_PROFILE_FRAMES = 10 # Stack frames kept per allocation, used to attribute it to a subsystem
+
+# Party mode: several foods at once and timed power-ups
+PARTY_FOOD_COUNT = 1 # Foods on the board at once
+PARTY_POWER_UPS = False # Spawn power-ups
+POWER_UP_INTERVAL = 150 # Ticks between power-up spawns
+POWER_UP_LIFETIME = 100 # Ticks a power-up stays on the board before it expires
+POWER_UP_DURATION = 80 # Ticks a speed power-up lasts once eaten
+POWER_UP_SPEED_FACTORS = {"fast": 1.5, "slow": 0.6} # Game speed multipliers of the speed power-ups
+POWER_UP_COLORS = {"fast": GOLD, "slow": (0, 160, 255), "clean": WHITE}
+
+# Level maps
+LEVEL = None # A level file (.snkl, or the text format) to play on; None for the open board
+LEVEL_WALL_COLOR = (90, 90, 110)
+LEVEL_PORTAL_COLOR = (170, 60, 220)
+LEVEL_CACHED_BACKGROUNDS = 8 # Level backgrounds kept drawn at once
+
+# Display: the game draws at SCREEN_WIDTH x SCREEN_HEIGHT and the frame is scaled to the window
+WINDOW_SIZE = None # Initial window size, e.g. (1920, 1080); None for the screen size above
+FULLSCREEN = False
+INTEGER_SCALING = False # Scale only by whole factors, with wider borders, for crisp pixels
+SMOOTH_SCALING = True # Smooth scaling for fractional factors below 2; larger factors replicate pixels
+RENDER_THREAD = False # Play on an engine thread at the tick rate and draw its snapshots from the main thread
+RENDER_FPS = 60 # Most frames per second drawn while the engine thread plays, or in turbo mode
+
+# Turbo mode: several ticks per rendered frame, for speed runs and bot showcases
+TURBO_TPS = 0 # Ticks per second in turbo mode; 0 plays one tick per frame at the selected speed
+TURBO_MAX_TICKS_PER_FRAME = 2000 # Ticks caught up in one frame at most, so slow frames cannot snowball
+TURBO_TRAIL_COLOR = (255, 255, 255, 70) # Cells the head crossed since the last frame that the body no longer covers
+
+# Differential testing of optimized engines against update_game_state
+DIFFTEST_MAX_TICKS = 5000 # Ticks per generated game at most
+
+# Simulation service (the serve command)
+SERVICE_HOST = "127.0.0.1"
+SERVICE_PORT = 8765
+SERVICE_WORKERS = None # Simulation processes (None for one per CPU)
+SERVICE_CACHE_SIZE = 100_000 # Results kept in memory
+SERVICE_CACHE_PATH = os.path.join(os.path.expanduser("~"), ".snekbyte", "simulations.db") # Where evicted results spill; None to drop them
+SERVICE_SPILL_BATCH = 256 # Evicted results written to disk at once
+SERVICE_MAX_REQUEST = 16 * 1024 * 1024 # Longest request line in bytes
+
+# Cold start: rendered assets cached on disk, and the bundled build (the build and startup commands)
+ASSET_CACHE_DIR = os.path.join(os.path.expanduser("~"), ".snekbyte", "assets") # Rendered menu, background and atlas per config hash; None to render every launch
+BUNDLE_PATH = "snekbyte.pyz" # Where the build command writes the zipapp
+STARTUP_RUNS = 5 # Launches timed per case by the startup command
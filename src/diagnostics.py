@@ -0,0 +1,262 @@
+import json
+import linecache
+import os
+import sys
+import time
+import tracemalloc
+from dataclasses import dataclass
+from typing import Callable, Dict, Optional
+from src import config
+
+MEMORY_LOG_FILE = "memory.jsonl"
+
+# Source files of each subsystem; allocations are charged to the subsystem of
+# the innermost frame that lies in one of these files
+SUBSYSTEMS = {
+    "engine": ("game_logic.py", "game_state.py", "snake.py", "food.py", "poop.py", "grid.py"),
+    "ui": ("ui.py", "sprites.py"),
+    "events": ("event_handler.py",),
+    "game_loop": ("game_loop.py",),
+    "storage": ("stats_store.py", "replay.py", "telemetry.py"),
+}
+OTHER = "other"
+
+_SOURCE_DIR = os.path.dirname(os.path.abspath(__file__))
+_SUBSYSTEM_OF_FILE = {
+    os.path.join(_SOURCE_DIR, filename): subsystem
+    for subsystem, filenames in SUBSYSTEMS.items() for filename in filenames
+}
+
+
+def subsystem_of(traceback: tracemalloc.Traceback) -> str:
+    """Returns the subsystem an allocation belongs to, judged by its innermost SnekByte frame."""
+    for frame in reversed(traceback):
+        subsystem = _SUBSYSTEM_OF_FILE.get(frame.filename)
+        if subsystem is not None:
+            return subsystem
+    return OTHER
+
+
+@dataclass
+class SectionStats:
+    """
+    Memory statistics of a measured section of code, such as one call of `update_game_state`.
+
+    The retained counts are the net growth over the section: objects that
+    are allocated and freed again inside it cancel out, so a call that makes
+    a thousand temporary tuples retains nothing. Such temporaries show up in
+    `peak_bytes`, which is the measure to drive down for allocation-free code.
+
+    Attributes:
+        calls: How often the section ran.
+        retained_blocks: Memory blocks still allocated after the section, summed over all calls.
+        retained_bytes: Traced bytes still allocated after the section, summed over all calls.
+        peak_bytes: The most traced memory any single call needed on top of what it started with.
+    """
+    calls: int = 0
+    retained_blocks: int = 0
+    retained_bytes: int = 0
+    peak_bytes: int = 0
+
+    def per_call(self) -> dict:
+        """Returns the averages per call, with the peak."""
+        calls = max(self.calls, 1)
+        return {"calls": self.calls, "retained_blocks_per_call": self.retained_blocks / calls,
+                "retained_bytes_per_call": self.retained_bytes / calls, "peak_bytes": self.peak_bytes}
+
+
+def measure_allocations(func: Callable, *args, repeat: int = 1, **kwargs) -> SectionStats:
+    """
+    Runs a function under tracemalloc and reports what it retains and its peak memory.
+
+    The function is called once first, so caches it fills on first use do
+    not count. Tracing is started and stopped here if it was not running.
+
+    Args:
+        func: The function to measure.
+        *args: Its arguments.
+        repeat: How many measured calls to make.
+        **kwargs: Its keyword arguments.
+
+    Returns:
+        The SectionStats of the measured calls.
+    """
+    started = not tracemalloc.is_tracing()
+    if started:
+        tracemalloc.start()
+    stats = SectionStats()
+    try:
+        # Under tracing, so objects it replaces that were allocated earlier are traced when measuring
+        func(*args, **kwargs)
+        for _ in range(repeat):
+            with _Measurement(stats):
+                func(*args, **kwargs)
+    finally:
+        if started:
+            tracemalloc.stop()
+    return stats
+
+
+class _Measurement:
+    """Context manager that adds the retained memory and peak of its `with` block to a SectionStats."""
+
+    __slots__ = ("stats", "blocks", "traced")
+
+    # Blocks and bytes the measurement accounts to itself (its own readings), subtracted from every call
+    overhead_blocks = None
+    overhead_bytes = 0
+
+    def __init__(self, stats: SectionStats):
+        self.stats = stats
+        if _Measurement.overhead_blocks is None:
+            _Measurement.overhead_blocks = 0
+            empties = [SectionStats() for _ in range(9)]
+            for empty in empties:
+                with _Measurement(empty):
+                    pass
+            # Free lists make single readings jitter by a block; the median is the steady overhead
+            _Measurement.overhead_blocks = sorted(empty.retained_blocks for empty in empties)[4]
+            _Measurement.overhead_bytes = sorted(empty.retained_bytes for empty in empties)[4]
+
+    def __enter__(self) -> None:
+        self.blocks = sys.getallocatedblocks()
+        self.traced = tracemalloc.get_traced_memory()[0]
+        tracemalloc.reset_peak()
+
+    def __exit__(self, *exc_info) -> None:
+        current, peak = tracemalloc.get_traced_memory()
+        stats = self.stats
+        stats.calls += 1
+        stats.retained_blocks += sys.getallocatedblocks() - self.blocks - _Measurement.overhead_blocks
+        stats.retained_bytes += current - self.traced - _Measurement.overhead_bytes
+        stats.peak_bytes = max(stats.peak_bytes, peak - self.traced)
+
+
+class MemoryProfiler:
+    """
+    A diagnostics mode that tracks where memory goes during long sessions.
+
+    At every game boundary, and every `every` ticks, a tracemalloc snapshot is
+    taken and compared with the previous one. Each report is dumped to disk:
+    the growth per subsystem and the largest growing allocation sites go to
+    a text file, and a summary line goes to memory.jsonl. Sections measured
+    with `section` (the game loop measures `update_game_state` and
+    `draw_game_screen`) add what each call retained, and its peak, to each report.
+
+    tracemalloc only sees memory allocated through Python's allocators;
+    pixel buffers that SDL allocates for surfaces are not included, but the
+    Python objects that own them are.
+    """
+
+    def __init__(self, directory: str, every: int = config.MEMORY_PROFILE_EVERY,
+                 frames: int = config.MEMORY_PROFILE_FRAMES, top: int = 25):
+        """
+        Starts tracing allocations and takes the baseline snapshot.
+
+        Args:
+            directory: Where the reports are written.
+            every: Ticks between periodic snapshots; 0 for game boundaries only.
+            frames: Stack frames recorded per allocation.
+            top: Allocation sites listed in each report.
+        """
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.every = every
+        self.top = top
+        self.sections: Dict[str, SectionStats] = {}
+        self.reports = 0
+        self._ticks = 0
+        self._started_tracing = not tracemalloc.is_tracing()
+        if self._started_tracing:
+            tracemalloc.start(frames)
+        self._previous = self._snapshot()
+
+    def section(self, name: str) -> _Measurement:
+        """Returns a context manager that measures the retained memory and peak of its `with` block under `name`."""
+        stats = self.sections.get(name)
+        if stats is None:
+            stats = self.sections[name] = SectionStats()
+        return _Measurement(stats)
+
+    def tick(self) -> Optional[dict]:
+        """Counts a tick and reports if a periodic snapshot is due. Returns the report, if any."""
+        self._ticks += 1
+        if self.every and self._ticks % self.every == 0:
+            return self.report(f"tick-{self._ticks}")
+        return None
+
+    def game_boundary(self, label: str = "game_over") -> dict:
+        """Reports the memory growth since the last report, e.g. over one game and Retry."""
+        return self.report(label)
+
+    def report(self, label: str) -> dict:
+        """
+        Takes a snapshot, compares it with the previous one and dumps the result.
+
+        Args:
+            label: Names the report, e.g. "game_over" or "tick-5000".
+
+        Returns:
+            The summary that was appended to memory.jsonl.
+        """
+        snapshot = self._snapshot()
+        differences = snapshot.compare_to(self._previous, "traceback")
+        self._previous = snapshot
+
+        growth = {name: {"bytes": 0, "blocks": 0} for name in list(SUBSYSTEMS) + [OTHER]}
+        for difference in differences:
+            subsystem = growth[subsystem_of(difference.traceback)]
+            subsystem["bytes"] += difference.size_diff
+            subsystem["blocks"] += difference.count_diff
+
+        self.reports += 1
+        current, peak = tracemalloc.get_traced_memory()
+        summary = {
+            "report": self.reports,
+            "label": label,
+            "time": time.time(),
+            "ticks": self._ticks,
+            "traced_bytes": current,
+            "peak_bytes": peak,
+            "subsystems": growth,
+            "sections": {name: stats.per_call() for name, stats in self.sections.items()},
+        }
+        with open(os.path.join(self.directory, MEMORY_LOG_FILE), "a") as f:
+            f.write(json.dumps(summary) + "\n")
+        self._write_diff(f"{self.reports:05d}-{label}.txt", summary, differences)
+        self.sections = {}
+        return summary
+
+    def close(self) -> None:
+        """Writes a final report and stops tracing if this profiler started it."""
+        self.report("close")
+        if self._started_tracing:
+            tracemalloc.stop()
+
+    def _snapshot(self) -> tracemalloc.Snapshot:
+        # Leave out what tracing and this profiler allocate themselves
+        return tracemalloc.take_snapshot().filter_traces((
+            tracemalloc.Filter(False, tracemalloc.__file__, all_frames=True),
+            tracemalloc.Filter(False, __file__, all_frames=True),
+            tracemalloc.Filter(False, linecache.__file__),
+        ))
+
+    def _write_diff(self, filename: str, summary: dict, differences) -> None:
+        lines = [f"Report {summary['report']} ({summary['label']}) after {summary['ticks']} ticks",
+                 f"Traced: {summary['traced_bytes']} bytes, peak {summary['peak_bytes']} bytes", "",
+                 "Growth per subsystem since the previous report:"]
+        for name, growth in summary["subsystems"].items():
+            lines.append(f"  {name:<10} {growth['bytes']:>+12} bytes {growth['blocks']:>+9} blocks")
+        if summary["sections"]:
+            lines += ["", "Retained per call:"]
+            for name, stats in summary["sections"].items():
+                lines.append(f"  {name:<20} {stats['calls']:>8} calls "
+                             f"{stats['retained_blocks_per_call']:>10.2f} blocks "
+                             f"{stats['retained_bytes_per_call']:>10.1f} bytes  peak {stats['peak_bytes']} bytes")
+        lines += ["", f"Top {self.top} growing allocation sites:"]
+        for difference in differences[:self.top]:
+            lines.append(f"  {difference.size_diff:>+12} bytes {difference.count_diff:>+9} blocks "
+                         f"[{subsystem_of(difference.traceback)}]")
+            lines.extend("    " + line for line in difference.traceback.format(limit=4, most_recent_first=True))
+        with open(os.path.join(self.directory, filename), "w") as f:
+            f.write("\n".join(lines) + "\n")
@@ -0,0 +1,387 @@
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, NamedTuple, Optional, Tuple
+from src import config
+from src.bots import DIRECTIONS, greedy_policy, random_policy
+from src.game_logic import DEATH_WALL, update_game_state
+from src.game_state import GameSettings
+from src.lookahead import CompactGame
+from src.replay import Replay
+from src.state_hash import FOOD, HEAD, POOP, SNAKE, StateHasher, scalars_hash, zobrist_keys
+
+# Shares of the generated inputs: steer for the food, turn to a random safe direction, or turn anywhere at all
+_GREEDY_SHARE = 0.6
+_SAFE_SHARE = 0.3
+
+
+class Observation(NamedTuple):
+    """
+    What two engines must agree on after every tick.
+
+    `state_hash` is the Zobrist hash of the whole state (see src.state_hash)
+    while the game runs, and None once it is over: how a finished game's
+    board looks is up to each engine, but how and when it ended is not.
+    """
+    ticks: int
+    game_over: bool
+    death_cause: Optional[str]
+    score: int
+    state_hash: Optional[int]
+
+
+class ReferenceEngine:
+    """Plays a replay's game with `update_game_state`, the engine every other one must match."""
+
+    def __init__(self, replay: Replay):
+        """
+        Args:
+            replay: Supplies the seed and settings of the game to start.
+        """
+        self.settings = replay.settings()
+        self.game_data = replay.start_game()
+        self.hasher = StateHasher(self.game_data)
+
+    def turn(self, direction: Tuple[int, int]) -> None:
+        """Turns the snake before the next tick."""
+        self.game_data.snake.turn(direction)
+
+    def step(self) -> None:
+        """Plays one tick."""
+        update_game_state(self.game_data, self.settings)
+
+    def observe(self) -> Observation:
+        """Returns what the engines are compared on."""
+        game_data = self.game_data
+        return Observation(game_data.ticks, game_data.game_over, game_data.death_cause, game_data.score,
+                           None if game_data.game_over else self.hasher.value)
+
+    def describe(self) -> dict:
+        """Returns the state in full, for reports of a divergence."""
+        game_data = self.game_data
+        snake = game_data.snake
+        return {"ticks": game_data.ticks, "positions": list(snake.positions), "direction": snake.direction,
+                "length": snake.length, "food": game_data.food.position,
+                "poops": sorted(game_data.poops.positions()), "score": game_data.score,
+                "shit_counter": game_data.shit_counter, "game_over": game_data.game_over,
+                "death_cause": game_data.death_cause}
+
+
+class CompactEngine:
+    """
+    Plays a replay's game with the lookahead bot's CompactGame.
+
+    The hash is kept up to date from what each step changed: the new head,
+    the tail cell if it was freed, the food if it moved and the poop if one
+    was dropped.
+    """
+
+    def __init__(self, replay: Replay):
+        """
+        Args:
+            replay: Supplies the seed and settings of the game to start.
+
+        Raises:
+            ValueError: If the replay uses party mode or a level, which CompactGame does not play.
+        """
+        settings = replay.settings()
+        if settings.party_mode or settings.level is not None:
+            raise ValueError("CompactGame plays neither party mode nor levels")
+        game = self.game = CompactGame.from_game_data(replay.start_game(), settings)
+        keys = self.keys = zobrist_keys(game.width, game.height)
+        value = keys.key(HEAD, game.body[0]) ^ keys.key(FOOD, game.food)
+        for index in game.body:
+            value ^= keys.key(SNAKE, index)
+        for index, poop in enumerate(game.poops):
+            if poop:
+                value ^= keys.key(POOP, index)
+        self._cells = value
+        # The poops as hashed so far, to notice a new one
+        self._poops = game.poops[:]
+
+    def turn(self, direction: Tuple[int, int]) -> None:
+        """Turns the snake before the next tick."""
+        self.game.turn(direction)
+
+    def step(self) -> None:
+        """Plays one tick."""
+        game = self.game
+        body = game.body
+        keys = self.keys
+        head, tail, food, length, score = body[0], body[-1], game.food, len(body), game.score
+        game.step()
+        if game.death_cause == DEATH_WALL:
+            # The snake stays where it was; the observation stops hashing the board anyway
+            return
+        value = self._cells ^ keys.key(HEAD, head) ^ keys.key(HEAD, body[0]) ^ keys.key(SNAKE, body[0])
+        if len(body) == length:
+            value ^= keys.key(SNAKE, tail)
+        if game.food != food:
+            value ^= keys.key(FOOD, food) ^ keys.key(FOOD, game.food)
+        if game.score != score and game.poops[body[-1]] and not self._poops[body[-1]]:
+            self._poops[body[-1]] = 1
+            value ^= keys.key(POOP, body[-1])
+        self._cells = value
+
+    def observe(self) -> Observation:
+        """Returns what the engines are compared on."""
+        game = self.game
+        if game.game_over:
+            return Observation(game.ticks, True, game.death_cause, game.score, None)
+        return Observation(game.ticks, False, None, game.score,
+                           self._cells ^ scalars_hash(game.score, game.shit_counter, game.length,
+                                                      game.direction, False))
+
+    def describe(self) -> dict:
+        """Returns the state in full, for reports of a divergence."""
+        game = self.game
+        width = game.width
+        return {"ticks": game.ticks, "positions": game.positions(), "direction": game.direction,
+                "length": game.length, "food": (game.food % width, game.food // width),
+                "poops": [(i % width, i // width) for i, poop in enumerate(game.poops) if poop],
+                "score": game.score, "shit_counter": game.shit_counter, "game_over": game.game_over,
+                "death_cause": game.death_cause}
+
+
+# Engines the harness can test against the reference, by name
+ENGINES = {
+    "reference": ReferenceEngine,
+    "compact": CompactEngine,
+}
+
+
+class Divergence(NamedTuple):
+    """The first tick at which an engine did not match the reference, and the game that got it there."""
+    tick: int
+    replay: Replay
+    expected: Observation
+    actual: Observation
+
+    def to_dict(self, engine: str) -> dict:
+        """Returns the divergence with both engines' full state, as a JSON-serializable dictionary."""
+        reference, other = _play_to(self.replay, ENGINES[engine], self.tick)
+        return {"tick": self.tick, "turns": len(self.replay.turns), "replay": self.replay.to_dict(),
+                "expected": reference.describe(), "actual": other.describe()}
+
+
+def _play(replay: Replay, engine_class, max_ticks: int, choose=None) -> Tuple[int, Optional[Divergence]]:
+    """
+    Plays a replay on the reference engine and another engine side by side.
+
+    Once the replay's turns are used up, `choose(game_data, settings)` (if
+    given) picks the direction before every tick from the reference game,
+    and the turns it makes are recorded in the replay.
+
+    Returns:
+        The number of ticks played, and the first Divergence or None.
+    """
+    reference, engine = ReferenceEngine(replay), engine_class(replay)
+    game_data, settings = reference.game_data, reference.settings
+    snake = game_data.snake
+    turns = replay.turns
+    # Turns recorded from here on are never played back from the list
+    recorded = len(turns)
+    next_turn = 0
+    expected, actual = reference.observe(), engine.observe()
+    while expected == actual:
+        if expected.game_over or expected.ticks >= max_ticks:
+            return expected.ticks, None
+        tick = expected.ticks
+        if next_turn < recorded:
+            while next_turn < recorded and turns[next_turn][0] <= tick:
+                _, dx, dy = turns[next_turn]
+                reference.turn((dx, dy))
+                engine.turn((dx, dy))
+                next_turn += 1
+        elif choose is not None:
+            direction = choose(game_data, settings)
+            if direction != snake.direction:
+                replay.record_turn(tick, direction)
+                reference.turn(direction)
+                engine.turn(direction)
+        reference.step()
+        engine.step()
+        expected, actual = reference.observe(), engine.observe()
+    return expected.ticks, Divergence(expected.ticks, replay, expected, actual)
+
+
+def _play_to(replay: Replay, engine_class, tick: int):
+    """Plays a replay on the reference and another engine up to a tick, returning both."""
+    reference, engine = ReferenceEngine(replay), engine_class(replay)
+    turns = iter(replay.turns)
+    turn = next(turns, None)
+    while reference.game_data.ticks < tick and not reference.game_data.game_over:
+        while turn is not None and turn[0] <= reference.game_data.ticks:
+            _, dx, dy = turn
+            reference.turn((dx, dy))
+            engine.turn((dx, dy))
+            turn = next(turns, None)
+        reference.step()
+        engine.step()
+    return reference, engine
+
+
+def check_replay(replay: Replay, engine_class, max_ticks: int = config.DIFFTEST_MAX_TICKS) -> Optional[Divergence]:
+    """
+    Plays a replay on the reference engine and another engine side by side.
+
+    Args:
+        replay: The game to play.
+        engine_class: The engine to check, e.g. a value of ENGINES.
+        max_ticks: Stops after this many ticks.
+
+    Returns:
+        The first Divergence, or None if the engines agreed on every tick.
+    """
+    return _play(replay, engine_class, max_ticks)[1]
+
+
+def _random_inputs(rng):
+    """Returns a `choose` for `_play` that mixes steering for the food with random turns."""
+    def choose(game_data, settings):
+        draw = rng.random()
+        if draw < _GREEDY_SHARE:
+            return greedy_policy(game_data, settings)
+        if draw < _GREEDY_SHARE + _SAFE_SHARE:
+            return random_policy(game_data, settings, rng)
+        return rng.choice(DIRECTIONS)
+    return choose
+
+
+def check_game(settings: GameSettings, seed: int, engine_class,
+               max_ticks: int = config.DIFFTEST_MAX_TICKS) -> Tuple[int, Optional[Divergence]]:
+    """
+    Generates a random game and plays it on the reference engine and another engine side by side.
+
+    The inputs come from a mix of steering for the food, turning to a random
+    safe direction and turning to any direction at all, including reversals
+    and turns into walls. Every turn is recorded, so a divergence comes with
+    the replay that reproduces it.
+
+    Args:
+        settings: The settings to play with.
+        seed: Seeds the game and the inputs.
+        engine_class: The engine to check, e.g. a value of ENGINES.
+        max_ticks: Stops after this many ticks.
+
+    Returns:
+        The number of ticks played, and the first Divergence or None.
+    """
+    return _play(Replay.new(settings, seed), engine_class, max_ticks, _random_inputs(random.Random(seed ^ 0xD1FF)))
+
+
+def _with_turns(replay: Replay, turns: List[Tuple[int, int, int]]) -> Replay:
+    candidate = Replay.from_dict(replay.to_dict())
+    candidate.turns = list(turns)
+    return candidate
+
+
+def _greedy(game_data, settings):
+    return greedy_policy(game_data, settings)
+
+
+def shrink(divergence: Divergence, engine_class, max_ticks: int = config.DIFFTEST_MAX_TICKS) -> Divergence:
+    """
+    Shrinks a divergence to a game with as few turns as possible that still diverges.
+
+    Turns after the divergent tick never matter and are dropped first. As
+    removing any one turn sends the snake somewhere else entirely, the
+    shrinker then tries the plainest games first: the shortest prefix of the
+    turns after which steering straight for the food still diverges. Last,
+    ever smaller runs of turns are removed (delta debugging), keeping any
+    removal after which the engines still disagree, until no single turn can
+    be removed. The seed and settings stay the same.
+
+    Args:
+        divergence: A Divergence found by `check_game` or `check_replay`.
+        engine_class: The engine that diverged.
+        max_ticks: Ticks the games tried while shrinking may last.
+
+    Returns:
+        The Divergence of the smallest game found.
+    """
+    turns = [turn for turn in divergence.replay.turns if turn[0] < divergence.tick]
+    best = check_replay(_with_turns(divergence.replay, turns), engine_class, divergence.tick) or divergence
+    for prefix in range(len(best.replay.turns)):
+        found = _play(_with_turns(best.replay, best.replay.turns[:prefix]), engine_class, max_ticks, _greedy)[1]
+        if found is not None:
+            if len(found.replay.turns) < len(best.replay.turns):
+                best = found
+            break
+
+    turns = [turn for turn in best.replay.turns if turn[0] < best.tick]
+    chunk = max(1, len(turns) // 2)
+    while turns:
+        removed = False
+        start = 0
+        while start < len(turns):
+            candidate = turns[:start] + turns[start + chunk:]
+            found = check_replay(_with_turns(best.replay, candidate), engine_class, best.tick)
+            if found is not None:
+                best = found
+                turns = [turn for turn in candidate if turn[0] < best.tick]
+                removed = True
+            else:
+                start += 1
+        if chunk == 1 and not removed:
+            break
+        if not removed:
+            chunk //= 2
+    return best._replace(replay=_with_turns(best.replay, turns))
+
+
+def _check_batch(settings: GameSettings, engine: str, seed: int, stride: int, ticks: int,
+                 max_ticks: int) -> dict:
+    """Checks generated games, seeds `seed`, `seed + stride`, ..., until `ticks` ticks have been played."""
+    engine_class = ENGINES[engine]
+    played = games = 0
+    while played < ticks:
+        game_ticks, divergence = check_game(settings, seed, engine_class, max_ticks)
+        played += game_ticks
+        games += 1
+        if divergence is not None:
+            return {"games": games, "ticks": played,
+                    "divergence": shrink(divergence, engine_class).to_dict(engine)}
+        seed += stride
+    return {"games": games, "ticks": played, "divergence": None}
+
+
+def run_differential(settings: GameSettings, engine: str, total_ticks: int, seed: int = 0,
+                     workers: int = 1, max_ticks: int = config.DIFFTEST_MAX_TICKS) -> dict:
+    """
+    Checks an engine against the reference on generated games until enough ticks have been played.
+
+    Args:
+        settings: The settings to play with.
+        engine: The name of the engine in ENGINES.
+        total_ticks: The number of ticks to check, over all games.
+        seed: Seed of the first game.
+        workers: Number of processes; each plays its own seeds.
+        max_ticks: Ticks per game at most.
+
+    Returns:
+        A JSON-serializable summary: games and ticks played, ticks per second,
+        and the shrunk divergence (with its replay) if one was found.
+
+    Raises:
+        ValueError: If there is no such engine, or it cannot play these settings.
+    """
+    if engine not in ENGINES:
+        raise ValueError(f"Unknown engine {engine!r}, expected one of: {', '.join(ENGINES)}")
+    # Fail here rather than in every worker if the engine cannot play these settings
+    ENGINES[engine](Replay.new(settings, seed))
+    start = time.perf_counter()
+    if workers > 1:
+        share = -(-total_ticks // workers)
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            batches = list(pool.map(_check_batch, [settings] * workers, [engine] * workers,
+                                    range(seed, seed + workers), [workers] * workers, [share] * workers,
+                                    [max_ticks] * workers))
+    else:
+        batches = [_check_batch(settings, engine, seed, 1, total_ticks, max_ticks)]
+    seconds = time.perf_counter() - start
+    ticks = sum(batch["ticks"] for batch in batches)
+    divergences = [batch["divergence"] for batch in batches if batch["divergence"] is not None]
+    return {"engine": engine, "games": sum(batch["games"] for batch in batches), "ticks": ticks,
+            "seconds": round(seconds, 3), "ticks_per_second": round(ticks / seconds) if seconds else None,
+            "divergence": min(divergences, key=lambda d: d["turns"]) if divergences else None}
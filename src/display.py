@@ -0,0 +1,127 @@
+import pygame
+from typing import Optional, Tuple
+from src import config
+
+
+def fit(logical_size: Tuple[int, int], window_size: Tuple[int, int], integer_scaling: bool) -> pygame.Rect:
+    """
+    Returns where a logical framebuffer is drawn in a window: as large as fits, centered.
+
+    Args:
+        logical_size: The size the game draws at.
+        window_size: The size of the window.
+        integer_scaling: Only use whole scale factors (when the window is at
+            least the logical size), so every logical pixel covers the same
+            number of window pixels.
+
+    Returns:
+        The area of the window the framebuffer is scaled to.
+    """
+    logical_width, logical_height = logical_size
+    window_width, window_height = window_size
+    factor = min(window_width / logical_width, window_height / logical_height)
+    if integer_scaling and factor >= 1:
+        factor = int(factor)
+    width = max(1, min(window_width, round(logical_width * factor)))
+    height = max(1, min(window_height, round(logical_height * factor)))
+    return pygame.Rect((window_width - width) // 2, (window_height - height) // 2, width, height)
+
+
+class Display:
+    """
+    The game window, drawn through a framebuffer of a fixed logical size.
+
+    Everything is drawn onto `surface`, which is always the logical size
+    (config.SCREEN_WIDTH x config.SCREEN_HEIGHT) whatever the window's size,
+    so the UI only ever deals in logical pixels. `present` scales the whole
+    frame to the window once per frame.
+
+    The placement of the scaled frame is worked out only when the window
+    changes size, together with a subsurface of the window to scale into,
+    so presenting a frame is a single transform call with no intermediate
+    surface. When the window is exactly the logical size, `surface` is the
+    window itself and nothing is scaled. Whole scale factors, and any factor
+    of 2 or more, use plain pixel replication; smaller fractional factors
+    use smooth scaling if `smooth` is set.
+    """
+
+    def __init__(self, logical_size: Optional[Tuple[int, int]] = None, window_size: Optional[Tuple[int, int]] = None,
+                 fullscreen: bool = config.FULLSCREEN, integer_scaling: bool = config.INTEGER_SCALING,
+                 smooth: bool = config.SMOOTH_SCALING):
+        """
+        Opens the window.
+
+        Args:
+            logical_size: The size the game draws at; defaults to the configured screen size.
+            window_size: The window size; defaults to config.WINDOW_SIZE, or the logical size.
+            fullscreen: Use the whole screen at its desktop resolution.
+            integer_scaling: Only scale by whole factors, leaving wider borders.
+            smooth: Smooth scaling for fractional factors below 2.
+        """
+        self.logical_size = logical_size or (config.SCREEN_WIDTH, config.SCREEN_HEIGHT)
+        self.fullscreen = fullscreen
+        self.integer_scaling = integer_scaling
+        self.smooth = smooth
+        self.window: Optional[pygame.Surface] = None
+        self.surface: Optional[pygame.Surface] = None
+        self.area: Optional[pygame.Rect] = None
+        self._target: Optional[pygame.Surface] = None
+        self._scale = None
+        self._open(window_size or config.WINDOW_SIZE or self.logical_size)
+
+    def set_logical_size(self, size: Tuple[int, int]) -> None:
+        """Changes the size the game draws at, e.g. after a config profile changed the screen size."""
+        if size != self.logical_size:
+            self.logical_size = size
+            self._layout()
+
+    def handle_event(self, event: pygame.event.Event) -> bool:
+        """
+        Follows the window when the player resizes it.
+
+        Returns:
+            True if the event was a resize.
+        """
+        if event.type != pygame.VIDEORESIZE:
+            return False
+        if not self.fullscreen:
+            self._open(event.size)
+        return True
+
+    def present(self) -> None:
+        """Scales the frame drawn on `surface` to the window and shows it."""
+        if self._scale is not None:
+            self._scale(self.surface, self.area.size, self._target)
+        pygame.display.flip()
+
+    def to_logical(self, position: Tuple[int, int]) -> Tuple[int, int]:
+        """Converts a window position (e.g. of the mouse) to logical pixels."""
+        x, y = position
+        return ((x - self.area.x) * self.logical_size[0] // self.area.width,
+                (y - self.area.y) * self.logical_size[1] // self.area.height)
+
+    def _open(self, window_size: Tuple[int, int]) -> None:
+        if self.fullscreen:
+            self.window = pygame.display.set_mode((0, 0), pygame.FULLSCREEN)
+        else:
+            self.window = pygame.display.set_mode(window_size, pygame.RESIZABLE)
+        self._layout()
+
+    def _layout(self) -> None:
+        # Everything that depends on the window and logical sizes, worked out once per change
+        window_size = self.window.get_size()
+        self.area = fit(self.logical_size, window_size, self.integer_scaling)
+        if window_size == self.logical_size:
+            self.surface = self.window
+            self._target = None
+            self._scale = None
+            return
+        self.surface = pygame.Surface(self.logical_size).convert(self.window)
+        self.window.fill(config.BLACK)
+        self._target = self.window.subsurface(self.area)
+        factor = self.area.width / self.logical_size[0]
+        # Smoothing costs twice as much as replicating pixels, and from 2x up their uneven sizes hardly show
+        if self.smooth and factor != int(factor) and factor < 2 and self.window.get_bitsize() >= 24:
+            self._scale = pygame.transform.smoothscale
+        else:
+            self._scale = pygame.transform.scale
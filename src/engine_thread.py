@@ -0,0 +1,169 @@
+import logging
+import queue
+import random
+import threading
+import time
+from typing import NamedTuple, Optional, Tuple
+from src.game_logic import update_game_state
+from src.game_state import GameData, GameSettings
+from src.grid import CellSet
+
+
+class ItemsSnapshot(NamedTuple):
+    """The party mode items of a GameSnapshot, with the fields the renderer reads from an ItemField."""
+    foods: CellSet
+    power_ups: CellSet
+    kinds: bytes
+
+
+class GameSnapshot(NamedTuple):
+    """
+    An immutable copy of everything needed to draw one tick of a game.
+
+    Snapshots share nothing mutable with the engine, so the render loop can
+    draw one while the engine thread plays the next ticks.
+    """
+    ticks: int
+    positions: Tuple[Tuple[int, int], ...]
+    direction: Tuple[int, int]
+    food_position: Tuple[int, int]
+    poops: CellSet
+    items: Optional[ItemsSnapshot]
+    level: object
+    score: int
+    shit_counter: int
+    game_over: bool
+
+    @classmethod
+    def of(cls, game_data: GameData) -> "GameSnapshot":
+        """Copies the drawable state of a game."""
+        items = game_data.items
+        if items is not None:
+            items = ItemsSnapshot(items.foods.copy(), items.power_ups.copy(), bytes(items.kinds))
+        return cls(game_data.ticks, tuple(game_data.snake.positions), game_data.snake.direction,
+                   game_data.food.position, game_data.poops.copy(), items, game_data.level,
+                   game_data.score, game_data.shit_counter, game_data.game_over)
+
+
+class SnapshotBuffer:
+    """
+    A double buffer of GameSnapshots with one writer and any number of readers.
+
+    The writer fills the back slot and then flips which slot is the front;
+    readers take whatever the front slot holds. A flip is a single reference
+    assignment, so neither side ever takes a lock or waits for the other,
+    and because snapshots are immutable a reader can keep drawing one while
+    the writer moves on.
+    """
+    __slots__ = ("_slots", "_front", "published")
+
+    def __init__(self, first: GameSnapshot):
+        """
+        Args:
+            first: The snapshot readers see until the first publish.
+        """
+        self._slots = [first, first]
+        self._front = 0
+        self.published = 0
+
+    def publish(self, snapshot: GameSnapshot) -> None:
+        """Makes a new snapshot the latest (writer side)."""
+        back = 1 - self._front
+        self._slots[back] = snapshot
+        self._front = back
+        self.published += 1
+
+    def latest(self) -> GameSnapshot:
+        """Returns the most recently published snapshot (reader side)."""
+        return self._slots[self._front]
+
+
+class EngineThread(threading.Thread):
+    """
+    Plays a game on its own thread at the game's tick rate.
+
+    Ticks are scheduled against the monotonic clock rather than after
+    whatever the previous frame cost, so a slow `display.flip` on the render
+    side cannot delay them. After every tick a GameSnapshot of the game is
+    published to `snapshots`. Turns come in through `turn`, which only puts
+    them on a queue; they are applied, and recorded in the replay, right
+    before the next tick.
+
+    The thread owns `game_data` until it has stopped: other threads read
+    snapshots instead, and only touch the game itself after `stop` (or once
+    the game is over and the thread has ended).
+    """
+
+    def __init__(self, game_data: GameData, settings: GameSettings, replay=None, policy=None):
+        """
+        Args:
+            game_data: The game to play, usually just started.
+            settings: Its settings; the speed, or the turbo rate, sets the tick rate.
+            replay: If set, turns are recorded in this Replay.
+            policy: If set, a bot policy from src.bots steers the snake before every tick.
+        """
+        super().__init__(name="snekbyte-engine", daemon=True)
+        self.game_data = game_data
+        self.settings = settings
+        self.replay = replay
+        self.policy = policy
+        self.snapshots = SnapshotBuffer(GameSnapshot.of(game_data))
+        # Ticks that started more than a whole tick late
+        self.late_ticks = 0
+        self._turns: "queue.SimpleQueue[Tuple[int, int]]" = queue.SimpleQueue()
+        self._stop_requested = threading.Event()
+
+    def turn(self, direction: Tuple[int, int]) -> None:
+        """Queues a turn for the next tick. Safe to call from any thread."""
+        self._turns.put(direction)
+
+    def stop(self) -> None:
+        """Stops playing and waits for the thread to end."""
+        self._stop_requested.set()
+        if self.is_alive():
+            self.join()
+
+    def run(self) -> None:
+        game_data = self.game_data
+        settings = self.settings
+        snake = game_data.snake
+        turns = self._turns
+        policy = self.policy
+        rng = random.Random()
+        next_tick = time.perf_counter()
+        try:
+            while not game_data.game_over:
+                speed = settings.tick_rate()
+                if game_data.items is not None:
+                    # Speed power-ups change the tick rate while they last
+                    speed *= game_data.items.speed_factor
+                period = 1.0 / speed
+                next_tick += period
+                delay = next_tick - time.perf_counter()
+                if delay > 0:
+                    if self._stop_requested.wait(delay):
+                        return
+                elif self._stop_requested.is_set():
+                    return
+                elif delay < -period:
+                    # Too far behind to catch up without a burst of ticks: start the schedule again
+                    self.late_ticks += 1
+                    next_tick = time.perf_counter()
+
+                while not turns.empty():
+                    direction = turns.get_nowait()
+                    if self.replay is not None:
+                        self.replay.record_turn(game_data.ticks, direction)
+                    snake.turn(direction)
+                if policy is not None:
+                    direction = policy(game_data, settings, rng)
+                    if direction != snake.direction:
+                        if self.replay is not None:
+                            self.replay.record_turn(game_data.ticks, direction)
+                        snake.turn(direction)
+                update_game_state(game_data, settings)
+                self.snapshots.publish(GameSnapshot.of(game_data))
+        except Exception:
+            logging.exception("The engine thread failed")
+            game_data.game_over = True
+            self.snapshots.publish(GameSnapshot.of(game_data))
@@ -0,0 +1,307 @@
+import random
+from typing import Optional, Tuple
+import numpy as np
+import pygame
+from src import config, game_logic
+from src.game_logic import reset_game_state, update_game_state
+from src.game_state import GameSettings
+from src.rays import RAY_FEATURE_SIZE, RayEncoder
+from src.ui import draw_game_screen
+
+try:
+    import gymnasium
+    from gymnasium import spaces
+except ImportError:  # gymnasium is optional; the env follows its API either way
+    gymnasium = None
+    spaces = None
+
+# Actions are absolute directions, in this order
+ACTIONS = (config.UP, config.DOWN, config.LEFT, config.RIGHT)
+
+# Planes of the occupancy buffer
+OBSTACLE_PLANE = 0  # Walls (the padding around the board) and poops
+BODY_PLANE = 1      # Number of snake segments on each cell
+HEAD_PLANE = 2
+FOOD_PLANE = 3
+NUM_PLANES = 4
+
+OBS_GRID = "grid"
+OBS_EGOCENTRIC = "egocentric"
+OBS_FEATURES = "features"
+OBS_RAYS = "rays"
+OBSERVATION_MODES = (OBS_GRID, OBS_EGOCENTRIC, OBS_FEATURES, OBS_RAYS)
+
+FEATURE_SIZE = 13
+
+REWARD_FOOD = 1.0
+REWARD_DEATH = -1.0
+
+
+class SnekByteEnv(gymnasium.Env if gymnasium is not None else object):
+    """
+    A Gymnasium-style environment that plays SnekByte through `game_logic`.
+
+    The env keeps a padded uint8 occupancy buffer of shape
+    (NUM_PLANES, height + 2 * pad, width + 2 * pad) that is updated
+    incrementally from the cells that changed on each step. Observations are
+    views over that buffer (or, for the feature mode, a preallocated vector
+    filled in place), so a step copies no board data. The flip side is that
+    an observation is only valid until the next `step` or `reset`; callers
+    that keep observations around (replay buffers, for example) must copy them.
+
+    Observation modes:
+        "grid": the whole board, shape (NUM_PLANES, height, width).
+        "egocentric": a (NUM_PLANES, 2r+1, 2r+1) window centred on the head,
+            where r is `crop_radius`. Cells outside the board read as walls.
+        "features": a float32 vector of FEATURE_SIZE hand-crafted features
+            (danger ahead/right/left, heading, food direction, length and
+            Poop-o-meter progress).
+        "rays": a float32 vector of RAY_FEATURE_SIZE egocentric features from
+            src.rays (distances to obstacles and food along eight rays from
+            the head), kept up to date incrementally by a RayEncoder.
+
+    Actions are indices into ACTIONS (up, down, left, right). Turning back on
+    the snake is ignored, exactly as in the game.
+    """
+
+    metadata = {"render_modes": ["rgb_array"], "render_fps": config.SPEED_LEVELS[config.DEFAULT_SPEED_INDEX]}
+
+    def __init__(self, observation_mode: str = OBS_GRID, wonq_mode: bool = config.DEFAULT_WONQ_MODE,
+                 crop_radius: int = 5, max_steps: Optional[int] = None,
+                 render_mode: Optional[str] = None):
+        """
+        Creates the environment.
+
+        Args:
+            observation_mode: One of OBSERVATION_MODES.
+            wonq_mode: Whether the games are played in WoNQ mode.
+            crop_radius: Half-size of the egocentric window.
+            max_steps: Episodes are truncated after this many steps, if set.
+            render_mode: "rgb_array" or None.
+        """
+        if observation_mode not in OBSERVATION_MODES:
+            raise ValueError(f"Unknown observation mode: {observation_mode!r}")
+        self.observation_mode = observation_mode
+        self.settings = GameSettings(wonq_mode=wonq_mode)
+        self.crop_radius = crop_radius
+        self.max_steps = max_steps
+        self.render_mode = render_mode
+
+        self.width = game_logic.GRID_WIDTH
+        self.height = game_logic.GRID_HEIGHT
+        # Wide enough that a head which just left the board still has a full
+        # window and in-bounds neighbours
+        self._pad = max(crop_radius, 1) + 1
+        self._buffer = np.zeros(
+            (NUM_PLANES, self.height + 2 * self._pad, self.width + 2 * self._pad), dtype=np.uint8
+        )
+        # Per-plane views, created once so steps index them without building new views
+        self._obstacles, self._body, self._heads, self._foods = self._buffer
+        self._grid_view = self._readonly(
+            self._buffer[:, self._pad:self._pad + self.height, self._pad:self._pad + self.width]
+        )
+        self._crop_views = {}
+        self._features = np.zeros(FEATURE_SIZE, dtype=np.float32)
+        self._features_view = self._readonly(self._features[:])
+        self._rays = np.zeros(RAY_FEATURE_SIZE, dtype=np.float32)
+        self._rays_view = self._readonly(self._rays[:])
+        self._encoder = None
+
+        self.game_data = None
+        self._steps = 0
+        self._head = None
+        self._food = None
+        self._poop_count = 0
+        self._surface = None
+
+        if spaces is not None:
+            self.action_space = spaces.Discrete(len(ACTIONS))
+            if observation_mode == OBS_FEATURES:
+                self.observation_space = spaces.Box(-1.0, 1.0, (FEATURE_SIZE,), np.float32)
+            elif observation_mode == OBS_RAYS:
+                self.observation_space = spaces.Box(-1.0, 1.0, (RAY_FEATURE_SIZE,), np.float32)
+            else:
+                self.observation_space = spaces.Box(0, 255, self.observation_shape, np.uint8)
+
+    @property
+    def observation_shape(self) -> Tuple[int, ...]:
+        """The shape of the observations returned in the configured mode."""
+        if self.observation_mode == OBS_GRID:
+            return (NUM_PLANES, self.height, self.width)
+        if self.observation_mode == OBS_EGOCENTRIC:
+            size = 2 * self.crop_radius + 1
+            return (NUM_PLANES, size, size)
+        if self.observation_mode == OBS_RAYS:
+            return (RAY_FEATURE_SIZE,)
+        return (FEATURE_SIZE,)
+
+    def reset(self, seed: Optional[int] = None, options: Optional[dict] = None):
+        """
+        Starts a new game.
+
+        Args:
+            seed: Seeds the placement of food for this and, if no later seed
+                is given, following episodes.
+            options: Unused; accepted for API compatibility.
+
+        Returns:
+            A tuple (observation, info).
+        """
+        if seed is not None or not hasattr(self, "_rng"):
+            self._rng = random.Random(seed)
+        self.game_data = reset_game_state(self.settings, self._rng)
+        self._steps = 0
+        if self.observation_mode == OBS_RAYS:
+            self._encoder = RayEncoder(self.game_data)
+
+        self._buffer.fill(0)
+        pad = self._pad
+        obstacles = self._obstacles
+        obstacles[:pad, :] = 1
+        obstacles[-pad:, :] = 1
+        obstacles[:, :pad] = 1
+        obstacles[:, -pad:] = 1
+        for x, y in self.game_data.snake.positions:
+            self._body[y + pad, x + pad] += 1
+        self._head = self.game_data.snake.get_head_position()
+        self._heads[self._head[1] + pad, self._head[0] + pad] = 1
+        self._food = self.game_data.food.position
+        self._foods[self._food[1] + pad, self._food[0] + pad] = 1
+        self._poop_count = 0
+        return self._observation(), self._info()
+
+    def step(self, action: int):
+        """
+        Advances the game by one tick.
+
+        Args:
+            action: Index into ACTIONS of the direction to steer towards.
+
+        Returns:
+            A tuple (observation, reward, terminated, truncated, info).
+        """
+        game_data = self.game_data
+        snake = game_data.snake
+        snake.turn(ACTIONS[action])
+
+        positions = snake.positions
+        previous_length = len(positions)
+        previous_tail = positions[-1]
+        previous_score = game_data.score
+
+        update_game_state(game_data, self.settings)
+        self._steps += 1
+
+        pad = self._pad
+        body = self._body
+        if len(snake.positions) == previous_length:
+            body[previous_tail[1] + pad, previous_tail[0] + pad] -= 1
+        head = snake.get_head_position()
+        body[head[1] + pad, head[0] + pad] += 1
+        self._heads[self._head[1] + pad, self._head[0] + pad] = 0
+        self._heads[head[1] + pad, head[0] + pad] = 1
+        self._head = head
+
+        food = game_data.food.position
+        if food != self._food:
+            self._foods[self._food[1] + pad, self._food[0] + pad] = 0
+            self._foods[food[1] + pad, food[0] + pad] = 1
+            self._food = food
+
+        poops = game_data.poops
+        if len(poops) != self._poop_count:
+            for i in range(self._poop_count, len(poops)):
+                x, y = poops.position_at(i)
+                self._obstacles[y + pad, x + pad] = 1
+            self._poop_count = len(poops)
+
+        terminated = game_data.game_over
+        truncated = not terminated and self.max_steps is not None and self._steps >= self.max_steps
+        if terminated:
+            reward = REWARD_DEATH
+        else:
+            reward = REWARD_FOOD * (game_data.score - previous_score)
+        return self._observation(), reward, terminated, truncated, self._info()
+
+    def render(self, mode: Optional[str] = None):
+        """
+        Renders the current game with the regular game screen.
+
+        Args:
+            mode: Overrides the render mode given at construction. Only
+                "rgb_array" is supported.
+
+        Returns:
+            A (height, width, 3) uint8 array viewing the pixels of the
+            offscreen surface, or None if no render mode is set. The array
+            keeps the surface locked and is only valid until the next call;
+            copy it to keep the frame.
+        """
+        mode = mode or self.render_mode
+        if mode is None:
+            return None
+        if mode != "rgb_array":
+            raise ValueError(f"Unsupported render mode: {mode!r}")
+        if not pygame.font.get_init():
+            pygame.font.init()
+        if self._surface is None or self._surface.get_locked():
+            # A caller still holds the previous frame; draw into a fresh surface instead
+            self._surface = pygame.Surface((config.SCREEN_WIDTH, config.SCREEN_HEIGHT))
+        draw_game_screen(self._surface, self.game_data, self.settings)
+        return pygame.surfarray.pixels3d(self._surface).transpose(1, 0, 2)
+
+    def close(self):
+        """Releases the offscreen render surface."""
+        self._surface = None
+
+    def _observation(self):
+        if self.observation_mode == OBS_GRID:
+            return self._grid_view
+        if self.observation_mode == OBS_EGOCENTRIC:
+            return self._crop_at(self._head)
+        if self.observation_mode == OBS_RAYS:
+            self._encoder.encode(self._rays)
+            return self._rays_view
+        self._fill_features()
+        return self._features_view
+
+    def _crop_at(self, head):
+        """Returns the window around `head`, creating its view the first time it is needed."""
+        view = self._crop_views.get(head)
+        if view is None:
+            top = head[1] + self._pad - self.crop_radius
+            left = head[0] + self._pad - self.crop_radius
+            size = 2 * self.crop_radius + 1
+            view = self._readonly(self._buffer[:, top:top + size, left:left + size])
+            self._crop_views[head] = view
+        return view
+
+    def _fill_features(self):
+        features = self._features
+        obstacles = self._obstacles
+        body = self._body
+        pad = self._pad
+        head_x, head_y = self._head
+        dx, dy = self.game_data.snake.direction
+        # Straight ahead, then a right and a left turn relative to the heading
+        for i, (ox, oy) in enumerate(((dx, dy), (-dy, dx), (dy, -dx))):
+            row, col = head_y + oy + pad, head_x + ox + pad
+            features[i] = 1.0 if obstacles[row, col] or body[row, col] else 0.0
+        for i, direction in enumerate(ACTIONS):
+            features[3 + i] = 1.0 if direction == (dx, dy) else 0.0
+        food_x, food_y = self._food
+        features[7] = 1.0 if food_y < head_y else 0.0
+        features[8] = 1.0 if food_y > head_y else 0.0
+        features[9] = 1.0 if food_x < head_x else 0.0
+        features[10] = 1.0 if food_x > head_x else 0.0
+        features[11] = len(self.game_data.snake.positions) / (self.width * self.height)
+        features[12] = self.game_data.shit_counter / config.WONQ_MODE_POOP_THRESHOLD
+
+    def _info(self) -> dict:
+        return {"score": self.game_data.score, "ticks": self.game_data.ticks,
+                "death_cause": self.game_data.death_cause}
+
+    @staticmethod
+    def _readonly(view):
+        view.flags.writeable = False
+        return view
@@ -2,7 +2,7 @@ import pygame
 from pygame.locals import K_UP, K_DOWN, K_LEFT, K_RIGHT, K_ESCAPE, K_RETURN, K_q
 from typing import Tuple, Optional
 from src.game_state import GameState, GameSettings
-from src.config import SPEED_LEVELS, UP, DOWN, LEFT, RIGHT as DIR_RIGHT
+from src.config import UP, DOWN, LEFT, RIGHT as DIR_RIGHT
 
 def handle_playing_events(event: pygame.event.Event, current_direction: Tuple[int, int]) -> Tuple[Tuple[int, int], bool]:
     """
@@ -1,5 +1,5 @@
 import pygame
-from src import config
+from src import config, sprites
 
 
 class Food:
@@ -10,6 +10,7 @@ class Food:
     eats. The food's position is randomized by the game logic, and this class
     is responsible for drawing it on the screen.
     """
+    __slots__ = ("position",)
 
     def __init__(self, position: tuple[int, int]):
         """
@@ -19,21 +20,16 @@ class Food:
             position: The (x, y) grid coordinates for the food.
         """
         self.position = position
-        self.color = config.FOOD_COLOR
 
-    def draw(self, surface: pygame.Surface):
+    def draw(self, surface: pygame.Surface, theme: str = config.DEFAULT_THEME):
         """
         Draws the food item on the given Pygame surface.
 
         The food is represented as a colored square that fits within a
-        single grid cell.
+        single grid cell, blitted from the sprite atlas.
 
         Args:
             surface: The pygame.Surface to draw the food on.
+            theme: The name of the sprite theme to draw with.
         """
-        r = pygame.Rect(
-            (self.position[0] * config.GRID_SIZE, self.position[1] * config.GRID_SIZE),
-            (config.GRID_SIZE, config.GRID_SIZE),
-        )
-        pygame.draw.rect(surface, self.color, r)
-        pygame.draw.rect(surface, config.GRID_COLOR, r, 1)
\ No newline at end of file
+        surface.blit(*sprites.get_atlas(theme).cell_blit(sprites.KIND_FOOD, self.position))
\ No newline at end of file
@@ -1,111 +1,217 @@
 import random
+from src import config, profiles
 from src.config import GRID_WIDTH, GRID_HEIGHT, RIGHT, WONQ_MODE_POOP_THRESHOLD
-from src.game_state import GameSettings, GameState
+from src.game_state import GameSettings, GameState, GameData, GameEvent
 from src.snake import Snake
 from src.food import Food
-from src.poop import Poop
+from src.poop import PoopField
+from src.items import CLEAN, FOOD, ItemField
+from src.grid import position_table
+from src.levels import PORTAL, WALL, LevelError, load_level
 
+# Values stored in GameData.death_cause when a game ends
+DEATH_WALL = "wall"
+DEATH_SELF = "self"
+DEATH_POOP = "poop"
 
-def reset_game_state(settings: GameSettings):
+
+def _sync_config(changed) -> None:
+    """Picks up board size and poop threshold changes from a reloaded config profile."""
+    global GRID_WIDTH, GRID_HEIGHT, WONQ_MODE_POOP_THRESHOLD
+    GRID_WIDTH = config.GRID_WIDTH
+    GRID_HEIGHT = config.GRID_HEIGHT
+    WONQ_MODE_POOP_THRESHOLD = config.WONQ_MODE_POOP_THRESHOLD
+
+
+profiles.on_change(("GRID_WIDTH", "GRID_HEIGHT", "WONQ_MODE_POOP_THRESHOLD"), _sync_config)
+
+
+def reset_game_state(settings: GameSettings, rng=None):
     """
     Resets the game to its initial state.
 
     Args:
         settings: The GameSettings object.
+        rng: Optional random.Random used for all item placement in this game.
+            Passing a seeded instance makes the game reproducible. Defaults
+            to the global `random` module.
 
     Returns:
-        A dictionary representing the initial state of the game.
+        A GameData representing the initial state of the game.
+
+    Raises:
+        LevelError: If settings.level cannot be loaded or does not fit the board.
     """
+    if rng is None:
+        rng = random
     snake = Snake()
-    poops = []
-    # Ensure the first food is not placed on the snake
-    food_position = _place_item(snake.positions)
+    poops = PoopField(GRID_WIDTH, GRID_HEIGHT)
+    level = None
+    if settings.level is not None:
+        level = load_level(settings.level)
+        if (level.width, level.height) != (GRID_WIDTH, GRID_HEIGHT):
+            raise LevelError(f"Level {level.name!r} is {level.width}x{level.height} cells, "
+                             f"but the board is {GRID_WIDTH}x{GRID_HEIGHT}")
+        snake.positions = [level.start_position(rng)]
+        snake.direction = level.direction
+    # Ensure the first food is not placed on the snake (or a wall)
+    food_position = _place_item(_Occupied(snake, poops, level), rng)
     food = Food(food_position)
 
-    return {
-        "snake": snake,
-        "food": food,
-        "poops": poops,
-        "score": 0,
-        "game_over": False,
-        "shit_counter": 0,
-    }
+    game_data = GameData(snake, food, poops, rng)
+    game_data.level = level
+    if settings.party_mode:
+        game_data.items = ItemField(GRID_WIDTH, GRID_HEIGHT, settings.food_count, settings.power_ups, level)
+        game_data.items.start(game_data)
+    return game_data
+
+
+class _Occupied:
+    """Membership view over the snake, poops and level walls, so placement needs no merged list."""
+    __slots__ = ("snake", "poops", "level")
 
+    def __init__(self, snake, poops, level=None):
+        self.snake = snake
+        self.poops = poops
+        self.level = level
 
-def _place_item(occupied_positions):
+    def __contains__(self, position) -> bool:
+        if position in self.poops or position in self.snake:
+            return True
+        level = self.level
+        return level is not None and level.is_blocked(position[1] * level.width + position[0])
+
+
+def _place_item(occupied_positions, rng=random):
     """
     Finds a random empty position on the grid.
 
     Args:
-        occupied_positions: A list of (x, y) tuples that are already taken.
+        occupied_positions: A container of (x, y) tuples that are already
+            taken; anything that supports `in` works.
+        rng: The source of randomness, either the `random` module or a
+            random.Random instance.
 
     Returns:
         A tuple (x, y) for the new item's position.
     """
-    position = (random.randint(0, GRID_WIDTH - 1), random.randint(0, GRID_HEIGHT - 1))
+    position = (rng.randint(0, GRID_WIDTH - 1), rng.randint(0, GRID_HEIGHT - 1))
     while position in occupied_positions:
-        position = (random.randint(0, GRID_WIDTH - 1), random.randint(0, GRID_HEIGHT - 1))
+        position = (rng.randint(0, GRID_WIDTH - 1), rng.randint(0, GRID_HEIGHT - 1))
     return position
 
 
-def update_game_state(game_data, settings: GameSettings):
+def update_game_state(game_data: GameData, settings: GameSettings):
     """
     Updates the game state for a single frame.
 
     Args:
-        game_data: A dictionary containing the current game state.
+        game_data: The GameData of the current game, updated in place.
         settings: The current GameSettings.
 
     Returns:
-        The updated game_data dictionary.
+        The updated game_data.
     """
-    if game_data["game_over"]:
+    if game_data.game_over:
         return game_data
 
-    snake = game_data["snake"]
-    food = game_data["food"]
-    poops = game_data["poops"]
-    score = game_data["score"]
-    shit_counter = game_data["shit_counter"]
+    snake = game_data.snake
+    food = game_data.food
+    poops = game_data.poops
+    items = game_data.items
+    level = game_data.level
+    listeners = game_data.listeners
+
+    if items is not None:
+        # Unless the snake is growing, its tail leaves its cell on this move
+        positions = snake.positions
+        tail = positions[-1] if len(positions) >= snake.length else None
 
     # Move the snake
     snake.move()
+    if level is not None:
+        _enter_portal(snake, level)
+    game_data.ticks += 1
+    game_data.version += 1
     head = snake.get_head_position()
+    if listeners:
+        game_data.emit(GameEvent.MOVED)
+
+    if items is not None:
+        if tail is not None and tail not in snake and tail not in poops and items.index_of(tail) >= 0:
+            items.release(items.index_of(tail))
+        head_index = items.index_of(head)
+        if head_index >= 0:
+            items.occupy(head_index)
 
     # Check for food collision
     if head == food.position:
-        snake.length += 1
-        score += 1
-
-        if settings.wonq_mode:
-            shit_counter += 1
-            if shit_counter >= WONQ_MODE_POOP_THRESHOLD:
-                # Place poop at the new tail position
-                poop_pos = snake.positions[-1]
-                poops.append(Poop(poop_pos))
-                shit_counter = 0
-
+        _eat(game_data, settings)
         # Place new food
-        occupied_positions = snake.positions + [p.position for p in poops]
-        food.position = _place_item(occupied_positions)
+        if items is None:
+            food.position = _place_item(_Occupied(snake, poops, level), game_data.rng)
+        else:
+            food.position = items.take_free_cell(game_data.rng) or food.position
+        if listeners:
+            game_data.emit(GameEvent.FOOD_EATEN)
+    elif items is not None and head_index >= 0 and items.kinds[head_index]:
+        kind = items.remove(head_index)
+        if kind == FOOD:
+            _eat(game_data, settings)
+            items.spawn(FOOD, game_data.rng, game_data.ticks)
+            if listeners:
+                game_data.emit(GameEvent.FOOD_EATEN)
+        else:
+            items.apply(kind, game_data)
+            if listeners:
+                if kind == CLEAN:
+                    game_data.emit(GameEvent.POOPS_CLEARED)
+                game_data.emit(GameEvent.POWER_UP)
 
     # Check for game-ending collisions
     head_x, head_y = head
     # 1. Wall collision
     if not (0 <= head_x < GRID_WIDTH and 0 <= head_y < GRID_HEIGHT):
-        game_data["game_over"] = True
+        game_data.death_cause = DEATH_WALL
+    # 1b. A wall of the level
+    elif level is not None and level.cells[head_y * GRID_WIDTH + head_x] == WALL:
+        game_data.death_cause = DEATH_WALL
     # 2. Self collision
-    elif head in snake.positions[1:]:
-        game_data["game_over"] = True
+    elif snake.collides_with_self():
+        game_data.death_cause = DEATH_SELF
     # 3. Poop collision (in WonQ mode)
-    elif settings.wonq_mode:
-        for poop in poops:
-            if head == poop.position:
-                game_data["game_over"] = True
-                break
-
-    # Update game_data dictionary before returning
-    game_data["score"] = score
-    game_data["shit_counter"] = shit_counter
-
-    return game_data
\ No newline at end of file
+    elif settings.wonq_mode and head in poops:
+        game_data.death_cause = DEATH_POOP
+
+    if game_data.death_cause is not None:
+        game_data.game_over = True
+        if listeners:
+            game_data.emit(GameEvent.GAME_OVER)
+    elif items is not None:
+        items.advance(game_data, settings)
+
+    return game_data
+
+
+def _enter_portal(snake: Snake, level) -> None:
+    """Moves the head to the paired portal if it just moved onto a portal of the level."""
+    head_x, head_y = snake.positions[0]
+    if 0 <= head_x < level.width and 0 <= head_y < level.height:
+        index = head_y * level.width + head_x
+        if level.cells[index] == PORTAL:
+            snake.warp_head(position_table(level.width, level.height)[level.portals[index]])
+
+
+def _eat(game_data: GameData, settings: GameSettings) -> None:
+    """Grows the snake and scores a meal, dropping a poop in WonQ mode when one is due."""
+    game_data.snake.length += 1
+    game_data.score += 1
+
+    if settings.wonq_mode:
+        game_data.shit_counter += 1
+        if game_data.shit_counter >= WONQ_MODE_POOP_THRESHOLD:
+            # Place poop at the new tail position
+            game_data.poops.add(game_data.snake.positions[-1])
+            game_data.shit_counter = 0
+            if game_data.listeners:
+                game_data.emit(GameEvent.POOP_DROPPED)
@@ -1,13 +1,51 @@
 import pygame
+import os
 import sys
+import time
 import logging
+import random
+from collections import deque
+from typing import Callable, Optional
 from src import config
 from src.game_state import GameState, GameSettings
-from src.game_logic import reset_game_state, update_game_state
-from src.ui import draw_game_screen, draw_main_menu, draw_settings_menu, draw_game_over_menu
+from src.ui import (clear_caches, draw_game_screen, draw_main_menu, draw_settings_menu, draw_game_over_menu,
+                    draw_snapshot, draw_trail)
 from src.event_handler import handle_playing_events, handle_menu_events, handle_settings_menu_events
+from src.stats_store import StatsStore, RunRecord
+from src.replay import Replay
+from src.profiles import ConfigWatcher
+from src.telemetry import Telemetry, FrameStats
+from src.diagnostics import MemoryProfiler
+from src.display import Display
+from src.engine_thread import EngineThread
+from src.turbo import TickClock, play_ticks
+from src.asset_cache import load_assets, save_assets
 
-def run_game() -> None:
+def apply_config_changes(config_watcher: ConfigWatcher, display: Display, game_settings: GameSettings) -> None:
+    """
+    Applies a reloaded config profile between games.
+
+    Caches that depend on the changed settings are dropped by the modules
+    that own them; this only resizes the framebuffer if the screen size
+    changed and keeps the selected speed within the speed levels.
+
+    Args:
+        config_watcher: The watcher holding the reloaded profile.
+        display: The game's Display.
+        game_settings: The settings of the session, updated in place.
+    """
+    changed = config_watcher.apply_pending()
+    if changed & {"SCREEN_WIDTH", "SCREEN_HEIGHT"}:
+        display.set_logical_size((config.SCREEN_WIDTH, config.SCREEN_HEIGHT))
+    if game_settings.speed_index >= len(config.SPEED_LEVELS):
+        game_settings.speed_index = len(config.SPEED_LEVELS) - 1
+
+def run_game(game_settings: Optional[GameSettings] = None, replay_dir: Optional[str] = config.REPLAY_DIR,
+             config_watcher: Optional[ConfigWatcher] = None, telemetry: Optional[Telemetry] = None,
+             profiler: Optional[MemoryProfiler] = None, display: Optional[Display] = None,
+             render_thread: bool = config.RENDER_THREAD, bot: Optional[Callable] = None,
+             asset_cache_dir: Optional[str] = config.ASSET_CACHE_DIR,
+             on_first_frame: Optional[Callable[[], None]] = None) -> None:
     """
     The main function that initializes Pygame, controls the game loop, and
     manages state transitions.
@@ -16,16 +54,59 @@ def run_game() -> None:
     switching between game states like the main menu, settings, playing, and
     game over screen. It delegates event handling and rendering to other
     modules based on the current game state.
+
+    Args:
+        game_settings: The initial settings, e.g. resolved from the command
+            line. Defaults to GameSettings().
+        replay_dir: If set, a replay of every finished game is saved here.
+        config_watcher: If set, its profile file is watched and changes are
+            applied whenever no game is being played.
+        telemetry: If set, game events and frame time statistics are recorded to it.
+        profiler: If set, the allocations of every tick and frame are
+            measured, and a memory report is written after every game.
+        display: The window to play in, drawn at the logical screen size
+            and scaled to fit. Defaults to a Display opened from config.
+        render_thread: Play each game on an EngineThread at the tick rate,
+            while this thread handles events and draws the latest snapshot
+            at up to config.RENDER_FPS, so slow frames cannot delay ticks.
+            The profiler's per-tick sections are not measured in this mode.
+        bot: If set, a policy from src.bots steers the snake instead of the
+            keyboard, e.g. to show a bot off in turbo mode.
+        asset_cache_dir: If set, the main menu, the grid background and the
+            sprite atlas are loaded from the cache file of the current
+            settings in this directory instead of being drawn; when there is
+            none, they are saved there after the first frame.
+        on_first_frame: If set, called once the first frame is on the screen.
+
+    In turbo mode (game_settings.turbo ticks per second) every frame plays
+    all the ticks owed since the last one, draws the latest state with a
+    trail of where the head went in between, and waits for the next frame
+    at config.RENDER_FPS. Key presses are queued and applied one per tick.
     """
     pygame.init()
-    screen = pygame.display.set_mode((config.SCREEN_WIDTH, config.SCREEN_HEIGHT))
+    clear_caches()
+    if display is None:
+        display = Display()
     pygame.display.set_caption("SnekByte")
     clock = pygame.time.Clock()
+    assets_cached = load_assets(display.logical_size, asset_cache_dir)
+    first_frame = True
 
-    game_settings = GameSettings()
+    if game_settings is None:
+        game_settings = GameSettings()
     current_state = GameState.MAIN_MENU
+    stats_store = StatsStore()
 
-    game_data = {}
+    game_data = None
+    replay = None
+    engine = None
+    drawn = None
+    # Turbo mode: the turns waiting for a tick, the head positions since the last frame, and the tick schedule
+    pending_turns = deque()
+    trail = []
+    tick_clock = TickClock()
+    bot_rng = random.Random()
+    frame_stats = FrameStats(telemetry) if telemetry is not None else None
 
     # Menu state variables
     main_menu_selection = 0
@@ -33,21 +114,37 @@ def run_game() -> None:
     game_over_menu_selection = 0
 
     while current_state != GameState.QUITTING:
+        frame_start = time.perf_counter()
         events = pygame.event.get()
 
         for event in events:
             if event.type == pygame.QUIT:
                 current_state = GameState.QUITTING
                 break
+            if display.handle_event(event):
+                drawn = None
         if current_state == GameState.QUITTING:
             break
 
+        if config_watcher is not None and config_watcher.poll() and current_state != GameState.PLAYING:
+            apply_config_changes(config_watcher, display, game_settings)
+        # Everything is drawn at the logical size; resizing the window may replace this surface
+        screen = display.surface
+
         if current_state == GameState.MAIN_MENU:
             for event in events:
                 main_menu_selection, confirmed = handle_menu_events(event, 3, main_menu_selection)
                 if confirmed:
                     if main_menu_selection == 0: # Play
-                        game_data = reset_game_state(game_settings)
+                        replay = Replay.new(game_settings)
+                        game_data = replay.start_game()
+                        if telemetry is not None:
+                            telemetry.watch_game(game_data, game_settings, replay.seed)
+                        pending_turns.clear()
+                        tick_clock.reset()
+                        if render_thread:
+                            engine = EngineThread(game_data, game_settings, replay, policy=bot)
+                            engine.start()
                         current_state = GameState.PLAYING
                     elif main_menu_selection == 1: # Settings
                         current_state = GameState.SETTINGS
@@ -55,7 +152,7 @@ def run_game() -> None:
                         current_state = GameState.QUITTING
             
             if current_state != GameState.QUITTING:
-                draw_main_menu(screen, main_menu_selection)
+                draw_main_menu(screen, main_menu_selection, stats_store.leaderboard(game_settings.wonq_mode))
 
         elif current_state == GameState.SETTINGS:
             for event in events:
@@ -69,36 +166,116 @@ def run_game() -> None:
                 draw_settings_menu(screen, game_settings, settings_menu_selection)
 
         elif current_state == GameState.PLAYING:
-            if game_data.get("game_over"):
+            if engine is not None and engine.snapshots.latest().game_over and engine.snapshots.latest() is drawn:
+                # The engine thread has finished the game and its last tick is on screen; game_data is ours again
+                engine.join()
+                engine = None
+            if engine is None and game_data.game_over:
+                 stats_store.record_run(RunRecord.from_game(game_data, game_settings))
+                 if replay_dir:
+                     os.makedirs(replay_dir, exist_ok=True)
+                     replay.save_in_background(os.path.join(replay_dir, f"{time.strftime('%Y%m%d-%H%M%S')}-{replay.seed}.json"))
+                 if profiler is not None:
+                     profiler.game_boundary()
                  current_state = GameState.GAME_OVER
                  continue
 
             for event in events:
-                new_direction, quit_game = handle_playing_events(event, game_data["snake"].direction)
+                if engine is not None:
+                    direction = engine.snapshots.latest().direction
+                elif pending_turns:
+                    # Turbo mode: the turn pressed before this one has not been played yet
+                    direction = pending_turns[-1]
+                else:
+                    direction = game_data.snake.direction
+                new_direction, quit_game = handle_playing_events(event, direction)
                 if quit_game:
                     current_state = GameState.QUITTING
                     break
-                if event.type == pygame.KEYDOWN:
-                    game_data["snake"].turn(new_direction)
+                if event.type == pygame.KEYDOWN and bot is None:
+                    if engine is not None:
+                        engine.turn(new_direction)
+                    elif game_settings.turbo:
+                        if new_direction != direction:
+                            pending_turns.append(new_direction)
+                    else:
+                        replay.record_turn(game_data.ticks, new_direction)
+                        game_data.snake.turn(new_direction)
             
             if current_state == GameState.QUITTING:
                 break
             
-            game_data = update_game_state(game_data, game_settings)
-            draw_game_screen(screen, game_data, game_settings)
+            if engine is not None:
+                snapshot = engine.snapshots.latest()
+                if snapshot is drawn:
+                    # Nothing new since the last frame: keep it on screen
+                    clock.tick(config.RENDER_FPS)
+                    continue
+                draw_snapshot(screen, snapshot, game_settings)
+                drawn = snapshot
+            elif game_settings.turbo:
+                rate = game_settings.tick_rate()
+                if game_data.items is not None:
+                    rate *= game_data.items.speed_factor
+                trail.clear()
+                play_ticks(game_data, game_settings, tick_clock.due(rate), pending_turns, replay, bot, bot_rng, trail)
+                draw_game_screen(screen, game_data, game_settings)
+                draw_trail(screen, trail, game_data.snake)
+            elif profiler is None:
+                play_ticks(game_data, game_settings, 1, pending_turns, replay, bot, bot_rng)
+                draw_game_screen(screen, game_data, game_settings)
+            else:
+                with profiler.section("update_game_state"):
+                    play_ticks(game_data, game_settings, 1, pending_turns, replay, bot, bot_rng)
+                with profiler.section("draw_game_screen"):
+                    draw_game_screen(screen, game_data, game_settings)
+                profiler.tick()
 
         elif current_state == GameState.GAME_OVER:
             for event in events:
                 game_over_menu_selection, confirmed = handle_menu_events(event, 2, game_over_menu_selection)
                 if confirmed:
                     if game_over_menu_selection == 0: # Retry
-                        game_data = reset_game_state(game_settings)
+                        replay = Replay.new(game_settings)
+                        game_data = replay.start_game()
+                        if telemetry is not None:
+                            telemetry.watch_game(game_data, game_settings, replay.seed)
+                        pending_turns.clear()
+                        tick_clock.reset()
+                        if render_thread:
+                            engine = EngineThread(game_data, game_settings, replay, policy=bot)
+                            engine.start()
                         current_state = GameState.PLAYING
                     elif game_over_menu_selection == 1: # Main Menu
                         current_state = GameState.MAIN_MENU
             
             if current_state != GameState.QUITTING:
-                draw_game_over_menu(screen, game_data.get("score", 0), game_over_menu_selection)
+                draw_game_over_menu(screen, game_data.score, game_over_menu_selection,
+                                    stats_store.leaderboard(game_settings.wonq_mode))
         
-        pygame.display.flip()
-        clock.tick(game_settings.get_speed())
\ No newline at end of file
+        display.present()
+        if first_frame:
+            first_frame = False
+            if on_first_frame is not None:
+                on_first_frame()
+            if asset_cache_dir is not None and not assets_cached:
+                try:
+                    save_assets(display.logical_size, game_settings.theme, asset_cache_dir)
+                except OSError as e:
+                    logging.warning("Could not save the asset cache: %s", e)
+        if frame_stats is not None and current_state == GameState.PLAYING:
+            frame_stats.add(time.perf_counter() - frame_start)
+        speed = game_settings.get_speed()
+        if engine is not None or (current_state == GameState.PLAYING and game_settings.turbo):
+            # The engine thread or the turbo tick clock keeps the tick rate; this loop only draws
+            speed = config.RENDER_FPS
+        elif current_state == GameState.PLAYING and game_data.items is not None:
+            # Speed power-ups change the tick rate while they last
+            speed *= game_data.items.speed_factor
+        clock.tick(speed)
+
+    if engine is not None:
+        engine.stop()
+    if frame_stats is not None:
+        frame_stats.report()
+    stats_store.close()
\ No newline at end of file
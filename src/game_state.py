@@ -1,6 +1,15 @@
+from collections import deque
 from enum import Enum, auto
-from dataclasses import dataclass
-from src.config import SPEED_LEVELS, DEFAULT_SPEED_INDEX, DEFAULT_WONQ_MODE
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Any, Callable, Dict, List, Optional
+from src import config
+
+if TYPE_CHECKING:
+    from src.snake import Snake
+    from src.food import Food
+    from src.poop import PoopField
+    from src.items import ItemField
+    from src.levels import Level
 
 class GameState(Enum):
     """Enumeration for the different game states."""
@@ -12,19 +21,234 @@ class GameState(Enum):
 
 @dataclass
 class GameSettings:
-    """Dataclass to hold game settings."""
-    speed_index: int = DEFAULT_SPEED_INDEX
-    wonq_mode: bool = DEFAULT_WONQ_MODE
+    """Dataclass to hold game settings. Defaults are read from config when the settings are created."""
+    speed_index: int = field(default_factory=lambda: config.DEFAULT_SPEED_INDEX)
+    wonq_mode: bool = field(default_factory=lambda: config.DEFAULT_WONQ_MODE)
+    theme: str = field(default_factory=lambda: config.DEFAULT_THEME)
+    food_count: int = field(default_factory=lambda: config.PARTY_FOOD_COUNT)
+    power_ups: bool = field(default_factory=lambda: config.PARTY_POWER_UPS)
+    level: Optional[str] = field(default_factory=lambda: config.LEVEL)
+    turbo: int = field(default_factory=lambda: config.TURBO_TPS)
+
+    @property
+    def party_mode(self) -> bool:
+        """True if the game has more than one food or power-ups, which game_data.items then holds."""
+        return self.food_count > 1 or self.power_ups
 
     def get_speed(self) -> int:
         """Returns the current speed (FPS) based on the index."""
-        return SPEED_LEVELS[self.speed_index]
+        return config.SPEED_LEVELS[self.speed_index]
+
+    def __setattr__(self, name, value):
+        # Checked on every assignment, so settings changed after creation (e.g. by the CLI) are caught too
+        if name == "turbo" and value < 0:
+            raise ValueError(f"The turbo rate must be positive, or 0 for off: {value}")
+        super().__setattr__(name, value)
+
+    def tick_rate(self) -> int:
+        """Returns the ticks played per second: the turbo rate in turbo mode, otherwise the speed."""
+        return self.turbo if self.turbo > 0 else self.get_speed()
 
     def change_speed(self, delta: int):
         """Changes the speed index, wrapping around if necessary."""
-        num_levels = len(SPEED_LEVELS)
+        num_levels = len(config.SPEED_LEVELS)
         self.speed_index = (self.speed_index + delta + num_levels) % num_levels
 
     def toggle_wonq_mode(self):
         """Toggles the WonQ mode on or off."""
-        self.wonq_mode = not self.wonq_mode
\ No newline at end of file
+        self.wonq_mode = not self.wonq_mode
+
+
+class GameEvent(Enum):
+    """Changes that GameData announces to its listeners."""
+    MOVED = auto()
+    FOOD_EATEN = auto()
+    POOP_DROPPED = auto()
+    GAME_OVER = auto()
+    POWER_UP = auto()
+    POOPS_CLEARED = auto()  # The clean power-up removed every poop; sent before its POWER_UP
+
+
+class GameData:
+    """
+    The state of a single game.
+
+    A typed, slotted replacement for the old game_data dictionary. For
+    compatibility it still supports `game_data["score"]`-style access and
+    `get`, but the engine and renderers use the attributes directly.
+
+    `version` increases whenever the state changes, so renderers and caches
+    can key on it and skip work when nothing changed. Listeners registered
+    with `subscribe` are called with a GameEvent and the GameData itself.
+
+    In party mode, `items` holds the extra foods and the power-ups; it is
+    None otherwise. `level` is the Level map the game is played on, or None
+    for the open board.
+
+    `trackers` holds the helpers and caches the bots keep for the game
+    (e.g. the FreeRegions of the cautious policy) by name, so they are
+    created once per game and go away with it.
+    """
+    __slots__ = ("snake", "food", "poops", "score", "game_over", "shit_counter",
+                 "ticks", "death_cause", "rng", "version", "items", "level", "listeners", "trackers")
+
+    snake: "Snake"
+    food: "Food"
+    poops: "PoopField"
+    score: int
+    game_over: bool
+    shit_counter: int
+    ticks: int
+    death_cause: Optional[str]
+    rng: Any
+    version: int
+    items: Optional["ItemField"]
+    level: Optional["Level"]
+    listeners: List[Callable[["GameEvent", "GameData"], None]]
+    trackers: Dict[str, Any]
+
+    _FIELDS = frozenset(__slots__) - {"listeners", "trackers"}
+
+    def __init__(self, snake: "Snake", food: "Food", poops: "PoopField", rng: Any):
+        """
+        Creates the state of a new game.
+
+        Args:
+            snake: The snake.
+            food: The food.
+            poops: The (usually empty) poops.
+            rng: The random number source used to place items.
+        """
+        self.snake = snake
+        self.food = food
+        self.poops = poops
+        self.score = 0
+        self.game_over = False
+        self.shit_counter = 0
+        self.ticks = 0
+        self.death_cause = None
+        self.rng = rng
+        self.version = 0
+        self.items = None
+        self.level = None
+        self.listeners = []
+        self.trackers = {}
+
+    def subscribe(self, listener: Callable[[GameEvent, "GameData"], None]) -> None:
+        """Registers a listener for the events of this game."""
+        self.listeners.append(listener)
+
+    def unsubscribe(self, listener: Callable[[GameEvent, "GameData"], None]) -> None:
+        """Removes a listener registered with `subscribe`."""
+        self.listeners.remove(listener)
+
+    def emit(self, event: GameEvent) -> None:
+        """Calls every listener with the given event."""
+        for listener in self.listeners:
+            listener(event, self)
+
+    def __getitem__(self, key: str):
+        if key not in self._FIELDS:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def __setitem__(self, key: str, value) -> None:
+        if key not in self._FIELDS:
+            raise KeyError(key)
+        setattr(self, key, value)
+        if key != "version":
+            self.version += 1
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._FIELDS
+
+    def get(self, key: str, default=None):
+        """Returns the named field, or `default` if there is no such field."""
+        return getattr(self, key) if key in self._FIELDS else default
+
+
+class BoardFollower:
+    """
+    Follows the cells that the snake and the poops cover as `update_game_state` plays a game.
+
+    Trackers that keep something per cell up to date (the Zobrist hash, the
+    ray index, the free regions) subclass this and override the hooks, which
+    the follower calls from the game's events with cell indices (negative
+    off the board, see `cell_index`):
+
+        _tail_left(index): a segment left a cell; called for every segment
+            a move dropped, before the move's `_head_entered`.
+        _head_entered(index, previous): the head moved onto a cell from `previous`.
+        _poop_dropped(index): a new poop covers a cell.
+        _poops_cleared(indices): the clean power-up removed these poops.
+
+    Other events go to `_on_other_event`. A move does not say which tail
+    cell it freed, so the follower keeps its own queue of the snake's cells
+    (`_segments`, head first) and of the poop cells (`_poops`).
+
+    Only changes made by the engine are followed; code that edits the game
+    directly (e.g. replaces `snake.positions`) must create a new follower.
+    """
+
+    def __init__(self, game_data: GameData):
+        """
+        Reads the cells of a game and subscribes to its events.
+
+        Args:
+            game_data: The GameData to follow.
+        """
+        self.game_data = game_data
+        self.width = game_data.poops.width
+        self.height = game_data.poops.height
+        self._segments = deque(self.cell_index(position) for position in game_data.snake.positions)
+        self._poops = list(game_data.poops.indices)
+        game_data.subscribe(self._on_event)
+
+    def close(self) -> None:
+        """Stops following the game."""
+        self.game_data.unsubscribe(self._on_event)
+
+    def cell_index(self, position) -> int:
+        """Returns the cell index of a position, or -1 off the board."""
+        x, y = position
+        if 0 <= x < self.width and 0 <= y < self.height:
+            return y * self.width + x
+        return -1
+
+    def _tail_left(self, index: int) -> None:
+        pass
+
+    def _head_entered(self, index: int, previous: int) -> None:
+        pass
+
+    def _poop_dropped(self, index: int) -> None:
+        pass
+
+    def _poops_cleared(self, indices: List[int]) -> None:
+        pass
+
+    def _on_other_event(self, event: GameEvent, game_data: GameData) -> None:
+        pass
+
+    def _on_event(self, event: GameEvent, game_data: GameData) -> None:
+        if event is GameEvent.MOVED:
+            segments = self._segments
+            positions = game_data.snake.positions
+            previous = segments[0]
+            # Unless the snake grew, the move dropped the last segment
+            while len(segments) >= len(positions):
+                self._tail_left(segments.pop())
+            head = self.cell_index(positions[0])
+            segments.appendleft(head)
+            self._head_entered(head, previous)
+        elif event is GameEvent.POOP_DROPPED:
+            # A new poop is appended at the end of the packed array (unless its cell already had one)
+            if len(game_data.poops) > len(self._poops):
+                index = game_data.poops.indices[-1]
+                self._poops.append(index)
+                self._poop_dropped(index)
+        elif event is GameEvent.POOPS_CLEARED:
+            poops, self._poops = self._poops, []
+            self._poops_cleared(poops)
+        else:
+            self._on_other_event(event, game_data)
@@ -0,0 +1,172 @@
+from array import array
+from functools import lru_cache
+from typing import Iterator, List, Tuple
+
+
+def cell_index(x: int, y: int, width: int) -> int:
+    """Returns the row-major index of grid cell (x, y) on a board `width` cells wide."""
+    return y * width + x
+
+
+@lru_cache(maxsize=8)
+def position_table(width: int, height: int) -> List[Tuple[int, int]]:
+    """
+    Returns the (x, y) tuple of every cell, indexed by cell index.
+
+    The table is built once per board size, so converting an index back to
+    a position never allocates a new tuple.
+    """
+    return [(x, y) for y in range(height) for x in range(width)]
+
+
+# Order of the directions in a neighbor table: up, down, left, right
+NEIGHBOR_DIRECTIONS = ((0, -1), (0, 1), (-1, 0), (1, 0))
+
+
+@lru_cache(maxsize=8)
+def neighbor_table(width: int, height: int) -> array:
+    """
+    Returns the index of each cell's neighbor in every direction (-1 off the board).
+
+    The neighbor of cell `i` in direction slot `d` (an index into
+    NEIGHBOR_DIRECTIONS) is at `table[4 * i + d]`. The table is built once
+    per board size.
+    """
+    table = array("i")
+    for y in range(height):
+        for x in range(width):
+            for dx, dy in NEIGHBOR_DIRECTIONS:
+                nx, ny = x + dx, y + dy
+                table.append(ny * width + nx if 0 <= nx < width and 0 <= ny < height else -1)
+    return table
+
+
+def index_typecode(cell_count: int) -> str:
+    """Returns the smallest unsigned array typecode that can hold every cell index of a board."""
+    return "H" if cell_count <= 0x10000 else "I"
+
+
+class CellSet:
+    """
+    A set of grid cells stored as a packed array of cell indices.
+
+    Membership, insertion and removal are O(1) through a per-cell slot table
+    that records where each cell sits in the packed array (-1 if absent).
+    Removal swaps the last cell into the freed slot, so iteration follows
+    insertion order only until the first removal.
+    """
+    __slots__ = ("width", "height", "indices", "_slots", "_positions")
+
+    def __init__(self, width: int, height: int):
+        """
+        Creates an empty set for a board of the given size.
+
+        Args:
+            width: The board width in cells.
+            height: The board height in cells.
+        """
+        self.width = width
+        self.height = height
+        self.indices = array(index_typecode(width * height))
+        self._slots = array("i", [-1]) * (width * height)
+        self._positions = position_table(width, height)
+
+    def index_of(self, position) -> int:
+        """Returns the cell index of a position, or -1 if it is off the board."""
+        x, y = position
+        if 0 <= x < self.width and 0 <= y < self.height:
+            return y * self.width + x
+        return -1
+
+    def add(self, position) -> bool:
+        """
+        Adds a cell to the set.
+
+        Args:
+            position: The (x, y) grid position of the cell.
+
+        Returns:
+            True if the cell was added, False if it was already present.
+        """
+        index = self.index_of(position)
+        if index < 0:
+            raise ValueError(f"Position {position} is off the board")
+        return self.add_index(index)
+
+    def add_index(self, index: int) -> bool:
+        """Adds a cell by index. Returns False if it was already present."""
+        if self._slots[index] >= 0:
+            return False
+        self._slots[index] = len(self.indices)
+        self.indices.append(index)
+        return True
+
+    def discard(self, position) -> bool:
+        """
+        Removes a cell from the set if it is present.
+
+        Returns:
+            True if the cell was removed.
+        """
+        index = self.index_of(position)
+        return index >= 0 and self.discard_index(index)
+
+    def discard_index(self, index: int) -> bool:
+        """Removes a cell by index. Returns False if it was not present."""
+        slot = self._slots[index]
+        if slot < 0:
+            return False
+        last = self.indices.pop()
+        if last != index:
+            self.indices[slot] = last
+            self._slots[last] = slot
+        self._slots[index] = -1
+        return True
+
+    def contains_index(self, index: int) -> bool:
+        """Returns True if the cell with the given index is in the set."""
+        return self._slots[index] >= 0
+
+    def clear(self) -> None:
+        """Removes every cell."""
+        slots = self._slots
+        for index in self.indices:
+            slots[index] = -1
+        del self.indices[:]
+
+    def copy(self) -> "CellSet":
+        """Returns an independent copy of the same class; copying is two buffer copies."""
+        clone = self.__class__.__new__(self.__class__)
+        clone.width = self.width
+        clone.height = self.height
+        clone.indices = self.indices[:]
+        clone._slots = self._slots[:]
+        clone._positions = self._positions
+        return clone
+
+    def position_at(self, i: int) -> Tuple[int, int]:
+        """Returns the position of the i-th cell in the packed array."""
+        return self._positions[self.indices[i]]
+
+    def positions(self) -> Iterator[Tuple[int, int]]:
+        """Iterates over the (x, y) positions of the cells."""
+        positions = self._positions
+        for index in self.indices:
+            yield positions[index]
+
+    def __contains__(self, position) -> bool:
+        index = self.index_of(position)
+        return index >= 0 and self._slots[index] >= 0
+
+    def __len__(self) -> int:
+        return len(self.indices)
+
+    def __iter__(self) -> Iterator[Tuple[int, int]]:
+        return self.positions()
+
+    def __eq__(self, other) -> bool:
+        if isinstance(other, CellSet):
+            return set(self.indices) == set(other.indices)
+        return NotImplemented
+
+    __hash__ = None
@@ -0,0 +1,226 @@
+import heapq
+from typing import Dict, List, Optional, Tuple
+from src import config
+from src.grid import CellSet, position_table
+from src.state_hash import ITEMS, zobrist_keys
+
+# What lies on a cell, as stored in ItemField.kinds
+EMPTY = 0
+FOOD = 1
+FAST = 2
+SLOW = 3
+CLEAN = 4
+
+# Power-up kinds by name, as used in config.POWER_UP_SPEED_FACTORS and config.POWER_UP_COLORS
+POWER_UP_NAMES = {FAST: "fast", SLOW: "slow", CLEAN: "clean"}
+
+# What a timer does when it is due
+_EXPIRE = 0      # Remove the power-up on a cell
+_END_EFFECT = 1  # End a speed power-up
+_SPAWN = 2       # Spawn the next power-up
+
+
+class ItemField:
+    """
+    The extra foods and the power-ups of a party mode game.
+
+    `kinds` holds what lies on every cell, so finding out whether the head
+    reached an item is a single lookup, however many items there are.
+    `free` is every cell that is not covered by the snake, a poop, the main
+    food, an item or a wall or portal of the level. The engine keeps it up to date as the snake moves, with
+    constant work per tick, and spawning draws a uniformly random cell from
+    it in O(1).
+
+    Expiring power-ups and ending effects are timers on a heap ordered by
+    tick. A tick only looks at the earliest timer; timers of power-ups that
+    were eaten before they expired are recognized by their serial number and
+    skipped when they come due.
+
+    `hash` is the XOR of the Zobrist keys of the items on the board, kept up
+    to date as they spawn and disappear (see state_hash.StateHasher).
+    """
+    __slots__ = ("width", "height", "food_count", "power_ups_enabled", "kinds", "foods", "power_ups",
+                 "free", "effects", "level", "hash", "_keys", "_timers", "_serials", "_serial")
+
+    def __init__(self, width: int, height: int, food_count: int = config.PARTY_FOOD_COUNT,
+                 power_ups: bool = config.PARTY_POWER_UPS, level=None):
+        """
+        Creates an empty field for a board of the given size.
+
+        Args:
+            width: The board width in cells.
+            height: The board height in cells.
+            food_count: Foods on the board at once, counting the main food.
+            power_ups: Whether power-ups spawn.
+            level: The Level the game is played on, whose walls and portals never become free.
+        """
+        self.width = width
+        self.height = height
+        self.food_count = food_count
+        self.power_ups_enabled = power_ups
+        self.kinds = bytearray(width * height)
+        self.foods = CellSet(width, height)
+        self.power_ups = CellSet(width, height)
+        self.free = CellSet(width, height)
+        # Active speed power-ups, and the tick each one ends
+        self.effects: Dict[int, int] = {}
+        self.level = level
+        self.hash = 0
+        self._keys = zobrist_keys(width, height)
+        self._timers: List[Tuple[int, int, int, int]] = []
+        # Serial number of the expiry timer of the power-up on each cell
+        self._serials: Dict[int, int] = {}
+        self._serial = 0
+
+    def start(self, game_data) -> None:
+        """
+        Fills the free cells from a new game's board and spawns the extra foods.
+
+        Args:
+            game_data: The GameData of the game that is starting.
+        """
+        snake = game_data.snake
+        poops = game_data.poops
+        food = game_data.food.position
+        free = self.free
+        level = self.level
+        for index, position in enumerate(position_table(self.width, self.height)):
+            if position != food and position not in snake and position not in poops:
+                if level is None or not level.is_blocked(index):
+                    free.add_index(index)
+        for _ in range(self.food_count - 1):
+            self.spawn(FOOD, game_data.rng, game_data.ticks)
+        if self.power_ups_enabled:
+            self._schedule(game_data.ticks + config.POWER_UP_INTERVAL, _SPAWN, 0)
+
+    def index_of(self, position) -> int:
+        """Returns the cell index of a position, or -1 if it is off the board."""
+        x, y = position
+        if 0 <= x < self.width and 0 <= y < self.height:
+            return y * self.width + x
+        return -1
+
+    def spawn(self, kind: int, rng, tick: int) -> int:
+        """
+        Puts an item on a random free cell.
+
+        Args:
+            kind: FOOD or a power-up kind.
+            rng: The game's random number source.
+            tick: The current tick, from which a power-up's lifetime counts.
+
+        Returns:
+            The cell index of the item, or -1 if no cell is free.
+        """
+        free = self.free
+        if not len(free):
+            return -1
+        index = free.indices[rng.randrange(len(free))]
+        free.discard_index(index)
+        self.kinds[index] = kind
+        self.hash ^= self._keys.key(ITEMS + kind, index)
+        if kind == FOOD:
+            self.foods.add_index(index)
+        else:
+            self.power_ups.add_index(index)
+            self._serials[index] = self._schedule(tick + config.POWER_UP_LIFETIME, _EXPIRE, index)
+        return index
+
+    def take_free_cell(self, rng) -> Optional[Tuple[int, int]]:
+        """Removes a random cell from the free cells, for the main food. Returns None if none is free."""
+        free = self.free
+        if not len(free):
+            return None
+        index = free.indices[rng.randrange(len(free))]
+        free.discard_index(index)
+        return position_table(self.width, self.height)[index]
+
+    def remove(self, index: int) -> int:
+        """
+        Removes the item on a cell, e.g. because the head reached it.
+
+        The cell does not become free; the caller frees it if nothing else covers it.
+
+        Returns:
+            The kind of the removed item (EMPTY if there was none).
+        """
+        kind = self.kinds[index]
+        if kind == FOOD:
+            self.foods.discard_index(index)
+        elif kind != EMPTY:
+            self.power_ups.discard_index(index)
+            del self._serials[index]
+        if kind != EMPTY:
+            self.hash ^= self._keys.key(ITEMS + kind, index)
+        self.kinds[index] = EMPTY
+        return kind
+
+    def occupy(self, index: int) -> None:
+        """Marks a cell as covered, e.g. by the head or a new poop."""
+        self.free.discard_index(index)
+
+    def release(self, index: int) -> None:
+        """Marks a cell as free again, e.g. when the tail left it. Walls and portals stay taken."""
+        if self.level is None or not self.level.is_blocked(index):
+            self.free.add_index(index)
+
+    def apply(self, kind: int, game_data) -> None:
+        """
+        Applies the effect of an eaten power-up.
+
+        Speed power-ups last config.POWER_UP_DURATION ticks; eating one that
+        is already active extends it. The clean power-up removes every poop.
+
+        Args:
+            kind: The power-up kind.
+            game_data: The GameData of the game.
+        """
+        if kind == CLEAN:
+            poops = game_data.poops
+            snake = game_data.snake
+            for i in range(len(poops)):
+                position = poops.position_at(i)
+                if position not in snake:
+                    self.release(self.index_of(position))
+            poops.clear()
+        else:
+            end = game_data.ticks + config.POWER_UP_DURATION
+            self.effects[kind] = end
+            self._schedule(end, _END_EFFECT, kind)
+
+    @property
+    def speed_factor(self) -> float:
+        """The factor the active speed power-ups multiply the game speed by."""
+        factor = 1.0
+        for kind in self.effects:
+            factor *= config.POWER_UP_SPEED_FACTORS[POWER_UP_NAMES[kind]]
+        return factor
+
+    def advance(self, game_data, settings) -> None:
+        """
+        Runs the timers that are due at the game's current tick.
+
+        Args:
+            game_data: The GameData of the game.
+            settings: The game's GameSettings; clean power-ups only spawn in WoNQ mode.
+        """
+        timers = self._timers
+        tick = game_data.ticks
+        while timers and timers[0][0] <= tick:
+            due, serial, action, value = heapq.heappop(timers)
+            if action == _EXPIRE:
+                if self._serials.get(value) == serial:
+                    self.remove(value)
+                    self.release(value)
+            elif action == _END_EFFECT:
+                if self.effects.get(value) == due:
+                    del self.effects[value]
+            else:
+                kinds = (FAST, SLOW, CLEAN) if settings.wonq_mode else (FAST, SLOW)
+                self.spawn(game_data.rng.choice(kinds), game_data.rng, tick)
+                self._schedule(tick + config.POWER_UP_INTERVAL, _SPAWN, 0)
+
+    def _schedule(self, tick: int, action: int, value: int) -> int:
+        self._serial += 1
+        heapq.heappush(self._timers, (tick, self._serial, action, value))
+        return self._serial
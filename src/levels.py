@@ -0,0 +1,320 @@
+import mmap
+import os
+import struct
+import sys
+from array import array
+from typing import Dict, Optional, Tuple
+from src.grid import NEIGHBOR_DIRECTIONS, position_table
+
+LEVEL_SUFFIX = ".snkl"
+LEVEL_MAGIC = b"SNKL"
+LEVEL_FORMAT_VERSION = 1
+
+# What a level has on each cell. Cells from WALL up are taken for good:
+# nothing is ever placed on them.
+EMPTY = 0
+SPAWN = 1   # The snake may start here
+WALL = 2    # Kills the snake
+PORTAL = 3  # Moves the head to the paired portal
+
+# Binary layout, all little-endian:
+#   header: magic, version, start direction (index into grid.NEIGHBOR_DIRECTIONS),
+#           width, height, name length, portal count, spawn count
+#   the name in UTF-8
+#   per portal cell: its index and the index of the cell it leads to (u32 each)
+#   per spawn cell: its index (u32)
+#   one byte per cell, row-major
+_HEADER = struct.Struct("<4sBBHHHII")
+
+# Characters of the text format
+_TEXT_CELLS = {".": EMPTY, " ": EMPTY, "S": SPAWN, "#": WALL}
+_TEXT_DIRECTIONS = {"up": 0, "down": 1, "left": 2, "right": 3}
+
+
+class LevelError(ValueError):
+    """Raised when a level cannot be loaded or compiled."""
+
+
+class Level:
+    """
+    A level map: static walls, portal pairs and the cells the snake may start on.
+
+    `cells` holds one byte per cell in row-major order. A level loaded from
+    a binary file maps the file into memory and `cells` is a view straight
+    into the mapping, so loading costs the same for any level size and only
+    the pages that are read are ever paged in. Collision checks, placement
+    and rendering all read `cells` directly.
+    """
+    __slots__ = ("name", "width", "height", "direction", "cells", "portals", "spawns", "key", "_mmap")
+
+    def __init__(self, name: str, width: int, height: int, direction: Tuple[int, int], cells,
+                 portals: Dict[int, int], spawns: array, key, mapping: Optional[mmap.mmap] = None):
+        """
+        Args:
+            name: The level's name.
+            width: The width in cells.
+            height: The height in cells.
+            direction: The direction the snake starts in.
+            cells: One cell code (EMPTY, SPAWN, WALL or PORTAL) per cell, row-major.
+            portals: The index of the cell each portal cell leads to.
+            spawns: The indices of the spawn cells.
+            key: Identifies this version of the level, e.g. for caching its background.
+            mapping: The memory map `cells` is a view of, if any.
+        """
+        self.name = name
+        self.width = width
+        self.height = height
+        self.direction = direction
+        self.cells = cells
+        self.portals = portals
+        self.spawns = spawns
+        self.key = key
+        self._mmap = mapping
+
+    def is_blocked(self, index: int) -> bool:
+        """Returns True if nothing may be placed on the cell with the given index."""
+        return self.cells[index] >= WALL
+
+    def start_position(self, rng) -> Tuple[int, int]:
+        """Returns where the snake starts: a random spawn cell, or the center without spawn cells."""
+        if not self.spawns:
+            return (self.width // 2, self.height // 2)
+        return position_table(self.width, self.height)[self.spawns[rng.randrange(len(self.spawns))]]
+
+    def close(self) -> None:
+        """Releases the memory map of a level loaded from a binary file."""
+        if self._mmap is not None:
+            self.cells.release()
+            self._mmap.close()
+            self._mmap = None
+
+
+def compile_level(text: str, name: str = "") -> bytes:
+    """
+    Compiles a level from its text format into the binary format.
+
+    The text format is a grid with one character per cell: `.` (or a space)
+    for an empty cell, `#` for a wall, `S` for a cell the snake may start on,
+    and a letter for a portal; each letter must appear exactly twice, and
+    entering either cell leads to the other. Lines of the form `key: value`
+    before the grid set the `name` and the start `direction` (up, down, left
+    or right; right by default). Lines starting with `;` are comments.
+
+    Args:
+        text: The level in the text format.
+        name: The name to use if the text sets none.
+
+    Returns:
+        The level in the binary format.
+
+    Raises:
+        LevelError: If the text is not a valid level.
+    """
+    direction = _TEXT_DIRECTIONS["right"]
+    rows = []
+    for number, line in enumerate(text.splitlines(), 1):
+        if line.startswith(";") or (not rows and not line.strip()):
+            continue
+        if not rows and ":" in line:
+            key, value = (part.strip() for part in line.split(":", 1))
+            if key == "name":
+                name = value
+            elif key == "direction":
+                if value not in _TEXT_DIRECTIONS:
+                    raise LevelError(f"Line {number}: direction must be one of: {', '.join(_TEXT_DIRECTIONS)}")
+                direction = _TEXT_DIRECTIONS[value]
+            else:
+                raise LevelError(f"Line {number}: unknown setting {key!r}")
+            continue
+        rows.append(line)
+    while rows and not rows[-1].strip():
+        rows.pop()
+    if not rows:
+        raise LevelError("The level has no grid")
+    width, height = max(len(row) for row in rows), len(rows)
+    if width > 0xFFFF or height > 0xFFFF:
+        raise LevelError(f"The level is too large: {width}x{height}")
+
+    cells = bytearray(width * height)
+    letters: Dict[str, list] = {}
+    for y, row in enumerate(rows):
+        for x, char in enumerate(row):
+            code = _TEXT_CELLS.get(char)
+            if code is None:
+                if not char.isalpha():
+                    raise LevelError(f"Line {y + 1} of the grid: unknown cell {char!r}")
+                code = PORTAL
+                letters.setdefault(char, []).append(y * width + x)
+            cells[y * width + x] = code
+    portals = []
+    for letter, indices in sorted(letters.items()):
+        if len(indices) != 2:
+            raise LevelError(f"Portal {letter!r} must appear exactly twice, not {len(indices)} times")
+        portals += [(indices[0], indices[1]), (indices[1], indices[0])]
+    spawns = [index for index, code in enumerate(cells) if code == SPAWN]
+    if not spawns and cells[(height // 2) * width + width // 2] != EMPTY:
+        raise LevelError("A level without spawn cells must leave its center empty")
+
+    encoded_name = name.encode("utf-8")
+    return b"".join((
+        _HEADER.pack(LEVEL_MAGIC, LEVEL_FORMAT_VERSION, direction, width, height,
+                     len(encoded_name), len(portals), len(spawns)),
+        encoded_name,
+        _pack_indices([index for pair in portals for index in pair]),
+        _pack_indices(spawns),
+        bytes(cells),
+    ))
+
+
+def _pack_indices(indices) -> bytes:
+    values = array("I", indices)
+    if sys.byteorder == "big":
+        values.byteswap()
+    return values.tobytes()
+
+
+def _unpack_indices(data) -> array:
+    values = array("I")
+    values.frombytes(data)
+    if sys.byteorder == "big":
+        values.byteswap()
+    return values
+
+
+def parse_level(data, key=None, mapping: Optional[mmap.mmap] = None) -> Level:
+    """
+    Reads a level in the binary format.
+
+    Only the header and the portal and spawn tables are copied; the cells
+    stay a view into `data`.
+
+    Args:
+        data: The binary level: bytes, or a memory map of a level file.
+        key: Identifies this version of the level.
+        mapping: The memory map `data` is, so the level can release it.
+
+    Raises:
+        LevelError: If the data is not a valid level.
+    """
+    view = memoryview(data)
+    if len(view) < _HEADER.size:
+        raise LevelError("Not a level: the header is cut off")
+    magic, version, direction, width, height, name_length, portal_count, spawn_count = \
+        _HEADER.unpack_from(view)
+    if magic != LEVEL_MAGIC:
+        raise LevelError("Not a level: bad magic number")
+    if version != LEVEL_FORMAT_VERSION:
+        raise LevelError(f"Unsupported level version: {version}")
+    if direction >= len(NEIGHBOR_DIRECTIONS):
+        raise LevelError(f"Bad start direction: {direction}")
+    offset = _HEADER.size
+    table_size = 4 * (2 * portal_count + spawn_count)
+    if offset + name_length + table_size > len(view):
+        raise LevelError("The level's name or portal and spawn tables are cut off")
+    try:
+        name = bytes(view[offset:offset + name_length]).decode("utf-8")
+    except UnicodeDecodeError as e:
+        raise LevelError(f"Bad level name: {e}")
+    offset += name_length
+    tables = _unpack_indices(view[offset:offset + table_size])
+    offset += table_size
+    cells = view[offset:offset + width * height]
+    if len(cells) != width * height:
+        raise LevelError("The level's cells are cut off")
+    portals = dict(zip(tables[0:2 * portal_count:2], tables[1:2 * portal_count:2]))
+    if any(index >= width * height for index in tables):
+        raise LevelError("A portal or spawn cell is off the board")
+    spawns = tables[2 * portal_count:]
+    return Level(name, width, height, NEIGHBOR_DIRECTIONS[direction], cells, portals, spawns, key, mapping)
+
+
+def read_level(path: str) -> Level:
+    """
+    Loads a level file.
+
+    Binary levels are memory-mapped rather than read. Anything else is taken
+    to be the text format and compiled in memory, which is handy while
+    designing a level.
+
+    Args:
+        path: A binary (.snkl) or text level.
+
+    Raises:
+        LevelError: If the file is missing or not a valid level.
+    """
+    try:
+        with open(path, "rb") as f:
+            stat = os.fstat(f.fileno())
+            key = (os.path.abspath(path), stat.st_mtime_ns, stat.st_size)
+            if f.read(len(LEVEL_MAGIC)) != LEVEL_MAGIC:
+                f.seek(0)
+                name = os.path.splitext(os.path.basename(path))[0]
+                return parse_level(compile_level(f.read().decode("utf-8"), name), key)
+            # The mapping stays valid after the file is closed
+            mapping = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    except (OSError, UnicodeDecodeError) as e:
+        raise LevelError(f"Cannot read level {path}: {e}")
+    try:
+        return parse_level(mapping, key, mapping)
+    except LevelError as e:
+        error = str(e)
+    # Closed once the exception is gone: its frames hold views into the mapping until then
+    mapping.close()
+    raise LevelError(f"{path}: {error}")
+
+
+# Levels already loaded, by path
+_levels: Dict[str, Level] = {}
+
+
+def load_level(path: str) -> Level:
+    """
+    Returns the level in a file, loading it only if it is new or changed since it was last loaded.
+
+    Args:
+        path: A binary (.snkl) or text level.
+
+    Raises:
+        LevelError: If the file is missing or not a valid level.
+    """
+    level = _levels.get(path)
+    if level is not None:
+        try:
+            stat = os.stat(path)
+        except OSError as e:
+            raise LevelError(f"Cannot read level {path}: {e}")
+        if level.key[1:] == (stat.st_mtime_ns, stat.st_size):
+            return level
+    level = _levels[path] = read_level(path)
+    return level
+
+
+def compile_level_file(source: str, destination: Optional[str] = None) -> str:
+    """
+    Compiles a text level file into a binary level file.
+
+    Args:
+        source: The text level.
+        destination: The binary file to write; defaults to `source` with the .snkl suffix.
+
+    Returns:
+        The path of the binary file.
+
+    Raises:
+        LevelError: If the text is not a valid level.
+    """
+    if destination is None:
+        destination = os.path.splitext(source)[0] + LEVEL_SUFFIX
+    with open(source, encoding="utf-8") as f:
+        name = os.path.splitext(os.path.basename(source))[0]
+        try:
+            data = compile_level(f.read(), name)
+        except LevelError as e:
+            raise LevelError(f"{source}: {e}")
+    # Replace the file in one step, so a game that has the old version mapped keeps a valid view of it
+    temporary = destination + ".tmp"
+    with open(temporary, "wb") as f:
+        f.write(data)
+    os.replace(temporary, destination)
+    return destination
+
@@ -0,0 +1,488 @@
+import atexit
+import logging
+import os
+import random
+import statistics
+import time
+from array import array
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, wait
+from multiprocessing import shared_memory
+from typing import List, Optional, Sequence, Tuple
+from src import config, game_logic
+from src.bots import greedy_policy, safe_directions
+
+# Value of a rollout that ends in death, on top of the food it ate
+DEATH_PENALTY = 5.0
+# Share of rollout moves that head for the food instead of a random safe direction
+_GREEDY_SHARE = 0.5
+
+# Layout of the int32 header of the shared board buffer
+_VERSION = 0
+_FOOD = 1
+_LENGTH = 2
+_SHIT_COUNTER = 3
+_DX = 4
+_DY = 5
+_WONQ = 6
+_SCORE = 7
+_SEGMENTS = 8
+_HEADER = 9
+
+
+class CompactGame:
+    """
+    A cheap copy of the game engine for rollouts.
+
+    Cells are row-major indices, the snake is a deque of indices with
+    per-cell occupancy counts, and poops are a bytearray board, so cloning a
+    state is a handful of buffer copies. `step` follows `update_game_state`
+    exactly, down to the order in which it draws from the rng, so a
+    CompactGame fed the same turns and seed plays out the same game.
+    """
+    __slots__ = ("width", "height", "body", "occupancy", "poops", "food", "length",
+                 "shit_counter", "score", "direction", "wonq_mode", "ticks",
+                 "game_over", "death_cause", "rng")
+
+    def __init__(self, width: int, height: int, wonq_mode: bool, rng=None):
+        """
+        Creates an empty board; use `from_game_data` to copy a running game.
+
+        Args:
+            width: The board width in cells.
+            height: The board height in cells.
+            wonq_mode: Whether poops are dropped and deadly.
+            rng: The random.Random used to place food.
+        """
+        self.width = width
+        self.height = height
+        self.body = deque()
+        self.occupancy = bytearray(width * height)
+        self.poops = bytearray(width * height)
+        self.food = 0
+        self.length = 1
+        self.shit_counter = 0
+        self.score = 0
+        self.direction = config.RIGHT
+        self.wonq_mode = wonq_mode
+        self.ticks = 0
+        self.game_over = False
+        self.death_cause = None
+        self.rng = rng if rng is not None else random
+
+    @classmethod
+    def from_game_data(cls, game_data, settings, rng=None) -> "CompactGame":
+        """
+        Copies a running game.
+
+        Args:
+            game_data: The GameData to copy. Its game must not be over.
+            settings: The current GameSettings.
+            rng: The random.Random used to place food (defaults to the game's own).
+        """
+        width, height = game_logic.GRID_WIDTH, game_logic.GRID_HEIGHT
+        game = cls(width, height, settings.wonq_mode, rng if rng is not None else game_data.rng)
+        snake = game_data.snake
+        for x, y in snake.positions:
+            index = y * width + x
+            game.body.append(index)
+            game.occupancy[index] += 1
+        for x, y in game_data.poops.positions():
+            game.poops[y * width + x] = 1
+        food_x, food_y = game_data.food.position
+        game.food = food_y * width + food_x
+        game.length = snake.length
+        game.shit_counter = game_data.shit_counter
+        game.score = game_data.score
+        game.direction = snake.direction
+        game.ticks = game_data.ticks
+        return game
+
+    def copy(self, rng=None) -> "CompactGame":
+        """Returns an independent clone, placing food with `rng` (defaults to this game's rng)."""
+        clone = CompactGame.__new__(CompactGame)
+        clone.width = self.width
+        clone.height = self.height
+        clone.body = self.body.copy()
+        clone.occupancy = self.occupancy[:]
+        clone.poops = self.poops[:]
+        clone.food = self.food
+        clone.length = self.length
+        clone.shit_counter = self.shit_counter
+        clone.score = self.score
+        clone.direction = self.direction
+        clone.wonq_mode = self.wonq_mode
+        clone.ticks = self.ticks
+        clone.game_over = self.game_over
+        clone.death_cause = self.death_cause
+        clone.rng = rng if rng is not None else self.rng
+        return clone
+
+    def head_position(self) -> Tuple[int, int]:
+        """Returns the (x, y) position of the snake's head."""
+        return divmod(self.body[0], self.width)[::-1]
+
+    def positions(self) -> List[Tuple[int, int]]:
+        """Returns the snake's segments as (x, y) positions, head first."""
+        width = self.width
+        return [(index % width, index // width) for index in self.body]
+
+    def turn(self, direction: Tuple[int, int]) -> None:
+        """Changes direction, ignoring reversals like `Snake.turn`."""
+        if self.length > 1 and (-direction[0], -direction[1]) == self.direction:
+            return
+        self.direction = direction
+
+    def safe_moves(self) -> List[Tuple[int, int]]:
+        """Returns the directions that do not die on the next tick, like `bots.safe_directions`."""
+        width, height = self.width, self.height
+        body = self.body
+        head_x, head_y = body[0] % width, body[0] // width
+        # Unless the snake is still growing, its tail moves out of the way on this tick
+        tail = body[-1] if len(body) >= self.length else -1
+        reverse = (-self.direction[0], -self.direction[1])
+        occupancy, poops, wonq_mode = self.occupancy, self.poops, self.wonq_mode
+        moves = []
+        for direction in (config.UP, config.DOWN, config.LEFT, config.RIGHT):
+            if self.length > 1 and direction == reverse:
+                continue
+            x, y = head_x + direction[0], head_y + direction[1]
+            if not (0 <= x < width and 0 <= y < height):
+                continue
+            index = y * width + x
+            if occupancy[index] - (index == tail) > 0:
+                continue
+            if wonq_mode and poops[index]:
+                continue
+            moves.append(direction)
+        return moves
+
+    def step(self) -> None:
+        """Advances the game by one tick, like `update_game_state`."""
+        if self.game_over:
+            return
+        width = self.width
+        body = self.body
+        x = body[0] % width + self.direction[0]
+        y = body[0] // width + self.direction[1]
+        self.ticks += 1
+        if not (0 <= x < width and 0 <= y < self.height):
+            self.game_over = True
+            self.death_cause = game_logic.DEATH_WALL
+            return
+
+        head = y * width + x
+        occupancy = self.occupancy
+        body.appendleft(head)
+        occupancy[head] += 1
+        if len(body) > self.length:
+            occupancy[body.pop()] -= 1
+
+        if head == self.food:
+            self.length += 1
+            self.score += 1
+            if self.wonq_mode:
+                self.shit_counter += 1
+                if self.shit_counter >= config.WONQ_MODE_POOP_THRESHOLD:
+                    self.poops[body[-1]] = 1
+                    self.shit_counter = 0
+            self.food = self._place_food()
+
+        if occupancy[head] > 1:
+            self.death_cause = game_logic.DEATH_SELF
+        elif self.wonq_mode and self.poops[head]:
+            self.death_cause = game_logic.DEATH_POOP
+        if self.death_cause is not None:
+            self.game_over = True
+
+    def _place_food(self) -> int:
+        # Same draws as game_logic._place_item: x then y, until the cell is free
+        width, height = self.width, self.height
+        randint, occupancy, poops = self.rng.randint, self.occupancy, self.poops
+        index = randint(0, width - 1) + randint(0, height - 1) * width
+        while occupancy[index] or poops[index]:
+            index = randint(0, width - 1) + randint(0, height - 1) * width
+        return index
+
+
+def rollout(game: CompactGame, first: Tuple[int, int], depth: int, rng) -> float:
+    """
+    Plays out one random future of a game that starts by moving in `first`.
+
+    Moves are safe directions, heading for the food about half of the time
+    and picked at random otherwise.
+
+    Args:
+        game: The state to start from; it is not modified.
+        first: The direction of the first move.
+        depth: The number of ticks to play at most.
+        rng: The random.Random for moves and food placement.
+
+    Returns:
+        The food eaten, minus DEATH_PENALTY if the snake died.
+    """
+    sim = game.copy(rng)
+    sim.turn(first)
+    sim.step()
+    width = sim.width
+    for _ in range(depth - 1):
+        if sim.game_over:
+            break
+        moves = sim.safe_moves()
+        if moves:
+            if len(moves) > 1 and rng.random() < _GREEDY_SHARE:
+                head, food = sim.body[0], sim.food
+                dx, dy = food % width - head % width, food // width - head // width
+                move = min(moves, key=lambda d: abs(dx - d[0]) + abs(dy - d[1]))
+            else:
+                move = moves[0] if len(moves) == 1 else rng.choice(moves)
+            sim.turn(move)
+        sim.step()
+    value = float(sim.score - game.score)
+    if sim.game_over:
+        value -= DEATH_PENALTY
+    return value
+
+
+def evaluate(game: CompactGame, candidates: Sequence[Tuple[int, int]], depth: int,
+             deadline: float, rng, max_rounds: Optional[int] = None) -> List[List[float]]:
+    """
+    Rolls out every candidate direction in turn until the deadline passes.
+
+    Args:
+        game: The state to evaluate.
+        candidates: The directions to compare.
+        depth: Ticks per rollout.
+        deadline: The `time.monotonic()` value to stop at.
+        rng: The random.Random for the rollouts.
+        max_rounds: Optional limit on the rollouts per candidate.
+
+    Returns:
+        A [total value, rollout count] pair per candidate.
+    """
+    totals = [[0.0, 0] for _ in candidates]
+    rounds = 0
+    while time.monotonic() < deadline and (max_rounds is None or rounds < max_rounds):
+        for total, first in zip(totals, candidates):
+            total[0] += rollout(game, first, depth, rng)
+            total[1] += 1
+        rounds += 1
+    return totals
+
+
+# Per-process state of the rollout workers
+_worker_shm = None
+_worker_state = None
+_worker_poops = None
+_worker_size = None
+
+
+def _attach_board(shm_name: str, width: int, height: int) -> None:
+    """Pool initializer: maps the shared board buffer into the worker process."""
+    global _worker_shm, _worker_state, _worker_poops, _worker_size
+    _worker_shm = shared_memory.SharedMemory(name=shm_name)
+    _worker_state, _worker_poops = _board_views(_worker_shm, width * height)
+    _worker_size = (width, height)
+
+
+def _board_views(shm: shared_memory.SharedMemory, cells: int) -> Tuple[memoryview, memoryview]:
+    state_bytes = 4 * (_HEADER + cells)
+    return shm.buf[:state_bytes].cast("i"), shm.buf[state_bytes:state_bytes + cells]
+
+
+def _read_board(version: int) -> Optional[CompactGame]:
+    """Copies the published state out of shared memory, or returns None if it is not `version`."""
+    state = _worker_state
+    if state[_VERSION] != version:
+        return None
+    width, height = _worker_size
+    game = CompactGame(width, height, bool(state[_WONQ]))
+    segments = state[_SEGMENTS]
+    game.body.extend(state[_HEADER:_HEADER + segments].tolist())
+    for index in game.body:
+        game.occupancy[index] += 1
+    game.poops[:] = _worker_poops
+    game.food = state[_FOOD]
+    game.length = state[_LENGTH]
+    game.shit_counter = state[_SHIT_COUNTER]
+    game.direction = (state[_DX], state[_DY])
+    game.score = state[_SCORE]
+    # The board may have been republished while it was being copied
+    return game if state[_VERSION] == version else None
+
+
+def _rollout_task(version: int, candidates: Sequence[Tuple[int, int]], depth: int,
+                  deadline: float, seed: int) -> Optional[List[List[float]]]:
+    """Pool task: evaluates the candidates on the published board until the deadline."""
+    if time.monotonic() >= deadline:
+        return None
+    game = _read_board(version)
+    if game is None:
+        return None
+    return evaluate(game, candidates, depth, deadline, random.Random(seed))
+
+
+class LookaheadBot:
+    """
+    A Monte Carlo lookahead policy.
+
+    For every safe direction it plays many short rollouts on clones of the
+    current state and picks the direction with the best mean outcome. With
+    workers, the state is published once per decision into a shared-memory
+    board buffer that every pool process reads, and each process rolls out
+    all candidates until the deadline. A decision never takes longer than
+    `budget` of one tick at the current speed. A budget too short for the
+    pool's round trip (see config.LOOKAHEAD_POOL_ROUND_TRIPS), as in fast
+    turbo mode, is spent on rollouts in the calling process instead; if no
+    rollout finished in time, the bot falls back to the greedy policy. When
+    a config profile changes the board size, the workers are started again
+    for the new board.
+    """
+
+    def __init__(self, workers: Optional[int] = config.LOOKAHEAD_WORKERS,
+                 depth: int = config.LOOKAHEAD_DEPTH, budget: float = config.LOOKAHEAD_BUDGET):
+        """
+        Starts the rollout workers.
+
+        Args:
+            workers: Number of rollout processes; None for one per CPU, 0 to
+                roll out in the calling process.
+            depth: Ticks played out by each rollout.
+            budget: Share of one tick, at the current speed, spent per decision.
+        """
+        self.workers = (os.cpu_count() or 1) if workers is None else workers
+        self.depth = depth
+        self.budget = budget
+        self.last_rollouts = 0
+        self._version = 0
+        self._pool = None
+        self._shm = None
+        self._size = None
+        self._round_trip = 0.0
+        if self.workers > 0:
+            self._start_workers(game_logic.GRID_WIDTH, game_logic.GRID_HEIGHT)
+
+    def choose(self, game_data, settings, rng=None) -> Tuple[int, int]:
+        """
+        Picks the direction to turn to.
+
+        Args:
+            game_data: The current game state.
+            settings: The current GameSettings; its speed sets the time budget.
+            rng: The random.Random that seeds the rollouts (defaults to the `random` module).
+
+        Returns:
+            The direction to turn to.
+        """
+        snake = game_data.snake
+        self.last_rollouts = 0
+        if game_data.game_over:
+            return snake.direction
+        candidates = safe_directions(game_data, settings)
+        if len(candidates) < 2:
+            return candidates[0] if candidates else snake.direction
+
+        budget = self.budget / settings.tick_rate()
+        deadline = time.monotonic() + budget
+        game = CompactGame.from_game_data(game_data, settings)
+        seed = (rng or random).getrandbits(32)
+        if self._pool is None or budget < config.LOOKAHEAD_POOL_ROUND_TRIPS * self._round_trip:
+            totals = evaluate(game, candidates, self.depth, deadline, random.Random(seed))
+        else:
+            totals = self._evaluate_in_pool(game, candidates, deadline, budget, seed)
+
+        self.last_rollouts = sum(count for _, count in totals)
+        scored = [(total / count, direction) for (total, count), direction in zip(totals, candidates) if count]
+        if not scored:
+            return greedy_policy(game_data, settings, rng)
+        return max(scored, key=lambda item: item[0])[1]
+
+    def close(self) -> None:
+        """Stops the rollout workers and releases the shared memory."""
+        if self._pool is not None:
+            self._pool.shutdown(wait=True, cancel_futures=True)
+            self._pool = None
+        if self._shm is not None:
+            self._state.release()
+            self._poops.release()
+            self._shm.close()
+            self._shm.unlink()
+            self._shm = None
+
+    def __enter__(self) -> "LookaheadBot":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def _start_workers(self, width: int, height: int) -> None:
+        """Starts the pool on a new shared board buffer for a board size, and times its round trip."""
+        cells = width * height
+        self._shm = shared_memory.SharedMemory(create=True, size=4 * (_HEADER + cells) + cells)
+        self._state, self._poops = _board_views(self._shm, cells)
+        self._size = (width, height)
+        self._pool = ProcessPoolExecutor(max_workers=self.workers, initializer=_attach_board,
+                                         initargs=(self._shm.name, width, height))
+        # Start the processes now, so the first decision does not pay for it
+        wait([self._pool.submit(time.monotonic) for _ in range(self.workers)])
+        round_trips = []
+        for _ in range(5):
+            start = time.monotonic()
+            self._pool.submit(time.monotonic).result()
+            round_trips.append(time.monotonic() - start)
+        self._round_trip = statistics.median(round_trips)
+
+    def _evaluate_in_pool(self, game: CompactGame, candidates, deadline: float,
+                          budget: float, seed: int) -> List[List[float]]:
+        self._publish(game)
+        # Workers stop a little early, so their results make it back before the deadline
+        worker_deadline = deadline - 0.1 * budget
+        futures = [self._pool.submit(_rollout_task, self._version, candidates, self.depth,
+                                     worker_deadline, seed + i)
+                   for i in range(self.workers)]
+        done, _ = wait(futures, timeout=max(0.0, deadline - time.monotonic()))
+        totals = [[0.0, 0] for _ in candidates]
+        for future in done:
+            if future.exception() is not None:
+                logging.error("Rollout worker failed: %s", future.exception())
+                continue
+            result = future.result()
+            if result is None:
+                continue
+            for total, (value, count) in zip(totals, result):
+                total[0] += value
+                total[1] += count
+        return totals
+
+    def _publish(self, game: CompactGame) -> None:
+        if (game.width, game.height) != self._size:
+            # A config profile changed the board size: the workers read boards of the old size
+            self.close()
+            self._start_workers(game.width, game.height)
+        state = self._state
+        # Readers that see version 0 know the board is being rewritten
+        state[_VERSION] = 0
+        segments = len(game.body)
+        state[_HEADER:_HEADER + segments] = array("i", game.body)
+        state[_SEGMENTS] = segments
+        state[_FOOD] = game.food
+        state[_LENGTH] = game.length
+        state[_SHIT_COUNTER] = game.shit_counter
+        state[_DX], state[_DY] = game.direction
+        state[_WONQ] = game.wonq_mode
+        state[_SCORE] = game.score
+        self._poops[:] = game.poops
+        self._version += 1
+        state[_VERSION] = self._version
+
+
+_default_bot: Optional[LookaheadBot] = None
+
+
+def default_bot() -> LookaheadBot:
+    """Returns the shared LookaheadBot configured from config, starting it on first use."""
+    global _default_bot
+    if _default_bot is None:
+        _default_bot = LookaheadBot()
+        atexit.register(_default_bot.close)
+    return _default_bot
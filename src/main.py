@@ -1,16 +1,6 @@
 import sys
-import pygame
-from src.game_loop import run_game
+from src.cli import main
 
-
-def main():
-    """Initializes Pygame and runs the game."""
-    # The run_game function is expected to handle all aspects of the game loop,
-    # including pygame initialization and shutdown.
-    try:
-        run_game()
-    except Exception as e:
-        # Basic error handling for this secondary entry point
-        print(f"SnekByte encountered a fatal error: {e}", file=sys.stderr)
-        pygame.quit()
-        sys.exit(1)
\ No newline at end of file
+# Kept so `python -m src.main` keeps working; all entry points share src/cli.py.
+if __name__ == "__main__":
+    sys.exit(main())
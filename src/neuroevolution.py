@@ -0,0 +1,369 @@
+import csv
+import json
+import logging
+import os
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from typing import List, Optional, Sequence, Tuple
+import numpy as np
+from src import config
+from src.env import ACTIONS, FEATURE_SIZE
+from src.game_logic import reset_game_state
+from src.game_state import GameSettings
+from src.lookahead import CompactGame
+
+CHECKPOINT_FILE = "checkpoint.npz"
+BEST_FILE = "best.npz"
+FITNESS_FILE = "fitness.csv"
+FITNESS_COLUMNS = ("generation", "best", "mean", "median", "seconds")
+
+# Fitness of a game: food eaten, plus a small reward for every tick survived
+TICK_REWARD = 0.001
+
+
+def parameter_count(hidden: int) -> int:
+    """Returns the number of weights of a network with `hidden` hidden units."""
+    return FEATURE_SIZE * hidden + hidden + hidden * len(ACTIONS) + len(ACTIONS)
+
+
+def unpack(genomes: np.ndarray, hidden: int) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Splits flat genomes into the layers of their networks, without copying.
+
+    Args:
+        genomes: A (genomes, parameter_count(hidden)) float32 array.
+        hidden: The number of hidden units.
+
+    Returns:
+        The views (w1, b1, w2, b2) with shapes (G, FEATURE_SIZE, hidden),
+        (G, 1, hidden), (G, hidden, actions) and (G, 1, actions).
+    """
+    count = len(genomes)
+    actions = len(ACTIONS)
+    sizes = (FEATURE_SIZE * hidden, hidden, hidden * actions, actions)
+    ends = np.cumsum(sizes)
+    w1 = genomes[:, :ends[0]].reshape(count, FEATURE_SIZE, hidden)
+    b1 = genomes[:, ends[0]:ends[1]].reshape(count, 1, hidden)
+    w2 = genomes[:, ends[1]:ends[2]].reshape(count, hidden, actions)
+    b2 = genomes[:, ends[2]:ends[3]].reshape(count, 1, actions)
+    return w1, b1, w2, b2
+
+
+def batch_actions(layers, observations: np.ndarray) -> np.ndarray:
+    """
+    Runs every network on its own batch of observations in one vectorized pass.
+
+    Args:
+        layers: The (w1, b1, w2, b2) returned by `unpack`.
+        observations: A (G, batch, FEATURE_SIZE) float32 array; row g is fed to network g.
+
+    Returns:
+        A (G, batch) array of indices into ACTIONS.
+    """
+    w1, b1, w2, b2 = layers
+    hidden = np.tanh(np.matmul(observations, w1) + b1)
+    return np.argmax(np.matmul(hidden, w2) + b2, axis=2)
+
+
+def fill_features(game: CompactGame, out: np.ndarray) -> None:
+    """
+    Writes the observation of `SnekByteEnv`'s "features" mode for a compact game into `out`.
+
+    Args:
+        game: The game to observe.
+        out: A float32 array of FEATURE_SIZE values, overwritten in place.
+    """
+    width, height = game.width, game.height
+    occupancy, poops = game.occupancy, game.poops
+    head = game.body[0]
+    head_x, head_y = head % width, head // width
+    dx, dy = game.direction
+    features = [0.0] * FEATURE_SIZE
+    # Straight ahead, then a right and a left turn relative to the heading
+    for i, (ox, oy) in enumerate(((dx, dy), (-dy, dx), (dy, -dx))):
+        x, y = head_x + ox, head_y + oy
+        if not (0 <= x < width and 0 <= y < height) or occupancy[y * width + x] or poops[y * width + x]:
+            features[i] = 1.0
+    features[3 + ACTIONS.index((dx, dy))] = 1.0
+    food_x, food_y = game.food % width, game.food // width
+    features[7] = 1.0 if food_y < head_y else 0.0
+    features[8] = 1.0 if food_y > head_y else 0.0
+    features[9] = 1.0 if food_x < head_x else 0.0
+    features[10] = 1.0 if food_x > head_x else 0.0
+    features[11] = len(game.body) / (width * height)
+    features[12] = game.shit_counter / config.WONQ_MODE_POOP_THRESHOLD
+    out[:] = features
+
+
+def _restored_rng(state) -> random.Random:
+    rng = random.Random()
+    rng.setstate(state)
+    return rng
+
+
+def evaluate_genomes(genomes: np.ndarray, seeds: Sequence[int], hidden: int, wonq_mode: bool,
+                     max_ticks: int = config.TRAIN_MAX_TICKS,
+                     starvation_ticks: int = config.TRAIN_STARVATION_TICKS) -> np.ndarray:
+    """
+    Plays every genome on every seed and returns their mean fitness.
+
+    All G x S games advance in lockstep, so each tick needs one batched
+    forward pass for the whole chunk instead of one per game. Games stop at
+    death, after `max_ticks` ticks, or after `starvation_ticks` ticks without food.
+
+    Args:
+        genomes: A (G, parameter_count(hidden)) float32 array.
+        seeds: The seeds of the games every genome plays.
+        hidden: The number of hidden units.
+        wonq_mode: Whether the games are played in WoNQ mode.
+        max_ticks: The longest a game is played.
+        starvation_ticks: The longest a snake may go without eating.
+
+    Returns:
+        A (G,) float64 array of mean fitness per genome.
+    """
+    settings = GameSettings(wonq_mode=wonq_mode)
+    layers = unpack(np.ascontiguousarray(genomes, dtype=np.float32), hidden)
+    count, games_per_genome = len(genomes), len(seeds)
+    # Every genome plays the same boards: clones of each seed's start, with identical rngs
+    starts = [CompactGame.from_game_data(reset_game_state(settings, random.Random(seed)), settings)
+              for seed in seeds]
+    states = [start.rng.getstate() for start in starts]
+    games = [[start.copy(_restored_rng(state)) for start, state in zip(starts, states)] for _ in range(count)]
+    last_meal = np.zeros((count, games_per_genome), dtype=np.int64)
+    observations = np.zeros((count, games_per_genome, FEATURE_SIZE), dtype=np.float32)
+    active = [(g, s) for g in range(count) for s in range(games_per_genome)]
+
+    for tick in range(max_ticks):
+        if not active:
+            break
+        for g, s in active:
+            fill_features(games[g][s], observations[g, s])
+        actions = batch_actions(layers, observations)
+        still_active = []
+        for g, s in active:
+            game = games[g][s]
+            score = game.score
+            game.turn(ACTIONS[actions[g, s]])
+            game.step()
+            if game.score != score:
+                last_meal[g, s] = game.ticks
+            if not game.game_over and game.ticks - last_meal[g, s] < starvation_ticks:
+                still_active.append((g, s))
+        active = still_active
+
+    fitness = np.array([[game.score + TICK_REWARD * game.ticks for game in row] for row in games])
+    return fitness.mean(axis=1)
+
+
+def next_generation(population: np.ndarray, fitness: np.ndarray, rng: np.random.Generator,
+                    elite: float = config.TRAIN_ELITE, parents: float = config.TRAIN_PARENTS,
+                    sigma: float = config.TRAIN_SIGMA) -> np.ndarray:
+    """
+    Breeds the next population: the elite survive unchanged, the rest are mutated copies of the best parents.
+
+    Args:
+        population: The (P, parameters) genomes of this generation.
+        fitness: Their (P,) fitness.
+        rng: The numpy Generator for selection and mutation.
+        elite: Share of the population kept as is.
+        parents: Share of the population children are drawn from.
+        sigma: Standard deviation of the Gaussian mutation.
+
+    Returns:
+        The (P, parameters) float32 genomes of the next generation.
+    """
+    size = len(population)
+    ranking = np.argsort(-fitness, kind="stable")
+    elite_count = max(1, int(round(elite * size)))
+    parent_count = max(1, int(round(parents * size)))
+    chosen = ranking[rng.integers(0, parent_count, size - elite_count)]
+    children = population[chosen] + rng.normal(0.0, sigma, (size - elite_count, population.shape[1]))
+    return np.concatenate([population[ranking[:elite_count]], children]).astype(np.float32)
+
+
+@dataclass
+class Checkpoint:
+    """The state of a training run after a finished generation."""
+    generation: int
+    population: np.ndarray
+    hidden: int
+    rng_state: dict
+    wonq_mode: Optional[bool] = None  # None in checkpoints written before the mode was saved
+
+    def save(self, directory: str) -> None:
+        """Writes the checkpoint atomically, so an interrupted write never replaces a good one."""
+        path = os.path.join(directory, CHECKPOINT_FILE)
+        temporary = path + ".tmp"
+        with open(temporary, "wb") as f:
+            np.savez(f, generation=self.generation, population=self.population, hidden=self.hidden,
+                     rng_state=json.dumps(self.rng_state), wonq_mode=bool(self.wonq_mode))
+        os.replace(temporary, path)
+
+    @classmethod
+    def load(cls, directory: str) -> Optional["Checkpoint"]:
+        """Reads the checkpoint in a training directory, or returns None if there is none."""
+        path = os.path.join(directory, CHECKPOINT_FILE)
+        if not os.path.exists(path):
+            return None
+        with np.load(path) as data:
+            return cls(generation=int(data["generation"]), population=data["population"],
+                       hidden=int(data["hidden"]), rng_state=json.loads(str(data["rng_state"])),
+                       wonq_mode=bool(data["wonq_mode"]) if "wonq_mode" in data.files else None)
+
+
+def save_best(directory: str, genome: np.ndarray, hidden: int, fitness: float) -> None:
+    """Writes the best genome so far, atomically."""
+    path = os.path.join(directory, BEST_FILE)
+    temporary = path + ".tmp"
+    with open(temporary, "wb") as f:
+        np.savez(f, genome=genome, hidden=hidden, fitness=fitness)
+    os.replace(temporary, path)
+
+
+def _append_fitness(directory: str, row: Sequence) -> None:
+    path = os.path.join(directory, FITNESS_FILE)
+    new_file = not os.path.exists(path)
+    with open(path, "a", newline="") as f:
+        writer = csv.writer(f)
+        if new_file:
+            writer.writerow(FITNESS_COLUMNS)
+        writer.writerow(row)
+
+
+def evaluate_population(population: np.ndarray, seeds: Sequence[int], hidden: int, wonq_mode: bool,
+                        pool: Optional[ProcessPoolExecutor] = None, chunks: int = 1, **limits) -> np.ndarray:
+    """
+    Evaluates a population, split into chunks across a process pool if one is given.
+
+    Args:
+        population: The (P, parameters) genomes.
+        seeds: The seeds every genome plays.
+        hidden: The number of hidden units.
+        wonq_mode: Whether the games are played in WoNQ mode.
+        pool: The pool to evaluate in, or None to evaluate in this process.
+        chunks: Number of chunks to split the population into.
+        **limits: `max_ticks` and `starvation_ticks` for evaluate_genomes.
+
+    Returns:
+        The (P,) fitness of the population.
+    """
+    if pool is None:
+        return evaluate_genomes(population, seeds, hidden, wonq_mode, **limits)
+    parts = np.array_split(population, chunks)
+    futures = [pool.submit(evaluate_genomes, part, seeds, hidden, wonq_mode, **limits) for part in parts]
+    return np.concatenate([future.result() for future in futures])
+
+
+def train(directory: str = config.TRAIN_DIR, generations: int = 50,
+          population_size: int = config.TRAIN_POPULATION, seeds: int = config.TRAIN_SEEDS,
+          hidden: int = config.TRAIN_HIDDEN, wonq_mode: bool = config.DEFAULT_WONQ_MODE,
+          workers: Optional[int] = None, seed: int = 0, resume: bool = True, **limits) -> List[float]:
+    """
+    Evolves policy networks, writing progress to `directory` after every generation.
+
+    Each generation, every genome plays the same `seeds` games (new seeds
+    each generation, so networks cannot overfit a few boards). After
+    evaluation, a row is appended to fitness.csv, the best genome is saved
+    to best.npz if it improved, and the next population is checkpointed, so
+    a run can be stopped at any time and resumed where it left off.
+
+    Args:
+        directory: Where checkpoints and the fitness curve are written.
+        generations: The generation to stop after (including resumed ones).
+        population_size: Number of genomes in a new population.
+        seeds: Games each genome plays per generation.
+        hidden: Hidden units of a new population's networks.
+        wonq_mode: Whether the games of a new run are played in WoNQ mode.
+        workers: Number of evaluation processes (defaults to the CPU count; 1 evaluates in-process).
+        seed: Seeds the initial population, the mutations and the games.
+        resume: Continue from the checkpoint in `directory`, if there is one.
+            The checkpoint's population size, hidden units and mode win over
+            the arguments; a warning is logged for each one that differs.
+        **limits: `max_ticks` and `starvation_ticks` for evaluate_genomes.
+
+    Returns:
+        The best fitness of every generation run by this call.
+    """
+    os.makedirs(directory, exist_ok=True)
+    checkpoint = Checkpoint.load(directory) if resume else None
+    rng = np.random.default_rng(seed)
+    if checkpoint is not None:
+        saved = {"population_size": len(checkpoint.population), "hidden": checkpoint.hidden}
+        if checkpoint.wonq_mode is not None:
+            saved["wonq_mode"] = checkpoint.wonq_mode
+        requested = {"population_size": population_size, "hidden": hidden, "wonq_mode": wonq_mode}
+        for name, value in saved.items():
+            if requested[name] != value:
+                logging.warning("Resuming %s with the checkpoint's %s=%s instead of %s=%s",
+                                directory, name, value, name, requested[name])
+        population, hidden, start = checkpoint.population, checkpoint.hidden, checkpoint.generation
+        wonq_mode = saved.get("wonq_mode", wonq_mode)
+        rng.bit_generator.state = checkpoint.rng_state
+        logging.info("Resuming from generation %d in %s", start, directory)
+    else:
+        population = rng.normal(0.0, 1.0, (population_size, parameter_count(hidden))).astype(np.float32)
+        start = 0
+        for name in (FITNESS_FILE, BEST_FILE):
+            if os.path.exists(os.path.join(directory, name)):
+                os.remove(os.path.join(directory, name))
+
+    best_path = os.path.join(directory, BEST_FILE)
+    best_so_far = float(np.load(best_path)["fitness"]) if os.path.exists(best_path) else float("-inf")
+    workers = workers or os.cpu_count() or 1
+    pool = ProcessPoolExecutor(max_workers=workers) if workers > 1 else None
+    curve = []
+    try:
+        for generation in range(start, generations):
+            started = time.perf_counter()
+            game_seeds = [seed + generation * seeds + i for i in range(seeds)]
+            fitness = evaluate_population(population, game_seeds, hidden, wonq_mode,
+                                          pool=pool, chunks=4 * workers, **limits)
+            elapsed = time.perf_counter() - started
+
+            best = int(np.argmax(fitness))
+            curve.append(float(fitness[best]))
+            _append_fitness(directory, (generation, f"{fitness[best]:.4f}", f"{fitness.mean():.4f}",
+                                        f"{np.median(fitness):.4f}", f"{elapsed:.2f}"))
+            if fitness[best] > best_so_far:
+                best_so_far = float(fitness[best])
+                save_best(directory, population[best], hidden, best_so_far)
+            logging.info("Generation %d: best %.3f, mean %.3f (%.1fs)",
+                         generation, fitness[best], fitness.mean(), elapsed)
+
+            population = next_generation(population, fitness, rng)
+            Checkpoint(generation + 1, population, hidden, rng.bit_generator.state, wonq_mode).save(directory)
+    finally:
+        if pool is not None:
+            pool.shutdown()
+    return curve
+
+
+class NetworkPolicy:
+    """
+    A bot policy that steers with an evolved network.
+
+    Instances are called like the functions in bots.POLICIES.
+    """
+
+    def __init__(self, genome: np.ndarray, hidden: int):
+        """
+        Args:
+            genome: A flat parameter vector of parameter_count(hidden) values.
+            hidden: The number of hidden units.
+        """
+        self.layers = unpack(np.asarray(genome, dtype=np.float32).reshape(1, -1), hidden)
+        self._observation = np.zeros((1, 1, FEATURE_SIZE), dtype=np.float32)
+
+    @classmethod
+    def load(cls, path: str) -> "NetworkPolicy":
+        """Loads a genome saved by `train`, e.g. best.npz of a training directory."""
+        with np.load(path) as data:
+            return cls(data["genome"], int(data["hidden"]))
+
+    def __call__(self, game_data, settings, rng=None) -> Tuple[int, int]:
+        """Returns the direction the network turns to in the current game."""
+        fill_features(CompactGame.from_game_data(game_data, settings), self._observation[0, 0])
+        return ACTIONS[int(batch_actions(self.layers, self._observation)[0, 0])]
@@ -1,10 +1,17 @@
 import pygame
-from src import config
+from typing import Iterator
+from src import config, sprites
+from src.grid import CellSet
 
 class Poop:
     """
     Represents a persistent poop obstacle in WoNQ mode.
+
+    The game itself stores poops in a PoopField; Poop objects are lightweight
+    views of a single cell kept for code that works with individual poops.
     """
+    __slots__ = ("position",)
+
     def __init__(self, position):
         """
         Initializes the poop at a given grid position.
@@ -13,17 +20,48 @@ class Poop:
             position: A tuple (x, y) for the grid position.
         """
         self.position = position
-        self.color = config.BROWN
 
-    def draw(self, surface: pygame.Surface):
+    def draw(self, surface: pygame.Surface, theme: str = config.DEFAULT_THEME):
         """
-        Draws the poop block on the screen.
+        Draws the poop block on the screen, blitted from the sprite atlas.
 
         Args:
             surface: The pygame.Surface to draw on.
+            theme: The name of the sprite theme to draw with.
+        """
+        surface.blit(*sprites.get_atlas(theme).cell_blit(sprites.KIND_POOP, self.position))
+
+
+class PoopField(CellSet):
+    """
+    All poops on the board, stored as packed cell indices.
+
+    Checking whether a cell holds a poop is O(1), and a board full of poops
+    costs a few bytes per poop instead of a Python object each. Iterating
+    yields Poop objects for compatibility with the old list of poops; hot
+    paths should use `positions()`, `indices` or `in` instead.
+    """
+    __slots__ = ()
+
+    def append(self, poop) -> None:
+        """
+        Adds a poop.
+
+        Args:
+            poop: A Poop or an (x, y) position.
         """
-        r = pygame.Rect(
-            (self.position[0] * config.GRID_SIZE, self.position[1] * config.GRID_SIZE),
-            (config.GRID_SIZE, config.GRID_SIZE)
-        )
-        pygame.draw.rect(surface, self.color, r)
\ No newline at end of file
+        self.add(poop.position if isinstance(poop, Poop) else poop)
+
+    def __contains__(self, item) -> bool:
+        return CellSet.__contains__(self, item.position if isinstance(item, Poop) else item)
+
+    def __iter__(self) -> Iterator[Poop]:
+        for position in self.positions():
+            yield Poop(position)
+
+    def __eq__(self, other) -> bool:
+        if isinstance(other, (list, tuple)):
+            return sorted(self.positions()) == sorted(p.position if isinstance(p, Poop) else p for p in other)
+        return CellSet.__eq__(self, other)
+
+    __hash__ = None
@@ -0,0 +1,272 @@
+import copy
+import json
+import logging
+import os
+import time
+from typing import Callable, Dict, Iterable, List, Optional, Set
+from src import config
+
+
+class ProfileError(ValueError):
+    """Raised when a config profile cannot be loaded or is invalid."""
+
+
+def _int_at_least(minimum: int):
+    def check(name, value):
+        if isinstance(value, bool) or not isinstance(value, int) or value < minimum:
+            raise ProfileError(f"{name} must be an integer of at least {minimum}, got {value!r}")
+        return value
+    return check
+
+
+def _bool(name, value):
+    if not isinstance(value, bool):
+        raise ProfileError(f"{name} must be true or false, got {value!r}")
+    return value
+
+
+def _color(name, value):
+    if (not isinstance(value, (list, tuple)) or len(value) != 3
+            or not all(isinstance(c, int) and not isinstance(c, bool) and 0 <= c <= 255 for c in value)):
+        raise ProfileError(f"{name} must be three integers from 0 to 255, got {value!r}")
+    return tuple(value)
+
+
+def _string(name, value):
+    if not isinstance(value, str):
+        raise ProfileError(f"{name} must be a string, got {value!r}")
+    return value
+
+
+def _speed_levels(name, value):
+    if not isinstance(value, (list, tuple)) or not value:
+        raise ProfileError(f"{name} must be a non-empty list of speeds, got {value!r}")
+    return [_int_at_least(1)(name, speed) for speed in value]
+
+
+def _themes(name, value):
+    if not isinstance(value, dict):
+        raise ProfileError(f"{name} must map theme names to colors, got {value!r}")
+    themes = {theme: dict(colors) for theme, colors in _BUILTIN["THEMES"].items()}
+    for theme, colors in value.items():
+        if not isinstance(colors, dict):
+            raise ProfileError(f"{name}.{theme} must map parts to colors, got {colors!r}")
+        # Existing themes can be partly overridden; new ones need every part
+        merged = themes.get(theme, {})
+        for part, color in colors.items():
+            if part not in _THEME_PARTS:
+                raise ProfileError(f"{name}.{theme} has unknown part {part!r}")
+            merged[part] = _color(f"{name}.{theme}.{part}", color)
+        missing = [part for part in _THEME_PARTS if part not in merged]
+        if missing:
+            raise ProfileError(f"{name}.{theme} is missing {', '.join(missing)}")
+        themes[theme] = merged
+    return themes
+
+
+_THEME_PARTS = ("snake", "outline", "eyes", "food", "poop")
+
+# Every setting a profile may override, with the check that validates (and normalizes) it
+TUNABLES: Dict[str, Callable] = {
+    "SCREEN_WIDTH": _int_at_least(100),
+    "SCREEN_HEIGHT": _int_at_least(100),
+    "GRID_SIZE": _int_at_least(4),
+    "SPEED_LEVELS": _speed_levels,
+    "DEFAULT_SPEED_INDEX": _int_at_least(0),
+    "DEFAULT_WONQ_MODE": _bool,
+    "WONQ_MODE_POOP_THRESHOLD": _int_at_least(1),
+    "DEFAULT_THEME": _string,
+    "THEMES": _themes,
+    "UI_FONT_SIZE": _int_at_least(6),
+    "MENU_TITLE_FONT_SIZE": _int_at_least(6),
+    "MENU_OPTION_FONT_SIZE": _int_at_least(6),
+    "SCORE_FONT_SIZE": _int_at_least(6),
+}
+for _name in ("BLACK", "WHITE", "GREEN", "RED", "GRAY", "BROWN", "GOLD", "UI_BG_COLOR",
+              "UI_TEXT_COLOR", "UI_HIGHLIGHT_COLOR", "FOOD_COLOR", "GRID_COLOR"):
+    TUNABLES[_name] = _color
+
+# Settings computed from others rather than set directly
+DERIVED = ("GRID_WIDTH", "GRID_HEIGHT")
+
+# The values in src/config.py, which a profile's settings are applied on top of
+_BUILTIN = copy.deepcopy({name: getattr(config, name) for name in TUNABLES})
+
+_listeners: List[tuple] = []
+
+
+def on_change(keys: Iterable[str], callback: Callable[[Set[str]], None]) -> None:
+    """
+    Registers a callback for when any of the given settings change.
+
+    Modules use this to drop caches built from config values. The callback
+    is called with the set of every setting that changed.
+
+    Args:
+        keys: Names of settings (including DERIVED ones) the callback depends on.
+        callback: Called after the new values are in `config`.
+    """
+    _listeners.append((frozenset(keys), callback))
+
+
+def validate_profile(overrides: dict) -> dict:
+    """
+    Checks a profile and returns the complete settings it describes.
+
+    Args:
+        overrides: Setting names and values; settings that are left out keep
+            the value from src/config.py.
+
+    Returns:
+        Every tunable and derived setting, normalized (colors as tuples).
+
+    Raises:
+        ProfileError: Listing every problem found.
+    """
+    if not isinstance(overrides, dict):
+        raise ProfileError(f"A profile must be an object of settings, got {overrides!r}")
+    values = copy.deepcopy(_BUILTIN)
+    problems = []
+    for name, value in overrides.items():
+        check = TUNABLES.get(name)
+        if check is None:
+            problems.append(f"Unknown setting {name!r}")
+            continue
+        try:
+            values[name] = check(name, value)
+        except ProfileError as e:
+            problems.append(str(e))
+
+    if not problems:
+        grid_size = values["GRID_SIZE"]
+        if values["SCREEN_WIDTH"] % grid_size or values["SCREEN_HEIGHT"] % grid_size:
+            problems.append(f"GRID_SIZE {grid_size} must divide the screen size "
+                            f"{values['SCREEN_WIDTH']}x{values['SCREEN_HEIGHT']}")
+        if values["DEFAULT_SPEED_INDEX"] >= len(values["SPEED_LEVELS"]):
+            problems.append(f"DEFAULT_SPEED_INDEX must be below {len(values['SPEED_LEVELS'])}")
+        if values["DEFAULT_THEME"] not in values["THEMES"]:
+            problems.append(f"DEFAULT_THEME must be one of {', '.join(values['THEMES'])}")
+    if problems:
+        raise ProfileError("; ".join(problems))
+
+    values["GRID_WIDTH"] = values["SCREEN_WIDTH"] // values["GRID_SIZE"]
+    values["GRID_HEIGHT"] = values["SCREEN_HEIGHT"] // values["GRID_SIZE"]
+    return values
+
+
+def load_profile(path: str, name: str = config.CONFIG_PROFILE) -> dict:
+    """
+    Reads and validates one profile from a JSON profiles file.
+
+    The file maps profile names to objects of settings, for example
+    `{"cabinet": {"SPEED_LEVELS": [6, 10, 14], "GRID_SIZE": 25}}`.
+
+    Args:
+        path: The profiles file.
+        name: The profile to use.
+
+    Returns:
+        The complete settings, as returned by `validate_profile`.
+
+    Raises:
+        ProfileError: If the file cannot be read or the profile is missing or invalid.
+    """
+    try:
+        with open(path) as f:
+            profiles = json.load(f)
+    except (OSError, ValueError) as e:
+        raise ProfileError(f"Cannot read {path}: {e}") from e
+    if not isinstance(profiles, dict) or name not in profiles:
+        raise ProfileError(f"{path} has no profile named {name!r}")
+    return validate_profile(profiles[name])
+
+
+def apply_profile(values: dict) -> Set[str]:
+    """
+    Puts validated settings into `config` and notifies the caches that depend on them.
+
+    Args:
+        values: Settings returned by `validate_profile` or `load_profile`.
+
+    Returns:
+        The names of the settings that changed.
+    """
+    changed = {name for name, value in values.items() if getattr(config, name) != value}
+    for name in changed:
+        setattr(config, name, values[name])
+    if changed:
+        for keys, callback in _listeners:
+            if keys & changed:
+                callback(changed)
+    return changed
+
+
+class ConfigWatcher:
+    """
+    Watches a profiles file and reloads the profile when the file changes.
+
+    `poll` is cheap enough to call every frame: it looks at the file's
+    modification time at most once per `interval` seconds, and only reads
+    and validates the file when that changed. A valid new profile is held
+    back until `apply_pending` is called, so the game can apply it between
+    games; an invalid one is logged and ignored, keeping the current settings.
+    """
+
+    def __init__(self, path: str, profile: str = config.CONFIG_PROFILE,
+                 interval: float = config.CONFIG_POLL_INTERVAL):
+        """
+        Args:
+            path: The profiles file to watch.
+            profile: The name of the profile to use.
+            interval: Seconds between modification time checks.
+        """
+        self.path = path
+        self.profile = profile
+        self.interval = interval
+        # The file as it is now counts as applied; call `load` to apply it
+        self._mtime = self._stat()
+        self._next_check = 0.0
+        self._pending: Optional[dict] = None
+
+    def load(self) -> Set[str]:
+        """Loads and applies the profile now. Raises ProfileError if it is invalid."""
+        self._mtime = self._stat()
+        self._pending = None
+        return apply_profile(load_profile(self.path, self.profile))
+
+    def poll(self) -> bool:
+        """
+        Checks the file for changes, at most once per interval.
+
+        Returns:
+            True if a valid changed profile is waiting to be applied.
+        """
+        now = time.monotonic()
+        if now < self._next_check:
+            return self._pending is not None
+        self._next_check = now + self.interval
+        mtime = self._stat()
+        if mtime is not None and mtime != self._mtime:
+            self._mtime = mtime
+            try:
+                self._pending = load_profile(self.path, self.profile)
+                logging.info("Config profile %r in %s changed", self.profile, self.path)
+            except ProfileError as e:
+                logging.error("Ignoring invalid config: %s", e)
+        return self._pending is not None
+
+    def apply_pending(self) -> Set[str]:
+        """Applies a changed profile found by `poll`, if any. Returns the names of the settings that changed."""
+        if self._pending is None:
+            return set()
+        values, self._pending = self._pending, None
+        changed = apply_profile(values)
+        if changed:
+            logging.info("Applied config changes: %s", ", ".join(sorted(changed)))
+        return changed
+
+    def _stat(self) -> Optional[float]:
+        try:
+            return os.stat(self.path).st_mtime_ns
+        except OSError:
+            return None
@@ -0,0 +1,296 @@
+from array import array
+from bisect import bisect_left, insort
+from functools import lru_cache
+import numpy as np
+from src import config
+from src.game_state import BoardFollower
+from src.levels import WALL
+
+# The eight ray directions, clockwise from up; a heading's rays start at its slot
+RAY_DIRECTIONS = ((0, -1), (1, -1), (1, 0), (1, 1), (0, 1), (-1, 1), (-1, 0), (-1, -1))
+_HEADING_SLOTS = {config.UP: 0, config.RIGHT: 2, config.DOWN: 4, config.LEFT: 6}
+
+# Families of board lines a ray runs along, and the position of a cell on its line
+ROWS = 0       # Line y, position x
+COLUMNS = 1    # Line x, position y
+DIAGONALS = 2  # Line x - y + height - 1, position x
+ANTI = 3       # Line x + y, position x
+_FAMILIES = 4
+# The family of each ray direction, and whether positions grow along it
+_RAY_FAMILY = (COLUMNS, ANTI, ROWS, DIAGONALS, COLUMNS, ANTI, ROWS, DIAGONALS)
+_RAY_FORWARD = (False, True, True, True, True, False, False, False)
+
+# Layout of the feature vector: per ray (ahead first, then clockwise) the
+# inverse distance to the nearest obstacle, then per ray the inverse distance
+# to the food if it lies on the ray; then the food offset ahead and to the
+# right, the length and the Poop-o-meter
+OBSTACLE_FEATURES = 0
+FOOD_FEATURES = 8
+FOOD_AHEAD = 16
+FOOD_RIGHT = 17
+LENGTH_FEATURE = 18
+POOP_FEATURE = 19
+RAY_FEATURE_SIZE = 20
+
+
+class RayTables:
+    """
+    The per-cell tables of one board size that rays are read from.
+
+    For every cell, `lines[4 * i + family]` is the line of the family the
+    cell is on and `places[4 * i + family]` its position along that line;
+    `edges[8 * i + ray]` is the number of steps from the cell to the first
+    cell off the board in a ray direction.
+    """
+    __slots__ = ("width", "height", "line_counts", "lines", "places", "edges")
+
+    def __init__(self, width: int, height: int):
+        self.width = width
+        self.height = height
+        self.line_counts = (height, width, width + height - 1, width + height - 1)
+        self.lines = array("H")
+        self.places = array("H")
+        self.edges = array("H")
+        for y in range(height):
+            for x in range(width):
+                self.lines.extend((y, x, x - y + height - 1, x + y))
+                self.places.extend((x, y, x, x))
+                for dx, dy in RAY_DIRECTIONS:
+                    steps = 1
+                    while 0 <= x + steps * dx < width and 0 <= y + steps * dy < height:
+                        steps += 1
+                    self.edges.append(steps)
+
+
+@lru_cache(maxsize=8)
+def ray_tables(width: int, height: int) -> RayTables:
+    """Returns the ray tables of a board size, building them once."""
+    return RayTables(width, height)
+
+
+class LineIndex:
+    """
+    The occupied cells of a board, indexed by every row, column and diagonal.
+
+    Each line keeps the sorted positions of its occupied cells, so the
+    nearest occupied cell in a ray direction is a binary search on one line
+    instead of a walk along the ray. Adding or removing a cell updates its
+    four lines; lines are at most as long as the board is wide or high.
+    """
+    __slots__ = ("tables", "_lines")
+
+    def __init__(self, tables: RayTables):
+        self.tables = tables
+        self._lines = [[[] for _ in range(count)] for count in tables.line_counts]
+
+    def add(self, index: int) -> None:
+        """Marks a cell as occupied. The cell must not be occupied yet."""
+        base = 4 * index
+        lines, places = self.tables.lines, self.tables.places
+        for family in range(_FAMILIES):
+            insort(self._lines[family][lines[base + family]], places[base + family])
+
+    def remove(self, index: int) -> None:
+        """Marks an occupied cell as free."""
+        base = 4 * index
+        lines, places = self.tables.lines, self.tables.places
+        for family in range(_FAMILIES):
+            line = self._lines[family][lines[base + family]]
+            del line[bisect_left(line, places[base + family])]
+
+    def distance(self, index: int, ray: int) -> int:
+        """
+        Returns the steps from a cell to the nearest occupied cell in a ray direction.
+
+        Args:
+            index: The cell to look from, whose own occupancy is ignored.
+            ray: An index into RAY_DIRECTIONS.
+
+        Returns:
+            The number of steps, or 0 if no occupied cell lies on the ray.
+        """
+        family = _RAY_FAMILY[ray]
+        tables = self.tables
+        line = self._lines[family][tables.lines[4 * index + family]]
+        place = tables.places[4 * index + family]
+        if _RAY_FORWARD[ray]:
+            slot = bisect_left(line, place + 1)
+            return line[slot] - place if slot < len(line) else 0
+        slot = bisect_left(line, place)
+        return place - line[slot - 1] if slot else 0
+
+
+def _cell(tables: RayTables, position) -> int:
+    """Returns the cell index of a position, or -1 off the board."""
+    x, y = position
+    if 0 <= x < tables.width and 0 <= y < tables.height:
+        return y * tables.width + x
+    return -1
+
+
+def _fill(out: np.ndarray, tables: RayTables, head: int, direction, food: int, obstacle_distance,
+          length: int, shit_counter: int) -> None:
+    """Writes the features of a head cell into `out`, reading obstacle distances from `obstacle_distance(ray)`."""
+    features = [0.0] * RAY_FEATURE_SIZE
+    first = _HEADING_SLOTS[direction]
+    width = tables.width
+    head_x, head_y = head % width, head // width
+    food_x, food_y = food % width, food // width
+    edges = tables.edges
+    for i in range(8):
+        ray = (first + i) & 7
+        steps = obstacle_distance(ray) or edges[8 * head + ray]
+        features[OBSTACLE_FEATURES + i] = 1.0 / steps
+        dx, dy = RAY_DIRECTIONS[ray]
+        steps = (food_x - head_x) * dx if dx else (food_y - head_y) * dy
+        if steps > 0 and food_x == head_x + steps * dx and food_y == head_y + steps * dy:
+            features[FOOD_FEATURES + i] = 1.0 / steps
+    dx, dy = direction
+    features[FOOD_AHEAD] = ((food_x - head_x) * dx + (food_y - head_y) * dy) / max(tables.width, tables.height)
+    features[FOOD_RIGHT] = ((food_y - head_y) * dx + (head_x - food_x) * dy) / max(tables.width, tables.height)
+    features[LENGTH_FEATURE] = length / (tables.width * tables.height)
+    features[POOP_FEATURE] = shit_counter / config.WONQ_MODE_POOP_THRESHOLD
+    out[:] = features
+
+
+def _obstacles(game_data):
+    """Yields the cell positions that end a ray: the snake, the poops and the level's walls."""
+    yield from game_data.snake.positions
+    width = game_data.poops.width
+    for index in game_data.poops.indices:
+        yield index % width, index // width
+    level = game_data.level
+    if level is not None:
+        for index, cell in enumerate(level.cells):
+            if cell == WALL:
+                yield index % level.width, index // level.width
+
+
+def ray_features(game_data, out=None) -> np.ndarray:
+    """
+    Computes the ray features of a game from scratch, by walking every ray.
+
+    This is the reference that RayEncoder's incremental features must equal.
+    The snake must be on the board.
+
+    Args:
+        game_data: The game to observe.
+        out: An optional float32 array of RAY_FEATURE_SIZE values to fill.
+
+    Returns:
+        The features, in `out` if it was given.
+    """
+    tables = ray_tables(game_data.poops.width, game_data.poops.height)
+    if out is None:
+        out = np.zeros(RAY_FEATURE_SIZE, dtype=np.float32)
+    blocked = set(_obstacles(game_data))
+    head_x, head_y = game_data.snake.positions[0]
+
+    def obstacle_distance(ray):
+        dx, dy = RAY_DIRECTIONS[ray]
+        steps = 1
+        while 0 <= head_x + steps * dx < tables.width and 0 <= head_y + steps * dy < tables.height:
+            if (head_x + steps * dx, head_y + steps * dy) in blocked:
+                return steps
+            steps += 1
+        return 0
+
+    _fill(out, tables, _cell(tables, (head_x, head_y)), game_data.snake.direction,
+          _cell(tables, game_data.food.position), obstacle_distance, game_data.snake.length, game_data.shit_counter)
+    return out
+
+
+class RayEncoder(BoardFollower):
+    """
+    Keeps the ray features of a game up to date as `update_game_state` plays it.
+
+    The features are egocentric: eight rays from the head, starting straight
+    ahead and going clockwise, each giving the inverse distance to the
+    nearest wall, body segment or poop and, if the food lies on the ray, the
+    inverse distance to it; then the food's offset ahead and to the right,
+    the snake's length and the Poop-o-meter. See RAY_FEATURE_SIZE and the
+    *_FEATURE(S) constants for the layout.
+
+    Distances to the board edge come from tables precomputed per board size,
+    and the obstacles are kept in a LineIndex that the encoder updates as a
+    BoardFollower: a move adds the head and frees the tail, a poop adds its
+    cell and the clean power-up frees all of them. A tick and an `encode`
+    therefore cost the same whatever the snake's length or the number of
+    poops. Portals do not bend rays, and in party mode only the main food
+    is seen.
+
+    Only changes made by the engine are followed; code that edits the game
+    directly must create a new encoder.
+    """
+
+    def __init__(self, game_data):
+        """
+        Indexes a game and subscribes to its events.
+
+        Args:
+            game_data: The GameData to follow.
+        """
+        super().__init__(game_data)
+        self.tables = ray_tables(self.width, self.height)
+        self.features = np.zeros(RAY_FEATURE_SIZE, dtype=np.float32)
+        self._obstacles = LineIndex(self.tables)
+        # Obstacles per cell: the snake may overlap itself, and a poop is dropped under its tail
+        self._counts = bytearray(self.width * self.height)
+        for index in self._segments:
+            self._occupy(index)
+        for index in self._poops:
+            self._occupy(index)
+        if game_data.level is not None:
+            for index, cell in enumerate(game_data.level.cells):
+                if cell == WALL:
+                    self._occupy(index)
+
+    def encode(self, out=None) -> np.ndarray:
+        """
+        Returns the features of the game's current state.
+
+        Args:
+            out: An optional float32 array of RAY_FEATURE_SIZE values to
+                fill. By default `features` is overwritten and returned.
+
+        Returns:
+            The features; the same as `ray_features(game_data)` while the
+            head is on the board.
+        """
+        if out is None:
+            out = self.features
+        head = self._segments[0]
+        if head < 0:
+            # The snake hit the edge of the board: the game is over
+            out[:] = 0.0
+            return out
+        game_data = self.game_data
+        obstacles = self._obstacles
+        _fill(out, self.tables, head, game_data.snake.direction, _cell(self.tables, game_data.food.position),
+              lambda ray: obstacles.distance(head, ray), game_data.snake.length, game_data.shit_counter)
+        return out
+
+    def _occupy(self, index: int) -> None:
+        if index >= 0:
+            self._counts[index] += 1
+            if self._counts[index] == 1:
+                self._obstacles.add(index)
+
+    def _free(self, index: int) -> None:
+        if index >= 0:
+            self._counts[index] -= 1
+            if not self._counts[index]:
+                self._obstacles.remove(index)
+
+    def _tail_left(self, index: int) -> None:
+        self._free(index)
+
+    def _head_entered(self, index: int, previous: int) -> None:
+        self._occupy(index)
+
+    def _poop_dropped(self, index: int) -> None:
+        self._occupy(index)
+
+    def _poops_cleared(self, indices) -> None:
+        for index in indices:
+            self._free(index)
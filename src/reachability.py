@@ -0,0 +1,309 @@
+from array import array
+from typing import Optional, Tuple
+from src.game_state import BoardFollower
+from src.grid import neighbor_table
+from src.levels import WALL
+
+
+class FreeRegions(BoardFollower):
+    """
+    Keeps the connected regions of free cells of a game up to date as `update_game_state` plays it.
+
+    A cell is free unless the snake, a poop or a wall of the level is on it.
+    The regions are a union-find over the free cells, which the tracker
+    updates from the game's events. A cell that is freed (the tail moved on,
+    or the clean power-up removed a poop) joins the regions next to it at
+    the cost of a few unions. A cell that is taken (by the head, or a poop
+    in WoNQ mode) only shrinks its region, unless it may have cut it in two.
+    That is checked on the cell's eight neighbours, and only then is the
+    region split, with a search that stops once the cut-off pockets are
+    found (see `_split`). The cells come from the hooks of BoardFollower,
+    which frees the tail before the head is taken, so a head that follows
+    its tail onto a cell cuts nothing. A full flood fill only runs when the
+    tracker is created and, rarely, to compact the union-find. Portals join
+    the two cells of their pair.
+
+    Only changes made by the engine are followed; code that edits the game
+    directly must create a new tracker.
+    """
+
+    def __init__(self, game_data):
+        """
+        Finds the regions of a game and subscribes to its events.
+
+        Args:
+            game_data: The GameData to follow.
+        """
+        super().__init__(game_data)
+        cells = self.width * self.height
+        self._neighbors = neighbor_table(self.width, self.height)
+        level = game_data.level
+        self._portals = level.portals if level is not None else {}
+        # Obstacles per cell: the snake may overlap itself, and a poop is dropped under its tail
+        self._counts = bytearray(cells)
+        if level is not None:
+            for index, cell in enumerate(level.cells):
+                if cell == WALL:
+                    self._counts[index] = 1
+        for index in self._segments:
+            if index >= 0:
+                self._counts[index] += 1
+        for index in self._poops:
+            self._counts[index] += 1
+        # The union-find: the node of every cell, and each node's parent and (for roots) region size.
+        # A freed cell gets a new node, so cells that went through its old node keep their root.
+        self._node = array("i")
+        self._parent = array("i")
+        self._size = array("i")
+        self._dirty = True
+
+    def is_free(self, position: Tuple[int, int]) -> bool:
+        """Returns True if a position is on the board and nothing is on it."""
+        index = self.cell_index(position)
+        return index >= 0 and not self._counts[index]
+
+    def region_size(self, position: Tuple[int, int]) -> int:
+        """
+        Returns the number of free cells reachable from a position, itself included.
+
+        Args:
+            position: An (x, y) position; 0 is returned if it is not free.
+        """
+        index = self.cell_index(position)
+        if index < 0 or self._counts[index]:
+            return 0
+        self._update()
+        return self._size[self._find(self._node[index])]
+
+    def same_region(self, a: Tuple[int, int], b: Tuple[int, int]) -> bool:
+        """Returns True if both positions are free and connected through free cells."""
+        first, second = self.cell_index(a), self.cell_index(b)
+        if first < 0 or second < 0 or self._counts[first] or self._counts[second]:
+            return False
+        self._update()
+        return self._find(self._node[first]) == self._find(self._node[second])
+
+    def opens_within(self, position: Tuple[int, int], ticks: int) -> Optional[int]:
+        """
+        Returns when the tail first frees a cell next to the region of a position.
+
+        The snake is assumed to eat nothing in the meantime; a snake that is
+        still growing keeps its tail in place until it has grown.
+
+        Args:
+            position: A free (x, y) position in the pocket.
+            ticks: The most ticks to look ahead.
+
+        Returns:
+            The number of ticks until a freed cell joins the pocket to more
+            free cells, or None if that does not happen within `ticks` (or
+            the position is not free).
+        """
+        index = self.cell_index(position)
+        if index < 0 or self._counts[index]:
+            return None
+        self._update()
+        root = self._find(self._node[index])
+        positions = self.game_data.snake.positions
+        growing = max(0, self.game_data.snake.length - len(positions))
+        neighbors = self._neighbors
+        for freed in range(1, min(ticks - growing, len(positions)) + 1):
+            tail = self.cell_index(positions[-freed])
+            if tail < 0:
+                continue
+            for slot in range(4):
+                neighbor = neighbors[4 * tail + slot]
+                if neighbor >= 0 and not self._counts[neighbor] and self._find(self._node[neighbor]) == root:
+                    return growing + freed
+        return None
+
+    def _find(self, node: int) -> int:
+        parent = self._parent
+        while parent[node] != node:
+            parent[node] = parent[parent[node]]
+            node = parent[node]
+        return node
+
+    def _update(self) -> None:
+        if self._dirty:
+            self._rebuild()
+
+    def _rebuild(self) -> None:
+        """Labels every region with one flood fill, and starts the union-find over with one node per cell."""
+        cells = self.width * self.height
+        counts, neighbors, portals = self._counts, self._neighbors, self._portals
+        parent = array("i", range(cells))
+        size = array("i", [0]) * cells
+        seen = bytearray(counts)
+        start = seen.find(0)
+        while start >= 0:
+            seen[start] = 1
+            stack = [start]
+            region = 0
+            while stack:
+                index = stack.pop()
+                parent[index] = start
+                region += 1
+                for neighbor in neighbors[4 * index:4 * index + 4]:
+                    if neighbor >= 0 and not seen[neighbor]:
+                        seen[neighbor] = 1
+                        stack.append(neighbor)
+                if portals and index in portals and not seen[portals[index]]:
+                    seen[portals[index]] = 1
+                    stack.append(portals[index])
+            size[start] = region
+            start = seen.find(0, start)
+        self._node = array("i", range(cells))
+        self._parent = parent
+        self._size = size
+        self._dirty = False
+
+    def _free(self, index: int) -> None:
+        if index < 0:
+            return
+        counts = self._counts
+        counts[index] -= 1
+        if counts[index] or self._dirty:
+            return
+        node = len(self._parent)
+        if node >= 4 * len(counts):
+            # Too many dead nodes: compact them on the next query
+            self._dirty = True
+            return
+        self._parent.append(node)
+        self._size.append(1)
+        self._node[index] = node
+        for neighbor in self._links(index):
+            if not counts[neighbor]:
+                self._union(node, self._node[neighbor])
+
+    def _union(self, a: int, b: int) -> None:
+        a, b = self._find(a), self._find(b)
+        if a == b:
+            return
+        size = self._size
+        if size[a] < size[b]:
+            a, b = b, a
+        self._parent[b] = a
+        size[a] += size[b]
+
+    def _occupy(self, index: int) -> None:
+        if index < 0:
+            return
+        counts = self._counts
+        counts[index] += 1
+        if counts[index] > 1 or self._dirty:
+            return
+        root = self._find(self._node[index])
+        self._size[root] -= 1
+        if index in self._portals or self._may_cut(index):
+            self._split(index, root)
+
+    def _may_cut(self, index: int) -> bool:
+        """Returns True unless the free neighbours of a newly taken cell are still joined around it."""
+        counts = self._counts
+        width, height = self.width, self.height
+        x, y = index % width, index // width
+
+        def free(cx, cy):
+            return 0 <= cx < width and 0 <= cy < height and not counts[cy * width + cx]
+
+        # Up, right, down and left, and the corners between each and the next
+        sides = (free(x, y - 1), free(x + 1, y), free(x, y + 1), free(x - 1, y))
+        corners = (free(x + 1, y - 1), free(x + 1, y + 1), free(x - 1, y + 1), free(x - 1, y - 1))
+        links = sum(1 for i in range(4) if sides[i] and corners[i] and sides[(i + 1) & 3])
+        return sum(sides) - links > 1 and links < 4
+
+    def _links(self, index: int):
+        """Returns the cells next to a cell, the pair of a portal included."""
+        links = [neighbor for neighbor in self._neighbors[4 * index:4 * index + 4] if neighbor >= 0]
+        if index in self._portals:
+            links.append(self._portals[index])
+        return links
+
+    def _split(self, index: int, root: int) -> None:
+        """
+        Gives the pockets cut off by a newly taken cell regions of their own.
+
+        One search starts from each free neighbour of the cell, and the
+        searches take turns visiting a cell each. Searches that meet are in
+        the same region. Once all but one group of searches have run out of
+        cells, each of those groups has found a whole pocket, which gets a
+        new root; the last group keeps the old one. The work is bounded by
+        the size of the pockets rather than the region that was cut.
+        """
+        counts = self._counts
+        owner = {}
+        stacks, found, group = [], [], []
+        for seed in self._links(index):
+            if not counts[seed] and seed not in owner:
+                owner[seed] = len(stacks)
+                stacks.append([seed])
+                found.append([seed])
+                group.append(len(group))
+
+        def top(search):
+            while group[search] != search:
+                search = group[search]
+            return search
+
+        neighbors, portals = self._neighbors, self._portals
+        changed = True
+        while True:
+            if changed:
+                groups = {top(search) for search in range(len(stacks))}
+                searching = {top(search) for search in range(len(stacks)) if stacks[search]}
+                if len(groups) <= 1:
+                    return
+                if len(searching) <= 1:
+                    break
+                changed = False
+            for search, stack in enumerate(stacks):
+                if not stack:
+                    continue
+                cell = stack.pop()
+                links = neighbors[4 * cell:4 * cell + 4]
+                if cell in portals:
+                    links.append(portals[cell])
+                for neighbor in links:
+                    if neighbor < 0 or counts[neighbor]:
+                        continue
+                    other = owner.get(neighbor)
+                    if other is None:
+                        owner[neighbor] = search
+                        stack.append(neighbor)
+                        found[search].append(neighbor)
+                    elif other != search:
+                        first, second = top(search), top(other)
+                        if first != second:
+                            group[second] = first
+                            changed = True
+                if not stack:
+                    changed = True
+
+        members = {}
+        for search in range(len(stacks)):
+            members.setdefault(top(search), []).extend(found[search])
+        keep = searching.pop() if searching else max(members, key=lambda g: len(members[g]))
+        for pocket, cells in members.items():
+            if pocket == keep:
+                continue
+            node = len(self._parent)
+            self._parent.append(node)
+            self._size.append(len(cells))
+            self._size[root] -= len(cells)
+            for cell in cells:
+                self._node[cell] = node
+
+    def _tail_left(self, index: int) -> None:
+        self._free(index)
+
+    def _head_entered(self, index: int, previous: int) -> None:
+        self._occupy(index)
+
+    def _poop_dropped(self, index: int) -> None:
+        self._occupy(index)
+
+    def _poops_cleared(self, indices) -> None:
+        for index in indices:
+            self._free(index)
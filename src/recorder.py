@@ -0,0 +1,221 @@
+import logging
+import os
+import queue
+import shutil
+import subprocess
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from multiprocessing import shared_memory
+from typing import Optional, Tuple
+import numpy as np
+import pygame
+from src import config
+from src.replay import Replay, play_replay
+from src.ui import draw_game_screen
+
+ENCODER_AUTO = "auto"
+ENCODER_PNG = "png"
+ENCODER_FFMPEG = "ffmpeg"
+
+# Per-process state of the PNG encoding workers
+_worker_shm = None
+_worker_frames = None
+
+
+def _attach_frames(shm_name: str, shape: Tuple[int, ...]) -> None:
+    """Pool initializer: maps the shared frame slots into the worker process."""
+    global _worker_shm, _worker_frames
+    _worker_shm = shared_memory.SharedMemory(name=shm_name)
+    _worker_frames = np.ndarray(shape, dtype=np.uint8, buffer=_worker_shm.buf)
+
+
+def _encode_png(slot: int, path: str) -> None:
+    """Pool task: writes one frame slot to a PNG file."""
+    frame = _worker_frames[slot]
+    height, width = frame.shape[:2]
+    pygame.image.save(pygame.image.frombuffer(frame, (width, height), "RGB"), path)
+
+
+def ffmpeg_available() -> bool:
+    """Returns True if an ffmpeg binary is on the PATH."""
+    return shutil.which("ffmpeg") is not None
+
+
+class FrameRecorder:
+    """
+    Captures rendered frames and encodes them in the background.
+
+    Frames are copied once, straight from a `pygame.surfarray.pixels3d` view
+    of the surface, into a ring of slots in shared memory. From there they are
+    either encoded to a PNG sequence by a pool of worker processes, or
+    streamed to an ffmpeg process by a writer thread. `capture` only waits for
+    a free slot when `block` is True; otherwise a frame that arrives while
+    every slot is still being encoded is dropped and counted, so a live game
+    loop never stalls on encoding.
+    """
+
+    def __init__(self, output: str, size: Tuple[int, int], fps: int, encoder: str = ENCODER_AUTO,
+                 workers: Optional[int] = None, slots: int = config.RECORDING_SLOTS, block: bool = False):
+        """
+        Starts the encoders.
+
+        Args:
+            output: A directory for PNG frames, or a video file path for ffmpeg.
+            size: The (width, height) of the captured surfaces.
+            fps: Frame rate of the produced video.
+            encoder: ENCODER_PNG, ENCODER_FFMPEG, or ENCODER_AUTO to use
+                ffmpeg when it is installed and PNG frames otherwise.
+            workers: Number of PNG encoding processes (defaults to the CPU count).
+            slots: Number of frames that can be waiting for the encoders.
+            block: Whether `capture` waits for a free slot instead of dropping frames.
+        """
+        if encoder == ENCODER_AUTO:
+            encoder = ENCODER_FFMPEG if ffmpeg_available() else ENCODER_PNG
+        if encoder == ENCODER_PNG and os.path.splitext(output)[1]:
+            # A video file name was asked for, but without ffmpeg we can only write frames
+            output = os.path.splitext(output)[0]
+            logging.info("ffmpeg not found, writing PNG frames to %s", output)
+        if encoder not in (ENCODER_PNG, ENCODER_FFMPEG):
+            raise ValueError(f"Unknown encoder: {encoder!r}")
+
+        self.output = output
+        self.encoder = encoder
+        self.block = block
+        self.frames_captured = 0
+        self.frames_dropped = 0
+
+        width, height = size
+        self._shape = (slots, height, width, 3)
+        self._shm = shared_memory.SharedMemory(create=True, size=slots * height * width * 3)
+        self._frames = np.ndarray(self._shape, dtype=np.uint8, buffer=self._shm.buf)
+        self._frame_bytes = height * width * 3
+        self._free_slots: "queue.Queue[int]" = queue.Queue()
+        for slot in range(slots):
+            self._free_slots.put(slot)
+
+        self._pool = None
+        self._writer = None
+        self._ffmpeg = None
+        if encoder == ENCODER_PNG:
+            os.makedirs(output, exist_ok=True)
+            self._pool = ProcessPoolExecutor(max_workers=workers, initializer=_attach_frames,
+                                             initargs=(self._shm.name, self._shape))
+        else:
+            self._ffmpeg = subprocess.Popen(
+                ["ffmpeg", "-loglevel", "error", "-y", "-f", "rawvideo", "-pix_fmt", "rgb24",
+                 "-s", f"{width}x{height}", "-r", str(fps), "-i", "-",
+                 "-pix_fmt", "yuv420p", output],
+                stdin=subprocess.PIPE,
+            )
+            self._pending: "queue.Queue[Optional[int]]" = queue.Queue()
+            self._writer = threading.Thread(target=self._write_to_ffmpeg, name="snekbyte-ffmpeg", daemon=True)
+            self._writer.start()
+
+    def capture(self, surface: pygame.Surface) -> bool:
+        """
+        Queues the current contents of a surface as the next frame.
+
+        Args:
+            surface: The surface to capture. Must have the recorder's size.
+
+        Returns:
+            True if the frame was queued, False if it was dropped.
+        """
+        try:
+            slot = self._free_slots.get(block=self.block)
+        except queue.Empty:
+            self.frames_dropped += 1
+            return False
+
+        pixels = pygame.surfarray.pixels3d(surface)
+        # pixels3d is indexed [x, y]; the transposed view lets one copy produce row-major frames
+        self._frames[slot] = pixels.transpose(1, 0, 2)
+        del pixels  # Unlocks the surface
+
+        index = self.frames_captured
+        self.frames_captured += 1
+        if self._pool is not None:
+            path = os.path.join(self.output, f"frame_{index:06d}.png")
+            future = self._pool.submit(_encode_png, slot, path)
+            future.add_done_callback(partial(self._release_encoded, slot))
+        else:
+            self._pending.put(slot)
+        return True
+
+    def close(self) -> None:
+        """Waits for every queued frame to be encoded and releases the shared memory."""
+        if self._pool is not None:
+            self._pool.shutdown(wait=True)
+            self._pool = None
+        if self._writer is not None:
+            self._pending.put(None)
+            self._writer.join()
+            self._writer = None
+            self._ffmpeg.stdin.close()
+            self._ffmpeg.wait()
+        if self._shm is not None:
+            del self._frames
+            self._shm.close()
+            self._shm.unlink()
+            self._shm = None
+
+    def __enter__(self) -> "FrameRecorder":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def _release_encoded(self, slot: int, future) -> None:
+        if future.exception() is not None:
+            logging.error("Failed to encode a frame: %s", future.exception())
+        self._free_slots.put(slot)
+
+    def _write_to_ffmpeg(self) -> None:
+        frame_bytes = self._frame_bytes
+        buf = self._shm.buf
+        stdin = self._ffmpeg.stdin
+        while True:
+            slot = self._pending.get()
+            if slot is None:
+                return
+            start = slot * frame_bytes
+            try:
+                stdin.write(buf[start:start + frame_bytes])
+            except (BrokenPipeError, ValueError):
+                logging.error("ffmpeg stopped accepting frames")
+            self._free_slots.put(slot)
+
+
+def render_replay(replay: Replay, output: str, encoder: str = ENCODER_AUTO,
+                  workers: Optional[int] = None, max_ticks: Optional[int] = None) -> int:
+    """
+    Renders a replay to video (or a PNG sequence) as fast as the encoders allow.
+
+    The game screen is drawn with `ui.draw_game_screen` onto an offscreen
+    surface under the SDL dummy video driver, so no window is opened. Ticks
+    are not paced by a clock; the frame rate of the output matches the
+    speed the replay was recorded at.
+
+    Args:
+        replay: The replay to render.
+        output: A video file path or a directory for PNG frames.
+        encoder: See FrameRecorder.
+        workers: Number of PNG encoding processes.
+        max_ticks: Optional limit on the number of ticks to render.
+
+    Returns:
+        The number of frames written.
+    """
+    os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+    if not pygame.font.get_init():
+        pygame.font.init()
+    size = (config.SCREEN_WIDTH, config.SCREEN_HEIGHT)
+    surface = pygame.Surface(size)
+    settings = replay.settings()
+    with FrameRecorder(output, size, settings.get_speed(), encoder=encoder,
+                       workers=workers, block=True) as recorder:
+        for game_data in play_replay(replay, max_ticks=max_ticks):
+            draw_game_screen(surface, game_data, settings)
+            recorder.capture(surface)
+    return recorder.frames_captured
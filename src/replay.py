@@ -0,0 +1,136 @@
+import json
+import random
+import threading
+from dataclasses import dataclass, field
+from typing import Iterator, List, Optional, Tuple
+from src.game_logic import reset_game_state, update_game_state
+from src.game_state import GameData, GameSettings
+
+REPLAY_FORMAT_VERSION = 1
+
+
+@dataclass
+class Replay:
+    """
+    Everything needed to play a game again, tick for tick.
+
+    A game is fully determined by the seed of its random number generator,
+    its settings and the turns the player made. Turns are stored as
+    (tick, dx, dy), where tick is the number of ticks already played when
+    the turn was made.
+    """
+    seed: int
+    speed_index: int
+    wonq_mode: bool
+    turns: List[Tuple[int, int, int]] = field(default_factory=list)
+    food_count: int = 1
+    power_ups: bool = False
+    level: Optional[str] = None
+
+    @classmethod
+    def new(cls, settings: GameSettings, seed: Optional[int] = None) -> "Replay":
+        """
+        Creates an empty replay for a game about to start.
+
+        Args:
+            settings: The settings the game will be played with.
+            seed: The seed for the game, or None to pick a random one.
+        """
+        if seed is None:
+            seed = random.randrange(2 ** 32)
+        return cls(seed=seed, speed_index=settings.speed_index, wonq_mode=settings.wonq_mode,
+                   food_count=settings.food_count, power_ups=settings.power_ups, level=settings.level)
+
+    def settings(self) -> GameSettings:
+        """Returns the GameSettings this replay was recorded with."""
+        return GameSettings(speed_index=self.speed_index, wonq_mode=self.wonq_mode,
+                            food_count=self.food_count, power_ups=self.power_ups, level=self.level)
+
+    def start_game(self):
+        """Returns the initial game_data for this replay, seeded like the original game."""
+        return reset_game_state(self.settings(), random.Random(self.seed))
+
+    def record_turn(self, tick: int, direction: Tuple[int, int]) -> None:
+        """
+        Appends a turn made before the given tick was played.
+
+        Args:
+            tick: The number of ticks already played.
+            direction: The direction the player turned to.
+        """
+        self.turns.append((tick, direction[0], direction[1]))
+
+    def to_dict(self) -> dict:
+        """Returns a JSON-serializable representation of the replay."""
+        return {
+            "version": REPLAY_FORMAT_VERSION,
+            "seed": self.seed,
+            "speed_index": self.speed_index,
+            "wonq_mode": self.wonq_mode,
+            "turns": [list(turn) for turn in self.turns],
+            "food_count": self.food_count,
+            "power_ups": self.power_ups,
+            "level": self.level,
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "Replay":
+        """Builds a replay from the output of `to_dict`."""
+        if data.get("version") != REPLAY_FORMAT_VERSION:
+            raise ValueError(f"Unsupported replay version: {data.get('version')!r}")
+        return cls(
+            seed=data["seed"],
+            speed_index=data["speed_index"],
+            wonq_mode=data["wonq_mode"],
+            turns=[tuple(turn) for turn in data["turns"]],
+            # Replays from before party mode have neither
+            food_count=data.get("food_count", 1),
+            power_ups=data.get("power_ups", False),
+            level=data.get("level"),
+        )
+
+    def save(self, path: str) -> None:
+        """Writes the replay to a JSON file."""
+        with open(path, "w") as f:
+            json.dump(self.to_dict(), f, separators=(",", ":"))
+
+    def save_in_background(self, path: str) -> threading.Thread:
+        """Writes the replay from a background thread so the caller never waits on disk I/O."""
+        thread = threading.Thread(target=self.save, args=(path,), name="snekbyte-replay", daemon=True)
+        thread.start()
+        return thread
+
+    @classmethod
+    def load(cls, path: str) -> "Replay":
+        """Reads a replay written by `save`."""
+        with open(path) as f:
+            return cls.from_dict(json.load(f))
+
+
+def play_replay(replay: Replay, max_ticks: Optional[int] = None) -> Iterator[GameData]:
+    """
+    Replays a recorded game without any rendering.
+
+    Yields the GameData once for the initial state and then after every
+    tick, until the game is over or `max_ticks` ticks have been played. The
+    same object is yielded every time and is updated in place.
+
+    Args:
+        replay: The replay to play.
+        max_ticks: Optional limit on the number of ticks to play.
+    """
+    settings = replay.settings()
+    game_data = replay.start_game()
+    turns = replay.turns
+    next_turn = 0
+    yield game_data
+    while not game_data.game_over:
+        if max_ticks is not None and game_data.ticks >= max_ticks:
+            return
+        tick = game_data.ticks
+        while next_turn < len(turns) and turns[next_turn][0] <= tick:
+            _, dx, dy = turns[next_turn]
+            game_data.snake.turn((dx, dy))
+            next_turn += 1
+        update_game_state(game_data, settings)
+        yield game_data
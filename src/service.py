@@ -0,0 +1,399 @@
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import socket
+import sqlite3
+import sys
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from typing import Dict, List, NamedTuple, Optional, Tuple
+from src import config
+from src.game_state import GameSettings
+
+# Modules whose code decides how a game plays out; a change to any of them invalidates cached results
+_ENGINE_MODULES = ("src.game_logic", "src.game_state", "src.snake", "src.food", "src.poop", "src.grid",
+                   "src.items", "src.levels", "src.simulation")
+# Modules whose code decides how the bots play
+_POLICY_MODULES = ("src.bots", "src.lookahead")
+
+_SCHEMA = "CREATE TABLE IF NOT EXISTS results (key TEXT PRIMARY KEY, result TEXT NOT NULL)"
+_INSERT_RESULT = "INSERT OR REPLACE INTO results (key, result) VALUES (?, ?)"
+_SELECT_RESULT = "SELECT result FROM results WHERE key = ?"
+
+
+def _source_hash(modules) -> str:
+    digest = hashlib.sha256()
+    for name in modules:
+        __import__(name)
+        module = sys.modules[name]
+        # Through the loader, so the hash also works for bytecode inside a zipapp from the build command
+        digest.update(module.__loader__.get_data(module.__file__))
+    return digest.hexdigest()[:16]
+
+
+@lru_cache(maxsize=None)
+def engine_version() -> str:
+    """Returns a hash of the engine's source code, part of every cache key."""
+    return _source_hash(_ENGINE_MODULES)
+
+
+@lru_cache(maxsize=None)
+def policy_hash(policy: str) -> str:
+    """Returns a hash of a policy's name and of the bots' source code, part of every cache key."""
+    return f"{policy}-{_source_hash(_POLICY_MODULES)}"
+
+
+class SimulationJob(NamedTuple):
+    """One headless game to simulate: a seed, a bot policy and the settings to play with."""
+    seed: int
+    policy: str = "greedy"
+    wonq_mode: bool = False
+    food_count: int = 1
+    power_ups: bool = False
+    level: Optional[str] = None
+    max_ticks: Optional[int] = None
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "SimulationJob":
+        """
+        Reads a job from a request, where only `seed` is required.
+
+        Raises:
+            ValueError: If a field is missing, unknown or of the wrong type, or the policy does not exist.
+        """
+        from src.bots import POLICIES
+        if not isinstance(data, dict) or not isinstance(data.get("seed"), int):
+            raise ValueError(f"A job needs an integer seed: {data!r}")
+        unknown = set(data) - set(cls._fields)
+        if unknown:
+            raise ValueError(f"Unknown job fields: {', '.join(sorted(unknown))}")
+        job = cls(**data)
+        if job.policy not in POLICIES:
+            raise ValueError(f"Unknown policy {job.policy!r}, expected one of: {', '.join(POLICIES)}")
+        if not isinstance(job.food_count, int) or job.food_count < 1:
+            raise ValueError(f"food_count must be a positive integer, got {job.food_count!r}")
+        if job.max_ticks is not None and not isinstance(job.max_ticks, int):
+            raise ValueError(f"max_ticks must be an integer, got {job.max_ticks!r}")
+        return job
+
+    def settings(self) -> GameSettings:
+        """Returns the GameSettings of the job."""
+        return GameSettings(wonq_mode=bool(self.wonq_mode), food_count=self.food_count,
+                            power_ups=bool(self.power_ups), level=self.level)
+
+    def cache_key(self) -> str:
+        """
+        Returns the key of the job's result: the engine version, the policy
+        hash, the job and the config values the engine reads, so a result is
+        never served for a game that would play differently now.
+        """
+        level = None
+        if self.level is not None:
+            from src.levels import load_level
+            level = load_level(self.level).key
+        return json.dumps([engine_version(), policy_hash(self.policy), self, level, config.GRID_WIDTH,
+                           config.GRID_HEIGHT, config.WONQ_MODE_POOP_THRESHOLD])
+
+
+def _simulate_jobs(jobs: List[SimulationJob]) -> List[dict]:
+    """Runs jobs in a worker process."""
+    from src.simulation import simulate_game
+    return [simulate_game(job.settings(), job.seed, job.policy, job.max_ticks).to_dict() for job in jobs]
+
+
+def _warm_up() -> int:
+    """Imports the engine in a worker process, so the first real job does not pay for it."""
+    import src.bots
+    import src.simulation
+    return os.getpid()
+
+
+class ResultCache:
+    """
+    An LRU cache of simulation results that spills evicted entries to SQLite.
+
+    The most recently used results live in an OrderedDict, so a hit costs a
+    dictionary lookup. When it is full, the least recently used entries move
+    to the database in batches. A miss in memory looks in the database and
+    brings the result back into memory. Closing the cache writes everything
+    still in memory to the database, so the next service starts warm.
+    """
+
+    def __init__(self, size: int = config.SERVICE_CACHE_SIZE, path: Optional[str] = config.SERVICE_CACHE_PATH,
+                 spill_batch: int = config.SERVICE_SPILL_BATCH):
+        """
+        Args:
+            size: Results kept in memory.
+            path: The SQLite database to spill to, or None to forget evicted results.
+            spill_batch: Evicted results written to the database per transaction.
+        """
+        self.size = size
+        self.spill_batch = spill_batch
+        self._entries: "OrderedDict[str, dict]" = OrderedDict()
+        # Evicted results not written to the database yet
+        self._spilled: Dict[str, dict] = {}
+        self.hits = self.disk_hits = self.misses = 0
+        self._connection = None
+        if path is not None:
+            directory = os.path.dirname(path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            # Only the event loop uses the cache, but it need not be the thread that created it
+            self._connection = sqlite3.connect(path, check_same_thread=False)
+            self._connection.execute("PRAGMA journal_mode=WAL")
+            self._connection.execute("PRAGMA synchronous=NORMAL")
+            with self._connection:
+                self._connection.execute(_SCHEMA)
+
+    def get(self, key: str) -> Optional[dict]:
+        """Returns the cached result of a key, or None."""
+        entries = self._entries
+        result = entries.get(key)
+        if result is not None:
+            entries.move_to_end(key)
+            self.hits += 1
+            return result
+        result = self._spilled.pop(key, None)
+        if result is None and self._connection is not None:
+            row = self._connection.execute(_SELECT_RESULT, (key,)).fetchone()
+            if row is not None:
+                result = json.loads(row[0])
+        if result is None:
+            self.misses += 1
+            return None
+        self.disk_hits += 1
+        self.put(key, result)
+        return result
+
+    def put(self, key: str, result: dict) -> None:
+        """Caches a result, evicting the least recently used one if the cache is full."""
+        entries = self._entries
+        entries[key] = result
+        entries.move_to_end(key)
+        while len(entries) > self.size:
+            evicted, value = entries.popitem(last=False)
+            if self._connection is not None:
+                self._spilled[evicted] = value
+        if len(self._spilled) >= self.spill_batch:
+            self._spill()
+
+    def stats(self) -> dict:
+        """Returns the cache's size and hit counts."""
+        return {"entries": len(self._entries), "hits": self.hits, "disk_hits": self.disk_hits,
+                "misses": self.misses}
+
+    def close(self) -> None:
+        """Writes every result to the database and closes it."""
+        if self._connection is None:
+            return
+        self._spilled.update(self._entries)
+        self._spill()
+        self._connection.close()
+        self._connection = None
+
+    def _spill(self) -> None:
+        with self._connection:
+            self._connection.executemany(_INSERT_RESULT, ((key, json.dumps(result))
+                                                          for key, result in self._spilled.items()))
+        self._spilled.clear()
+
+
+class SimulationService:
+    """
+    Answers batches of simulation jobs over a local socket.
+
+    Requests and responses are JSON objects, one per line. A request
+    `{"jobs": [{"seed": 1, "policy": "greedy", "wonq_mode": true}, ...]}` is
+    answered with `{"results": [...], "cached": n}`: one SimulationResult per
+    job, in order, and how many came from the cache. `{"op": "stats"}`
+    returns the cache statistics. A malformed request gets `{"error": ...}`.
+
+    The asyncio front end only looks results up and hands the misses to a
+    process pool whose workers are started, and have imported the engine,
+    before the first request. Identical jobs that arrive while one is being
+    simulated wait for that one instead of running again.
+    """
+
+    def __init__(self, workers: Optional[int] = config.SERVICE_WORKERS, cache: Optional[ResultCache] = None):
+        """
+        Args:
+            workers: Worker processes, or None for one per CPU.
+            cache: The ResultCache to use; by default one with the config's size and spill file.
+        """
+        self.workers = workers or os.cpu_count() or 1
+        self.cache = cache if cache is not None else ResultCache()
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._pending: Dict[str, asyncio.Future] = {}
+
+    async def start(self, host: str = config.SERVICE_HOST, port: int = config.SERVICE_PORT) -> Tuple[str, int]:
+        """
+        Starts the workers and begins listening.
+
+        Args:
+            host: The address to listen on.
+            port: The port to listen on; 0 picks a free one.
+
+        Returns:
+            The address and port the service listens on.
+        """
+        loop = asyncio.get_running_loop()
+        self._pool = ProcessPoolExecutor(max_workers=self.workers)
+        pids = await asyncio.gather(*(loop.run_in_executor(self._pool, _warm_up) for _ in range(self.workers)))
+        logging.info("Started %d simulation workers", len(set(pids)))
+        self._server = await asyncio.start_server(self._handle, host, port, limit=config.SERVICE_MAX_REQUEST)
+        return self._server.sockets[0].getsockname()[:2]
+
+    async def serve_forever(self) -> None:
+        """Answers requests until cancelled."""
+        async with self._server:
+            await self._server.serve_forever()
+
+    async def close(self) -> None:
+        """Stops listening, shuts the workers down and saves the cache."""
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+        if self._pool is not None:
+            self._pool.shutdown(cancel_futures=True)
+        self.cache.close()
+
+    async def simulate(self, jobs: List[SimulationJob]) -> Tuple[List[dict], int]:
+        """
+        Returns the results of a batch of jobs, from the cache where possible.
+
+        Returns:
+            The results in the order of the jobs, and how many came from the cache.
+        """
+        loop = asyncio.get_running_loop()
+        cache, pending = self.cache, self._pending
+        keys = [job.cache_key() for job in jobs]
+        results: List[Optional[dict]] = [cache.get(key) for key in keys]
+        cached = sum(result is not None for result in results)
+        waiting = {}
+        missing: Dict[str, SimulationJob] = {}
+        for i, (key, result) in enumerate(zip(keys, results)):
+            if result is None:
+                if key not in pending and key not in missing:
+                    missing[key] = jobs[i]
+                    pending[key] = loop.create_future()
+                waiting[i] = pending[key]
+        if missing:
+            # A few chunks per worker keep them all busy without paying for a round trip per game
+            items = list(missing.items())
+            size = max(1, len(items) // (4 * self.workers))
+            for start in range(0, len(items), size):
+                chunk = items[start:start + size]
+                asyncio.ensure_future(self._run_chunk(chunk))
+        for i, future in waiting.items():
+            results[i] = await future
+        return results, cached
+
+    async def _run_chunk(self, chunk: List[Tuple[str, SimulationJob]]) -> None:
+        loop = asyncio.get_running_loop()
+        try:
+            outcomes = await loop.run_in_executor(self._pool, _simulate_jobs, [job for _, job in chunk])
+        except Exception as e:
+            for key, _ in chunk:
+                self._pending.pop(key).set_exception(e)
+            return
+        for (key, _), result in zip(chunk, outcomes):
+            self.cache.put(key, result)
+            self._pending.pop(key).set_result(result)
+
+    async def _answer(self, line: bytes) -> dict:
+        try:
+            request = json.loads(line)
+            if not isinstance(request, dict):
+                raise ValueError("A request must be a JSON object")
+            if request.get("op") == "stats":
+                return {"cache": self.cache.stats(), "workers": self.workers, "engine_version": engine_version()}
+            jobs = request.get("jobs")
+            if not isinstance(jobs, list):
+                raise ValueError("A request needs a list of jobs")
+            jobs = [SimulationJob.from_dict(job) for job in jobs]
+            results, cached = await self.simulate(jobs)
+        except Exception as e:
+            return {"error": f"{type(e).__name__}: {e}"}
+        return {"results": results, "cached": cached}
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            while True:
+                try:
+                    line = await reader.readline()
+                except ValueError:
+                    writer.write(b'{"error": "The request is too long"}\n')
+                    break
+                if not line:
+                    break
+                writer.write(json.dumps(await self._answer(line)).encode() + b"\n")
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+
+async def run_service(service: SimulationService, host: str = config.SERVICE_HOST,
+                      port: int = config.SERVICE_PORT) -> None:
+    """Starts a service and answers requests until cancelled, then closes it."""
+    try:
+        host, port = await service.start(host, port)
+        logging.info("Simulation service listening on %s:%d", host, port)
+        await service.serve_forever()
+    finally:
+        await service.close()
+
+
+class ServiceClient:
+    """A blocking client of the SimulationService, for scripts and notebooks."""
+
+    def __init__(self, host: str = config.SERVICE_HOST, port: int = config.SERVICE_PORT,
+                 timeout: Optional[float] = None):
+        """
+        Connects to a running service.
+
+        Args:
+            host: The service's address.
+            port: The service's port.
+            timeout: Seconds to wait for an answer, or None to wait as long as the batch takes.
+        """
+        self._socket = socket.create_connection((host, port), timeout=timeout)
+        self._file = self._socket.makefile("rwb")
+
+    def request(self, request: dict) -> dict:
+        """
+        Sends one request and returns the answer.
+
+        Raises:
+            ValueError: If the service rejected the request.
+        """
+        self._file.write(json.dumps(request).encode() + b"\n")
+        self._file.flush()
+        answer = json.loads(self._file.readline())
+        if "error" in answer:
+            raise ValueError(answer["error"])
+        return answer
+
+    def simulate(self, jobs: List[dict]) -> List[dict]:
+        """Returns the results of a batch of jobs, given as dictionaries of SimulationJob fields."""
+        return self.request({"jobs": jobs})["results"]
+
+    def stats(self) -> dict:
+        """Returns the service's cache statistics."""
+        return self.request({"op": "stats"})
+
+    def close(self) -> None:
+        """Closes the connection."""
+        self._file.close()
+        self._socket.close()
+
+    def __enter__(self) -> "ServiceClient":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
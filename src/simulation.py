@@ -0,0 +1,113 @@
+import random
+import time
+from dataclasses import dataclass, asdict
+from typing import Optional
+from src.bots import POLICIES
+from src.game_logic import reset_game_state, update_game_state
+from src.game_state import GameSettings
+
+
+@dataclass(frozen=True)
+class SimulationResult:
+    """The outcome of one headless game."""
+    seed: int
+    score: int
+    ticks: int
+    death_cause: Optional[str]
+    poops: int
+
+    def to_dict(self) -> dict:
+        """Returns the result as a JSON-serializable dictionary."""
+        return asdict(self)
+
+
+def simulate_game(settings: GameSettings, seed: int, policy: str = "greedy",
+                  max_ticks: Optional[int] = None) -> SimulationResult:
+    """
+    Plays one game without any rendering, steered by a bot policy.
+
+    Args:
+        settings: The settings to play with.
+        seed: Seeds both item placement and the policy, so the result is reproducible.
+        policy: The name of a policy in bots.POLICIES.
+        max_ticks: Stops the game after this many ticks, if set.
+
+    Returns:
+        The SimulationResult of the game.
+    """
+    choose = POLICIES[policy]
+    rng = random.Random(seed)
+    policy_rng = random.Random(seed ^ 0x5EED)
+    game_data = reset_game_state(settings, rng)
+    snake = game_data.snake
+    while not game_data.game_over:
+        if max_ticks is not None and game_data.ticks >= max_ticks:
+            break
+        snake.turn(choose(game_data, settings, policy_rng))
+        update_game_state(game_data, settings)
+    return SimulationResult(seed=seed, score=game_data.score, ticks=game_data.ticks,
+                            death_cause=game_data.death_cause, poops=len(game_data.poops))
+
+
+def run_benchmark(settings: GameSettings, total_ticks: int, policy: str = "greedy",
+                  seed: int = 0, render: bool = False, profiler=None) -> dict:
+    """
+    Measures how many ticks per second the engine runs, playing games back to back.
+
+    Args:
+        settings: The settings to play with.
+        total_ticks: The number of ticks to run.
+        policy: The name of a policy in bots.POLICIES.
+        seed: Seed of the first game; each following game uses the next seed.
+        render: Also draw every tick onto an offscreen surface with the
+            regular game screen. No window is opened.
+        profiler: A diagnostics.MemoryProfiler that measures the allocations
+            of every tick (and draw) and reports after every game. Tracing
+            slows the engine down, so the throughput is not comparable.
+
+    Returns:
+        A dictionary with the number of ticks and games played, the elapsed
+        time and the resulting ticks per second.
+    """
+    choose = POLICIES[policy]
+    draw = surface = None
+    if render:
+        import pygame
+        from src import config
+        from src.ui import draw_game_screen as draw
+        pygame.font.init()
+        surface = pygame.Surface((config.SCREEN_WIDTH, config.SCREEN_HEIGHT))
+
+    ticks = games = 0
+    policy_rng = random.Random(seed)
+    start = time.perf_counter()
+    while ticks < total_ticks:
+        game_data = reset_game_state(settings, random.Random(seed + games))
+        games += 1
+        snake = game_data.snake
+        if profiler is None:
+            while not game_data.game_over and ticks < total_ticks:
+                snake.turn(choose(game_data, settings, policy_rng))
+                update_game_state(game_data, settings)
+                ticks += 1
+                if draw is not None:
+                    draw(surface, game_data, settings)
+            continue
+        while not game_data.game_over and ticks < total_ticks:
+            snake.turn(choose(game_data, settings, policy_rng))
+            with profiler.section("update_game_state"):
+                update_game_state(game_data, settings)
+            ticks += 1
+            if draw is not None:
+                with profiler.section("draw_game_screen"):
+                    draw(surface, game_data, settings)
+            profiler.tick()
+        if game_data.game_over:
+            profiler.game_boundary()
+    elapsed = time.perf_counter() - start
+    return {
+        "ticks": ticks,
+        "games": games,
+        "seconds": elapsed,
+        "ticks_per_second": ticks / elapsed if elapsed > 0 else float("inf"),
+    }
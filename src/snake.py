@@ -1,6 +1,11 @@
 import pygame
+from array import array
 from typing import List, Tuple
-from src import config
+from src import config, sprites
+from src.grid import NEIGHBOR_DIRECTIONS, neighbor_table, position_table
+
+# Slot of each direction in a grid.neighbor_table
+_DIRECTION_SLOTS = {direction: slot for slot, direction in enumerate(NEIGHBOR_DIRECTIONS)}
 
 class Snake:
     """
@@ -8,6 +13,13 @@ class Snake:
 
     This class manages the snake's position, movement, growth, and rendering.
     It keeps track of the segments of the snake's body and its current direction.
+
+    Alongside the list of segments, the snake keeps a count of its segments
+    on every cell of the board, so checking whether a cell is part of the
+    snake is O(1). Moving looks the new head up in the board's neighbor and
+    position tables, so a tick allocates no new tuples. The counts are
+    rebuilt when `positions` is replaced with a new list; code other than
+    `move` should replace the list rather than mutate it.
     """
     def __init__(self) -> None:
         """
@@ -25,6 +37,24 @@ class Snake:
         """
         return self.positions[0]
 
+    def __contains__(self, position) -> bool:
+        """Returns True if a segment of the snake is on the given (x, y) position."""
+        if self.positions is not self._tracked:
+            self._track()
+        index = self._index_of(position)
+        if index >= 0:
+            return self._occupancy[index] > 0
+        return position in self.positions
+
+    def collides_with_self(self) -> bool:
+        """Returns True if the head is on the same cell as another segment."""
+        if self.positions is not self._tracked:
+            self._track()
+        index = self._head_index
+        if index >= 0:
+            return self._occupancy[index] > 1
+        return self.positions.count(self.positions[0]) > 1
+
     def turn(self, point: Tuple[int, int]) -> None:
         """
         Changes the snake's direction, preventing it from immediately reversing.
@@ -36,7 +66,8 @@ class Snake:
             point: A tuple (dx, dy) representing the new direction vector.
                    Example: (0, -1) for UP.
         """
-        if self.length > 1 and (point[0] * -1, point[1] * -1) == self.direction:
+        direction = self.direction
+        if self.length > 1 and point[0] == -direction[0] and point[1] == -direction[1]:
             return
         else:
             self.direction = point
@@ -48,13 +79,50 @@ class Snake:
         It calculates the new head position and updates the list of body segments.
         If the snake has not grown, the last segment is removed.
         """
-        cur = self.get_head_position()
-        x, y = self.direction
-        new_head = (cur[0] + x, cur[1] + y)
+        positions = self.positions
+        if positions is not self._tracked:
+            self._track()
+        occupancy = self._occupancy
+        index = self._head_index
+        slot = _DIRECTION_SLOTS.get(self.direction, -1)
+        if index >= 0 and slot >= 0 and self._neighbors[4 * index + slot] >= 0:
+            index = self._neighbors[4 * index + slot]
+            new_head = self._cells[index]
+            occupancy[index] += 1
+        else:
+            # Off the board (or an unusual direction): only happens on the tick the snake dies
+            cur = positions[0]
+            x, y = self.direction
+            new_head = (cur[0] + x, cur[1] + y)
+            index = self._index_of(new_head)
+            if index >= 0:
+                new_head = self._cells[index]
+                occupancy[index] += 1
+        self._head_index = index
+
+        positions.insert(0, new_head)
+        if len(positions) > self.length:
+            x, y = positions.pop()
+            if 0 <= x < self._width and 0 <= y < self._height:
+                occupancy[y * self._width + x] -= 1
 
-        self.positions.insert(0, new_head)
-        if len(self.positions) > self.length:
-            self.positions.pop()
+    def warp_head(self, position: Tuple[int, int]) -> None:
+        """
+        Moves the head to another cell without moving the rest of the body, e.g. through a portal.
+
+        Args:
+            position: The (x, y) position the head moves to.
+        """
+        if self.positions is not self._tracked:
+            self._track()
+        if self._head_index >= 0:
+            self._occupancy[self._head_index] -= 1
+        index = self._index_of(position)
+        if index >= 0:
+            position = self._cells[index]
+            self._occupancy[index] += 1
+        self._head_index = index
+        self.positions[0] = position
 
     def reset(self) -> None:
         """
@@ -63,22 +131,44 @@ class Snake:
         This is used when starting a new game. It restores the snake to its
         default length, position, and direction.
         """
+        self._width = config.GRID_WIDTH
+        self._height = config.GRID_HEIGHT
+        self._cells = position_table(self._width, self._height)
+        self._neighbors = neighbor_table(self._width, self._height)
         self.length = 1
         self.positions = [(config.GRID_WIDTH // 2, config.GRID_HEIGHT // 2)]
+        self._track()
         self.direction = config.RIGHT
         self.score = 0
 
-    def draw(self, surface: pygame.Surface) -> None:
+    def draw(self, surface: pygame.Surface, theme: str = config.DEFAULT_THEME) -> None:
         """
         Draws all segments of the snake on the given Pygame surface.
 
+        Segments are blitted from the sprite atlas in one batched call, using
+        head, body, corner and tail sprites as appropriate.
+
         Args:
             surface: The pygame.Surface to draw the snake on.
+            theme: The name of the sprite theme to draw with.
         """
-        for p in self.positions:
-            r = pygame.Rect((p[0] * config.GRID_SIZE, p[1] * config.GRID_SIZE), (config.GRID_SIZE, config.GRID_SIZE))
-            pygame.draw.rect(surface, config.GREEN, r)
-            pygame.draw.rect(surface, config.GRAY, r, 1)
+        surface.blits(sprites.get_atlas(theme).snake_blits(self.positions), doreturn=False)
+
+    def _track(self) -> None:
+        # Counts the segments on each cell of a newly assigned positions list
+        occupancy = self._occupancy = array("i", bytes(4 * self._width * self._height))
+        for position in self.positions:
+            index = self._index_of(position)
+            if index >= 0:
+                occupancy[index] += 1
+        self._head_index = self._index_of(self.positions[0])
+        self._tracked = self.positions
+
+    def _index_of(self, position) -> int:
+        x, y = position
+        if 0 <= x < self._width and 0 <= y < self._height:
+            return y * self._width + x
+        return -1
 
     def handle_keys(self) -> None:
         """
@@ -0,0 +1,357 @@
+import pygame
+from typing import Dict, List, Optional, Tuple
+from src import config, profiles
+from src.grid import CellSet
+from src.items import POWER_UP_NAMES
+
+# Connection bits: which neighbouring cells a snake segment joins up with
+CONNECT_UP = 1
+CONNECT_DOWN = 2
+CONNECT_LEFT = 4
+CONNECT_RIGHT = 8
+
+# Fills the parts of tiles that the cell underneath should show through
+_TRANSPARENT = (255, 0, 254)
+
+KIND_HEAD = "head"
+KIND_BODY = "body"
+KIND_TAIL = "tail"
+KIND_SINGLE = "single"
+KIND_FOOD = "food"
+KIND_POOP = "poop"
+# Power-ups are drawn with tiles named after them ("fast", "slow", "clean")
+KIND_POWER_UPS = tuple(POWER_UP_NAMES.values())
+
+# Snake segment kinds in the order of the atlas' segment tile table, and where each starts in it
+_SEGMENT_KINDS = (KIND_SINGLE, KIND_HEAD, KIND_BODY, KIND_TAIL)
+_SINGLE_TILES, _HEAD_TILES, _BODY_TILES, _TAIL_TILES = 0, 16, 32, 48
+
+# Every tile in the atlas, as (kind, connection mask). Heads and tails join
+# one neighbour, body segments join two (straight or corner).
+_TILES = (
+    [(KIND_SINGLE, 0), (KIND_FOOD, 0), (KIND_POOP, 0)]
+    + [(kind, 0) for kind in KIND_POWER_UPS]
+    + [(KIND_HEAD, bit) for bit in (CONNECT_UP, CONNECT_DOWN, CONNECT_LEFT, CONNECT_RIGHT)]
+    + [(KIND_TAIL, bit) for bit in (CONNECT_UP, CONNECT_DOWN, CONNECT_LEFT, CONNECT_RIGHT)]
+    + [(KIND_BODY, mask) for mask in (
+        CONNECT_UP | CONNECT_DOWN, CONNECT_LEFT | CONNECT_RIGHT,
+        CONNECT_UP | CONNECT_LEFT, CONNECT_UP | CONNECT_RIGHT,
+        CONNECT_DOWN | CONNECT_LEFT, CONNECT_DOWN | CONNECT_RIGHT,
+    )]
+)
+
+
+def connection_bit(from_cell: Tuple[int, int], to_cell: Tuple[int, int]) -> int:
+    """
+    Returns the connection bit pointing from one cell to an adjacent cell.
+
+    Cells that are not orthogonal neighbours (e.g. the head of a snake that
+    just left the board) have no connection and return 0.
+    """
+    dx = to_cell[0] - from_cell[0]
+    dy = to_cell[1] - from_cell[1]
+    if dy == 0:
+        return CONNECT_RIGHT if dx == 1 else CONNECT_LEFT if dx == -1 else 0
+    if dx == 0:
+        return CONNECT_DOWN if dy == 1 else CONNECT_UP if dy == -1 else 0
+    return 0
+
+
+class SpriteAtlas:
+    """
+    All cell sprites of one theme, pre-rendered into a single Surface.
+
+    The atlas is one row of square tiles, one per (kind, connection mask)
+    pair in `_TILES`. Drawing a cell is a blit from the atlas with the tile's
+    area, so whole frames can be drawn with one `Surface.blits` call.
+
+    The (surface, destination, area) tuple for each cell and tile is made
+    the first time it is drawn and reused after that, and frames are
+    collected in one reused list, so drawing a frame allocates nothing per
+    cell once the game is under way.
+    """
+
+    def __init__(self, theme: str = config.DEFAULT_THEME, cell_size: int = config.GRID_SIZE,
+                 surface: Optional[pygame.Surface] = None):
+        """
+        Renders the atlas.
+
+        Args:
+            theme: The name of a theme in config.THEMES.
+            cell_size: The width and height of a tile in pixels.
+            surface: The atlas already rendered, e.g. loaded by src.asset_cache;
+                its tiles are used as they are instead of being drawn.
+        """
+        if theme not in config.THEMES:
+            raise ValueError(f"Unknown theme: {theme!r}")
+        self.theme = theme
+        self.cell_size = cell_size
+        self.colors = config.THEMES[theme]
+        if surface is None:
+            self.surface = pygame.Surface((cell_size * len(_TILES), cell_size))
+            self.surface.fill(_TRANSPARENT)
+        else:
+            self.surface = surface
+        self.surface.set_colorkey(_TRANSPARENT, pygame.RLEACCEL)
+        self._areas: Dict[Tuple[str, int], pygame.Rect] = {}
+        self._tile_areas: List[pygame.Rect] = []
+        self._tile_numbers: Dict[Tuple[str, int], int] = {}
+        for i, (kind, mask) in enumerate(_TILES):
+            area = pygame.Rect(i * cell_size, 0, cell_size, cell_size)
+            self._areas[(kind, mask)] = area
+            self._tile_areas.append(area)
+            self._tile_numbers[(kind, mask)] = i
+            if surface is None:
+                self._draw_tile(area, kind, mask)
+        if pygame.display.get_init() and pygame.display.get_surface() is not None:
+            self.surface = self.surface.convert()
+        # Tile number of every snake segment, indexed by its kind's offset (_HEAD_TILES, ...) plus its connection mask
+        self._segment_tiles = [self._tile_numbers[self._normalize(kind, mask)]
+                               for kind in _SEGMENT_KINDS for mask in range(16)]
+        self._food_tile = self._tile_numbers[(KIND_FOOD, 0)]
+        self._poop_tile = self._tile_numbers[(KIND_POOP, 0)]
+        # Tile number of every power-up, indexed by its items kind
+        self._power_up_tiles = [0] * (max(POWER_UP_NAMES) + 1)
+        for code, name in POWER_UP_NAMES.items():
+            self._power_up_tiles[code] = self._tile_numbers[(name, 0)]
+        self._width = self._height = 0
+        self._blit_cache: List[Optional[tuple]] = []
+        self._buffer: list = []
+
+    def area(self, kind: str, mask: int = 0) -> pygame.Rect:
+        """
+        Returns the area of a tile within the atlas surface.
+
+        Args:
+            kind: One of the KIND_* constants.
+            mask: The connection mask for snake segments; ignored for food and poop.
+        """
+        return self._areas[self._normalize(kind, mask)]
+
+    def _normalize(self, kind: str, mask: int) -> Tuple[str, int]:
+        if kind in (KIND_FOOD, KIND_POOP, KIND_SINGLE) or kind in KIND_POWER_UPS:
+            mask = 0
+        elif kind != KIND_BODY and mask not in (CONNECT_UP, CONNECT_DOWN, CONNECT_LEFT, CONNECT_RIGHT):
+            # A head or tail without a neighbour on the board is drawn on its own
+            kind, mask = KIND_SINGLE, 0
+        elif kind == KIND_BODY and (kind, mask) not in self._areas:
+            # Only possible while the snake overlaps itself on the frame it dies
+            kind, mask = KIND_SINGLE, 0
+        return kind, mask
+
+    def snake_blits(self, positions: List[Tuple[int, int]]) -> list:
+        """
+        Returns the blit sequence that draws a snake.
+
+        Args:
+            positions: The snake's segments, head first.
+
+        Returns:
+            A list of (surface, destination, area) tuples for `Surface.blits`.
+        """
+        self._prepare_board()
+        blits = []
+        self._add_snake(blits, 0, positions)
+        return blits
+
+    def cell_blit(self, kind: str, cell: Tuple[int, int]) -> tuple:
+        """Returns the (surface, destination, area) tuple that draws a food or poop cell."""
+        self._prepare_board()
+        return self._blit(self._food_tile if kind == KIND_FOOD else self._poop_tile, cell)
+
+    def entity_blits(self, positions: List[Tuple[int, int]], food_position: Tuple[int, int], poops,
+                     items=None) -> list:
+        """
+        Returns the blit sequence that draws a snake, its food, the poops and any party mode items.
+
+        The list is owned by the atlas and refilled by the next call, so it
+        must be drawn before then.
+
+        Args:
+            positions: The snake's segments, head first.
+            food_position: The (x, y) position of the food.
+            poops: A CellSet of poops (such as a PoopField) or an iterable of (x, y) positions.
+            items: The ItemField of a party mode game, or None.
+
+        Returns:
+            A list of (surface, destination, area) tuples for `Surface.blits`.
+        """
+        self._prepare_board()
+        buffer = self._buffer
+        count = self._add_snake(buffer, 0, positions)
+        count = self._put(buffer, count, self._blit(self._food_tile, food_position))
+        poop_tile = self._poop_tile
+        if isinstance(poops, CellSet):
+            for i in range(len(poops)):
+                count = self._put(buffer, count, self._blit(poop_tile, poops.position_at(i)))
+        else:
+            for position in poops:
+                count = self._put(buffer, count, self._blit(poop_tile, position))
+        if items is not None:
+            food_tile = self._food_tile
+            foods = items.foods
+            for i in range(len(foods)):
+                count = self._put(buffer, count, self._blit(food_tile, foods.position_at(i)))
+            power_up_tiles = self._power_up_tiles
+            kinds = items.kinds
+            power_ups = items.power_ups
+            for i in range(len(power_ups)):
+                tile = power_up_tiles[kinds[power_ups.indices[i]]]
+                count = self._put(buffer, count, self._blit(tile, power_ups.position_at(i)))
+        del buffer[count:]
+        return buffer
+
+    def _add_snake(self, blits: list, count: int, positions: List[Tuple[int, int]]) -> int:
+        segment_tiles = self._segment_tiles
+        last = len(positions) - 1
+        for i in range(last + 1):
+            cell = positions[i]
+            mask = 0
+            if i > 0:
+                mask |= connection_bit(cell, positions[i - 1])
+            if i < last:
+                mask |= connection_bit(cell, positions[i + 1])
+            if last == 0:
+                kind = _SINGLE_TILES
+            elif i == 0:
+                kind = _HEAD_TILES
+            elif i == last:
+                kind = _TAIL_TILES
+            else:
+                kind = _BODY_TILES
+            count = self._put(blits, count, self._blit(segment_tiles[kind + mask], cell))
+        return count
+
+    @staticmethod
+    def _put(blits: list, count: int, blit: tuple) -> int:
+        # Overwrite the list in place, growing it only when needed
+        if count < len(blits):
+            blits[count] = blit
+        else:
+            blits.append(blit)
+        return count + 1
+
+    def _prepare_board(self) -> None:
+        # The cached blits cover the current board; start over if its size changed
+        if self._width != config.GRID_WIDTH or self._height != config.GRID_HEIGHT:
+            self._width = config.GRID_WIDTH
+            self._height = config.GRID_HEIGHT
+            self._blit_cache = [None] * (len(_TILES) * self._width * self._height)
+
+    def _blit(self, tile: int, cell: Tuple[int, int]) -> tuple:
+        width, height = self._width, self._height
+        x, y = cell
+        if not (0 <= x < width and 0 <= y < height):
+            return (self.surface, (x * self.cell_size, y * self.cell_size), self._tile_areas[tile])
+        key = (tile * height + y) * width + x
+        blit = self._blit_cache[key]
+        if blit is None:
+            blit = self._blit_cache[key] = (self.surface, (x * self.cell_size, y * self.cell_size),
+                                            self._tile_areas[tile])
+        return blit
+
+    def _draw_tile(self, area: pygame.Rect, kind: str, mask: int) -> None:
+        colors = self.colors
+        surface = self.surface
+        if kind == KIND_FOOD:
+            pygame.draw.rect(surface, colors["food"], area)
+            pygame.draw.rect(surface, colors["outline"], area, 1)
+            return
+        if kind == KIND_POOP:
+            pygame.draw.rect(surface, colors["poop"], area)
+            return
+        if kind in KIND_POWER_UPS:
+            pygame.draw.circle(surface, config.POWER_UP_COLORS[kind], area.center, self.cell_size // 2 - 1)
+            pygame.draw.circle(surface, colors["outline"], area.center, self.cell_size // 2 - 1, 1)
+            return
+
+        size = self.cell_size
+        inset = max(1, size // 10)
+        if kind == KIND_TAIL:
+            # Tails taper away from the body
+            body = area.inflate(-4 * inset, -4 * inset)
+        else:
+            body = area.inflate(-2 * inset, -2 * inset)
+        # Stretch the segment to the edges it connects to, so segments join up
+        if mask & CONNECT_UP:
+            body.union_ip(pygame.Rect(body.left, area.top, body.width, 1))
+        if mask & CONNECT_DOWN:
+            body.union_ip(pygame.Rect(body.left, area.bottom - 1, body.width, 1))
+        if mask & CONNECT_LEFT:
+            body.union_ip(pygame.Rect(area.left, body.top, 1, body.height))
+        if mask & CONNECT_RIGHT:
+            body.union_ip(pygame.Rect(area.right - 1, body.top, 1, body.height))
+        pygame.draw.rect(surface, colors["snake"], body)
+        pygame.draw.rect(surface, colors["outline"], body, 1)
+
+        if kind in (KIND_HEAD, KIND_SINGLE):
+            self._draw_eyes(area, mask)
+
+    def _draw_eyes(self, area: pygame.Rect, mask: int) -> None:
+        # Eyes sit on the side facing away from the body
+        radius = max(1, self.cell_size // 8)
+        near, far = self.cell_size // 3, self.cell_size - self.cell_size // 3
+        if mask & (CONNECT_LEFT | CONNECT_RIGHT):
+            x = area.left + (far if mask & CONNECT_LEFT else near)
+            eyes = [(x, area.top + near), (x, area.top + far)]
+        else:
+            y = area.top + (far if mask & CONNECT_UP else near)
+            eyes = [(area.left + near, y), (area.left + far, y)]
+        for eye in eyes:
+            pygame.draw.circle(self.surface, self.colors["eyes"], eye, radius)
+
+
+_atlases: Dict[Tuple[str, int], SpriteAtlas] = {}
+# Atlases are rebuilt when a config profile changes the cell size or theme colors
+profiles.on_change(("GRID_SIZE", "THEMES"), lambda changed: _atlases.clear())
+
+
+def get_atlas(theme: str = config.DEFAULT_THEME) -> SpriteAtlas:
+    """
+    Returns the shared atlas for a theme at the current cell size, building it on first use.
+
+    Args:
+        theme: The name of a theme in config.THEMES.
+    """
+    key = (theme, config.GRID_SIZE)
+    atlas = _atlases.get(key)
+    if atlas is None:
+        atlas = _atlases[key] = SpriteAtlas(theme, config.GRID_SIZE)
+    return atlas
+
+
+def seed_atlas(theme: str, surface: pygame.Surface) -> SpriteAtlas:
+    """
+    Makes an atlas rendered earlier the shared atlas of a theme at the current cell size.
+
+    Args:
+        theme: The name of a theme in config.THEMES.
+        surface: The atlas's Surface, e.g. loaded by src.asset_cache.
+
+    Returns:
+        The new atlas.
+    """
+    atlas = _atlases[(theme, config.GRID_SIZE)] = SpriteAtlas(theme, config.GRID_SIZE, surface)
+    return atlas
+
+
+def clear_atlases() -> None:
+    """Drops every shared atlas, so each is rendered again on first use."""
+    _atlases.clear()
+
+
+def draw_entities(surface: pygame.Surface, snake, food, poop_positions, theme: str = config.DEFAULT_THEME,
+                  items=None) -> None:
+    """
+    Draws the snake, food and poops with a single batched blit.
+
+    Args:
+        surface: The pygame Surface to draw on.
+        snake: The Snake to draw.
+        food: The Food to draw.
+        poop_positions: The poops to draw on top of the snake: a PoopField, or (x, y) positions.
+        theme: The name of the theme to draw with.
+        items: The ItemField of a party mode game, whose foods and power-ups are drawn too.
+    """
+    surface.blits(get_atlas(theme).entity_blits(snake.positions, food.position, poop_positions, items),
+                  doreturn=False)
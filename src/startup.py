@@ -0,0 +1,147 @@
+import itertools
+import os
+import py_compile
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import zipapp
+from typing import Dict, List, Optional
+from src import config
+
+# Printed by `play --exit-after-first-frame` once the first frame is on the screen
+FIRST_FRAME_MARKER = "snekbyte: first frame"
+
+_SOURCE_DIR = os.path.dirname(os.path.abspath(__file__))
+_ROOT_DIR = os.path.dirname(_SOURCE_DIR)
+
+_BUNDLE_MAIN = """import sys
+from src.cli import main
+
+sys.exit(main())
+"""
+
+
+def build_bundle(path: str = config.BUNDLE_PATH, assets_dir: Optional[str] = None) -> Dict:
+    """
+    Builds a zipapp of the game that holds bytecode only.
+
+    Every module of src/ is compiled ahead of time into a .pyc that is never
+    checked against its source, and the archive is stored uncompressed, so
+    a launch imports the game straight from the zip without compiling,
+    stat-ing source files or inflating anything. The bundle runs with
+    `python snekbyte.pyz` on the Python version that built it; pygame and
+    numpy are imported from the environment as usual.
+
+    Args:
+        path: The file to write.
+        assets_dir: If set, the static assets of the current settings are
+            also rendered into this asset cache directory, so the first
+            launch finds them (see src.asset_cache).
+
+    Returns:
+        The bundle's path, its size in bytes and the number of modules.
+    """
+    with tempfile.TemporaryDirectory() as staging:
+        modules = 0
+        for directory, subdirectories, files in os.walk(_SOURCE_DIR):
+            subdirectories[:] = sorted(d for d in subdirectories if d != "__pycache__")
+            relative = os.path.relpath(directory, _ROOT_DIR)
+            for name in sorted(files):
+                if not name.endswith(".py"):
+                    continue
+                # zipimport finds src/ui.pyc next to where src/ui.py would be
+                py_compile.compile(os.path.join(directory, name),
+                                   cfile=os.path.join(staging, relative, name[:-3] + ".pyc"),
+                                   dfile=os.path.join(relative, name), doraise=True,
+                                   invalidation_mode=py_compile.PycInvalidationMode.UNCHECKED_HASH)
+                modules += 1
+        with open(os.path.join(staging, "__main__.py"), "w") as f:
+            f.write(_BUNDLE_MAIN)
+        zipapp.create_archive(staging, path, interpreter="/usr/bin/env python3")
+    if assets_dir is not None:
+        import pygame
+        from src.asset_cache import save_assets
+        pygame.font.init()
+        save_assets((config.SCREEN_WIDTH, config.SCREEN_HEIGHT), config.DEFAULT_THEME, assets_dir)
+    return {"path": path, "bytes": os.path.getsize(path), "modules": modules}
+
+
+def _launch(command: List[str], asset_dir: str, env: Dict[str, str]) -> float:
+    """Runs the game until its first frame and returns the seconds from the launch to the frame."""
+    start = time.perf_counter()
+    process = subprocess.Popen(command + ["play", "--exit-after-first-frame", "--asset-cache", asset_dir],
+                               stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, env=env, text=True)
+    elapsed = None
+    for line in process.stdout:
+        if line.strip() == FIRST_FRAME_MARKER:
+            elapsed = time.perf_counter() - start
+            break
+    process.stdout.close()
+    if process.wait() != 0 or elapsed is None:
+        raise RuntimeError(f"{' '.join(command)} exited with {process.returncode} before its first frame")
+    return elapsed
+
+
+def _summary(samples: List[float]) -> Dict:
+    return {"runs": len(samples), "median_ms": round(1000 * statistics.median(samples), 1),
+            "min_ms": round(1000 * min(samples), 1), "max_ms": round(1000 * max(samples), 1)}
+
+
+def measure_startup(runs: int = config.STARTUP_RUNS, bundle: Optional[str] = None) -> Dict:
+    """
+    Times launches of the game from the start of the process to its first frame on the screen.
+
+    The source tree is copied into a scratch directory and launched from
+    there, so the tree's own bytecode and the user's asset cache are left
+    alone. Cold launches start from a fresh copy with no bytecode and an
+    empty asset cache; warm launches reuse one copy and cache, warmed up by
+    an untimed launch first. With a bundle from `build_bundle`, its launches
+    are timed the same way (a bundle has no bytecode to warm, only assets).
+    The operating system's file cache is warm in every case.
+
+    Args:
+        runs: Launches timed per case.
+        bundle: The path of a bundle to time as well.
+
+    Returns:
+        The median, fastest and slowest time to the first frame of each case.
+    """
+    env = dict(os.environ)
+    # Each launch must import its own copy of src, not whatever PYTHONPATH points at
+    env.pop("PYTHONPATH", None)
+    # Warm launches need the bytecode that the first launch writes
+    env.pop("PYTHONDONTWRITEBYTECODE", None)
+    env.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+    samples = {}
+    with tempfile.TemporaryDirectory() as scratch:
+        counter = itertools.count()
+
+        def fresh_tree():
+            tree = os.path.join(scratch, f"tree{next(counter)}")
+            shutil.copytree(os.path.join(_ROOT_DIR, "src"), os.path.join(tree, "src"),
+                            ignore=shutil.ignore_patterns("__pycache__"))
+            shutil.copy(os.path.join(_ROOT_DIR, "main.py"), tree)
+            return [sys.executable, os.path.join(tree, "main.py")]
+
+        def fresh_assets():
+            return os.path.join(scratch, f"assets{next(counter)}")
+
+        def warmed(command):
+            assets = fresh_assets()
+            _launch(command, assets, env)
+            return lambda: (command, assets)
+
+        # Each case makes the command and asset directory of a launch
+        cases = {"source_cold": lambda: (fresh_tree(), fresh_assets()), "source_warm": warmed(fresh_tree())}
+        if bundle is not None:
+            command = [sys.executable, os.path.abspath(bundle)]
+            cases["bundle_cold"] = lambda: (command, fresh_assets())
+            cases["bundle_warm"] = warmed(command)
+        # Taking turns spreads any drift in the machine's speed over every case
+        for _ in range(runs):
+            for name, launch in cases.items():
+                samples.setdefault(name, []).append(_launch(*launch(), env))
+    return {"python": sys.version.split()[0], "cases": {name: _summary(times) for name, times in samples.items()}}
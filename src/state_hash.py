@@ -0,0 +1,244 @@
+import random
+import struct
+import sys
+from array import array
+from functools import lru_cache
+from typing import Optional
+from src.game_state import BoardFollower, GameEvent
+
+HASH_MAGIC = b"SNKH"
+HASH_FORMAT_VERSION = 1
+_HASH_HEADER = struct.Struct("<4sBI")  # magic, version, number of hashes
+
+_MASK = (1 << 64) - 1
+
+# Zobrist key tables, one key per cell each
+SNAKE = 0  # A snake segment on the cell
+HEAD = 1   # The snake's head on the cell
+FOOD = 2   # The main food on the cell
+POOP = 3   # A poop on the cell
+ITEMS = 4  # A party mode item on the cell, one table per items kind from here on
+_ITEM_KINDS = 5  # items.EMPTY to items.CLEAN
+
+
+class ZobristKeys:
+    """
+    The random 64-bit keys of one board size.
+
+    The keys come from a generator seeded with the board size, so every
+    engine version, process and machine uses the same keys.
+    """
+    __slots__ = ("cells", "keys")
+
+    def __init__(self, width: int, height: int):
+        self.cells = width * height
+        rng = random.Random(f"snekbyte-zobrist-{width}x{height}")
+        self.keys = array("Q", (rng.getrandbits(64) for _ in range((ITEMS + _ITEM_KINDS) * self.cells)))
+
+    def key(self, table: int, index: int) -> int:
+        """Returns the key of a cell in a table (the key of an off-board cell is derived from its index)."""
+        if 0 <= index < self.cells:
+            return self.keys[table * self.cells + index]
+        return mix(index & _MASK, table + 101)
+
+
+@lru_cache(maxsize=8)
+def zobrist_keys(width: int, height: int) -> ZobristKeys:
+    """Returns the Zobrist keys of a board size, generating them once."""
+    return ZobristKeys(width, height)
+
+
+def mix(value: int, salt: int) -> int:
+    """Scrambles an integer into 64 bits (splitmix64), for hashing counters like the score."""
+    z = (value * 0x9E3779B97F4A7C15 + salt * 0xBF58476D1CE4E5B9) & _MASK
+    z = ((z ^ (z >> 30)) * 0xBF58476D1CE4E5B9) & _MASK
+    z = ((z ^ (z >> 27)) * 0x94D049BB133111EB) & _MASK
+    return z ^ (z >> 31)
+
+
+@lru_cache(maxsize=4096)
+def scalars_hash(score: int, shit_counter: int, length: int, direction, game_over: bool) -> int:
+    """Returns the part of the hash that covers the game's counters, the snake's direction and game over."""
+    dx, dy = direction
+    return (mix(score, 1) ^ mix(shit_counter, 2) ^ mix(length, 3)
+            ^ mix((dx + 1) * 3 + dy + 1, 4) ^ mix(int(game_over), 5))
+
+
+def _scalars(game_data) -> int:
+    snake = game_data.snake
+    return scalars_hash(game_data.score, game_data.shit_counter, snake.length, snake.direction, game_data.game_over)
+
+
+def _index(game_data, position) -> int:
+    width = game_data.poops.width
+    x, y = position
+    if 0 <= x < width and 0 <= y < game_data.poops.height:
+        return y * width + x
+    # Off the board: distinct negative numbers, which ZobristKeys.key hashes on the fly
+    return -1 - ((y & 0xFFFF) << 16 | (x & 0xFFFF))
+
+
+def full_hash(game_data) -> int:
+    """
+    Computes the hash of a game's state from scratch.
+
+    The hash covers the snake's cells, its head, direction and length, the
+    food, the poops, the party mode items, the score and the shit counter.
+    It is the reference that StateHasher's incremental hash must equal.
+    """
+    keys = zobrist_keys(game_data.poops.width, game_data.poops.height)
+    snake = game_data.snake
+    value = _scalars(game_data)
+    for position in snake.positions:
+        value ^= keys.key(SNAKE, _index(game_data, position))
+    value ^= keys.key(HEAD, _index(game_data, snake.positions[0]))
+    value ^= keys.key(FOOD, _index(game_data, game_data.food.position))
+    for index in game_data.poops.indices:
+        value ^= keys.key(POOP, index)
+    items = game_data.items
+    if items is not None:
+        for i, kind in enumerate(items.kinds):
+            if kind:
+                value ^= keys.key(ITEMS + kind, i)
+    return value
+
+
+class StateHasher(BoardFollower):
+    """
+    Keeps a Zobrist hash of a game up to date as `update_game_state` plays it.
+
+    Every part of the state is the XOR of one random key per occupied cell,
+    so a change is undone and redone by XORing the keys of the cells that
+    changed: a tick costs a few XORs whatever the snake's length or the
+    number of poops. The hasher follows the game's cells as a BoardFollower.
+    The party mode items keep their own hash (ItemField.hash) as they spawn
+    and disappear. Counters such as the score are mixed in when the hash is
+    read.
+
+    Only changes made by the engine are followed; code that edits the game
+    directly (e.g. replaces `snake.positions`) must create a new hasher.
+    """
+
+    def __init__(self, game_data):
+        """
+        Hashes a game and subscribes to its events.
+
+        Args:
+            game_data: The GameData to follow.
+        """
+        super().__init__(game_data)
+        self.keys = zobrist_keys(game_data.poops.width, game_data.poops.height)
+        self._food = self.cell_index(game_data.food.position)
+        value = 0
+        for index in self._segments:
+            value ^= self.keys.key(SNAKE, index)
+        value ^= self.keys.key(HEAD, self._segments[0])
+        value ^= self.keys.key(FOOD, self._food)
+        # The poops are also hashed on their own, so the clean power-up can take them all out at once
+        poops = 0
+        for index in self._poops:
+            poops ^= self.keys.key(POOP, index)
+        self._poop_hash = poops
+        self._cells = value ^ poops
+
+    @property
+    def value(self) -> int:
+        """The hash of the game's current state, equal to `full_hash(game_data)`."""
+        items = self.game_data.items
+        return self._cells ^ _scalars(self.game_data) ^ (items.hash if items is not None else 0)
+
+    def cell_index(self, position) -> int:
+        """Returns the cell index of a position; off the board, a distinct negative number per position."""
+        return _index(self.game_data, position)
+
+    def _tail_left(self, index: int) -> None:
+        self._cells ^= self.keys.key(SNAKE, index)
+
+    def _head_entered(self, index: int, previous: int) -> None:
+        keys = self.keys
+        self._cells ^= keys.key(HEAD, previous) ^ keys.key(HEAD, index) ^ keys.key(SNAKE, index)
+
+    def _poop_dropped(self, index: int) -> None:
+        key = self.keys.key(POOP, index)
+        self._poop_hash ^= key
+        self._cells ^= key
+
+    def _poops_cleared(self, indices) -> None:
+        self._cells ^= self._poop_hash
+        self._poop_hash = 0
+
+    def _on_other_event(self, event: GameEvent, game_data) -> None:
+        if event is GameEvent.FOOD_EATEN:
+            food = self.cell_index(game_data.food.position)
+            self._cells ^= self.keys.key(FOOD, self._food) ^ self.keys.key(FOOD, food)
+            self._food = food
+
+
+def game_hashes(replay, max_ticks: Optional[int] = None) -> array:
+    """
+    Plays a replay and hashes the state after every tick.
+
+    Args:
+        replay: The Replay to play.
+        max_ticks: Stops after this many ticks, if set.
+
+    Returns:
+        The hashes as an array of unsigned 64-bit integers: the starting
+        state first, then one per tick.
+    """
+    from src.replay import play_replay
+    hashes = array("Q")
+    hasher = None
+    for game_data in play_replay(replay, max_ticks=max_ticks):
+        if hasher is None:
+            hasher = StateHasher(game_data)
+        hashes.append(hasher.value)
+    return hashes
+
+
+def save_hashes(path: str, hashes: array) -> None:
+    """Writes per-tick hashes to a file."""
+    data = array("Q", hashes)
+    if sys.byteorder == "big":
+        data.byteswap()
+    with open(path, "wb") as f:
+        f.write(_HASH_HEADER.pack(HASH_MAGIC, HASH_FORMAT_VERSION, len(data)))
+        f.write(data.tobytes())
+
+
+def load_hashes(path: str) -> array:
+    """
+    Reads per-tick hashes written by `save_hashes`.
+
+    Raises:
+        ValueError: If the file is not a hash file.
+    """
+    with open(path, "rb") as f:
+        header = f.read(_HASH_HEADER.size)
+        if len(header) < _HASH_HEADER.size:
+            raise ValueError(f"{path} is not a hash file")
+        magic, version, count = _HASH_HEADER.unpack(header)
+        if magic != HASH_MAGIC or version != HASH_FORMAT_VERSION:
+            raise ValueError(f"{path} is not a hash file of version {HASH_FORMAT_VERSION}")
+        hashes = array("Q")
+        hashes.frombytes(f.read(8 * count))
+    if len(hashes) != count:
+        raise ValueError(f"{path} is cut off")
+    if sys.byteorder == "big":
+        hashes.byteswap()
+    return hashes
+
+
+def first_difference(expected: array, actual: array) -> Optional[int]:
+    """
+    Returns the first tick whose hashes differ, or None if they all match.
+
+    A run that is shorter or longer than the other differs at the tick
+    where one of them ends.
+    """
+    for tick, (a, b) in enumerate(zip(expected, actual)):
+        if a != b:
+            return tick
+    if len(expected) != len(actual):
+        return min(len(expected), len(actual))
+    return None
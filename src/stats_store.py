@@ -0,0 +1,242 @@
+import logging
+import os
+import queue
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+from src import config
+
+_SCHEMA = (
+    """
+    CREATE TABLE IF NOT EXISTS runs (
+        id INTEGER PRIMARY KEY,
+        finished_at REAL NOT NULL,
+        score INTEGER NOT NULL,
+        ticks INTEGER NOT NULL,
+        death_cause TEXT,
+        poops INTEGER NOT NULL,
+        speed_index INTEGER NOT NULL,
+        wonq_mode INTEGER NOT NULL
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS runs_mode_score ON runs (wonq_mode, score DESC)",
+)
+
+# Statements are kept as constants so sqlite3's statement cache reuses the
+# prepared form on every batch instead of re-parsing the SQL.
+_INSERT_RUN = (
+    "INSERT INTO runs (finished_at, score, ticks, death_cause, poops, speed_index, wonq_mode) "
+    "VALUES (?, ?, ?, ?, ?, ?, ?)"
+)
+_SELECT_TOP = "SELECT score FROM runs WHERE wonq_mode = ? ORDER BY score DESC LIMIT ?"
+_COUNT_RUNS = "SELECT COUNT(*) FROM runs WHERE wonq_mode = ?"
+_COUNT_BELOW = "SELECT COUNT(*) FROM runs WHERE wonq_mode = ? AND score < ?"
+
+_STOP = object()
+
+
+@dataclass(frozen=True)
+class RunRecord:
+    """A single finished game, as written to the statistics store."""
+    score: int
+    ticks: int
+    death_cause: Optional[str]
+    poops: int
+    speed_index: int
+    wonq_mode: bool
+    finished_at: float = field(default_factory=time.time)
+
+    @classmethod
+    def from_game(cls, game_data, settings) -> "RunRecord":
+        """
+        Builds a record from the state of a game that just ended.
+
+        Args:
+            game_data: The game state of the finished game.
+            settings: The GameSettings the game was played with.
+        """
+        return cls(
+            score=game_data.score,
+            ticks=game_data.ticks,
+            death_cause=game_data.death_cause,
+            poops=len(game_data.poops),
+            speed_index=settings.speed_index,
+            wonq_mode=settings.wonq_mode,
+        )
+
+
+@dataclass(frozen=True)
+class Leaderboard:
+    """
+    An immutable view of the stored statistics for one game mode.
+
+    Attributes:
+        top_scores: The best scores, highest first.
+        total_runs: The number of runs stored for this mode.
+        last_percentile: The share (0-100) of stored runs that scored below
+            the most recently recorded run, or None if no run was recorded
+            in this mode since the store was opened.
+    """
+    top_scores: Tuple[int, ...] = ()
+    total_runs: int = 0
+    last_percentile: Optional[float] = None
+
+    @property
+    def best(self) -> int:
+        """The highest stored score, or 0 if nothing is stored yet."""
+        return self.top_scores[0] if self.top_scores else 0
+
+
+class StatsStore:
+    """
+    SQLite-backed store of finished runs.
+
+    All database work happens on a background writer thread, so recording a
+    run from the game loop is a non-blocking queue put. Runs that arrive close
+    together are written in a single transaction. After each batch the writer
+    refreshes a `Leaderboard` per game mode, which menus read without ever
+    touching the database.
+    """
+
+    def __init__(self, path: str = config.STATS_DB_PATH, top_n: int = config.STATS_TOP_N,
+                 batch_size: int = config.STATS_BATCH_SIZE,
+                 flush_interval: float = config.STATS_FLUSH_INTERVAL):
+        """
+        Opens (or creates) the store and starts the writer thread.
+
+        Args:
+            path: Location of the SQLite database file.
+            top_n: How many top scores each leaderboard keeps.
+            batch_size: The maximum number of runs written per transaction.
+            flush_interval: How long the writer waits for more runs to join
+                a batch before writing it, in seconds.
+        """
+        self.path = path
+        self.top_n = top_n
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._queue: "queue.Queue" = queue.Queue()
+        self._leaderboards: Dict[bool, Leaderboard] = {False: Leaderboard(), True: Leaderboard()}
+        self._ready = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="snekbyte-stats", daemon=True)
+        self._thread.start()
+
+    def record_run(self, record: RunRecord) -> None:
+        """
+        Queues a finished run for writing. Never blocks on disk I/O.
+
+        Args:
+            record: The run to store.
+        """
+        self._queue.put_nowait(record)
+
+    def leaderboard(self, wonq_mode: bool) -> Leaderboard:
+        """
+        Returns the latest leaderboard for a game mode.
+
+        Args:
+            wonq_mode: Whether to return the WoNQ mode leaderboard.
+        """
+        return self._leaderboards[bool(wonq_mode)]
+
+    def flush(self) -> None:
+        """Blocks until the stored leaderboards are loaded and every queued run has been written."""
+        self._ready.wait()
+        self._queue.join()
+
+    def close(self) -> None:
+        """Writes any pending runs and stops the writer thread."""
+        if self._thread.is_alive():
+            self._queue.put(_STOP)
+            self._thread.join()
+
+    def _connect(self) -> sqlite3.Connection:
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        connection = sqlite3.connect(self.path)
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.execute("PRAGMA synchronous=NORMAL")
+        with connection:
+            for statement in _SCHEMA:
+                connection.execute(statement)
+        return connection
+
+    def _run(self) -> None:
+        try:
+            connection = self._connect()
+        except sqlite3.Error:
+            logging.exception("Could not open the statistics store at %s", self.path)
+            self._ready.set()
+            self._drain_without_storage()
+            return
+
+        try:
+            for mode in (False, True):
+                self._leaderboards[mode] = self._query_leaderboard(connection, mode, None)
+            self._ready.set()
+            stopping = False
+            while not stopping:
+                batch, stopping = self._next_batch()
+                if batch:
+                    self._write_batch(connection, batch)
+                for _ in range(len(batch) + stopping):
+                    self._queue.task_done()
+        finally:
+            connection.close()
+
+    def _next_batch(self) -> Tuple[List[RunRecord], bool]:
+        """Waits for a run, then gathers whatever else arrives within the flush interval."""
+        item = self._queue.get()
+        if item is _STOP:
+            return [], True
+        batch = [item]
+        deadline = time.monotonic() + self.flush_interval
+        while len(batch) < self.batch_size:
+            remaining = deadline - time.monotonic()
+            try:
+                item = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is _STOP:
+                return batch, True
+            batch.append(item)
+        return batch, False
+
+    def _write_batch(self, connection: sqlite3.Connection, batch: List[RunRecord]) -> None:
+        try:
+            with connection:
+                connection.executemany(_INSERT_RUN, [
+                    (r.finished_at, r.score, r.ticks, r.death_cause, r.poops, r.speed_index, int(r.wonq_mode))
+                    for r in batch
+                ])
+        except sqlite3.Error:
+            logging.exception("Failed to write %d runs to the statistics store", len(batch))
+            return
+
+        latest: Dict[bool, RunRecord] = {}
+        for record in batch:
+            latest[bool(record.wonq_mode)] = record
+        for mode, record in latest.items():
+            self._leaderboards[mode] = self._query_leaderboard(connection, mode, record.score)
+
+    def _query_leaderboard(self, connection: sqlite3.Connection, wonq_mode: bool,
+                           last_score: Optional[int]) -> Leaderboard:
+        mode = int(wonq_mode)
+        top = tuple(row[0] for row in connection.execute(_SELECT_TOP, (mode, self.top_n)))
+        total = connection.execute(_COUNT_RUNS, (mode,)).fetchone()[0]
+        percentile = None
+        if last_score is not None and total:
+            below = connection.execute(_COUNT_BELOW, (mode, last_score)).fetchone()[0]
+            percentile = 100.0 * below / total
+        return Leaderboard(top_scores=top, total_runs=total, last_percentile=percentile)
+
+    def _drain_without_storage(self) -> None:
+        """Keeps the queue moving when the database is unavailable so flush() never hangs."""
+        while True:
+            item = self._queue.get()
+            self._queue.task_done()
+            if item is _STOP:
+                return
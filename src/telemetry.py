@@ -0,0 +1,315 @@
+import json
+import logging
+import os
+import queue
+import threading
+import time
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+from typing import Dict, Optional
+from src import config
+from src.game_state import GameEvent
+
+TELEMETRY_FILE = "telemetry.jsonl"
+
+# Categories of the events written by the game
+GAME_START = "game_start"
+FOOD_EATEN = "food_eaten"
+POOP_DROPPED = "poop_dropped"
+GAME_OVER = "game_over"
+POWER_UP = "power_up"
+FRAME_STATS = "frame_stats"
+
+
+class JsonFormatter(logging.Formatter):
+    """Formats telemetry records as one JSON object per line."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        event = {"ts": round(record.created, 3), "category": record.category}
+        event.update(record.fields)
+        return json.dumps(event, separators=(",", ":"))
+
+
+class BatchedRotatingFileHandler(RotatingFileHandler):
+    """
+    A rotating file handler that writes lines in batches.
+
+    Formatted lines are collected until `batch_size` are waiting or `flush`
+    is called, then written with a single write call. The file is rotated
+    before a batch that would take it past `maxBytes`.
+    """
+
+    def __init__(self, filename: str, max_bytes: int, backups: int, batch_size: int):
+        """
+        Args:
+            filename: The file to append to.
+            max_bytes: Size at which the file is rotated.
+            backups: Number of rotated files to keep.
+            batch_size: Lines collected before they are written.
+        """
+        super().__init__(filename, maxBytes=max_bytes, backupCount=backups, encoding="utf-8", delay=True)
+        self.batch_size = batch_size
+        self._batch = []
+
+    def emit(self, record: logging.LogRecord) -> None:
+        try:
+            self._batch.append(self.format(record) + "\n")
+        except Exception:
+            self.handleError(record)
+            return
+        if len(self._batch) >= self.batch_size:
+            self.flush()
+
+    def flush(self) -> None:
+        with self.lock:
+            if not self._batch:
+                return
+            data = "".join(self._batch)
+            self._batch.clear()
+            if self.stream is None:
+                self.stream = self._open()
+            if self.maxBytes > 0 and self.stream.tell() + len(data) > self.maxBytes and self.stream.tell() > 0:
+                self.doRollover()
+                if self.stream is None:
+                    self.stream = self._open()
+            self.stream.write(data)
+            self.stream.flush()
+
+    def close(self) -> None:
+        self.flush()
+        super().close()
+
+
+class DrainingQueueListener(QueueListener):
+    """A QueueListener that flushes its handlers whenever it has emptied the queue."""
+
+    def enqueue_sentinel(self) -> None:
+        # The queue may be full; wait for room rather than fail to stop
+        self.queue.put(self._sentinel)
+
+    def dequeue(self, block: bool):
+        try:
+            return self.queue.get_nowait()
+        except queue.Empty:
+            # Everything queued so far is handled: write the batch before waiting
+            for handler in self.handlers:
+                handler.flush()
+            return self.queue.get(block)
+
+
+class NonBlockingQueueHandler(QueueHandler):
+    """
+    A QueueHandler for a bounded queue that never blocks the caller.
+
+    Records are queued as they are, without the formatting and copying that
+    QueueHandler does for general log records; telemetry records carry only
+    plain data and are formatted by the writer thread. When the queue is
+    full, the record is dropped and counted.
+    """
+
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+class CategoryRateLimiter(logging.Filter):
+    """
+    Limits how many events of each category pass per second.
+
+    Each category has a token bucket that holds one second's worth of
+    events. Events that find their bucket empty are counted, and the next
+    event of that category that passes reports the count as `suppressed`.
+    """
+
+    def __init__(self, rates: Dict[str, float], default_rate: float):
+        """
+        Args:
+            rates: Events per second allowed for each category.
+            default_rate: Events per second for categories not in `rates`.
+        """
+        super().__init__()
+        self.rates = dict(rates)
+        self.default_rate = default_rate
+        self.suppressed: Dict[str, int] = {}
+        self._buckets: Dict[str, list] = {}
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        category = record.category
+        now = record.created
+        bucket = self._buckets.get(category)
+        rate = self.rates.get(category, self.default_rate)
+        if bucket is None:
+            bucket = self._buckets[category] = [float(rate), now]
+        else:
+            bucket[0] = min(float(rate), bucket[0] + (now - bucket[1]) * rate)
+            bucket[1] = now
+        if bucket[0] < 1.0:
+            self.suppressed[category] = self.suppressed.get(category, 0) + 1
+            return False
+        bucket[0] -= 1.0
+        suppressed = self.suppressed.pop(category, 0)
+        if suppressed:
+            record.fields = dict(record.fields, suppressed=suppressed)
+        return True
+
+
+class Telemetry:
+    """
+    Collects game events and writes them as JSON lines on a background thread.
+
+    `event` only builds a log record and puts it on a bounded queue, so it
+    never waits on disk. A QueueListener thread formats the records and
+    appends them in batches to a rotating file. Events beyond each
+    category's rate limit, or that find the queue full, are dropped.
+    """
+
+    def __init__(self, directory: str,
+                 max_bytes: int = config.TELEMETRY_MAX_BYTES, backups: int = config.TELEMETRY_BACKUPS,
+                 queue_size: int = config.TELEMETRY_QUEUE_SIZE, batch_size: int = config.TELEMETRY_BATCH_SIZE,
+                 rate_limits: Optional[Dict[str, float]] = None,
+                 default_rate: float = config.TELEMETRY_DEFAULT_RATE):
+        """
+        Starts the writer thread.
+
+        Args:
+            directory: Where telemetry.jsonl and its rotated copies are written.
+            max_bytes: Size at which the file is rotated.
+            backups: Number of rotated files to keep.
+            queue_size: Events that can wait for the writer.
+            batch_size: Events written to disk at once.
+            rate_limits: Events per second per category (defaults to config.TELEMETRY_RATE_LIMITS).
+            default_rate: Events per second for other categories.
+        """
+        os.makedirs(directory, exist_ok=True)
+        self.path = os.path.join(directory, TELEMETRY_FILE)
+        self._writer = BatchedRotatingFileHandler(self.path, max_bytes, backups, batch_size)
+        self._writer.setFormatter(JsonFormatter())
+        self._queue: "queue.Queue[logging.LogRecord]" = queue.Queue(queue_size)
+        self._handler = NonBlockingQueueHandler(self._queue)
+        self.rate_limiter = CategoryRateLimiter(
+            config.TELEMETRY_RATE_LIMITS if rate_limits is None else rate_limits, default_rate)
+        self._handler.addFilter(self.rate_limiter)
+        # A private logger, so telemetry never reaches (or is configured by) the application's logging
+        self._logger = logging.Logger("snekbyte.telemetry", logging.INFO)
+        self._logger.addHandler(self._handler)
+        self._listener = DrainingQueueListener(self._queue, self._writer)
+        self._listener.start()
+        self._lock = threading.Lock()
+        self._closed = False
+
+    @property
+    def dropped(self) -> int:
+        """The number of events dropped because the queue was full."""
+        return self._handler.dropped
+
+    def event(self, category: str, **fields) -> None:
+        """
+        Records an event.
+
+        Args:
+            category: The kind of event; rate limits apply per category.
+            **fields: JSON-serializable values stored with the event.
+        """
+        if self._closed:
+            return
+        record = self._logger.makeRecord(self._logger.name, logging.INFO, "", 0, category, None, None)
+        record.category = category
+        record.fields = fields
+        self._logger.handle(record)
+
+    def watch_game(self, game_data, settings, seed: Optional[int] = None) -> None:
+        """
+        Records the start of a game and subscribes to its events.
+
+        Args:
+            game_data: The GameData of the game that is starting.
+            settings: The settings it is played with.
+            seed: The seed of the game, if known.
+        """
+        self.event(GAME_START, seed=seed, wonq_mode=settings.wonq_mode, speed=settings.tick_rate(),
+                   food_count=settings.food_count, power_ups=settings.power_ups, level=settings.level)
+        game_data.subscribe(self._on_game_event)
+
+    def close(self) -> None:
+        """Writes every queued event and stops the writer thread."""
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+        self._listener.stop()
+        self._writer.close()
+
+    def __enter__(self) -> "Telemetry":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def _on_game_event(self, event: GameEvent, game_data) -> None:
+        if event is GameEvent.MOVED:
+            return
+        if event is GameEvent.FOOD_EATEN:
+            self.event(FOOD_EATEN, tick=game_data.ticks, score=game_data.score)
+        elif event is GameEvent.POOP_DROPPED:
+            self.event(POOP_DROPPED, tick=game_data.ticks, poops=len(game_data.poops))
+        elif event is GameEvent.POWER_UP:
+            self.event(POWER_UP, tick=game_data.ticks, speed_factor=game_data.items.speed_factor,
+                       poops=len(game_data.poops))
+        elif event is GameEvent.GAME_OVER:
+            self.event(GAME_OVER, tick=game_data.ticks, score=game_data.score,
+                       death_cause=game_data.death_cause, poops=len(game_data.poops))
+
+
+class FrameStats:
+    """
+    Accumulates frame times and reports a summary every few seconds.
+
+    `add` only appends to a list; percentiles are computed once per interval.
+    """
+
+    def __init__(self, telemetry: Telemetry, interval: float = config.TELEMETRY_FRAME_STATS_INTERVAL):
+        """
+        Args:
+            telemetry: Where the frame_stats events are recorded.
+            interval: Seconds of frames summarized in each event.
+        """
+        self.telemetry = telemetry
+        self.interval = interval
+        self._frame_times = []
+        self._window_start = time.perf_counter()
+
+    def add(self, frame_time: float) -> None:
+        """
+        Adds the duration of one frame, in seconds.
+
+        Reports the summary of the current window if it is over.
+        """
+        self._frame_times.append(frame_time)
+        now = time.perf_counter()
+        if now - self._window_start >= self.interval:
+            self.report()
+            self._window_start = now
+
+    def report(self) -> None:
+        """Records a frame_stats event for the frames added since the last report."""
+        times = self._frame_times
+        if not times:
+            return
+        times.sort()
+        count = len(times)
+        self.telemetry.event(
+            FRAME_STATS, frames=count,
+            mean_ms=round(1000 * sum(times) / count, 3),
+            p50_ms=round(1000 * times[count // 2], 3),
+            p95_ms=round(1000 * times[min(count - 1, int(count * 0.95))], 3),
+            max_ms=round(1000 * times[-1], 3),
+        )
+        times.clear()
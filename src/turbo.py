@@ -0,0 +1,100 @@
+import time
+from typing import Callable, Deque, List, Optional, Tuple
+from src import config
+from src.game_logic import update_game_state
+from src.game_state import GameData, GameSettings
+
+
+class TickClock:
+    """
+    Turns the time that passed into the number of ticks owed at a tick rate.
+
+    The fraction of a tick left over at the end of a frame carries over to
+    the next one, so a rate of 150 ticks per second at 60 frames per second
+    plays 2 and 3 ticks per frame in turn. After a frame too slow to catch up
+    in `max_per_frame` ticks, the owed ticks are dropped rather than played
+    in ever larger bursts.
+    """
+    __slots__ = ("max_per_frame", "_last", "_owed")
+
+    def __init__(self, max_per_frame: int = config.TURBO_MAX_TICKS_PER_FRAME):
+        """
+        Args:
+            max_per_frame: The most ticks `due` returns at once.
+        """
+        self.max_per_frame = max_per_frame
+        self._last = None
+        self._owed = 0.0
+
+    def reset(self) -> None:
+        """Starts counting again, e.g. when a game starts."""
+        self._last = None
+        self._owed = 0.0
+
+    def due(self, rate: float, now: Optional[float] = None) -> int:
+        """
+        Returns the number of ticks to play for the time since the last call.
+
+        The first call after a reset plays one tick.
+
+        Args:
+            rate: Ticks per second, which may change from frame to frame.
+            now: The current time in seconds; defaults to time.perf_counter().
+        """
+        if now is None:
+            now = time.perf_counter()
+        if self._last is None:
+            self._last = now
+            return 1
+        self._owed += (now - self._last) * rate
+        self._last = now
+        ticks = int(self._owed)
+        self._owed -= ticks
+        if ticks > self.max_per_frame:
+            ticks = self.max_per_frame
+            self._owed = 0.0
+        return ticks
+
+
+def play_ticks(game_data: GameData, settings: GameSettings, count: int, turns: Deque[Tuple[int, int]],
+               replay=None, policy: Optional[Callable] = None, rng=None,
+               trail: Optional[List[Tuple[int, int]]] = None) -> int:
+    """
+    Plays several ticks in a row, as turbo mode does within one frame.
+
+    Turns the player made during the frame wait in `turns` and are applied
+    one per tick, so two quick key presses still turn the snake twice
+    instead of the second overriding the first before the snake moved.
+
+    Args:
+        game_data: The game, updated in place.
+        settings: Its settings.
+        count: The most ticks to play; fewer if the game ends.
+        turns: Queued turns, taken from the left.
+        replay: If set, the turns are recorded in this Replay.
+        policy: If set, a bot policy from src.bots that steers once the queued turns are used up.
+        rng: The random.Random passed to the policy.
+        trail: If set, the head position after every tick is appended to it.
+
+    Returns:
+        The number of ticks played.
+    """
+    snake = game_data.snake
+    played = 0
+    while played < count and not game_data.game_over:
+        if turns:
+            direction = turns.popleft()
+        elif policy is not None:
+            direction = policy(game_data, settings, rng)
+        else:
+            direction = None
+        if direction is not None and direction != snake.direction:
+            if replay is not None:
+                replay.record_turn(game_data.ticks, direction)
+            snake.turn(direction)
+        update_game_state(game_data, settings)
+        played += 1
+        if trail is not None:
+            trail.append(snake.positions[0])
+    return played
+
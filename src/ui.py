@@ -1,10 +1,105 @@
 import pygame
-from src import config
+from src import config, profiles
 from src.game_state import GameSettings
+from src.levels import PORTAL, WALL
+from src.sprites import draw_entities, get_atlas
+
+# Fonts by size, the pre-drawn background of the game screen by screen size (and level),
+# the rendered in-game labels by name, the pre-composed menu screens by name, and the turbo
+# mode trail cell by cell size and color
+_fonts = {}
+_backgrounds = {}
+_labels = {}
+_menus = {}
+_trail_cells = {}
+
+profiles.on_change(("UI_FONT_SIZE", "MENU_TITLE_FONT_SIZE", "MENU_OPTION_FONT_SIZE", "SCORE_FONT_SIZE"),
+                   lambda changed: _fonts.clear())
+profiles.on_change(("UI_TEXT_COLOR", "SCREEN_WIDTH"),
+                   lambda changed: _labels.clear())
+profiles.on_change(("SCREEN_WIDTH", "SCREEN_HEIGHT", "GRID_SIZE", "BLACK", "GRAY"),
+                   lambda changed: _backgrounds.clear())
+profiles.on_change(("SCREEN_WIDTH", "SCREEN_HEIGHT", "UI_BG_COLOR", "UI_TEXT_COLOR", "UI_HIGHLIGHT_COLOR", "WHITE",
+                    "GOLD", "MENU_TITLE_FONT_SIZE", "MENU_OPTION_FONT_SIZE", "SCORE_FONT_SIZE"),
+                   lambda changed: _menus.clear())
 
 def _get_font(size):
-    """Helper function to get a font object."""
-    return pygame.font.Font(None, size)
+    """Helper function to get a font object, loading each size once."""
+    font = _fonts.get(size)
+    if font is None:
+        font = _fonts[size] = pygame.font.Font(None, size)
+    return font
+
+def _get_background(size, level=None):
+    """
+    Returns the black, grid-lined game background for a screen size, drawing it once.
+
+    With a level, its walls and portals are baked into the background, so
+    drawing a frame costs the same however many walls the level has.
+    """
+    key = size if level is None else (size, level.key)
+    background = _backgrounds.get(key)
+    if background is None:
+        if level is not None and len(_backgrounds) >= config.LEVEL_CACHED_BACKGROUNDS:
+            _backgrounds.clear()
+        background = _backgrounds[key] = pygame.Surface(size)
+        background.fill(config.BLACK)
+        draw_grid(background)
+        if level is not None:
+            draw_level(background, level)
+    return background
+
+def clear_caches():
+    """Drops every cached font and surface, e.g. after pygame was shut down and started again."""
+    _fonts.clear()
+    _backgrounds.clear()
+    _labels.clear()
+    _menus.clear()
+    _trail_cells.clear()
+
+def _as_tuples(value):
+    """Turns the lists of a value read back from JSON into tuples, as the menu keys are built."""
+    if isinstance(value, list):
+        return tuple(_as_tuples(item) for item in value)
+    return value
+
+def export_static_surfaces(size):
+    """
+    Returns the surfaces of the first screens that look the same on every launch, drawing any that are missing.
+
+    These are the grid background of the open board and the composed main
+    menu, as it was last drawn (with the high score, if it was shown).
+    `seed_static_surfaces` takes them back, e.g. in src.asset_cache.
+
+    Args:
+        size: The logical screen size the game draws at.
+
+    Returns:
+        A dict with the "background" Surface, the "menu" background layer,
+        its "menu_options" as (normal, highlighted, rect) tuples, and the
+        "menu_key" its text is checked against, made of tuples, strings and
+        numbers only, so it can be stored as JSON.
+    """
+    if "main" not in _menus:
+        draw_main_menu(pygame.Surface(size), 0)
+    key, menu, options = _menus["main"]
+    return {"background": _get_background(size), "menu": menu, "menu_options": options, "menu_key": key}
+
+def seed_static_surfaces(size, background, menu, menu_options, menu_key):
+    """
+    Fills the caches with surfaces from `export_static_surfaces`, so the first screens need no drawing.
+
+    Args:
+        size: The logical screen size the surfaces were drawn at.
+        background: The grid background of the open board.
+        menu: The background layer of the main menu.
+        menu_options: The menu's (normal, highlighted, rect) tuples.
+        menu_key: The menu's key as exported, or read back from JSON with
+            lists for tuples; if the menu's text has changed since, it is
+            rendered again as usual.
+    """
+    _backgrounds[tuple(size)] = background
+    _menus["main"] = (_as_tuples(menu_key), menu, list(menu_options))
 
 def draw_text(screen, text, font, color, center_x, y):
     """Renders text centered on the screen at a given y-coordinate."""
@@ -12,6 +107,27 @@ def draw_text(screen, text, font, color, center_x, y):
     text_rect = text_surface.get_rect(center=(center_x, y))
     screen.blit(text_surface, text_rect)
 
+def draw_label(screen, name, text, font, color, center_x, y):
+    """
+    Like draw_text, but renders the text again only when it changes.
+
+    Used for text drawn every frame, such as the score.
+
+    Args:
+        screen: The pygame Surface to draw on.
+        name: Identifies the label; each label keeps its last rendering.
+        text: The text to show.
+        font: The font to render it with.
+        color: The text color.
+        center_x: The x-coordinate of the center of the text.
+        y: The y-coordinate of the center of the text.
+    """
+    label = _labels.get(name)
+    if label is None or label[0] != text or label[1] is not font:
+        text_surface = font.render(text, True, color)
+        label = _labels[name] = (text, font, text_surface, text_surface.get_rect(center=(center_x, y)))
+    screen.blit(label[2], label[3])
+
 def draw_grid(screen):
     """Draws the grid lines on the screen."""
     for x in range(0, config.SCREEN_WIDTH, config.GRID_SIZE):
@@ -19,23 +135,68 @@ def draw_grid(screen):
     for y in range(0, config.SCREEN_HEIGHT, config.GRID_SIZE):
         pygame.draw.line(screen, config.GRAY, (0, y), (config.SCREEN_WIDTH, y))
 
+def draw_level(screen, level):
+    """Draws the walls and portals of a level."""
+    size = config.GRID_SIZE
+    width = level.width
+    for index, code in enumerate(level.cells):
+        if code == WALL:
+            pygame.draw.rect(screen, config.LEVEL_WALL_COLOR,
+                             ((index % width) * size, (index // width) * size, size, size))
+        elif code == PORTAL:
+            center = ((index % width) * size + size // 2, (index // width) * size + size // 2)
+            pygame.draw.circle(screen, config.LEVEL_PORTAL_COLOR, center, size // 2 - 1, max(1, size // 8))
+
 def draw_game_screen(screen, game_data, settings: GameSettings):
     """
     Draws all elements for the main game screen.
 
     Args:
         screen: The pygame Surface to draw on.
-        game_data: The dictionary containing the current game state.
+        game_data: The GameData of the current game.
         settings: The current GameSettings object.
     """
-    screen.fill(config.BLACK)
-    draw_grid(screen)
-    game_data["snake"].draw(screen)
-    game_data["food"].draw(screen)
-    if settings.wonq_mode:
-        for poop in game_data["poops"]:
-            poop.draw(screen)
-    draw_game_ui(screen, game_data["score"], game_data["shit_counter"], settings)
+    screen.blit(_get_background(screen.get_size(), game_data.level), (0, 0))
+    poops = game_data.poops if settings.wonq_mode else ()
+    draw_entities(screen, game_data.snake, game_data.food, poops, settings.theme, game_data.items)
+    draw_game_ui(screen, game_data.score, game_data.shit_counter, settings)
+
+def draw_snapshot(screen, snapshot, settings: GameSettings):
+    """
+    Like draw_game_screen, but draws a GameSnapshot published by an EngineThread.
+
+    Args:
+        screen: The pygame Surface to draw on.
+        snapshot: The GameSnapshot to draw.
+        settings: The current GameSettings object.
+    """
+    screen.blit(_get_background(screen.get_size(), snapshot.level), (0, 0))
+    poops = snapshot.poops if settings.wonq_mode else ()
+    screen.blits(get_atlas(settings.theme).entity_blits(snapshot.positions, snapshot.food_position, poops,
+                                                        snapshot.items), doreturn=False)
+    draw_game_ui(screen, snapshot.score, snapshot.shit_counter, settings)
+
+def draw_trail(screen, trail, snake):
+    """
+    Shades the cells the head crossed since the last frame that the body no longer covers.
+
+    In turbo mode a frame can follow many ticks; the trail shows where the
+    head went in between, so a short snake does not seem to jump.
+
+    Args:
+        screen: The pygame Surface to draw on.
+        trail: The head positions of the ticks played since the last frame.
+        snake: The Snake, whose cells are drawn already.
+    """
+    size = config.GRID_SIZE
+    key = (size, config.TURBO_TRAIL_COLOR)
+    cell = _trail_cells.get(key)
+    if cell is None:
+        cell = _trail_cells[key] = pygame.Surface((size, size), pygame.SRCALPHA)
+        cell.fill(config.TURBO_TRAIL_COLOR)
+    width, height = config.GRID_WIDTH, config.GRID_HEIGHT
+    screen.blits([(cell, (x * size, y * size)) for x, y in trail
+                  if 0 <= x < width and 0 <= y < height and (x, y) not in snake], doreturn=False)
 
 def draw_game_ui(screen, score, shit_counter, settings: GameSettings):
     """
@@ -49,30 +210,68 @@ def draw_game_ui(screen, score, shit_counter, settings: GameSettings):
     """
     font = _get_font(config.UI_FONT_SIZE)
     score_text = f"Score: {score}"
-    draw_text(screen, score_text, font, config.UI_TEXT_COLOR, 70, 20)
+    draw_label(screen, "score", score_text, font, config.UI_TEXT_COLOR, 70, 20)
     
     if settings.wonq_mode:
         poop_text = f"Poop-o-meter: {shit_counter}/{config.WONQ_MODE_POOP_THRESHOLD}"
-        draw_text(screen, poop_text, font, config.UI_TEXT_COLOR, config.SCREEN_WIDTH - 150, 20)
+        draw_label(screen, "poop", poop_text, font, config.UI_TEXT_COLOR, config.SCREEN_WIDTH - 150, 20)
 
-def draw_main_menu(screen, selected_option):
+def _compose_menu(name, texts, options, options_top):
+    """
+    Returns a menu screen pre-composed into layers, rendering it again only when its text changes.
+
+    The background layer holds the fill and every fixed line of text; each
+    option is rendered once in its normal and once in its highlighted color.
+    Menus that show values, such as the speed or the score, put them in the
+    text, so a changed value renders the menu again and an unchanged one costs
+    nothing.
+
+    Args:
+        name: Identifies the menu; each menu keeps its last composition.
+        texts: The fixed lines, as (text, font size, color, y) tuples.
+        options: The option labels, top to bottom.
+        options_top: The y-coordinate of the center of the first option.
+
+    Returns:
+        The background layer, and a (normal, highlighted, rect) tuple per option.
+    """
+    key = (texts, options, options_top)
+    menu = _menus.get(name)
+    if menu is None or menu[0] != key:
+        center_x = config.SCREEN_WIDTH // 2
+        background = pygame.Surface((config.SCREEN_WIDTH, config.SCREEN_HEIGHT))
+        background.fill(config.UI_BG_COLOR)
+        for text, size, color, y in texts:
+            draw_text(background, text, _get_font(size), color, center_x, y)
+        option_font = _get_font(config.MENU_OPTION_FONT_SIZE)
+        variants = []
+        for i, option in enumerate(options):
+            normal = option_font.render(option, True, config.UI_TEXT_COLOR)
+            highlighted = option_font.render(option, True, config.UI_HIGHLIGHT_COLOR)
+            variants.append((normal, highlighted, normal.get_rect(center=(center_x, options_top + i * 70))))
+        menu = _menus[name] = (key, background, variants)
+    return menu[1], menu[2]
+
+def _draw_menu(screen, menu, selected_option):
+    """Draws a menu from _compose_menu: the background layer and every option, the selected one highlighted."""
+    background, variants = menu
+    screen.blit(background, (0, 0))
+    for i, (normal, highlighted, rect) in enumerate(variants):
+        screen.blit(highlighted if i == selected_option else normal, rect)
+
+def draw_main_menu(screen, selected_option, leaderboard=None):
     """
     Draws the main menu screen.
 
     Args:
         screen: The pygame Surface to draw on.
         selected_option: The index of the currently selected menu item.
+        leaderboard: Optional Leaderboard whose best score is shown below the options.
     """
-    screen.fill(config.UI_BG_COLOR)
-    title_font = _get_font(config.MENU_TITLE_FONT_SIZE)
-    option_font = _get_font(config.MENU_OPTION_FONT_SIZE)
-    
-    draw_text(screen, "SnekByte", title_font, config.WHITE, config.SCREEN_WIDTH // 2, 100)
-    
-    options = ["Play", "Settings", "Quit"]
-    for i, option in enumerate(options):
-        color = config.UI_HIGHLIGHT_COLOR if i == selected_option else config.UI_TEXT_COLOR
-        draw_text(screen, option, option_font, color, config.SCREEN_WIDTH // 2, 300 + i * 70)
+    texts = (("SnekByte", config.MENU_TITLE_FONT_SIZE, config.WHITE, 100),)
+    if leaderboard is not None and leaderboard.top_scores:
+        texts += ((f"High Score: {leaderboard.best}", config.SCORE_FONT_SIZE, config.GOLD, 530),)
+    _draw_menu(screen, _compose_menu("main", texts, ("Play", "Settings", "Quit"), 300), selected_option)
 
 def draw_settings_menu(screen, settings: GameSettings, selected_option: int):
     """
@@ -83,24 +282,12 @@ def draw_settings_menu(screen, settings: GameSettings, selected_option: int):
         settings: The current GameSettings object.
         selected_option: The index of the currently selected setting.
     """
-    screen.fill(config.UI_BG_COLOR)
-    title_font = _get_font(config.MENU_TITLE_FONT_SIZE)
-    option_font = _get_font(config.MENU_OPTION_FONT_SIZE)
-    
-    draw_text(screen, "Settings", title_font, config.WHITE, config.SCREEN_WIDTH // 2, 100)
-    
-    # Speed Setting
-    speed_color = config.UI_HIGHLIGHT_COLOR if selected_option == 0 else config.UI_TEXT_COLOR
-    speed_text = f"Speed: < {settings.get_speed()} >"
-    draw_text(screen, speed_text, option_font, speed_color, config.SCREEN_WIDTH // 2, 300)
-
-    # WonQ Mode Setting
-    wonq_color = config.UI_HIGHLIGHT_COLOR if selected_option == 1 else config.UI_TEXT_COLOR
+    texts = (("Settings", config.MENU_TITLE_FONT_SIZE, config.WHITE, 100),)
     wonq_status = "ON" if settings.wonq_mode else "OFF"
-    wonq_text = f"WonQ Mode: < {wonq_status} >"
-    draw_text(screen, wonq_text, option_font, wonq_color, config.SCREEN_WIDTH // 2, 370)
+    options = (f"Speed: < {settings.get_speed()} >", f"WonQ Mode: < {wonq_status} >")
+    _draw_menu(screen, _compose_menu("settings", texts, options, 300), selected_option)
 
-def draw_game_over_menu(screen, score, selected_option):
+def draw_game_over_menu(screen, score, selected_option, leaderboard=None):
     """
     Draws the game over menu screen.
 
@@ -108,16 +295,14 @@ def draw_game_over_menu(screen, score, selected_option):
         screen: The pygame Surface to draw on.
         score: The final score to display.
         selected_option: The index of the currently selected menu item.
+        leaderboard: Optional Leaderboard used to show the best score and how
+            this run ranks against earlier runs.
     """
-    screen.fill(config.UI_BG_COLOR)
-    title_font = _get_font(config.MENU_TITLE_FONT_SIZE)
-    score_font = _get_font(config.SCORE_FONT_SIZE)
-    option_font = _get_font(config.MENU_OPTION_FONT_SIZE)
-
-    draw_text(screen, "Game Over", title_font, config.WHITE, config.SCREEN_WIDTH // 2, 100)
-    draw_text(screen, f"Final Score: {score}", score_font, config.GOLD, config.SCREEN_WIDTH // 2, 200)
-
-    options = ["Retry", "Main Menu"]
-    for i, option in enumerate(options):
-        color = config.UI_HIGHLIGHT_COLOR if i == selected_option else config.UI_TEXT_COLOR
-        draw_text(screen, option, option_font, color, config.SCREEN_WIDTH // 2, 350 + i * 70)
\ No newline at end of file
+    texts = (("Game Over", config.MENU_TITLE_FONT_SIZE, config.WHITE, 100),
+             (f"Final Score: {score}", config.SCORE_FONT_SIZE, config.GOLD, 200))
+    if leaderboard is not None and leaderboard.top_scores:
+        stats_text = f"Best: {leaderboard.best}"
+        if leaderboard.last_percentile is not None:
+            stats_text += f"   Better than {leaderboard.last_percentile:.0f}% of runs"
+        texts += ((stats_text, config.SCORE_FONT_SIZE, config.UI_TEXT_COLOR, 250),)
+    _draw_menu(screen, _compose_menu("game_over", texts, ("Retry", "Main Menu"), 350), selected_option)
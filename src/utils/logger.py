@@ -1,18 +1,32 @@
+import atexit
 import logging
+import queue
 import sys
+from logging.handlers import QueueHandler, QueueListener
 
-def setup_logging(debug: bool = False):
+def setup_logging(debug: bool = False, stream=None):
     """
     Configures the basic logging for the application.
-    Logs INFO level and above to standard output.
+    Logs INFO level and above to standard output, or to `stream` if given.
     If debug is True, logs DEBUG level and above.
+
+    Log calls only put the record on a queue; a background listener thread
+    writes them out, so logging never blocks the game loop on I/O. Like
+    `logging.basicConfig`, this does nothing if the root logger already has
+    handlers.
     """
-    log_level = logging.DEBUG if debug else logging.INFO
-    logging.basicConfig(
-        level=log_level,
-        format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
-        stream=sys.stdout,
-    )
+    root = logging.getLogger()
+    if not root.handlers:
+        log_level = logging.DEBUG if debug else logging.INFO
+        handler = logging.StreamHandler(stream or sys.stdout)
+        handler.setFormatter(logging.Formatter("%(asctime)s - %(name)s - %(levelname)s - %(message)s"))
+        log_queue = queue.SimpleQueue()
+        listener = QueueListener(log_queue, handler)
+        root.addHandler(QueueHandler(log_queue))
+        root.setLevel(log_level)
+        listener.start()
+        # Write out whatever is still queued when the program ends
+        atexit.register(listener.stop)
     logging.info("Logging configured.")
     if debug:
-        logging.debug("Debug mode enabled.")
\ No newline at end of file
+        logging.debug("Debug mode enabled.")
@@ -0,0 +1,108 @@
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import unittest
+import zipfile
+from unittest import mock
+import pygame
+from src import config, sprites, ui
+from src.asset_cache import asset_path, load_assets, save_assets
+from src.sprites import get_atlas
+from src.startup import build_bundle
+
+SIZE = (config.SCREEN_WIDTH, config.SCREEN_HEIGHT)
+
+
+def rendered():
+    """Draws the cached assets from scratch and returns the pixels of each."""
+    ui.clear_caches()
+    sprites.clear_atlases()
+    menu = pygame.Surface(SIZE)
+    ui.draw_main_menu(menu, 1)
+    return {"menu": pygame.image.tobytes(menu, "RGB"),
+            "background": pygame.image.tobytes(ui.export_static_surfaces(SIZE)["background"], "RGB"),
+            "atlas": pygame.image.tobytes(get_atlas("neon").surface, "RGB")}
+
+
+class TestAssetCache(unittest.TestCase):
+    """Tests for the static assets cached on disk."""
+
+    @classmethod
+    def setUpClass(cls):
+        pygame.font.init()
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+        self.addCleanup(ui.clear_caches)
+        self.addCleanup(sprites.clear_atlases)
+
+    def test_loaded_assets_look_like_rendered_ones(self):
+        """Test that a menu, background and atlas loaded from the cache have the rendered pixels."""
+        expected = rendered()
+        self.assertFalse(load_assets(SIZE, self.directory.name))
+        save_assets(SIZE, "neon", self.directory.name)
+        ui.clear_caches()
+        sprites.clear_atlases()
+
+        self.assertTrue(load_assets(SIZE, self.directory.name))
+        menu = pygame.Surface(SIZE)
+        with mock.patch("pygame.font.Font", side_effect=AssertionError("the menu was rendered again")), \
+                mock.patch("pygame.Surface", side_effect=AssertionError("a surface was drawn again")):
+            ui.draw_main_menu(menu, 1)
+            static = ui.export_static_surfaces(SIZE)
+            atlas = get_atlas("neon")
+        self.assertEqual(pygame.image.tobytes(menu, "RGB"), expected["menu"])
+        self.assertEqual(pygame.image.tobytes(static["background"], "RGB"), expected["background"])
+        self.assertEqual(pygame.image.tobytes(atlas.surface, "RGB"), expected["atlas"])
+        self.assertEqual(get_atlas("neon").surface.get_colorkey()[:3], sprites._TRANSPARENT)
+
+    def test_stale_and_broken_files_are_ignored(self):
+        """Test that changed settings, another screen size or a damaged file fall back to rendering."""
+        path = save_assets(SIZE, cache_dir=self.directory.name)
+        ui.clear_caches()
+        with mock.patch.object(config, "UI_BG_COLOR", (1, 2, 3)):
+            self.assertNotEqual(asset_path(self.directory.name), path)
+            self.assertFalse(load_assets(SIZE, self.directory.name))
+        self.assertFalse(load_assets((SIZE[0] // 2, SIZE[1] // 2), self.directory.name))
+        self.assertFalse(load_assets(SIZE, None))
+
+        with mock.patch.object(ui, "seed_static_surfaces") as seed:
+            with open(path, "r+b") as f:
+                f.truncate(os.path.getsize(path) // 2)
+            with self.assertLogs(level="WARNING"):
+                self.assertFalse(load_assets(SIZE, self.directory.name))
+            with open(path, "r+b") as f:
+                f.write(b"JUNK")
+            with self.assertLogs(level="WARNING"):
+                self.assertFalse(load_assets(SIZE, self.directory.name))
+        seed.assert_not_called()
+
+
+class TestBundle(unittest.TestCase):
+    """Tests for the bytecode zipapp."""
+
+    def test_bundle_runs_from_bytecode(self):
+        """Test that the zipapp holds no source but its entry point and plays games."""
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "snekbyte.pyz")
+            result = build_bundle(path, assets_dir=os.path.join(directory, "assets"))
+            self.assertEqual(result["path"], path)
+            with zipfile.ZipFile(path) as bundle:
+                names = bundle.namelist()
+            self.assertIn("src/game_logic.pyc", names)
+            self.assertIn("src/utils/logger.pyc", names)
+            self.assertEqual([name for name in names if name.endswith(".py")], ["__main__.py"])
+            self.assertTrue(os.listdir(os.path.join(directory, "assets")))
+
+            env = dict(os.environ, PYGAME_HIDE_SUPPORT_PROMPT="1")
+            env.pop("PYTHONPATH", None)
+            output = subprocess.run([sys.executable, path, "simulate", "--games", "2", "--max-ticks", "200"],
+                                    cwd=directory, env=env, capture_output=True, text=True, check=True).stdout
+            self.assertEqual([json.loads(line)["seed"] for line in output.splitlines()], [0, 1])
+
+
+if __name__ == '__main__':
+    unittest.main()
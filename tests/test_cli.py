@@ -0,0 +1,109 @@
+import io
+import json
+import os
+import tempfile
+import unittest
+from contextlib import redirect_stdout
+from src.cli import build_parser, main, resolve_settings
+from src.replay import Replay
+from src.game_state import GameSettings
+from src.simulation import simulate_game
+from src import config
+
+
+def run_cli(argv):
+    """Runs the CLI and returns the JSON objects it printed."""
+    out = io.StringIO()
+    with redirect_stdout(out):
+        exit_code = main(argv)
+    return exit_code, [json.loads(line) for line in out.getvalue().splitlines()]
+
+
+class TestCli(unittest.TestCase):
+    """Tests for the command line interface."""
+
+    def test_resolve_settings(self):
+        """Test that command-line options override the config defaults."""
+        args = build_parser().parse_args(["simulate", "--speed", "0", "--wonq", "--theme", "neon"])
+        settings = resolve_settings(args)
+        self.assertEqual(settings.speed_index, 0)
+        self.assertTrue(settings.wonq_mode)
+        self.assertEqual(settings.theme, "neon")
+
+        defaults = resolve_settings(build_parser().parse_args(["simulate"]))
+        self.assertEqual(defaults, GameSettings())
+
+    def test_invalid_speed(self):
+        """Test that an out-of-range speed is rejected."""
+        args = build_parser().parse_args(["simulate", "--speed", str(len(config.SPEED_LEVELS))])
+        with self.assertRaises(SystemExit):
+            resolve_settings(args)
+
+    def test_simulate(self):
+        """Test that simulate prints one reproducible result per game."""
+        exit_code, results = run_cli(["simulate", "--games", "3", "--seed", "5", "--max-ticks", "200"])
+        self.assertEqual(exit_code, 0)
+        self.assertEqual([r["seed"] for r in results], [5, 6, 7])
+        expected = simulate_game(GameSettings(), 6, max_ticks=200)
+        self.assertEqual(results[1], expected.to_dict())
+
+    def test_bench(self):
+        """Test that bench reports the number of ticks run."""
+        exit_code, results = run_cli(["bench", "--ticks", "500"])
+        self.assertEqual(exit_code, 0)
+        self.assertEqual(results[0]["ticks"], 500)
+        self.assertGreater(results[0]["ticks_per_second"], 0)
+
+    def test_train(self):
+        """Test that train evolves networks in worker processes and reports the best fitness."""
+        with tempfile.TemporaryDirectory() as directory:
+            exit_code, results = run_cli(["train", "--out", directory, "--generations", "2", "--population", "8",
+                                          "--seeds", "2", "--hidden", "4", "--workers", "2"])
+            self.assertEqual(exit_code, 0)
+            self.assertEqual(results[0]["generations"], 2)
+            self.assertIsNotNone(results[0]["best"])
+
+    def test_replay(self):
+        """Test that replay plays a saved game back headlessly."""
+        replay = Replay.new(GameSettings(), seed=11)
+        replay.record_turn(0, config.UP)
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, "game.json")
+            replay.save(path)
+            exit_code, results = run_cli(["replay", path])
+        self.assertEqual(exit_code, 0)
+        self.assertEqual(results[0]["seed"], 11)
+        self.assertEqual(results[0]["death_cause"], "wall")
+        self.assertEqual(results[0]["ticks"], config.GRID_HEIGHT // 2 + 1)
+
+    def test_hashes(self):
+        """Test that hashes saved from a replay are checked against a later run of it."""
+        replay = Replay.new(GameSettings(), seed=11)
+        replay.record_turn(2, config.UP)
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, "game.json")
+            hashes = os.path.join(tmpdir, "hashes.bin")
+            replay.save(path)
+            exit_code, results = run_cli(["hashes", path, "--out", hashes])
+            self.assertEqual(exit_code, 0)
+            exit_code, checked = run_cli(["hashes", path, "--against", hashes])
+            self.assertEqual(exit_code, 0)
+            self.assertEqual(checked[0]["hash"], results[0]["hash"])
+            self.assertIsNone(checked[0]["first_difference"])
+            replay.turns[0] = (2, 0, 1)
+            replay.save(path)
+            exit_code, checked = run_cli(["hashes", path, "--against", hashes])
+        self.assertEqual(exit_code, 1)
+        self.assertEqual(checked[0]["first_difference"], 3)
+
+    def test_difftest(self):
+        """Test that difftest reports the ticks it checked and no divergence for the compact engine."""
+        exit_code, results = run_cli(["difftest", "--wonq", "--ticks", "2000", "--seed", "4"])
+        self.assertEqual(exit_code, 0)
+        self.assertEqual(results[0]["engine"], "compact")
+        self.assertGreaterEqual(results[0]["ticks"], 2000)
+        self.assertIsNone(results[0]["divergence"])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,10 +0,0 @@
-import pytest
-from snake_game.core import GameState, Direction, Snake, Food
-
-# This file is for testing the core game logic in core.py.
-
-def test_placeholder_core():
-    """
-    A placeholder test to ensure the test setup is working for the core module.
-    """
-    assert True
\ No newline at end of file
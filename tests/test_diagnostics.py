@@ -0,0 +1,106 @@
+import json
+import os
+import random
+import tempfile
+import tracemalloc
+import unittest
+from src import game_logic
+from src.diagnostics import MEMORY_LOG_FILE, MemoryProfiler, measure_allocations, subsystem_of
+from src.game_logic import reset_game_state, update_game_state
+from src.game_state import GameSettings
+from src.bots import greedy_policy
+
+_leak = []
+
+
+def leaky_tick():
+    """Keeps a new object alive on every call, like a cache that is never trimmed."""
+    # One memory block, and bytes objects have no free list that could hand out an old one
+    _leak.append(bytes(100))
+
+
+class TestMeasureAllocations(unittest.TestCase):
+    """Tests for measuring the allocations of single calls."""
+
+    def tearDown(self):
+        _leak.clear()
+
+    def test_counts_retained_allocations(self):
+        """Test that objects kept alive by each call are counted per call."""
+        stats = measure_allocations(leaky_tick, repeat=50)
+        self.assertEqual(stats.calls, 50)
+        self.assertAlmostEqual(stats.retained_blocks / stats.calls, 1, delta=0.2)
+        self.assertGreater(stats.retained_bytes / stats.calls, 50)
+
+    def test_nothing_retained(self):
+        """Test that a call that keeps nothing alive measures no growth."""
+        stats = measure_allocations(lambda: [0] * 10, repeat=50)
+        self.assertEqual(stats.retained_bytes, 0)
+        self.assertGreater(stats.peak_bytes, 0)
+        self.assertFalse(tracemalloc.is_tracing())
+
+
+class TestMemoryProfiler(unittest.TestCase):
+    """Tests for the memory profiling mode."""
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        _leak.clear()
+        if tracemalloc.is_tracing():
+            tracemalloc.stop()
+        self.directory.cleanup()
+
+    def read_reports(self):
+        with open(os.path.join(self.directory.name, MEMORY_LOG_FILE)) as f:
+            return [json.loads(line) for line in f]
+
+    def test_reports_at_boundaries_and_intervals(self):
+        """Test that a report is written every N ticks, at game boundaries and on close."""
+        settings = GameSettings()
+        profiler = MemoryProfiler(self.directory.name, every=10)
+        game_data = reset_game_state(settings, random.Random(1))
+        for _ in range(25):
+            with profiler.section("update_game_state"):
+                update_game_state(game_data, settings)
+            profiler.tick()
+        profiler.game_boundary()
+        profiler.close()
+
+        reports = self.read_reports()
+        self.assertEqual([report["label"] for report in reports], ["tick-10", "tick-20", "game_over", "close"])
+        self.assertEqual(reports[0]["sections"]["update_game_state"]["calls"], 10)
+        self.assertEqual(reports[2]["sections"]["update_game_state"]["calls"], 5)
+        self.assertEqual(len([name for name in os.listdir(self.directory.name) if name.endswith(".txt")]), 4)
+        self.assertFalse(tracemalloc.is_tracing())
+
+    def test_leak_is_attributed_to_its_subsystem(self):
+        """Test that memory kept by the engine between boundaries is charged to the engine."""
+        profiler = MemoryProfiler(self.directory.name, every=0)
+        kept = []
+        # Compile a function whose code lives in game_logic.py, so its allocations look like the engine's
+        namespace = {"kept": kept}
+        exec(compile("def leak():\n    kept.append(bytearray(1000))\n", game_logic.__file__, "exec"), namespace)
+        for _ in range(20):
+            namespace["leak"]()
+        report = profiler.game_boundary()
+        profiler.close()
+        self.assertGreaterEqual(report["subsystems"]["engine"]["bytes"], 20_000)
+        self.assertLess(report["subsystems"]["ui"]["bytes"], 20_000)
+
+    def test_subsystem_of_uses_innermost_project_frame(self):
+        """Test that allocations are attributed by the innermost frame in the project."""
+        tracemalloc.start(10)
+        settings = GameSettings(wonq_mode=True)
+        game_data = reset_game_state(settings, random.Random(2))
+        while not game_data.game_over and game_data.ticks < 200:
+            game_data.snake.turn(greedy_policy(game_data, settings))
+            update_game_state(game_data, settings)
+        snapshot = tracemalloc.take_snapshot()
+        subsystems = {subsystem_of(stat.traceback) for stat in snapshot.statistics("traceback")}
+        self.assertIn("engine", subsystems)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,76 @@
+import json
+import unittest
+from src import config
+from src.differential import (CompactEngine, ReferenceEngine, check_game, check_replay, run_differential,
+                              shrink)
+from src.game_state import GameSettings
+from src.replay import Replay
+
+
+class IgnoresUp(CompactEngine):
+    """A broken engine that never turns up."""
+
+    def turn(self, direction):
+        if direction != config.UP:
+            super().turn(direction)
+
+
+class GrowsTwiceOnFourthMeal(CompactEngine):
+    """A broken engine whose snake grows by two when it eats its fourth food."""
+
+    def step(self):
+        score = self.game.score
+        super().step()
+        if score == 3 and self.game.score == 4:
+            self.game.length += 1
+
+
+class TestDifferential(unittest.TestCase):
+    """Tests for checking optimized engines against update_game_state."""
+
+    def test_compact_engine_matches_the_reference(self):
+        """Test that the lookahead bot's engine agrees with the reference on every tick of random games."""
+        for settings in (GameSettings(), GameSettings(wonq_mode=True)):
+            for seed in range(20):
+                ticks, divergence = check_game(settings, seed, CompactEngine)
+                self.assertIsNone(divergence)
+                self.assertGreater(ticks, 0)
+
+    def test_divergence_is_found_and_shrunk(self):
+        """Test that a broken engine is caught and the game shrunk to the one turn that shows it."""
+        ticks, divergence = check_game(GameSettings(), 3, IgnoresUp)
+        self.assertIsNotNone(divergence)
+        shrunk = shrink(divergence, IgnoresUp)
+        self.assertEqual(len(shrunk.replay.turns), 1)
+        self.assertEqual(shrunk.replay.turns[0][1:], config.UP)
+        self.assertEqual(check_replay(shrunk.replay, IgnoresUp), shrunk)
+
+    def test_shrinking_keeps_the_turns_that_matter(self):
+        """Test that shrinking a bug deep in a game leaves far fewer turns that still reproduce it."""
+        settings = GameSettings(wonq_mode=True)
+        for seed in range(3):
+            ticks, divergence = check_game(settings, seed, GrowsTwiceOnFourthMeal)
+            self.assertIsNotNone(divergence)
+            shrunk = shrink(divergence, GrowsTwiceOnFourthMeal)
+            self.assertLess(len(shrunk.replay.turns), len(divergence.replay.turns) / 2)
+            self.assertEqual(shrunk.expected.score, 4)
+            found = check_replay(Replay.from_dict(json.loads(json.dumps(shrunk.replay.to_dict()))),
+                                 GrowsTwiceOnFourthMeal)
+            self.assertEqual(found.tick, shrunk.tick)
+            self.assertIsNone(check_replay(shrunk.replay, ReferenceEngine))
+
+    def test_run_differential(self):
+        """Test the summary of a run over several processes, and a reported divergence."""
+        result = run_differential(GameSettings(wonq_mode=True), "compact", 20_000, workers=2)
+        self.assertIsNone(result["divergence"])
+        self.assertGreaterEqual(result["ticks"], 20_000)
+        self.assertGreater(result["games"], 1)
+
+        with self.assertRaises(ValueError):
+            run_differential(GameSettings(food_count=3), "compact", 100)
+        with self.assertRaises(ValueError):
+            run_differential(GameSettings(), "vectorized", 100)
+
+
+if __name__ == '__main__':
+    unittest.main()
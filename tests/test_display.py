@@ -0,0 +1,78 @@
+import os
+import unittest
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+import pygame
+from src import config
+from src.display import Display, fit
+
+
+class TestFit(unittest.TestCase):
+    """Tests for placing the logical framebuffer in a window."""
+
+    def test_fit(self):
+        """Test that the frame keeps its aspect ratio and is centered."""
+        self.assertEqual(fit((800, 600), (800, 600), False), pygame.Rect(0, 0, 800, 600))
+        self.assertEqual(fit((800, 600), (1280, 720), False), pygame.Rect(160, 0, 960, 720))
+        self.assertEqual(fit((800, 600), (3840, 2160), False), pygame.Rect(480, 0, 2880, 2160))
+        self.assertEqual(fit((800, 600), (400, 400), False), pygame.Rect(0, 50, 400, 300))
+
+    def test_integer_scaling(self):
+        """Test that integer scaling rounds the factor down, but never below 1."""
+        self.assertEqual(fit((800, 600), (3840, 2160), True), pygame.Rect(720, 180, 2400, 1800))
+        self.assertEqual(fit((800, 600), (1280, 720), True), pygame.Rect(240, 60, 800, 600))
+        self.assertEqual(fit((800, 600), (400, 400), True), pygame.Rect(0, 50, 400, 300))
+
+
+class TestDisplay(unittest.TestCase):
+    """Tests for drawing through the logical framebuffer."""
+
+    def setUp(self):
+        pygame.display.init()
+
+    def tearDown(self):
+        pygame.display.quit()
+
+    def test_window_of_the_logical_size_is_drawn_on_directly(self):
+        """Test that nothing is scaled when the window has the logical size."""
+        display = Display((800, 600), (800, 600))
+        self.assertIs(display.surface, display.window)
+        display.present()
+
+    def test_frame_is_scaled_to_the_window(self):
+        """Test that a frame drawn in logical pixels fills the scaled area of the window."""
+        display = Display((800, 600), (1600, 1200))
+        self.assertEqual(display.surface.get_size(), (800, 600))
+        display.surface.fill(config.BLACK)
+        display.surface.fill(config.RED, (0, 0, 10, 10))
+        display.present()
+        self.assertEqual(display.window.get_at((19, 19))[:3], config.RED)
+        self.assertEqual(display.window.get_at((20, 20))[:3], config.BLACK)
+        self.assertEqual(display.to_logical((19, 21)), (9, 10))
+
+    def test_letterbox(self):
+        """Test that the borders around a frame of another aspect ratio stay black."""
+        display = Display((800, 600), (1280, 720))
+        display.surface.fill(config.WHITE)
+        display.present()
+        self.assertEqual(display.window.get_at((100, 360))[:3], config.BLACK)
+        self.assertEqual(display.window.get_at((640, 360))[:3], config.WHITE)
+
+    def test_resize(self):
+        """Test that resizing the window lays the frame out again."""
+        display = Display((800, 600), (800, 600))
+        self.assertTrue(display.handle_event(pygame.event.Event(pygame.VIDEORESIZE, size=(1600, 1200),
+                                                                w=1600, h=1200)))
+        self.assertEqual(display.area, pygame.Rect(0, 0, 1600, 1200))
+        self.assertIsNot(display.surface, display.window)
+        self.assertFalse(display.handle_event(pygame.event.Event(pygame.KEYDOWN, key=pygame.K_UP)))
+
+    def test_logical_size_change(self):
+        """Test that a new logical size gets a new framebuffer."""
+        display = Display((800, 600), (1600, 1200))
+        display.set_logical_size((400, 300))
+        self.assertEqual(display.surface.get_size(), (400, 300))
+        self.assertEqual(display.area, pygame.Rect(0, 0, 1600, 1200))
+
+
+if __name__ == '__main__':
+    unittest.main()
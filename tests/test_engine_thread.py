@@ -0,0 +1,113 @@
+import random
+import time
+import unittest
+from unittest.mock import patch
+import pygame
+from src import config
+from src.engine_thread import EngineThread, GameSnapshot, SnapshotBuffer
+from src.game_logic import reset_game_state, update_game_state
+from src.game_state import GameSettings
+from src.replay import Replay, play_replay
+from src.ui import draw_game_screen, draw_snapshot
+
+
+class TestSnapshots(unittest.TestCase):
+    """Tests for game snapshots and the double buffer."""
+
+    @classmethod
+    def setUpClass(cls):
+        pygame.font.init()
+
+    def test_snapshot_is_independent_of_the_game(self):
+        """Test that playing on does not change a snapshot taken earlier."""
+        settings = GameSettings(wonq_mode=True, food_count=3)
+        game_data = reset_game_state(settings, random.Random(4))
+        game_data.poops.add((1, 1))
+        snapshot = GameSnapshot.of(game_data)
+        positions = snapshot.positions
+        update_game_state(game_data, settings)
+        game_data.poops.add((2, 2))
+        game_data.items.spawn(1, game_data.rng, game_data.ticks)
+        self.assertEqual(snapshot.positions, positions)
+        self.assertEqual(snapshot.ticks, 0)
+        self.assertEqual(list(snapshot.poops.positions()), [(1, 1)])
+        self.assertEqual(len(snapshot.items.foods), 2)
+
+    def test_double_buffer(self):
+        """Test that readers always get the latest whole snapshot."""
+        game_data = reset_game_state(GameSettings(), random.Random(1))
+        first = GameSnapshot.of(game_data)
+        buffer = SnapshotBuffer(first)
+        self.assertIs(buffer.latest(), first)
+        snapshots = []
+        for _ in range(3):
+            update_game_state(game_data, GameSettings())
+            snapshots.append(GameSnapshot.of(game_data))
+            buffer.publish(snapshots[-1])
+            self.assertIs(buffer.latest(), snapshots[-1])
+        self.assertEqual(buffer.published, 3)
+
+    def test_snapshot_draws_like_the_game(self):
+        """Test that drawing a snapshot gives the same frame as drawing the game."""
+        settings = GameSettings(wonq_mode=True, food_count=4)
+        game_data = reset_game_state(settings, random.Random(2))
+        for _ in range(3):
+            update_game_state(game_data, settings)
+        from_game = pygame.Surface((config.SCREEN_WIDTH, config.SCREEN_HEIGHT))
+        from_snapshot = pygame.Surface((config.SCREEN_WIDTH, config.SCREEN_HEIGHT))
+        draw_game_screen(from_game, game_data, settings)
+        draw_snapshot(from_snapshot, GameSnapshot.of(game_data), settings)
+        self.assertEqual(pygame.image.tobytes(from_game, "RGB"), pygame.image.tobytes(from_snapshot, "RGB"))
+
+
+class TestEngineThread(unittest.TestCase):
+    """Tests for playing a game on its own thread."""
+
+    def test_plays_to_the_end_and_records_turns(self):
+        """Test that queued turns are played and recorded so the replay reproduces the game."""
+        settings = GameSettings(speed_index=0)
+        replay = Replay.new(settings, seed=9)
+        game_data = replay.start_game()
+        engine = EngineThread(game_data, settings, replay)
+        engine.turn(config.DOWN)
+        with patch.object(config, "SPEED_LEVELS", [2000]):
+            engine.start()
+            engine.join(timeout=10)
+        self.assertFalse(engine.is_alive())
+        self.assertTrue(engine.snapshots.latest().game_over)
+        self.assertEqual(engine.snapshots.latest().ticks, game_data.ticks)
+        self.assertEqual(replay.turns, [(0, 0, 1)])
+        for replayed in play_replay(replay):
+            pass
+        self.assertEqual((replayed.ticks, replayed.score), (game_data.ticks, game_data.score))
+
+    def test_ticks_keep_their_schedule(self):
+        """Test that ticks follow the clock rather than the time between them."""
+        settings = GameSettings()
+        game_data = reset_game_state(settings, random.Random(3))
+        engine = EngineThread(game_data, settings)
+        with patch.object(config, "SPEED_LEVELS", [100] * len(config.SPEED_LEVELS)):
+            start = time.perf_counter()
+            engine.start()
+            time.sleep(0.25)
+            engine.stop()
+        elapsed = time.perf_counter() - start
+        self.assertFalse(engine.is_alive())
+        self.assertLessEqual(game_data.ticks, elapsed * 100 + 1)
+        if not game_data.game_over:
+            self.assertGreaterEqual(game_data.ticks, 10)
+
+    def test_stop(self):
+        """Test that a slow game stops promptly."""
+        settings = GameSettings()
+        engine = EngineThread(reset_game_state(settings, random.Random(5)), settings)
+        with patch.object(config, "SPEED_LEVELS", [1] * len(config.SPEED_LEVELS)):
+            engine.start()
+            start = time.perf_counter()
+            engine.stop()
+        self.assertLess(time.perf_counter() - start, 0.5)
+        self.assertEqual(engine.game_data.ticks, 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,105 @@
+import unittest
+import numpy as np
+from src.env import (SnekByteEnv, ACTIONS, NUM_PLANES, FEATURE_SIZE, BODY_PLANE, HEAD_PLANE,
+                     FOOD_PLANE, OBSTACLE_PLANE, REWARD_DEATH)
+from src import config
+
+
+class TestSnekByteEnv(unittest.TestCase):
+    """Tests for the SnekByteEnv class."""
+
+    def test_grid_observation_is_a_view(self):
+        """Test that grid observations reuse the same buffer every step."""
+        env = SnekByteEnv()
+        obs, info = env.reset(seed=1)
+        self.assertEqual(obs.shape, (NUM_PLANES, env.height, env.width))
+        self.assertFalse(obs.flags.writeable)
+        self.assertEqual(info["score"], 0)
+
+        next_obs, _, _, _, _ = env.step(ACTIONS.index(config.RIGHT))
+        self.assertIs(next_obs, obs)
+
+    def test_grid_matches_game_state(self):
+        """Test that the incrementally updated planes match the game state."""
+        env = SnekByteEnv(wonq_mode=True)
+        obs, _ = env.reset(seed=3)
+        rng = np.random.default_rng(0)
+        for _ in range(200):
+            obs, _, terminated, _, _ = env.step(int(rng.integers(len(ACTIONS))))
+            if terminated:
+                break
+            game_data = env.game_data
+            expected_body = np.zeros((env.height, env.width), dtype=np.uint8)
+            for x, y in game_data["snake"].positions:
+                expected_body[y, x] += 1
+            np.testing.assert_array_equal(obs[BODY_PLANE], expected_body)
+            head_x, head_y = game_data["snake"].get_head_position()
+            self.assertEqual(obs[HEAD_PLANE].sum(), 1)
+            self.assertEqual(obs[HEAD_PLANE, head_y, head_x], 1)
+            food_x, food_y = game_data["food"].position
+            self.assertEqual(obs[FOOD_PLANE, food_y, food_x], 1)
+            self.assertEqual(obs[OBSTACLE_PLANE].sum(), len(game_data["poops"]))
+
+    def test_wall_death(self):
+        """Test that running into the wall terminates with the death reward."""
+        env = SnekByteEnv()
+        env.reset(seed=0)
+        terminated = False
+        steps = 0
+        while not terminated:
+            _, reward, terminated, _, info = env.step(ACTIONS.index(config.UP))
+            steps += 1
+        self.assertEqual(reward, REWARD_DEATH)
+        self.assertEqual(info["death_cause"], "wall")
+        self.assertEqual(steps, env.height // 2 + 1)
+
+    def test_egocentric_crop(self):
+        """Test that the crop is centred on the head and walls read as obstacles."""
+        env = SnekByteEnv(observation_mode="egocentric", crop_radius=2)
+        obs, _ = env.reset(seed=0)
+        self.assertEqual(obs.shape, (NUM_PLANES, 5, 5))
+        self.assertEqual(obs[HEAD_PLANE, 2, 2], 1)
+        for _ in range(env.height // 2):
+            obs, _, terminated, _, _ = env.step(ACTIONS.index(config.UP))
+            self.assertFalse(terminated)
+        # The head is on the top row, so the two rows above it are wall
+        self.assertTrue(obs[OBSTACLE_PLANE, :2, :].all())
+        self.assertEqual(obs[HEAD_PLANE, 2, 2], 1)
+
+    def test_feature_observation(self):
+        """Test the feature vector shape and heading features."""
+        env = SnekByteEnv(observation_mode="features")
+        obs, _ = env.reset(seed=0)
+        self.assertEqual(obs.shape, (FEATURE_SIZE,))
+        self.assertEqual(obs.dtype, np.float32)
+        self.assertEqual(obs[3 + ACTIONS.index(config.RIGHT)], 1.0)
+
+    def test_seed_is_reproducible(self):
+        """Test that the same seed places the same food."""
+        env = SnekByteEnv()
+        env.reset(seed=42)
+        first = env.game_data["food"].position
+        env.reset(seed=42)
+        self.assertEqual(env.game_data["food"].position, first)
+
+    def test_truncation(self):
+        """Test that episodes are truncated after max_steps."""
+        env = SnekByteEnv(max_steps=3)
+        env.reset(seed=0)
+        truncated = False
+        for _ in range(3):
+            _, _, _, truncated, _ = env.step(ACTIONS.index(config.DOWN))
+        self.assertTrue(truncated)
+
+    def test_render_rgb_array(self):
+        """Test that rendering returns a frame of the screen size."""
+        env = SnekByteEnv(render_mode="rgb_array")
+        env.reset(seed=0)
+        frame = env.render()
+        self.assertEqual(frame.shape, (config.SCREEN_HEIGHT, config.SCREEN_WIDTH, 3))
+        del frame
+        env.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -6,6 +6,7 @@ from src.snake import Snake
 from src.food import Food
 from src.poop import Poop
 from src import config
+from src.diagnostics import measure_allocations
 
 class TestGameLogic(unittest.TestCase):
     """Tests for the main game_logic module."""
@@ -126,5 +127,39 @@ class TestGameLogic(unittest.TestCase):
         
         self.assertTrue(game_data['game_over'])
 
+
+class TestSteadyStateTick(unittest.TestCase):
+    """Tests that a tick in which nothing is eaten allocates nothing."""
+
+    def test_tick_allocates_nothing(self):
+        """Test that moving a long snake past poops keeps no memory and creates no objects."""
+        settings = GameSettings(wonq_mode=True)
+        game_data = reset_game_state(settings)
+        snake = game_data.snake
+        snake.positions = [(x, 2) for x in range(12, 2, -1)]
+        snake.length = 10
+        snake.direction = config.RIGHT
+        game_data.food = Food((0, 0))
+        game_data.poops.add((3, 3))
+
+        stats = measure_allocations(update_game_state, game_data, settings, repeat=5)
+        self.assertFalse(game_data.game_over)
+        self.assertEqual(stats.retained_bytes, 0)
+        # At most a counter's int object exists at a time, never a tuple per segment
+        self.assertLessEqual(stats.peak_bytes, 64)
+
+    @patch('src.game_logic.GRID_HEIGHT', 20)
+    @patch('src.game_logic.GRID_WIDTH', 20)
+    def test_self_collision_after_positions_are_replaced(self):
+        """Test that a snake set up by assigning positions collides with itself."""
+        game_data = reset_game_state(GameSettings())
+        snake = game_data.snake
+        snake.positions = [(10, 11), (10, 10), (11, 10), (11, 11), (12, 11)]
+        snake.length = 5
+        snake.direction = config.RIGHT
+        update_game_state(game_data, GameSettings())
+        self.assertTrue(game_data.game_over)
+        self.assertEqual(game_data.death_cause, "self")
+
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
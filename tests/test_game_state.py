@@ -1,5 +1,10 @@
+import random
 import unittest
-from src.game_state import GameSettings
+from collections import Counter
+from src.game_state import BoardFollower, GameSettings, GameData, GameEvent
+from src.game_logic import reset_game_state, update_game_state
+from src.food import Food
+from src.bots import greedy_policy
 from src.config import SPEED_LEVELS, DEFAULT_SPEED_INDEX, DEFAULT_WONQ_MODE
 
 class TestGameSettings(unittest.TestCase):
@@ -55,5 +60,101 @@ class TestGameSettings(unittest.TestCase):
         self.settings.toggle_wonq_mode()
         self.assertEqual(self.settings.wonq_mode, initial_mode)
 
+class TestGameData(unittest.TestCase):
+    """Tests for the GameData class."""
+
+    def setUp(self):
+        """Start a new game."""
+        self.settings = GameSettings(wonq_mode=True)
+        self.game_data = reset_game_state(self.settings)
+
+    def test_no_instance_dict(self):
+        """Test that GameData is slotted."""
+        self.assertFalse(hasattr(self.game_data, "__dict__"))
+        with self.assertRaises(AttributeError):
+            self.game_data.not_a_field = 1
+
+    def test_mapping_compatibility(self):
+        """Test that the old dictionary-style access still works."""
+        self.assertIs(self.game_data["snake"], self.game_data.snake)
+        self.assertIn("shit_counter", self.game_data)
+        self.assertEqual(self.game_data.get("score"), 0)
+        self.assertEqual(self.game_data.get("missing", 5), 5)
+        with self.assertRaises(KeyError):
+            self.game_data["missing"]
+
+        version = self.game_data.version
+        self.game_data["score"] = 3
+        self.assertEqual(self.game_data.score, 3)
+        self.assertGreater(self.game_data.version, version)
+
+    def test_version_increases_every_tick(self):
+        """Test that every tick bumps the version."""
+        version = self.game_data.version
+        update_game_state(self.game_data, self.settings)
+        self.assertGreater(self.game_data.version, version)
+
+    def test_events(self):
+        """Test that eating, pooping and dying emit events in order."""
+        events = []
+        self.game_data.subscribe(lambda event, data: events.append(event))
+        self.game_data.shit_counter = 4
+        snake = self.game_data.snake
+        head_x, head_y = snake.get_head_position()
+        # A longer snake, so the dropped poop lands behind the head
+        snake.positions = [(head_x, head_y), (head_x - 1, head_y), (head_x - 2, head_y)]
+        snake.length = 3
+        snake.direction = (1, 0)
+        self.game_data.food = Food((head_x + 1, head_y))
+
+        update_game_state(self.game_data, self.settings)
+        self.assertEqual(events, [GameEvent.MOVED, GameEvent.POOP_DROPPED, GameEvent.FOOD_EATEN])
+
+        events.clear()
+        while not self.game_data.game_over:
+            update_game_state(self.game_data, self.settings)
+        self.assertEqual(events[-1], GameEvent.GAME_OVER)
+        self.assertEqual(events.count(GameEvent.GAME_OVER), 1)
+
+
+class CellCounter(BoardFollower):
+    """Counts the snake segments and poops on each cell through the follower's hooks."""
+
+    def __init__(self, game_data):
+        super().__init__(game_data)
+        self.counts = Counter(self._segments) + Counter(self._poops)
+
+    def _tail_left(self, index):
+        self.counts[index] -= 1
+
+    def _head_entered(self, index, previous):
+        self.counts[index] += 1
+
+    def _poop_dropped(self, index):
+        self.counts[index] += 1
+
+    def _poops_cleared(self, indices):
+        self.counts.subtract(indices)
+
+
+class TestBoardFollower(unittest.TestCase):
+    """Tests for following the snake and poop cells through the game's events."""
+
+    def test_hooks_track_the_board(self):
+        """Test that the hooks keep per-cell counts equal to the ones read from the game."""
+        settings = GameSettings(wonq_mode=True, food_count=20, power_ups=True)
+        for seed in range(5):
+            game_data = reset_game_state(settings, random.Random(seed))
+            follower = CellCounter(game_data)
+            while not game_data.game_over:
+                game_data.snake.turn(greedy_policy(game_data, settings, game_data.rng))
+                update_game_state(game_data, settings)
+                expected = Counter(map(follower.cell_index, game_data.snake.positions))
+                expected.update(game_data.poops.indices)
+                self.assertEqual(+follower.counts, expected)
+            follower.close()
+            self.assertFalse(game_data.listeners)
+
+
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
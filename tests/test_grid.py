@@ -0,0 +1,76 @@
+import unittest
+from src.grid import CellSet, cell_index, position_table, index_typecode
+from src.poop import Poop, PoopField
+
+
+class TestCellSet(unittest.TestCase):
+    """Tests for the packed CellSet."""
+
+    def setUp(self):
+        """Create an empty set on a small board."""
+        self.cells = CellSet(10, 8)
+
+    def test_add_and_contains(self):
+        """Test adding cells and checking membership."""
+        self.assertTrue(self.cells.add((3, 4)))
+        self.assertFalse(self.cells.add((3, 4)))
+        self.assertIn((3, 4), self.cells)
+        self.assertNotIn((4, 3), self.cells)
+        self.assertEqual(len(self.cells), 1)
+        self.assertEqual(list(self.cells.indices), [cell_index(3, 4, 10)])
+
+    def test_off_board(self):
+        """Test that off-board positions are never members and cannot be added."""
+        self.assertNotIn((-1, 0), self.cells)
+        self.assertNotIn((10, 0), self.cells)
+        with self.assertRaises(ValueError):
+            self.cells.add((0, 8))
+
+    def test_discard_swaps_last_cell(self):
+        """Test that removing a cell keeps the packed array dense."""
+        for position in [(0, 0), (1, 0), (2, 0)]:
+            self.cells.add(position)
+        self.assertTrue(self.cells.discard((0, 0)))
+        self.assertFalse(self.cells.discard((0, 0)))
+        self.assertEqual(list(self.cells.positions()), [(2, 0), (1, 0)])
+        self.assertTrue(self.cells.discard((1, 0)))
+        self.assertEqual(list(self.cells), [(2, 0)])
+
+    def test_clear(self):
+        """Test that clearing empties the set."""
+        self.cells.add((1, 1))
+        self.cells.clear()
+        self.assertEqual(len(self.cells), 0)
+        self.assertNotIn((1, 1), self.cells)
+
+    def test_position_table_and_typecode(self):
+        """Test the shared position table and index typecodes."""
+        table = position_table(10, 8)
+        self.assertEqual(table[cell_index(7, 5, 10)], (7, 5))
+        self.assertIs(position_table(10, 8), table)
+        self.assertEqual(index_typecode(256 * 256), "H")
+        self.assertEqual(index_typecode(256 * 256 + 1), "I")
+
+
+class TestPoopField(unittest.TestCase):
+    """Tests for the PoopField compatibility API."""
+
+    def test_append_and_iterate(self):
+        """Test that poops can be appended as objects or positions and iterate as Poops."""
+        poops = PoopField(20, 20)
+        poops.append(Poop((1, 2)))
+        poops.append((3, 4))
+        self.assertIn(Poop((1, 2)), poops)
+        self.assertIn((3, 4), poops)
+        self.assertEqual([p.position for p in poops], [(1, 2), (3, 4)])
+        self.assertEqual(poops, [Poop((3, 4)), (1, 2)])
+        self.assertEqual(PoopField(20, 20), [])
+
+    def test_slots(self):
+        """Test that poops and the field carry no per-instance dictionary."""
+        self.assertFalse(hasattr(Poop((0, 0)), "__dict__"))
+        self.assertFalse(hasattr(PoopField(2, 2), "__dict__"))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,159 @@
+import random
+import unittest
+from src import config
+from src.bots import greedy_policy
+from src.game_logic import reset_game_state, update_game_state
+from src.game_state import GameEvent, GameSettings
+from src.grid import position_table
+from src.items import CLEAN, EMPTY, FAST, FOOD, SLOW
+from src.replay import Replay
+from src.sprites import SpriteAtlas
+
+
+def free_cells_are_consistent(game_data):
+    """Returns True if the free cells are exactly the cells nothing covers."""
+    items = game_data.items
+    covered = (set(game_data.snake.positions) | set(game_data.poops.positions()) | {game_data.food.position}
+               | set(items.foods.positions()) | set(items.power_ups.positions()))
+    board = set(position_table(items.width, items.height))
+    return set(items.free.positions()) == board - covered
+
+
+class TestItemField(unittest.TestCase):
+    """Tests for party mode foods and power-ups."""
+
+    def new_game(self, seed=0, **settings):
+        self.settings = GameSettings(**settings)
+        return reset_game_state(self.settings, random.Random(seed))
+
+    def test_default_game_has_no_items(self):
+        """Test that party mode is off unless asked for."""
+        self.assertIsNone(self.new_game().items)
+
+    def test_foods_are_spawned(self):
+        """Test that the extra foods are on free cells."""
+        game_data = self.new_game(food_count=50)
+        self.assertEqual(len(game_data.items.foods), 49)
+        self.assertTrue(free_cells_are_consistent(game_data))
+
+    def test_free_cells_follow_the_game(self):
+        """Test that the free cells stay exact through meals, poops, power-ups and expiries."""
+        game_data = self.new_game(seed=4, wonq_mode=True, food_count=40, power_ups=True)
+        events = []
+        game_data.subscribe(lambda event, _: events.append(event))
+        while not game_data.game_over and game_data.ticks < 1500:
+            game_data.snake.turn(greedy_policy(game_data, self.settings))
+            update_game_state(game_data, self.settings)
+            self.assertTrue(free_cells_are_consistent(game_data), f"tick {game_data.ticks}")
+            self.assertEqual(len(game_data.items.foods), 39)
+        self.assertGreater(events.count(GameEvent.FOOD_EATEN), 10)
+
+    def test_eating_an_extra_food(self):
+        """Test that an extra food is eaten like the main food and replaced."""
+        game_data = self.new_game(food_count=3)
+        items = game_data.items
+        snake = game_data.snake
+        head = snake.get_head_position()
+        target = (head[0] + 1, head[1])
+        index = items.index_of(target)
+        items.remove(items.foods.indices[0])
+        items.free.discard_index(index)
+        items.kinds[index] = FOOD
+        items.foods.add_index(index)
+        if game_data.food.position == target:
+            game_data.food.position = (0, 0)
+
+        update_game_state(game_data, self.settings)
+        self.assertEqual(game_data.score, 1)
+        self.assertEqual(snake.length, 2)
+        self.assertEqual(items.kinds[index], EMPTY)
+        self.assertEqual(len(items.foods), 2)
+
+    def test_power_up_expires(self):
+        """Test that an uneaten power-up disappears after its lifetime and frees its cell."""
+        game_data = self.new_game(food_count=1, power_ups=True)
+        items = game_data.items
+        index = items.spawn(SLOW, game_data.rng, game_data.ticks)
+        game_data.ticks = config.POWER_UP_LIFETIME - 1
+        items.advance(game_data, self.settings)
+        self.assertEqual(items.kinds[index], SLOW)
+        game_data.ticks = config.POWER_UP_LIFETIME
+        items.advance(game_data, self.settings)
+        self.assertEqual(items.kinds[index], EMPTY)
+        self.assertTrue(items.free.contains_index(index))
+        self.assertEqual(len(items.power_ups), 0)
+
+    def test_eaten_power_up_does_not_expire_its_successor(self):
+        """Test that the expiry of an eaten power-up leaves a new power-up on the same cell alone."""
+        game_data = self.new_game(power_ups=True)
+        items = game_data.items
+        index = items.spawn(FAST, game_data.rng, 0)
+        items.remove(index)
+        items.release(index)
+
+        class SameCell:
+            def randrange(self, n):
+                return list(items.free.indices).index(index)
+
+        self.assertEqual(items.spawn(SLOW, SameCell(), config.POWER_UP_LIFETIME // 2), index)
+        game_data.ticks = config.POWER_UP_LIFETIME
+        items.advance(game_data, self.settings)
+        self.assertEqual(items.kinds[index], SLOW)
+
+    def test_speed_power_ups(self):
+        """Test that speed power-ups change the speed factor until they run out."""
+        game_data = self.new_game(power_ups=True)
+        items = game_data.items
+        items.apply(FAST, game_data)
+        items.apply(SLOW, game_data)
+        self.assertAlmostEqual(items.speed_factor, config.POWER_UP_SPEED_FACTORS["fast"]
+                               * config.POWER_UP_SPEED_FACTORS["slow"])
+        game_data.ticks = 10
+        items.apply(FAST, game_data)  # Extends the fast power-up
+        game_data.ticks = config.POWER_UP_DURATION
+        items.advance(game_data, self.settings)
+        self.assertAlmostEqual(items.speed_factor, config.POWER_UP_SPEED_FACTORS["fast"])
+        game_data.ticks = config.POWER_UP_DURATION + 10
+        items.advance(game_data, self.settings)
+        self.assertEqual(items.speed_factor, 1.0)
+
+    def test_clean_power_up(self):
+        """Test that the clean power-up removes every poop and frees its cells."""
+        game_data = self.new_game(wonq_mode=True, power_ups=True)
+        items = game_data.items
+        for position in ((1, 1), (2, 2)):
+            game_data.poops.add(position)
+            items.occupy(items.index_of(position))
+        items.apply(CLEAN, game_data)
+        self.assertEqual(len(game_data.poops), 0)
+        self.assertTrue(free_cells_are_consistent(game_data))
+
+    def test_power_ups_spawn_on_schedule(self):
+        """Test that a power-up appears every interval."""
+        game_data = self.new_game(power_ups=True)
+        game_data.ticks = config.POWER_UP_INTERVAL
+        game_data.items.advance(game_data, self.settings)
+        self.assertEqual(len(game_data.items.power_ups), 1)
+
+    def test_replay_keeps_party_settings(self):
+        """Test that party settings are saved with replays, and old replays still load."""
+        settings = GameSettings(food_count=20, power_ups=True)
+        replay = Replay.from_dict(Replay.new(settings, seed=5).to_dict())
+        self.assertEqual(replay.settings().food_count, 20)
+        self.assertTrue(replay.settings().power_ups)
+        old = Replay.new(GameSettings(), seed=5).to_dict()
+        del old["food_count"], old["power_ups"]
+        self.assertFalse(Replay.from_dict(old).settings().party_mode)
+
+    def test_items_are_drawn(self):
+        """Test that extra foods and power-ups are part of the batched blit."""
+        game_data = self.new_game(food_count=5, power_ups=True)
+        index = game_data.items.spawn(FAST, game_data.rng, 0)
+        atlas = SpriteAtlas("classic", 20)
+        blits = atlas.entity_blits(game_data.snake.positions, game_data.food.position, (), game_data.items)
+        self.assertEqual(len(blits), 1 + 1 + 4 + 1)
+        self.assertEqual(blits[-1][2], atlas.area("fast"))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,192 @@
+import os
+import random
+import tempfile
+import unittest
+from unittest.mock import patch
+from src import config, game_logic, levels
+from src.bots import greedy_policy, level_distances, safe_directions
+from src.game_logic import DEATH_WALL, reset_game_state, update_game_state
+from src.game_state import GameSettings
+from src.levels import (LEVEL_SUFFIX, PORTAL, SPAWN, WALL, LevelError, compile_level, compile_level_file,
+                        load_level, parse_level, read_level)
+from src.replay import Replay
+from src.ui import _get_background
+
+# A 20x15 board: a wall across the middle, a pair of portals, and one spawn cell
+BOARD_TEXT = "\n".join(
+    ["name: Corridor", "direction: right", "; portal a joins the two halves"]
+    + ["." * 20] * 3
+    + ["..S" + "." * 17]
+    + ["." * 20] * 2
+    + ["." * 18 + "a."]
+    + ["#" * 20]
+    + [".a" + "." * 18]
+    + ["." * 20] * 6
+)
+
+
+class LevelTestCase(unittest.TestCase):
+    """Plays on a 20x15 board and keeps level files in a temporary directory."""
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.patches = [patch.object(game_logic, "GRID_WIDTH", 20),
+                        patch.object(game_logic, "GRID_HEIGHT", 15),
+                        patch.object(config, "GRID_WIDTH", 20),
+                        patch.object(config, "GRID_HEIGHT", 15)]
+        for patcher in self.patches:
+            patcher.start()
+
+    def tearDown(self):
+        for patcher in self.patches:
+            patcher.stop()
+        self.directory.cleanup()
+
+    def write(self, name, text):
+        path = os.path.join(self.directory.name, name)
+        with open(path, "w") as f:
+            f.write(text)
+        return path
+
+
+class TestLevelFormat(LevelTestCase):
+    """Tests for compiling and loading levels."""
+
+    def test_compile_and_map(self):
+        """Test that a compiled level is memory-mapped back with its cells, portals and spawns."""
+        binary = compile_level_file(self.write("corridor.txt", BOARD_TEXT))
+        self.assertTrue(binary.endswith(LEVEL_SUFFIX))
+        level = read_level(binary)
+        self.assertEqual((level.name, level.width, level.height), ("Corridor", 20, 15))
+        self.assertIsInstance(level.cells, memoryview)
+        self.assertEqual(level.cells[7 * 20], WALL)
+        self.assertEqual(level.cells[3 * 20 + 2], SPAWN)
+        self.assertEqual(level.portals, {6 * 20 + 18: 8 * 20 + 1, 8 * 20 + 1: 6 * 20 + 18})
+        self.assertEqual(level.cells[6 * 20 + 18], PORTAL)
+        self.assertEqual(level.start_position(random.Random(0)), (2, 3))
+        level.close()
+
+    def test_text_levels_load_directly(self):
+        """Test that the text format loads without compiling it to a file first."""
+        level = read_level(self.write("corridor.txt", BOARD_TEXT))
+        self.assertEqual(bytes(level.cells), bytes(parse_level(compile_level(BOARD_TEXT)).cells))
+
+    def test_invalid_levels(self):
+        """Test that broken levels are rejected with a LevelError."""
+        for text in ("", "a....", "..?..", "speed: 3\n.....", "direction: sideways\n....."):
+            with self.assertRaises(LevelError):
+                compile_level(text)
+        with self.assertRaises(LevelError):
+            read_level(os.path.join(self.directory.name, "missing.snkl"))
+        with self.assertRaises(LevelError):
+            parse_level(b"SNKL")
+        with self.assertRaises(LevelError):
+            parse_level(compile_level(BOARD_TEXT)[:-1])
+
+    def test_truncated_and_corrupt_files(self):
+        """Test that every cut-off prefix of a level and a level with a broken name raise a LevelError."""
+        data = compile_level(BOARD_TEXT)
+        for length in range(len(data)):
+            with self.assertRaises(LevelError):
+                parse_level(data[:length])
+        name_start = levels._HEADER.size
+        with self.assertRaises(LevelError):
+            parse_level(data[:name_start] + b"\xff" + data[name_start + 1:])
+        path = os.path.join(self.directory.name, "cut.snkl")
+        with open(path, "wb") as f:
+            f.write(data[:22])
+        with self.assertRaises(LevelError):
+            read_level(path)
+
+    def test_load_level_reloads_changed_files(self):
+        """Test that a level is loaded once and again only when its file changes."""
+        path = self.write("corridor.txt", BOARD_TEXT)
+        level = load_level(path)
+        self.assertIs(load_level(path), level)
+        self.write("corridor.txt", BOARD_TEXT.replace("name: Corridor", "name: Hallway"))
+        os.utime(path, ns=(1, 1))
+        self.assertEqual(load_level(path).name, "Hallway")
+
+
+class TestLevelGames(LevelTestCase):
+    """Tests for playing on a level."""
+
+    def start(self, **settings):
+        self.settings = GameSettings(level=self.write("corridor.txt", BOARD_TEXT), **settings)
+        return reset_game_state(self.settings, random.Random(1))
+
+    def test_start(self):
+        """Test that the snake starts on the spawn cell and the food on a free cell."""
+        game_data = self.start()
+        self.assertEqual(game_data.snake.positions, [(2, 3)])
+        self.assertEqual(game_data.snake.direction, config.RIGHT)
+        self.assertFalse(game_data.level.is_blocked(game_data.food.position[1] * 20 + game_data.food.position[0]))
+
+    def test_walls_kill(self):
+        """Test that running into a wall ends the game."""
+        game_data = self.start()
+        game_data.snake.turn(config.DOWN)
+        while not game_data.game_over:
+            update_game_state(game_data, self.settings)
+        self.assertEqual(game_data.death_cause, DEATH_WALL)
+        self.assertEqual(game_data.snake.get_head_position(), (2, 7))
+
+    def test_portals(self):
+        """Test that entering a portal moves the head out of its pair."""
+        game_data = self.start()
+        game_data.snake.positions = [(17, 6)]
+        update_game_state(game_data, self.settings)
+        self.assertEqual(game_data.snake.positions, [(1, 8)])
+        self.assertIn((1, 8), game_data.snake)
+        self.assertNotIn((18, 6), game_data.snake)
+        self.assertFalse(game_data.game_over)
+
+    def test_placement_avoids_walls(self):
+        """Test that food and party mode items never land on walls or portals."""
+        game_data = self.start(food_count=30)
+        level = game_data.level
+        items = game_data.items
+        self.assertFalse(any(level.is_blocked(index) for index in items.free.indices))
+        self.assertFalse(any(level.is_blocked(index) for index in items.foods.indices))
+        rng = random.Random(2)
+        for _ in range(200):
+            x, y = game_logic._place_item(game_logic._Occupied(game_data.snake, game_data.poops, level), rng)
+            self.assertFalse(level.is_blocked(y * 20 + x))
+
+    def test_bots_avoid_walls(self):
+        """Test that the bots see walls as blocked and find their way through portals."""
+        game_data = self.start()
+        game_data.snake.positions = [(5, 6)]
+        self.assertNotIn(config.DOWN, safe_directions(game_data, self.settings))
+        distances = level_distances(game_data.level, 9 * 20 + 1)
+        self.assertEqual(distances[6 * 20 + 17], 2)
+        game_data.snake.positions = [(16, 6)]
+        game_data.food.position = (1, 9)
+        self.assertEqual(greedy_policy(game_data, self.settings), config.RIGHT)
+        # The distances are cached per game until the food moves
+        game_data.food.position = (16, 2)
+        self.assertEqual(greedy_policy(game_data, self.settings), config.UP)
+
+    def test_replays_keep_the_level(self):
+        """Test that a replay plays on the level it was recorded on."""
+        game_data = self.start()
+        replay = Replay.from_dict(Replay.new(self.settings, seed=1).to_dict())
+        self.assertEqual(replay.start_game().snake.positions, game_data.snake.positions)
+
+    def test_board_size_must_match(self):
+        """Test that a level for another board size is refused."""
+        path = self.write("small.txt", "." * 10 + "\n" + "." * 10)
+        with self.assertRaises(LevelError):
+            reset_game_state(GameSettings(level=path))
+
+    def test_background_is_prebaked(self):
+        """Test that the walls are drawn into the cached background once."""
+        game_data = self.start()
+        background = _get_background((400, 300), game_data.level)
+        self.assertIs(_get_background((400, 300), game_data.level), background)
+        self.assertEqual(background.get_at((5, 7 * config.GRID_SIZE + 5))[:3], config.LEVEL_WALL_COLOR)
+        self.assertIsNot(_get_background((400, 300)), background)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,129 @@
+import random
+import time
+import unittest
+from unittest import mock
+from src import config, game_logic
+from src.bots import random_policy, safe_directions
+from src.food import Food
+from src.game_logic import reset_game_state, update_game_state
+from src.game_state import GameSettings
+from src.lookahead import CompactGame, LookaheadBot
+
+
+class TestCompactGame(unittest.TestCase):
+    """Tests for the rollout engine."""
+
+    def test_matches_game_logic(self):
+        """Test that the compact engine plays exactly the same game as update_game_state."""
+        settings = GameSettings(wonq_mode=True)
+        for seed in range(10):
+            game_data = reset_game_state(settings, random.Random(seed))
+            # A twin of the same game, so both engines draw from identical rngs
+            game = CompactGame.from_game_data(reset_game_state(settings, random.Random(seed)), settings)
+
+            turn_rng = random.Random(seed + 1000)
+            while not game_data.game_over:
+                direction = random_policy(game_data, settings, turn_rng)
+                game_data.snake.turn(direction)
+                game.turn(direction)
+                update_game_state(game_data, settings)
+                game.step()
+                self.assertEqual(game.game_over, game_data.game_over)
+                if game.game_over:
+                    break
+                self.assertEqual(game.positions(), game_data.snake.positions)
+                self.assertEqual(game.score, game_data.score)
+                self.assertEqual(game.food, game_data.food.position[1] * game.width + game_data.food.position[0])
+                self.assertEqual(sum(game.poops), len(game_data.poops))
+                self.assertEqual(sorted(game.safe_moves()), sorted(safe_directions(game_data, settings)))
+            self.assertEqual(game.death_cause, game_data.death_cause)
+            self.assertEqual(game.ticks, game_data.ticks)
+
+    def test_copy_is_independent(self):
+        """Test that stepping a clone leaves the original untouched."""
+        settings = GameSettings()
+        game = CompactGame.from_game_data(reset_game_state(settings, random.Random(1)), settings)
+        clone = game.copy(random.Random(2))
+        for _ in range(5):
+            clone.step()
+        self.assertEqual(game.ticks, 0)
+        self.assertEqual(len(game.body), 1)
+        self.assertNotEqual(clone.head_position(), game.head_position())
+
+
+def _cornered_game(settings):
+    """A game where the snake runs into the right wall unless it turns."""
+    game_data = reset_game_state(settings, random.Random(0))
+    snake = game_data.snake
+    x, y = game_logic.GRID_WIDTH - 1, game_logic.GRID_HEIGHT // 2
+    snake.positions = [(x, y), (x - 1, y), (x - 2, y)]
+    snake.length = 3
+    snake.direction = config.RIGHT
+    game_data.food = Food((0, 0))
+    return game_data
+
+
+class TestLookaheadBot(unittest.TestCase):
+    """Tests for the Monte Carlo lookahead bot."""
+
+    def test_in_process_decision_is_safe_and_on_time(self):
+        """Test that an in-process decision avoids the wall and keeps to its time budget."""
+        settings = GameSettings(wonq_mode=True)
+        game_data = _cornered_game(settings)
+        with LookaheadBot(workers=0, budget=0.5) as bot:
+            start = time.monotonic()
+            direction = bot.choose(game_data, settings, random.Random(0))
+            elapsed = time.monotonic() - start
+        self.assertIn(direction, (config.UP, config.DOWN))
+        self.assertGreater(bot.last_rollouts, 0)
+        self.assertLess(elapsed, 0.5 / settings.get_speed() + 0.05)
+
+    def test_pool_decision(self):
+        """Test that rollouts in worker processes produce a safe decision."""
+        settings = GameSettings(wonq_mode=True, speed_index=0)
+        game_data = _cornered_game(settings)
+        with LookaheadBot(workers=2, budget=0.5) as bot:
+            direction = bot.choose(game_data, settings, random.Random(0))
+            self.assertGreater(bot.last_rollouts, 0)
+            # A second decision on a changed state uses the republished board
+            game_data.snake.turn(direction)
+            update_game_state(game_data, settings)
+            self.assertIn(bot.choose(game_data, settings, random.Random(1)), safe_directions(game_data, settings))
+        self.assertIn(direction, (config.UP, config.DOWN))
+
+    def test_short_budget_rolls_out_in_process(self):
+        """Test that a budget shorter than the pool's round trip, as in fast turbo mode, skips the pool."""
+        settings = GameSettings(wonq_mode=True, turbo=600)
+        game_data = _cornered_game(settings)
+        with LookaheadBot(workers=1, budget=0.5) as bot, \
+                mock.patch.object(config, "LOOKAHEAD_POOL_ROUND_TRIPS", 10 ** 6), \
+                mock.patch.object(LookaheadBot, "_evaluate_in_pool", side_effect=AssertionError("the pool was used")):
+            self.assertIn(bot.choose(game_data, settings, random.Random(0)), (config.UP, config.DOWN))
+            self.assertGreater(bot.last_rollouts, 0)
+
+    def test_board_size_change_restarts_the_pool(self):
+        """Test that the pool keeps deciding after a config profile shrinks the board."""
+        settings = GameSettings(wonq_mode=True, speed_index=0)
+        with LookaheadBot(workers=1, budget=0.5) as bot:
+            bot.choose(_cornered_game(settings), settings, random.Random(0))
+            with mock.patch.object(game_logic, "GRID_WIDTH", 12), mock.patch.object(game_logic, "GRID_HEIGHT", 9):
+                game_data = _cornered_game(settings)
+                direction = bot.choose(game_data, settings, random.Random(1))
+                self.assertGreater(bot.last_rollouts, 0)
+        self.assertIn(direction, (config.UP, config.DOWN))
+
+    def test_single_option_needs_no_rollouts(self):
+        """Test that a forced move is returned without rolling out."""
+        settings = GameSettings()
+        game_data = reset_game_state(settings, random.Random(0))
+        snake = game_data.snake
+        snake.positions = [(0, 0), (1, 0), (1, 1)]
+        snake.length = 3
+        snake.direction = config.LEFT
+        with LookaheadBot(workers=0) as bot:
+            self.assertEqual(bot.choose(game_data, settings), config.DOWN)
+            self.assertEqual(bot.last_rollouts, 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,104 @@
+import csv
+import os
+import random
+import tempfile
+import unittest
+import numpy as np
+from src import config
+from src.env import SnekByteEnv, ACTIONS, FEATURE_SIZE
+from src.game_logic import reset_game_state
+from src.game_state import GameSettings
+from src.lookahead import CompactGame
+from src.neuroevolution import (BEST_FILE, CHECKPOINT_FILE, FITNESS_FILE, Checkpoint, NetworkPolicy,
+                                batch_actions, evaluate_genomes, fill_features, next_generation,
+                                parameter_count, train, unpack)
+
+
+class TestNetworks(unittest.TestCase):
+    """Tests for the vectorized policy networks."""
+
+    def test_batched_forward_matches_single(self):
+        """Test that one batched pass gives every network the same answer as running it alone."""
+        rng = np.random.default_rng(0)
+        genomes = rng.normal(size=(5, parameter_count(8))).astype(np.float32)
+        observations = rng.random((5, 7, FEATURE_SIZE), dtype=np.float32)
+        batched = batch_actions(unpack(genomes, 8), observations)
+        self.assertEqual(batched.shape, (5, 7))
+        for g in range(5):
+            alone = batch_actions(unpack(genomes[g:g + 1], 8), observations[g:g + 1])
+            np.testing.assert_array_equal(alone[0], batched[g])
+
+    def test_features_match_env(self):
+        """Test that training sees the same features as SnekByteEnv's feature observations."""
+        env = SnekByteEnv(observation_mode="features", wonq_mode=True)
+        obs, _ = env.reset(seed=4)
+        out = np.zeros(FEATURE_SIZE, dtype=np.float32)
+        rng = random.Random(0)
+        for _ in range(100):
+            fill_features(CompactGame.from_game_data(env.game_data, env.settings), out)
+            np.testing.assert_allclose(out, obs)
+            obs, _, terminated, _, _ = env.step(rng.randrange(len(ACTIONS)))
+            if terminated:
+                break
+
+    def test_network_policy(self):
+        """Test that a loaded genome steers like a bot policy."""
+        settings = GameSettings()
+        game_data = reset_game_state(settings, random.Random(0))
+        policy = NetworkPolicy(np.zeros(parameter_count(4), dtype=np.float32), 4)
+        self.assertIn(policy(game_data, settings), ACTIONS)
+
+
+class TestEvolution(unittest.TestCase):
+    """Tests for evaluation, breeding and training runs."""
+
+    def test_evaluation_is_deterministic(self):
+        """Test that a genome's fitness depends only on the genome and the seeds."""
+        genomes = np.random.default_rng(1).normal(size=(6, parameter_count(8))).astype(np.float32)
+        fitness = evaluate_genomes(genomes, [1, 2, 3], 8, wonq_mode=True, max_ticks=200)
+        np.testing.assert_array_equal(fitness, evaluate_genomes(genomes, [1, 2, 3], 8, True, max_ticks=200))
+        # Evaluating a genome alone must not change its result
+        self.assertEqual(evaluate_genomes(genomes[2:3], [1, 2, 3], 8, True, max_ticks=200)[0], fitness[2])
+
+    def test_next_generation_keeps_the_elite(self):
+        """Test that the best genome survives unchanged and the population size is kept."""
+        rng = np.random.default_rng(2)
+        population = rng.normal(size=(20, 10)).astype(np.float32)
+        fitness = np.arange(20, dtype=float)
+        children = next_generation(population, fitness, rng, elite=0.05)
+        self.assertEqual(children.shape, population.shape)
+        np.testing.assert_array_equal(children[0], population[19])
+
+    def test_train_and_resume(self):
+        """Test that training writes its outputs every generation and resumes where it stopped."""
+        with tempfile.TemporaryDirectory() as directory:
+            curve = train(directory, generations=2, population_size=12, seeds=2, hidden=4,
+                          workers=1, max_ticks=100)
+            self.assertEqual(len(curve), 2)
+            for name in (CHECKPOINT_FILE, BEST_FILE, FITNESS_FILE):
+                self.assertTrue(os.path.exists(os.path.join(directory, name)))
+            self.assertEqual(Checkpoint.load(directory).generation, 2)
+
+            with self.assertLogs(level="WARNING") as logs:
+                resumed = train(directory, generations=3, hidden=8, wonq_mode=True, workers=1, max_ticks=100)
+            self.assertEqual(len(resumed), 1)
+            self.assertEqual(len(logs.records), 3)
+            self.assertIn("hidden=4 instead of hidden=8", logs.output[1])
+            self.assertIs(Checkpoint.load(directory).wonq_mode, config.DEFAULT_WONQ_MODE)
+            with open(os.path.join(directory, FITNESS_FILE)) as f:
+                rows = list(csv.DictReader(f))
+            self.assertEqual([row["generation"] for row in rows], ["0", "1", "2"])
+            self.assertEqual(Checkpoint.load(directory).population.shape, (12, parameter_count(4)))
+            NetworkPolicy.load(os.path.join(directory, BEST_FILE))
+
+    def test_resumed_run_matches_uninterrupted_run(self):
+        """Test that stopping and resuming gives the same population as one long run."""
+        with tempfile.TemporaryDirectory() as first, tempfile.TemporaryDirectory() as second:
+            train(first, generations=3, population_size=8, seeds=2, hidden=4, workers=1, max_ticks=50)
+            train(second, generations=1, population_size=8, seeds=2, hidden=4, workers=1, max_ticks=50)
+            train(second, generations=3, seeds=2, workers=1, max_ticks=50)
+            np.testing.assert_array_equal(Checkpoint.load(first).population, Checkpoint.load(second).population)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,158 @@
+import json
+import os
+import tempfile
+import unittest
+import pygame
+from src import config, game_logic, sprites, ui
+from src.cli import build_parser, resolve_settings
+from src.game_state import GameSettings
+from src.profiles import ConfigWatcher, ProfileError, apply_profile, load_profile, validate_profile
+
+
+class ProfileTestCase(unittest.TestCase):
+    """Restores the built-in config after every test."""
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, "profiles.json")
+
+    def tearDown(self):
+        apply_profile(validate_profile({}))
+        self.directory.cleanup()
+
+    def write_profiles(self, profiles, mtime=None):
+        with open(self.path, "w") as f:
+            json.dump(profiles, f)
+        if mtime is not None:
+            os.utime(self.path, (mtime, mtime))
+
+
+class TestValidation(ProfileTestCase):
+    """Tests for loading and validating profiles."""
+
+    def test_valid_profile(self):
+        """Test that a profile overrides only what it names and derives the board size."""
+        values = validate_profile({"GRID_SIZE": 40, "UI_BG_COLOR": [1, 2, 3]})
+        self.assertEqual(values["GRID_WIDTH"], config.SCREEN_WIDTH // 40)
+        self.assertEqual(values["UI_BG_COLOR"], (1, 2, 3))
+        self.assertEqual(values["SPEED_LEVELS"], config.SPEED_LEVELS)
+
+    def test_every_problem_is_reported(self):
+        """Test that all invalid settings are listed in one error."""
+        with self.assertRaises(ProfileError) as caught:
+            validate_profile({"GRID_SIZE": "big", "RED": [300, 0, 0], "NOT_A_SETTING": 1})
+        message = str(caught.exception)
+        for name in ("GRID_SIZE", "RED", "NOT_A_SETTING"):
+            self.assertIn(name, message)
+
+    def test_cross_field_checks(self):
+        """Test that settings are checked against each other."""
+        with self.assertRaises(ProfileError):
+            validate_profile({"GRID_SIZE": 33})
+        with self.assertRaises(ProfileError):
+            validate_profile({"SPEED_LEVELS": [5, 10], "DEFAULT_SPEED_INDEX": 2})
+        with self.assertRaises(ProfileError):
+            validate_profile({"DEFAULT_THEME": "missing"})
+
+    def test_themes(self):
+        """Test that themes can be partly overridden and new themes must be complete."""
+        values = validate_profile({"THEMES": {"classic": {"food": [0, 0, 255]}}})
+        self.assertEqual(values["THEMES"]["classic"]["food"], (0, 0, 255))
+        self.assertEqual(values["THEMES"]["classic"]["snake"], config.THEMES["classic"]["snake"])
+        with self.assertRaises(ProfileError):
+            validate_profile({"THEMES": {"new": {"food": [0, 0, 255]}}})
+
+    def test_load_profile(self):
+        """Test that profiles are picked by name from the file."""
+        self.write_profiles({"cabinet": {"SPEED_LEVELS": [6, 10], "DEFAULT_SPEED_INDEX": 1}})
+        self.assertEqual(load_profile(self.path, "cabinet")["SPEED_LEVELS"], [6, 10])
+        with self.assertRaises(ProfileError):
+            load_profile(self.path, "missing")
+        with self.assertRaises(ProfileError):
+            load_profile(os.path.join(self.directory.name, "missing.json"), "cabinet")
+
+
+class TestApplying(ProfileTestCase):
+    """Tests for applying profiles to the running game."""
+
+    def test_apply_reaches_copied_names(self):
+        """Test that settings imported by name elsewhere follow the profile."""
+        changed = apply_profile(validate_profile({"GRID_SIZE": 40, "WONQ_MODE_POOP_THRESHOLD": 2,
+                                                  "SPEED_LEVELS": [3, 4], "DEFAULT_SPEED_INDEX": 1}))
+        self.assertIn("GRID_WIDTH", changed)
+        self.assertEqual(game_logic.GRID_WIDTH, config.SCREEN_WIDTH // 40)
+        self.assertEqual(game_logic.WONQ_MODE_POOP_THRESHOLD, 2)
+        settings = GameSettings()
+        self.assertEqual(settings.get_speed(), 4)
+
+    def test_only_affected_caches_are_dropped(self):
+        """Test that a color change keeps the sprite atlases and a cell size change drops them."""
+        pygame.font.init()
+        sprites.get_atlas()
+        ui._get_font(config.UI_FONT_SIZE)
+
+        apply_profile(validate_profile({"UI_BG_COLOR": [1, 2, 3]}))
+        self.assertTrue(sprites._atlases)
+        self.assertTrue(ui._fonts)
+
+        apply_profile(validate_profile({"GRID_SIZE": 40}))
+        self.assertFalse(sprites._atlases)
+        self.assertTrue(ui._fonts)
+
+        apply_profile(validate_profile({"GRID_SIZE": 40, "UI_FONT_SIZE": 20}))
+        self.assertFalse(ui._fonts)
+
+    def test_unchanged_profile_changes_nothing(self):
+        """Test that applying the current settings again reports no changes."""
+        values = validate_profile({"GRID_SIZE": 40})
+        apply_profile(values)
+        self.assertEqual(apply_profile(values), set())
+
+    def test_cli_applies_profile(self):
+        """Test that --config and --profile are applied before settings are resolved."""
+        self.write_profiles({"slow": {"SPEED_LEVELS": [2, 3], "DEFAULT_SPEED_INDEX": 0}})
+        settings = resolve_settings(build_parser().parse_args(["simulate", "--config", self.path,
+                                                                "--profile", "slow"]))
+        self.assertEqual(settings.get_speed(), 2)
+        with self.assertRaises(SystemExit):
+            resolve_settings(build_parser().parse_args(["simulate", "--config", self.path, "--profile", "x"]))
+
+
+class TestConfigWatcher(ProfileTestCase):
+    """Tests for watching a profiles file."""
+
+    def test_reload_on_change(self):
+        """Test that a changed file is picked up by poll and applied on demand."""
+        self.write_profiles({"default": {"WONQ_MODE_POOP_THRESHOLD": 3}}, mtime=1000)
+        watcher = ConfigWatcher(self.path, "default", interval=0)
+        self.assertEqual(watcher.load(), {"WONQ_MODE_POOP_THRESHOLD"})
+        self.assertFalse(watcher.poll())
+
+        self.write_profiles({"default": {"WONQ_MODE_POOP_THRESHOLD": 7}}, mtime=2000)
+        self.assertTrue(watcher.poll())
+        # Nothing changes until the game applies it
+        self.assertEqual(config.WONQ_MODE_POOP_THRESHOLD, 3)
+        self.assertEqual(watcher.apply_pending(), {"WONQ_MODE_POOP_THRESHOLD"})
+        self.assertEqual(config.WONQ_MODE_POOP_THRESHOLD, 7)
+        self.assertFalse(watcher.poll())
+
+    def test_invalid_change_is_ignored(self):
+        """Test that a broken file keeps the current settings."""
+        self.write_profiles({"default": {}}, mtime=1000)
+        watcher = ConfigWatcher(self.path, "default", interval=0)
+        self.write_profiles({"default": {"GRID_SIZE": -1}}, mtime=2000)
+        with self.assertLogs(level="ERROR"):
+            self.assertFalse(watcher.poll())
+        self.assertEqual(watcher.apply_pending(), set())
+
+    def test_polling_interval(self):
+        """Test that the file is not checked again within the interval."""
+        self.write_profiles({"default": {}}, mtime=1000)
+        watcher = ConfigWatcher(self.path, "default", interval=3600)
+        self.assertFalse(watcher.poll())
+        self.write_profiles({"default": {"GRID_SIZE": 40}}, mtime=2000)
+        self.assertFalse(watcher.poll())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,99 @@
+import random
+import unittest
+import numpy as np
+from src import config
+from src.bots import greedy_policy, random_policy
+from src.env import ACTIONS, SnekByteEnv
+from src.game_logic import reset_game_state, update_game_state
+from src.game_state import GameSettings
+from src.rays import (FOOD_FEATURES, OBSTACLE_FEATURES, RAY_FEATURE_SIZE, LineIndex, RayEncoder, ray_features,
+                      ray_tables)
+from tests.test_levels import LevelTestCase, BOARD_TEXT
+
+
+def play_and_compare(test, settings, seeds):
+    """Plays mostly greedy games and checks the encoder against the reference after every tick."""
+    for seed in seeds:
+        rng = random.Random(seed)
+        game_data = reset_game_state(settings, rng)
+        encoder = RayEncoder(game_data)
+        np.testing.assert_array_equal(encoder.encode(), ray_features(game_data))
+        while True:
+            policy = greedy_policy if rng.random() < 0.8 else random_policy
+            game_data.snake.turn(policy(game_data, settings, rng))
+            update_game_state(game_data, settings)
+            if game_data.game_over:
+                break
+            np.testing.assert_array_equal(encoder.encode(), ray_features(game_data))
+        encoder.close()
+        test.assertFalse(game_data.listeners)
+
+
+class TestLineIndex(unittest.TestCase):
+    """Tests for finding the nearest occupied cell along a ray."""
+
+    def test_distance(self):
+        """Test the eight directions from a cell, with cells added and removed."""
+        tables = ray_tables(10, 8)
+        index = LineIndex(tables)
+        center = 4 * 10 + 5
+        for x, y in ((5, 1), (7, 6), (0, 4), (8, 4), (2, 1)):
+            index.add(y * 10 + x)
+        # Up, right, down-right, left and up-left are blocked
+        self.assertEqual([index.distance(center, ray) for ray in range(8)], [3, 0, 3, 2, 0, 0, 5, 3])
+        index.remove(4 * 10 + 8)
+        self.assertEqual(index.distance(center, 2), 0)
+        self.assertEqual(tables.edges[8 * center + 2], 5)
+
+
+class TestRayEncoder(unittest.TestCase):
+    """Tests for the incrementally updated ray features."""
+
+    def test_matches_walking_the_rays(self):
+        """Test that the encoder equals the reference on every tick, with poops and the clean power-up."""
+        play_and_compare(self, GameSettings(), range(5))
+        play_and_compare(self, GameSettings(wonq_mode=True), range(10))
+        play_and_compare(self, GameSettings(wonq_mode=True, food_count=20, power_ups=True), range(5))
+
+    def test_features_are_egocentric(self):
+        """Test that the rays start straight ahead and the food shows up on the ray it lies on."""
+        game_data = reset_game_state(GameSettings(), random.Random(0))
+        head_x, head_y = game_data.snake.positions[0]
+        game_data.snake.direction = config.LEFT
+        game_data.food.position = (head_x, head_y - 4)
+        features = RayEncoder(game_data).encode()
+        self.assertEqual(features.shape, (RAY_FEATURE_SIZE,))
+        self.assertEqual(features.dtype, np.float32)
+        # Straight ahead is the left edge of the board, and the food is up, to the right of the heading
+        self.assertAlmostEqual(features[OBSTACLE_FEATURES], 1 / (head_x + 1))
+        self.assertAlmostEqual(features[FOOD_FEATURES + 2], 1 / 4)
+        self.assertEqual(np.count_nonzero(features[FOOD_FEATURES:FOOD_FEATURES + 8]), 1)
+
+    def test_env_observation(self):
+        """Test the env's ray observation mode."""
+        env = SnekByteEnv(observation_mode="rays", wonq_mode=True)
+        obs, _ = env.reset(seed=2)
+        self.assertEqual(obs.shape, env.observation_shape)
+        self.assertFalse(obs.flags.writeable)
+        for _ in range(50):
+            obs, _, terminated, _, _ = env.step(ACTIONS.index(greedy_policy(env.game_data, env.settings)))
+            if terminated:
+                break
+            np.testing.assert_array_equal(obs, ray_features(env.game_data))
+
+
+class TestRayEncoderOnLevels(LevelTestCase):
+    """Tests for rays ending at the walls of a level."""
+
+    def test_walls_end_rays(self):
+        """Test that the encoder sees the level's walls."""
+        settings = GameSettings(level=self.write("corridor.txt", BOARD_TEXT))
+        game_data = reset_game_state(settings, random.Random(1))
+        game_data.snake.direction = config.DOWN
+        # The wall is four rows below the spawn cell
+        self.assertEqual(RayEncoder(game_data).encode()[OBSTACLE_FEATURES], 1 / 4)
+        play_and_compare(self, settings, range(5))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,134 @@
+import gc
+import random
+import unittest
+import weakref
+from collections import deque
+from src.bots import cautious_policy, free_regions, random_policy
+from src.game_logic import reset_game_state, update_game_state
+from src.game_state import GameSettings
+from src.levels import WALL
+from src.reachability import FreeRegions
+from src.simulation import simulate_game
+from tests.test_levels import LevelTestCase, BOARD_TEXT
+
+
+def flood_fill_sizes(game_data):
+    """Returns the size of the free region of every free cell, found with one flood fill per region."""
+    width, height = game_data.poops.width, game_data.poops.height
+    blocked = set(game_data.snake.positions) | {(i % width, i // width) for i in game_data.poops.indices}
+    portals = {}
+    if game_data.level is not None:
+        blocked |= {(i % width, i // width) for i, cell in enumerate(game_data.level.cells) if cell == WALL}
+        portals = game_data.level.portals
+    sizes = {}
+    for start in ((x, y) for y in range(height) for x in range(width)):
+        if start in blocked or start in sizes:
+            continue
+        region, queue = {start}, deque([start])
+        while queue:
+            x, y = queue.popleft()
+            links = [(x + 1, y), (x - 1, y), (x, y + 1), (x, y - 1)]
+            if y * width + x in portals:
+                pair = portals[y * width + x]
+                links.append((pair % width, pair // width))
+            for cell in links:
+                if 0 <= cell[0] < width and 0 <= cell[1] < height and cell not in blocked and cell not in region:
+                    region.add(cell)
+                    queue.append(cell)
+        sizes.update(dict.fromkeys(region, len(region)))
+    return sizes
+
+
+def play_and_compare(test, settings, seeds, every=5, max_ticks=3000):
+    """Plays cautious games with random moves mixed in and checks every cell's region against a flood fill."""
+    for seed in seeds:
+        rng = random.Random(seed)
+        game_data = reset_game_state(settings, rng)
+        regions = FreeRegions(game_data)
+        while not game_data.game_over and game_data.ticks < max_ticks:
+            policy = cautious_policy if rng.random() < 0.8 else random_policy
+            game_data.snake.turn(policy(game_data, settings, rng))
+            update_game_state(game_data, settings)
+            if game_data.game_over or game_data.ticks % every:
+                continue
+            expected = flood_fill_sizes(game_data)
+            width, height = game_data.poops.width, game_data.poops.height
+            actual = {(x, y): regions.region_size((x, y)) for y in range(height) for x in range(width)
+                      if regions.is_free((x, y))}
+            test.assertEqual(actual, expected)
+        regions.close()
+
+
+class TestFreeRegions(unittest.TestCase):
+    """Tests for the incrementally tracked regions of free cells."""
+
+    def test_matches_flood_fill(self):
+        """Test that the regions equal a flood fill while the snake cuts and frees pockets."""
+        play_and_compare(self, GameSettings(), range(1), every=25)
+        play_and_compare(self, GameSettings(wonq_mode=True), range(1), every=25)
+        play_and_compare(self, GameSettings(wonq_mode=True, food_count=20, power_ups=True), range(1), every=25)
+
+    def test_pocket_queries(self):
+        """Test the size of a pocket walled off by the body, and when the tail opens it."""
+        game_data = reset_game_state(GameSettings(), random.Random(0))
+        snake = game_data.snake
+        # The body walls off the 3x3 corner; the tail is the bottom left end of the wall
+        snake.positions = [(3, 0), (3, 1), (3, 2), (3, 3), (2, 3), (1, 3), (0, 3)]
+        snake.length = len(snake.positions)
+        regions = FreeRegions(game_data)
+        self.assertEqual(regions.region_size((1, 1)), 9)
+        self.assertEqual(regions.region_size((3, 1)), 0)
+        self.assertTrue(regions.same_region((0, 0), (2, 2)))
+        self.assertFalse(regions.same_region((0, 0), (5, 5)))
+        self.assertEqual(regions.opens_within((0, 0), 10), 1)
+        snake.length += 2
+        self.assertEqual(regions.opens_within((0, 0), 10), 3)
+        self.assertIsNone(regions.opens_within((0, 0), 2))
+
+        snake.direction = (1, 0)
+        update_game_state(game_data, GameSettings())
+        self.assertEqual(regions.region_size((1, 1)), 9)
+        self.assertEqual(regions.region_size((5, 5)), game_data.poops.width * game_data.poops.height - 8 - 9)
+        regions.close()
+        self.assertFalse(game_data.listeners)
+
+    def test_cautious_policy_outlives_greedy(self):
+        """Test that staying out of small pockets scores more than heading straight for the food."""
+        settings = GameSettings(wonq_mode=True)
+        greedy = sum(simulate_game(settings, seed, policy="greedy").score for seed in range(5))
+        cautious = sum(simulate_game(settings, seed, policy="cautious").score for seed in range(5))
+        self.assertGreater(cautious, greedy)
+
+    def test_policy_tracker_lives_with_its_game(self):
+        """Test that the cautious policy keeps one tracker per game, which goes away with the game."""
+        settings = GameSettings()
+        first = reset_game_state(settings, random.Random(0))
+        second = reset_game_state(settings, random.Random(1))
+        cautious_policy(first, settings, random.Random(0))
+        regions = free_regions(first)
+        self.assertIs(free_regions(first), regions)
+        self.assertIsNot(free_regions(second), regions)
+        self.assertIs(free_regions(first), regions)
+
+        tracker = weakref.ref(regions)
+        del first, regions
+        gc.collect()
+        self.assertIsNone(tracker())
+
+
+class TestFreeRegionsOnLevels(LevelTestCase):
+    """Tests for regions bounded by walls and joined by portals."""
+
+    def test_portals_join_regions(self):
+        """Test that the halves of the corridor level are one region through their portals."""
+        settings = GameSettings(level=self.write("corridor.txt", BOARD_TEXT))
+        game_data = reset_game_state(settings, random.Random(1))
+        regions = FreeRegions(game_data)
+        self.assertTrue(regions.same_region((0, 0), (0, 14)))
+        self.assertEqual(regions.region_size((0, 0)), 20 * 14 - 1)
+        regions.close()
+        play_and_compare(self, settings, range(3), every=3, max_ticks=1000)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,24 @@
+import os
+import tempfile
+import unittest
+from src.recorder import render_replay, ENCODER_PNG
+from src.replay import Replay
+from src.game_state import GameSettings
+
+
+class TestRecorder(unittest.TestCase):
+    """Tests for rendering replays to frames."""
+
+    def test_render_png_sequence(self):
+        """Test that every tick of a replay is written as a PNG frame."""
+        replay = Replay.new(GameSettings(), seed=3)
+        with tempfile.TemporaryDirectory() as tmpdir:
+            output = os.path.join(tmpdir, "frames")
+            frames = render_replay(replay, output, encoder=ENCODER_PNG, workers=2, max_ticks=5)
+            self.assertEqual(frames, 6)  # The initial state plus five ticks
+            self.assertEqual(sorted(os.listdir(output)),
+                             [f"frame_{i:06d}.png" for i in range(6)])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,11 +0,0 @@
-import pytest
-import pygame
-# from snake_game.rendering import draw_game, draw_snake, draw_food, draw_score
-
-# This file is for testing the rendering logic in rendering.py.
-
-def test_placeholder_rendering():
-    """
-    A placeholder test to ensure the test setup is working for rendering.
-    """
-    assert True
\ No newline at end of file
@@ -0,0 +1,61 @@
+import os
+import random
+import tempfile
+import unittest
+from src.replay import Replay, play_replay
+from src.game_logic import update_game_state
+from src.game_state import GameSettings
+from src import config
+
+
+def play_random_game(settings, seed, turn_seed, max_ticks=300):
+    """Plays a game with random turns, recording it. Returns (replay, final_score, ticks)."""
+    replay = Replay.new(settings, seed=seed)
+    game_data = replay.start_game()
+    turn_rng = random.Random(turn_seed)
+    directions = [config.UP, config.DOWN, config.LEFT, config.RIGHT]
+    while not game_data["game_over"] and game_data["ticks"] < max_ticks:
+        if turn_rng.random() < 0.3:
+            direction = turn_rng.choice(directions)
+            replay.record_turn(game_data["ticks"], direction)
+            game_data["snake"].turn(direction)
+        update_game_state(game_data, settings)
+    return replay, game_data
+
+
+class TestReplay(unittest.TestCase):
+    """Tests for recording and playing back replays."""
+
+    def test_playback_matches_original_game(self):
+        """Test that playing a replay reproduces the recorded game."""
+        settings = GameSettings(wonq_mode=True)
+        for seed in range(5):
+            replay, original = play_random_game(settings, seed, seed + 100)
+            final = None
+            for final in play_replay(replay, max_ticks=original["ticks"]):
+                pass
+            self.assertEqual(final["ticks"], original["ticks"])
+            self.assertEqual(final["score"], original["score"])
+            self.assertEqual(final["snake"].positions, original["snake"].positions)
+            self.assertEqual(final["food"].position, original["food"].position)
+            self.assertEqual(final["game_over"], original["game_over"])
+
+    def test_save_and_load(self):
+        """Test that a replay survives a round trip through a file."""
+        replay, _ = play_random_game(GameSettings(), 7, 8)
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, "game.json")
+            replay.save(path)
+            loaded = Replay.load(path)
+        self.assertEqual(loaded, replay)
+
+    def test_rejects_unknown_version(self):
+        """Test that replays from an unknown format version are refused."""
+        data = Replay.new(GameSettings(), seed=1).to_dict()
+        data["version"] = 999
+        with self.assertRaises(ValueError):
+            Replay.from_dict(data)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,110 @@
+import asyncio
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+from src import config
+from src.service import ResultCache, ServiceClient, SimulationJob, SimulationService
+from src.simulation import simulate_game
+
+
+class TestResultCache(unittest.TestCase):
+    """Tests for the LRU result cache and its spill file."""
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, "cache.db")
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_least_recently_used_results_are_evicted(self):
+        """Test that a full cache without a spill file forgets the least recently used result."""
+        cache = ResultCache(size=2, path=None)
+        cache.put("a", {"score": 1})
+        cache.put("b", {"score": 2})
+        self.assertEqual(cache.get("a"), {"score": 1})
+        cache.put("c", {"score": 3})
+        self.assertIsNone(cache.get("b"))
+        self.assertEqual(cache.get("a"), {"score": 1})
+        self.assertEqual(cache.stats(), {"entries": 2, "hits": 2, "disk_hits": 0, "misses": 1})
+
+    def test_evicted_results_spill_to_disk(self):
+        """Test that evicted results come back from the spill file, also after a restart."""
+        cache = ResultCache(size=2, path=self.path, spill_batch=2)
+        for i in range(6):
+            cache.put(str(i), {"score": i})
+        self.assertEqual(cache.get("0"), {"score": 0})
+        self.assertEqual(cache.get("5"), {"score": 5})
+        self.assertEqual(cache.disk_hits, 1)
+        cache.close()
+
+        reopened = ResultCache(size=10, path=self.path)
+        self.assertEqual([reopened.get(str(i)) for i in range(6)], [{"score": i} for i in range(6)])
+        self.assertEqual(reopened.disk_hits, 6)
+        reopened.close()
+
+
+class TestSimulationJob(unittest.TestCase):
+    """Tests for reading jobs and keying their results."""
+
+    def test_from_dict(self):
+        """Test that jobs are validated and defaults filled in."""
+        job = SimulationJob.from_dict({"seed": 3, "wonq_mode": True})
+        self.assertEqual(job, SimulationJob(3, "greedy", True))
+        self.assertTrue(job.settings().wonq_mode)
+        for bad in ({}, {"seed": "3"}, {"seed": 3, "policy": "psychic"}, {"seed": 3, "speed": 2},
+                    {"seed": 3, "food_count": 0}):
+            with self.assertRaises(ValueError):
+                SimulationJob.from_dict(bad)
+
+    def test_cache_key(self):
+        """Test that the key tells apart jobs, and the board sizes the engine plays them on."""
+        key = SimulationJob(3).cache_key()
+        self.assertEqual(key, SimulationJob(3).cache_key())
+        self.assertNotEqual(key, SimulationJob(4).cache_key())
+        self.assertNotEqual(key, SimulationJob(3, policy="random").cache_key())
+        with patch.object(config, "GRID_WIDTH", config.GRID_WIDTH + 1):
+            self.assertNotEqual(key, SimulationJob(3).cache_key())
+
+
+class TestSimulationService(unittest.TestCase):
+    """Tests for answering simulation jobs over a socket."""
+
+    def test_service(self):
+        """Test batches, cache hits, duplicate jobs, statistics and errors, through the blocking client."""
+        jobs = [{"seed": seed, "wonq_mode": True, "max_ticks": 300} for seed in (1, 2, 1)]
+        expected = [simulate_game(SimulationJob.from_dict(job).settings(), job["seed"], max_ticks=300).to_dict()
+                    for job in jobs]
+
+        def use_client(address):
+            with ServiceClient(*address, timeout=30) as client:
+                first = client.request({"jobs": jobs})
+                second = client.request({"jobs": jobs})
+                stats = client.stats()
+                with self.assertRaises(ValueError):
+                    client.simulate([{"seed": 1, "policy": "psychic"}])
+                with self.assertRaises(ValueError):
+                    client.request({"jobs": "all of them"})
+            return first, second, stats
+
+        async def main():
+            service = SimulationService(workers=2, cache=ResultCache(path=None))
+            address = await service.start("127.0.0.1", 0)
+            server = asyncio.ensure_future(service.serve_forever())
+            try:
+                return await asyncio.get_running_loop().run_in_executor(None, use_client, address)
+            finally:
+                server.cancel()
+                await service.close()
+
+        first, second, stats = asyncio.run(main())
+        self.assertEqual(first["results"], expected)
+        self.assertEqual(first["cached"], 0)
+        self.assertEqual(second, {"results": expected, "cached": 3})
+        self.assertEqual(stats["cache"]["entries"], 2)
+        self.assertEqual(stats["workers"], 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -66,6 +66,19 @@ class TestSnake(unittest.TestCase):
         self.assertEqual(len(self.snake.positions), 3)
         self.assertEqual(self.snake.positions, [(12, 10), (11, 10), (10, 10)])
 
+    def test_occupancy(self):
+        """Test that membership and self collision follow moves and replaced positions."""
+        self.snake.positions = [(5, 5), (5, 6), (6, 6), (6, 5)]
+        self.snake.length = 5
+        self.assertIn((6, 6), self.snake)
+        self.assertNotIn((7, 7), self.snake)
+        self.snake.direction = config.RIGHT
+        self.snake.move()
+        self.assertTrue(self.snake.collides_with_self())
+        self.snake.positions = [(5, 5), (4, 5)]
+        self.assertFalse(self.snake.collides_with_self())
+        self.assertNotIn((6, 6), self.snake)
+
     def test_reset(self):
         """Test resetting the snake to its initial state."""
         self.snake.length = 5
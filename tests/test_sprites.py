@@ -0,0 +1,94 @@
+import unittest
+import pygame
+from src.sprites import (SpriteAtlas, draw_entities, connection_bit, KIND_HEAD, KIND_BODY, KIND_TAIL,
+                         KIND_SINGLE, CONNECT_UP, CONNECT_DOWN, CONNECT_LEFT, CONNECT_RIGHT)
+from src.snake import Snake
+from src.food import Food
+from src.game_logic import reset_game_state
+from src.game_state import GameSettings
+from src.diagnostics import measure_allocations
+from src.ui import draw_game_screen
+from src import config
+
+
+class TestSpriteAtlas(unittest.TestCase):
+    """Tests for the sprite atlas and batched entity drawing."""
+
+    def setUp(self):
+        """Build an atlas with a known cell size."""
+        self.atlas = SpriteAtlas("classic", 20)
+
+    def test_connection_bit(self):
+        """Test the connection bit between neighbouring cells."""
+        self.assertEqual(connection_bit((5, 5), (5, 4)), CONNECT_UP)
+        self.assertEqual(connection_bit((5, 5), (6, 5)), CONNECT_RIGHT)
+        self.assertEqual(connection_bit((5, 5), (7, 5)), 0)
+
+    def test_snake_tiles(self):
+        """Test that heads, corners, straight segments and tails get the right tiles."""
+        # Head moving up, turning from a horizontal run, tail on the left
+        positions = [(5, 4), (5, 5), (4, 5), (3, 5)]
+        blits = self.atlas.snake_blits(positions)
+        self.assertEqual(len(blits), 4)
+        areas = [area for _, _, area in blits]
+        self.assertEqual(areas[0], self.atlas.area(KIND_HEAD, CONNECT_DOWN))
+        self.assertEqual(areas[1], self.atlas.area(KIND_BODY, CONNECT_UP | CONNECT_LEFT))
+        self.assertEqual(areas[2], self.atlas.area(KIND_BODY, CONNECT_LEFT | CONNECT_RIGHT))
+        self.assertEqual(areas[3], self.atlas.area(KIND_TAIL, CONNECT_RIGHT))
+        self.assertEqual(blits[0][1], (100, 80))
+
+    def test_single_segment_and_off_board_head(self):
+        """Test that a lone segment and a head with no neighbour use the single tile."""
+        single = self.atlas.area(KIND_SINGLE)
+        self.assertEqual(self.atlas.snake_blits([(1, 1)])[0][2], single)
+        self.assertEqual(self.atlas.area(KIND_HEAD, 0), single)
+
+    def test_unknown_theme(self):
+        """Test that an unknown theme is rejected."""
+        with self.assertRaises(ValueError):
+            SpriteAtlas("no-such-theme")
+
+    def test_draw_entities(self):
+        """Test that one batched draw paints the snake, food and poop cells."""
+        surface = pygame.Surface((config.SCREEN_WIDTH, config.SCREEN_HEIGHT))
+        snake = Snake()
+        snake.positions = [(3, 3), (2, 3)]
+        snake.length = 2
+        draw_entities(surface, snake, Food((8, 8)), [(10, 10)])
+        half = config.GRID_SIZE // 2
+        colors = config.THEMES[config.DEFAULT_THEME]
+        self.assertEqual(surface.get_at((2 * config.GRID_SIZE + half, 3 * config.GRID_SIZE + half))[:3],
+                         colors["snake"])
+        self.assertEqual(surface.get_at((8 * config.GRID_SIZE + half, 8 * config.GRID_SIZE + half))[:3],
+                         colors["food"])
+        self.assertEqual(surface.get_at((10 * config.GRID_SIZE + half, 10 * config.GRID_SIZE + half))[:3],
+                         colors["poop"])
+
+    def test_entity_blits_reuse_buffer(self):
+        """Test that each frame refills one list with cached blit tuples."""
+        first = self.atlas.entity_blits([(3, 3), (2, 3), (1, 3)], (8, 8), [(10, 10)])
+        cached = list(first)
+        second = self.atlas.entity_blits([(3, 3), (2, 3)], (8, 8), [])
+        self.assertIs(first, second)
+        self.assertEqual(len(second), 3)
+        self.assertIs(second[0], cached[0])
+        self.assertEqual(second[1][2], self.atlas.area(KIND_TAIL, CONNECT_RIGHT))
+
+    def test_frame_allocates_nothing_per_segment(self):
+        """Test that redrawing the game screen keeps no memory and allocates no tuple per cell."""
+        pygame.font.init()
+        settings = GameSettings(wonq_mode=True)
+        game_data = reset_game_state(settings)
+        game_data.snake.positions = [(x, 2) for x in range(16, 0, -1)]
+        game_data.snake.length = 16
+        for position in ((3, 3), (4, 4), (5, 5)):
+            game_data.poops.add(position)
+        surface = pygame.Surface((config.SCREEN_WIDTH, config.SCREEN_HEIGHT))
+        stats = measure_allocations(draw_game_screen, surface, game_data, settings, repeat=5)
+        self.assertEqual(stats.retained_bytes, 0)
+        # A few strings for the labels, far less than a tuple for each of the 20 cells
+        self.assertLess(stats.peak_bytes, 20 * 64)
+
+
+if __name__ == '__main__':
+    unittest.main()
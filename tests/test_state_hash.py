@@ -0,0 +1,116 @@
+import os
+import random
+import tempfile
+import unittest
+from unittest.mock import Mock, patch
+from src import config, game_logic
+from src.bots import greedy_policy, random_policy
+from src.game_logic import reset_game_state, update_game_state
+from src.game_state import GameSettings
+from src.items import CLEAN
+from src.levels import compile_level
+from src.replay import Replay
+from src.state_hash import (StateHasher, first_difference, full_hash, game_hashes, load_hashes,
+                            save_hashes)
+
+
+def play(settings, seed, policy, max_ticks=2000):
+    """Plays a bot game, checking the incremental hash against a full recompute after every tick."""
+    game_data = reset_game_state(settings, random.Random(seed))
+    hasher = StateHasher(game_data)
+    rng = random.Random(seed)
+    hashes = [hasher.value]
+    while not game_data.game_over and game_data.ticks < max_ticks:
+        game_data.snake.turn(policy(game_data, settings, rng))
+        update_game_state(game_data, settings)
+        hashes.append(hasher.value)
+        if hashes[-1] != full_hash(game_data):
+            raise AssertionError(f"Hash of tick {game_data.ticks} of seed {seed} is wrong")
+    return game_data, hashes
+
+
+class TestStateHasher(unittest.TestCase):
+    """Tests for the incremental Zobrist hash of the game state."""
+
+    def test_incremental_hash_matches_full_hash(self):
+        """Test that the hash kept up to date tick by tick always equals one computed from scratch."""
+        for settings in (GameSettings(), GameSettings(wonq_mode=True),
+                         GameSettings(wonq_mode=True, food_count=5)):
+            for seed in range(6):
+                play(settings, seed, greedy_policy if seed % 2 else random_policy)
+
+    def test_clean_power_up(self):
+        """Test that the hash follows the clean power-up removing every poop."""
+        settings = GameSettings(wonq_mode=True, food_count=3)
+        game_data = reset_game_state(settings, random.Random(1))
+        for position in ((0, 0), (5, 0), (9, 9)):
+            game_data.poops.add(position)
+            game_data.items.occupy(game_data.items.index_of(position))
+        x, y = game_data.snake.get_head_position()
+        dx, dy = game_data.snake.direction
+        ahead = game_data.items.index_of((x + dx, y + dy))
+        # Spawn the power-up right in front of the snake
+        slot = list(game_data.items.free.indices).index(ahead)
+        game_data.items.spawn(CLEAN, Mock(randrange=Mock(return_value=slot)), game_data.ticks)
+        hasher = StateHasher(game_data)
+        update_game_state(game_data, settings)
+        self.assertEqual(len(game_data.poops), 0)
+        self.assertEqual(hasher.value, full_hash(game_data))
+
+    def test_hash_tells_states_apart(self):
+        """Test that equal games hash equally and a different score or food does not."""
+        settings = GameSettings(wonq_mode=True)
+        first = reset_game_state(settings, random.Random(3))
+        second = reset_game_state(settings, random.Random(3))
+        self.assertEqual(full_hash(first), full_hash(second))
+        second.score += 1
+        self.assertNotEqual(full_hash(first), full_hash(second))
+        second.score -= 1
+        second.food.position = (0, 0) if first.food.position != (0, 0) else (1, 0)
+        self.assertNotEqual(full_hash(first), full_hash(second))
+
+    def test_portals(self):
+        """Test the hash of games on a level, where the head jumps through portals."""
+        text = "\n".join(["." * 20] * 3 + ["..S" + "." * 17] + ["." * 18 + "a."] + ["#" * 20]
+                         + [".a" + "." * 18] + ["." * 20] * 8)
+        with tempfile.TemporaryDirectory() as directory, \
+                patch.object(game_logic, "GRID_WIDTH", 20), patch.object(game_logic, "GRID_HEIGHT", 15), \
+                patch.object(config, "GRID_WIDTH", 20), patch.object(config, "GRID_HEIGHT", 15):
+            path = os.path.join(directory, "portal.snkl")
+            with open(path, "wb") as f:
+                f.write(compile_level(text))
+            for seed in range(4):
+                play(GameSettings(wonq_mode=True, level=path), seed, greedy_policy)
+
+
+class TestReplayHashes(unittest.TestCase):
+    """Tests for hashing replays and finding where two runs part."""
+
+    def test_replay_hashes(self):
+        """Test that a replay hashes the same every time and that a changed turn is found at its tick."""
+        replay = Replay.new(GameSettings(wonq_mode=True), seed=5)
+        replay.record_turn(3, config.UP)
+        replay.record_turn(8, config.LEFT)
+        hashes = game_hashes(replay)
+        self.assertIsNone(first_difference(hashes, game_hashes(replay)))
+
+        changed = Replay.from_dict(replay.to_dict())
+        changed.turns[1] = (8, 1, 0)
+        self.assertEqual(first_difference(hashes, game_hashes(changed)), 9)
+        self.assertEqual(first_difference(hashes, game_hashes(replay, max_ticks=4)), 5)
+
+    def test_save_and_load(self):
+        """Test that saved hashes load unchanged and that other files are rejected."""
+        hashes = game_hashes(Replay.new(GameSettings(), seed=2), max_ticks=50)
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "hashes.bin")
+            save_hashes(path, hashes)
+            self.assertEqual(load_hashes(path), hashes)
+            with open(path, "wb") as f:
+                f.write(b"not a hash file")
+            with self.assertRaises(ValueError):
+                load_hashes(path)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,86 @@
+import os
+import tempfile
+import unittest
+from src.stats_store import StatsStore, RunRecord
+from src.game_logic import reset_game_state
+from src.game_state import GameSettings
+
+
+def make_run(score, wonq_mode=False):
+    """Creates a RunRecord with the given score."""
+    return RunRecord(score=score, ticks=score * 10, death_cause="wall", poops=0,
+                     speed_index=2, wonq_mode=wonq_mode)
+
+
+class TestStatsStore(unittest.TestCase):
+    """Tests for the StatsStore class."""
+
+    def setUp(self):
+        """Create a store backed by a temporary database."""
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmpdir.name, "stats.db")
+        self.store = StatsStore(self.path, top_n=3)
+
+    def tearDown(self):
+        """Close the store and remove the database."""
+        self.store.close()
+        self.tmpdir.cleanup()
+
+    def test_empty_leaderboard(self):
+        """Test that a fresh store reports no scores."""
+        self.store.flush()
+        board = self.store.leaderboard(False)
+        self.assertEqual(board.top_scores, ())
+        self.assertEqual(board.best, 0)
+        self.assertIsNone(board.last_percentile)
+
+    def test_top_scores_and_percentile(self):
+        """Test that recorded runs show up in the leaderboard after a flush."""
+        for score in [4, 9, 1, 7, 3]:
+            self.store.record_run(make_run(score))
+        self.store.flush()
+
+        board = self.store.leaderboard(False)
+        self.assertEqual(board.top_scores, (9, 7, 4))
+        self.assertEqual(board.total_runs, 5)
+        # The last recorded run scored 3, which beats only the run that scored 1
+        self.assertAlmostEqual(board.last_percentile, 20.0)
+
+    def test_modes_are_separate(self):
+        """Test that WoNQ mode runs have their own leaderboard."""
+        self.store.record_run(make_run(5))
+        self.store.record_run(make_run(2, wonq_mode=True))
+        self.store.flush()
+
+        self.assertEqual(self.store.leaderboard(False).top_scores, (5,))
+        self.assertEqual(self.store.leaderboard(True).top_scores, (2,))
+
+    def test_runs_persist_across_reopen(self):
+        """Test that runs are loaded again when the store is reopened."""
+        self.store.record_run(make_run(12))
+        self.store.close()
+
+        self.store = StatsStore(self.path, top_n=3)
+        self.store.flush()
+        board = self.store.leaderboard(False)
+        self.assertEqual(board.top_scores, (12,))
+        self.assertIsNone(board.last_percentile)
+
+    def test_record_from_game(self):
+        """Test building a record from finished game data."""
+        settings = GameSettings()
+        game_data = reset_game_state(settings)
+        game_data["score"] = 6
+        game_data["ticks"] = 80
+        game_data["death_cause"] = "self"
+
+        record = RunRecord.from_game(game_data, settings)
+        self.assertEqual(record.score, 6)
+        self.assertEqual(record.ticks, 80)
+        self.assertEqual(record.death_cause, "self")
+        self.assertEqual(record.poops, 0)
+        self.assertEqual(record.speed_index, settings.speed_index)
+
+
+if __name__ == '__main__':
+    unittest.main()
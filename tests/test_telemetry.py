@@ -0,0 +1,105 @@
+import json
+import os
+import random
+import tempfile
+import unittest
+from src.game_logic import reset_game_state, update_game_state
+from src.game_state import GameSettings
+from src.bots import greedy_policy
+from src.telemetry import (FOOD_EATEN, FRAME_STATS, GAME_OVER, GAME_START, TELEMETRY_FILE,
+                           FrameStats, Telemetry)
+
+
+def read_events(directory):
+    """Returns the events written to the current telemetry file."""
+    with open(os.path.join(directory, TELEMETRY_FILE)) as f:
+        return [json.loads(line) for line in f]
+
+
+class TestTelemetry(unittest.TestCase):
+    """Tests for the telemetry pipeline."""
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_events_are_written_as_json_lines(self):
+        """Test that events reach the file with their category and fields."""
+        with Telemetry(self.directory.name) as telemetry:
+            telemetry.event("custom", value=1, name="x")
+        events = read_events(self.directory.name)
+        self.assertEqual(len(events), 1)
+        self.assertEqual(events[0]["category"], "custom")
+        self.assertEqual(events[0]["value"], 1)
+        self.assertIn("ts", events[0])
+
+    def test_game_events(self):
+        """Test that a watched game records its start, meals and end."""
+        settings = GameSettings(wonq_mode=True)
+        game_data = reset_game_state(settings, random.Random(3))
+        with Telemetry(self.directory.name, rate_limits={}, default_rate=10_000) as telemetry:
+            telemetry.watch_game(game_data, settings, seed=3)
+            while not game_data.game_over:
+                game_data.snake.turn(greedy_policy(game_data, settings))
+                update_game_state(game_data, settings)
+        categories = [event["category"] for event in read_events(self.directory.name)]
+        self.assertEqual(categories[0], GAME_START)
+        self.assertEqual(categories[-1], GAME_OVER)
+        self.assertEqual(categories.count(FOOD_EATEN), game_data.score)
+        self.assertEqual(read_events(self.directory.name)[-1]["death_cause"], game_data.death_cause)
+
+    def test_rate_limit(self):
+        """Test that a category is limited and the next passing event reports what was suppressed."""
+        with Telemetry(self.directory.name, rate_limits={"spam": 5}) as telemetry:
+            for i in range(100):
+                telemetry.event("spam", i=i)
+            self.assertGreaterEqual(telemetry.rate_limiter.suppressed["spam"], 90)
+            telemetry.rate_limiter._buckets["spam"][0] = 1.0
+            telemetry.event("spam", i=100)
+            telemetry.event("other")
+        events = read_events(self.directory.name)
+        spam = [event for event in events if event["category"] == "spam"]
+        self.assertEqual(len(spam), 6)
+        self.assertEqual(spam[-1]["suppressed"], 95)
+        self.assertEqual(events[-1]["category"], "other")
+
+    def test_full_queue_drops_instead_of_blocking(self):
+        """Test that events are dropped, not waited for, when the writer falls behind."""
+        telemetry = Telemetry(self.directory.name, queue_size=1, default_rate=10_000)
+        telemetry._listener.stop()  # Nobody drains the queue now
+        for i in range(10):
+            telemetry.event("burst", i=i)
+        self.assertEqual(telemetry.dropped, 9)
+        telemetry._listener.start()
+        telemetry.close()
+        self.assertEqual(len(read_events(self.directory.name)), 1)
+
+    def test_rotation(self):
+        """Test that the file is rotated once it would grow past its size limit."""
+        with Telemetry(self.directory.name, max_bytes=2000, backups=2, batch_size=10,
+                       default_rate=10_000) as telemetry:
+            for i in range(200):
+                telemetry.event("filler", i=i, padding="x" * 20)
+        files = sorted(os.listdir(self.directory.name))
+        self.assertEqual(files, [TELEMETRY_FILE, TELEMETRY_FILE + ".1", TELEMETRY_FILE + ".2"])
+        for name in files:
+            self.assertLessEqual(os.path.getsize(os.path.join(self.directory.name, name)), 2000)
+
+    def test_frame_stats(self):
+        """Test that frame times are summarized into one event per interval."""
+        with Telemetry(self.directory.name) as telemetry:
+            stats = FrameStats(telemetry, interval=3600)
+            for ms in range(1, 101):
+                stats.add(ms / 1000)
+            stats.report()
+        event = read_events(self.directory.name)[0]
+        self.assertEqual(event["category"], FRAME_STATS)
+        self.assertEqual(event["frames"], 100)
+        self.assertEqual(event["max_ms"], 100.0)
+        self.assertAlmostEqual(event["p95_ms"], 96.0)
+
+
+if __name__ == '__main__':
+    unittest.main()
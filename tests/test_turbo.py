@@ -0,0 +1,89 @@
+import random
+import unittest
+from collections import deque
+from src import config
+from src.bots import greedy_policy
+from src.cli import build_parser
+from src.game_state import GameSettings
+from src.replay import Replay, play_replay
+from src.turbo import TickClock, play_ticks
+
+
+class TestTickClock(unittest.TestCase):
+    """Tests for turning frame times into ticks."""
+
+    def test_fractions_carry_over(self):
+        """Test that 150 ticks per second at 60 frames per second alternate between 2 and 3 ticks."""
+        clock = TickClock()
+        self.assertEqual(clock.due(150, now=0.0), 1)
+        ticks = [clock.due(150, now=frame / 60) for frame in range(1, 61)]
+        self.assertEqual(set(ticks), {2, 3})
+        self.assertEqual(sum(ticks), 150)
+
+    def test_slow_frames_are_capped(self):
+        """Test that a long pause plays at most max_per_frame ticks and does not owe the rest."""
+        clock = TickClock(max_per_frame=300)
+        clock.due(1000, now=0.0)
+        self.assertEqual(clock.due(1000, now=5.0), 300)
+        self.assertEqual(clock.due(1000, now=5.125), 125)
+        clock.reset()
+        self.assertEqual(clock.due(1000, now=9.0), 1)
+
+
+class TestTurboRate(unittest.TestCase):
+    """Tests for the turbo rate setting."""
+
+    def test_rate_must_be_positive(self):
+        """Test that turbo rates below 1 are rejected, and 0 leaves turbo mode off."""
+        self.assertEqual(GameSettings(turbo=0).tick_rate(), GameSettings().get_speed())
+        self.assertEqual(GameSettings(turbo=600).tick_rate(), 600)
+        with self.assertRaises(ValueError):
+            GameSettings(turbo=-5)
+        settings = GameSettings()
+        with self.assertRaises(ValueError):
+            settings.turbo = -5
+        self.assertEqual(settings.tick_rate(), settings.get_speed())
+        self.assertEqual(build_parser().parse_args(["play", "--turbo", "600"]).turbo, 600)
+        for text in ("0", "-5", "fast"):
+            with self.assertRaises(SystemExit):
+                build_parser().parse_args(["play", "--turbo", text])
+
+
+class TestPlayTicks(unittest.TestCase):
+    """Tests for playing several ticks per frame."""
+
+    def test_quick_turns_are_played_one_per_tick(self):
+        """Test that two turns pressed within one frame both take effect, and the replay reproduces the game."""
+        settings = GameSettings()
+        replay = Replay.new(settings, seed=5)
+        game_data = replay.start_game()
+        game_data.snake.direction = config.RIGHT
+        head_x, head_y = game_data.snake.positions[0]
+        trail = []
+        played = play_ticks(game_data, settings, 3, deque([config.UP, config.LEFT]), replay, trail=trail)
+        self.assertEqual(played, 3)
+        self.assertEqual(trail, [(head_x, head_y - 1), (head_x - 1, head_y - 1), (head_x - 2, head_y - 1)])
+        self.assertEqual(replay.turns, [(0, *config.UP), (1, *config.LEFT)])
+
+        for replayed in play_replay(replay, max_ticks=3):
+            pass
+        self.assertEqual(list(replayed.snake.positions), list(game_data.snake.positions))
+
+    def test_bot_plays_until_the_game_ends(self):
+        """Test that a policy steers between queued turns and no ticks are played after the game is over."""
+        settings = GameSettings()
+        replay = Replay.new(settings, seed=2)
+        game_data = replay.start_game()
+        played = play_ticks(game_data, settings, 100_000, deque(), replay, greedy_policy, random.Random(0))
+        self.assertTrue(game_data.game_over)
+        self.assertEqual(played, game_data.ticks)
+        self.assertEqual(play_ticks(game_data, settings, 10, deque()), 0)
+
+        for replayed in play_replay(replay):
+            pass
+        self.assertEqual(replayed.score, game_data.score)
+        self.assertEqual(replayed.ticks, game_data.ticks)
+
+
+if __name__ == '__main__':
+    unittest.main()
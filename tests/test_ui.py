@@ -0,0 +1,67 @@
+import unittest
+import pygame
+from src import config, ui
+from src.game_state import GameSettings
+from src.stats_store import Leaderboard
+from src.ui import draw_game_over_menu, draw_main_menu, draw_settings_menu, draw_text
+
+
+def frame(draw, *args):
+    """Draws a screen onto a fresh surface and returns its pixels."""
+    screen = pygame.Surface((config.SCREEN_WIDTH, config.SCREEN_HEIGHT))
+    draw(screen, *args)
+    return pygame.image.tobytes(screen, "RGB")
+
+
+class TestMenus(unittest.TestCase):
+    """Tests for the pre-composed menu screens."""
+
+    @classmethod
+    def setUpClass(cls):
+        pygame.font.init()
+
+    def setUp(self):
+        ui.clear_caches()
+
+    def test_main_menu_looks_like_text_drawn_directly(self):
+        """Test that the composed main menu has the same pixels as rendering every label on the screen."""
+        expected = pygame.Surface((config.SCREEN_WIDTH, config.SCREEN_HEIGHT))
+        expected.fill(config.UI_BG_COLOR)
+        center_x = config.SCREEN_WIDTH // 2
+        draw_text(expected, "SnekByte", ui._get_font(config.MENU_TITLE_FONT_SIZE), config.WHITE, center_x, 100)
+        option_font = ui._get_font(config.MENU_OPTION_FONT_SIZE)
+        for i, option in enumerate(["Play", "Settings", "Quit"]):
+            color = config.UI_HIGHLIGHT_COLOR if i == 1 else config.UI_TEXT_COLOR
+            draw_text(expected, option, option_font, color, center_x, 300 + i * 70)
+        draw_text(expected, "High Score: 12", ui._get_font(config.SCORE_FONT_SIZE), config.GOLD, center_x, 530)
+        self.assertEqual(frame(draw_main_menu, 1, Leaderboard(top_scores=(12, 3), total_runs=2)),
+                         pygame.image.tobytes(expected, "RGB"))
+
+    def test_moving_the_selection_reuses_the_composition(self):
+        """Test that only the highlighted option changes between frames, without composing the menu again."""
+        first = frame(draw_game_over_menu, 7, 0)
+        menu = ui._menus["game_over"]
+        second = frame(draw_game_over_menu, 7, 1)
+        self.assertIs(ui._menus["game_over"], menu)
+        self.assertNotEqual(first, second)
+        self.assertEqual(frame(draw_game_over_menu, 7, 0), first)
+        frame(draw_game_over_menu, 8, 0)
+        self.assertIsNot(ui._menus["game_over"], menu)
+
+    def test_settings_changes_compose_the_menu_again(self):
+        """Test that changing the speed or WoNQ mode shows up on the settings menu."""
+        settings = GameSettings(speed_index=0, wonq_mode=False)
+        before = frame(draw_settings_menu, settings, 0)
+        menu = ui._menus["settings"]
+        self.assertEqual(frame(draw_settings_menu, settings, 0), before)
+        self.assertIs(ui._menus["settings"], menu)
+        settings.change_speed(1)
+        after_speed = frame(draw_settings_menu, settings, 0)
+        self.assertNotEqual(after_speed, before)
+        settings.toggle_wonq_mode()
+        self.assertNotEqual(frame(draw_settings_menu, settings, 0), after_speed)
+        self.assertIsNot(ui._menus["settings"], menu)
+
+
+if __name__ == '__main__':
+    unittest.main()